@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面批量翻译脚本
+遍历目录树中的文档，在输出目录中按相同结构生成译文，多个文档并行翻译。
+所有工作线程共用一个已初始化的翻译服务、术语库和片段缓存；每个文档写入各自的临时目录后再移动到输出目录。
+译文比原文新的文档直接跳过，结束时输出吞吐量汇总
+
+用法:
+    python python_scripts/batch_translate.py 输入目录 输出目录 [--workers 4] [--target-lang en]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.translator import TranslationService
+from utils.terminology import load_terminology
+from web.worker_pool import run_document_job, resolve_max_workers
+
+logger = logging.getLogger("batch_translate")
+
+# 支持的文档类型（与 DocumentProcessorFactory 一致）
+SUPPORTED_EXTENSIONS = ('.docx', '.pdf', '.xlsx', '.xls')
+
+# 语言代码到术语库语言名称的映射
+LANGUAGE_NAMES = {
+    'en': '英语',
+    'ja': '日语',
+    'ko': '韩语',
+    'fr': '法语',
+    'de': '德语',
+    'es': '西班牙语',
+    'ru': '俄语'
+}
+
+
+def setup_logging(verbose: bool = False):
+    """设置日志：明细日志只在 --verbose 时输出，默认只显示每个文件的结果"""
+    logging.basicConfig(
+        level=logging.INFO if verbose else logging.WARNING,
+        format='[%(asctime)s] %(levelname)s: %(message)s',
+        datefmt='%H:%M:%S',
+        stream=sys.stderr
+    )
+    logger.setLevel(logging.INFO)
+
+
+def output_path_for(source: Path, input_root: Path, output_root: Path, with_format: bool = False) -> Path:
+    """
+    译文在输出目录中的路径：保持相对目录结构，PDF的译文为Word文档
+
+    Args:
+        with_format: 在译文名中加入原文格式（如 a_pdf_translated.docx），用于区分同名的不同格式文档
+    """
+    relative = source.relative_to(input_root)
+    ext = '.docx' if source.suffix.lower() in ('.docx', '.pdf') else source.suffix
+    label = f"_{source.suffix.lower().lstrip('.')}" if with_format else ""
+    return output_root / relative.parent / f"{source.stem}{label}_translated{ext}"
+
+
+def collect_files(input_root: Path, output_root: Path, force: bool = False) -> Tuple[List, int, List]:
+    """
+    收集待翻译文件
+
+    同一目录中同名的不同格式文档（如 a.docx 和 a.pdf）会映射到同一译文，
+    此时转换了格式的文档改用带原文格式的译文名；仍然冲突的文件不翻译
+
+    Returns:
+        (待翻译列表[(原文, 译文路径)], 跳过数量, 译文路径冲突的文件列表)
+    """
+    sources = []
+    for source in sorted(input_root.rglob('*')):
+        if not source.is_file() or source.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            continue
+        if source.name.startswith(('~$', '.')):
+            continue
+        # 输出目录位于输入目录内部时，不翻译已有的译文
+        if output_root in source.parents:
+            continue
+        sources.append(source)
+
+    # 先确定全部译文路径并检查冲突，再分发翻译
+    default_targets: Dict[Path, List[Path]] = {}
+    for source in sources:
+        default_targets.setdefault(output_path_for(source, input_root, output_root), []).append(source)
+    targets: Dict[Path, List[Path]] = {}
+    for target, group in default_targets.items():
+        for source in group:
+            if len(group) > 1 and source.suffix != target.suffix:
+                target = output_path_for(source, input_root, output_root, with_format=True)
+            targets.setdefault(target, []).append(source)
+
+    pending = []
+    conflicts = []
+    skipped = 0
+    for target, group in sorted(targets.items()):
+        if len(group) > 1:
+            conflicts.extend(group)
+            continue
+        source = group[0]
+        if not force and target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+            skipped += 1
+            continue
+        pending.append((source, target))
+    return pending, skipped, sorted(conflicts)
+
+
+def translate_one(source: Path, target: Path, translator: TranslationService, base_spec: Dict) -> Dict:
+    """翻译单个文件并把结果移动到输出目录"""
+    started = time.perf_counter()
+    # 每个文件使用各自的临时输出目录：并行翻译同名文件时译文不会相互覆盖或被错误移动
+    job_dir = tempfile.mkdtemp(prefix="batch_translate_")
+    try:
+        result = run_document_job(dict(base_spec, input_path=str(source), output_dir=job_dir), translator)
+        _move_outputs(result, target, base_spec)
+    finally:
+        # 对照表、术语表等附带文件不保留
+        shutil.rmtree(job_dir, ignore_errors=True)
+    return {'elapsed': time.perf_counter() - started}
+
+
+def _move_outputs(result: Dict, target: Path, base_spec: Dict) -> None:
+    """把译文及同时生成的PDF、追踪和剖析文件移动到译文路径旁"""
+    produced = result['output_path']
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(produced, str(target))
+
+    # 同时导出的PDF一并移动
+    produced_pdf = os.path.splitext(produced)[0] + '.pdf'
+    if base_spec.get('export_pdf') and os.path.exists(produced_pdf):
+        shutil.move(produced_pdf, str(target.with_suffix('.pdf')))
+
+    # 追踪文件放在译文旁
+    if result.get('trace_file') and os.path.exists(result['trace_file']):
+        shutil.move(result['trace_file'], str(target.with_name(target.stem + '_trace.json')))
+
+    # 剖析文件同样放在译文旁，文件名后缀不变
+    produced_stem = os.path.splitext(os.path.basename(produced))[0]
+    for path in (result.get('profile_files') or {}).values():
+        if os.path.exists(path):
+            suffix = os.path.basename(path)[len(produced_stem):]
+            shutil.move(path, str(target.with_name(target.stem + suffix)))
+
+
+def print_summary(completed: int, failed: int, skipped: int, elapsed: float, usage: Dict, workers: int):
+    """输出吞吐量汇总"""
+    segments = usage.get('segments', 0)
+    input_tokens = usage.get('input_tokens', 0)
+    output_tokens = usage.get('output_tokens', 0)
+    cache_hits = usage.get('cache_hits', 0)
+    minutes = elapsed / 60 if elapsed > 0 else 0
+
+    print("=" * 60)
+    print(f"批量翻译完成: 成功 {completed}，失败 {failed}，跳过(已是最新) {skipped}，并发 {workers}")
+    print(f"总耗时: {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"吞吐量: {completed / minutes:.2f} 文件/分钟，{segments / elapsed:.2f} 片段/秒")
+    print(f"片段: {segments}（缓存命中 {cache_hits}，合并重复请求 {usage.get('coalesced', 0)}，批量翻译 {usage.get('batched', 0)}）")
+    print(f"估算token: 输入 {input_tokens}，输出 {output_tokens}，合计 {input_tokens + output_tokens}")
+    prompt_tokens = usage.get('prompt_tokens', 0)
+    if prompt_tokens:
+        cached_tokens = usage.get('cached_tokens', 0)
+        print(f"接口提示词token: {prompt_tokens}，命中前缀缓存 {cached_tokens}（{cached_tokens / prompt_tokens:.1%}）")
+    local_segments = usage.get('local_segments', 0)
+    escalated_segments = usage.get('escalated_segments', 0)
+    if local_segments or escalated_segments:
+        print(f"复杂度路由: 本地模型完成 {local_segments} 个片段，升级到远程模型 {escalated_segments} 个")
+    if elapsed > 0:
+        print(f"估算token速率: {(input_tokens + output_tokens) / elapsed:.1f} token/秒")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='批量翻译目录中的文档（Word/PDF/Excel）')
+    parser.add_argument('input_dir', help='输入目录')
+    parser.add_argument('output_dir', help='输出目录（按输入目录结构生成译文）')
+    parser.add_argument('--workers', type=int, default=None, help='并行翻译的文件数，默认按翻译引擎的并行槽位数（未知时为2）')
+    parser.add_argument('--engine', type=str, default=None, help='翻译引擎（zhipuai/ollama/siliconflow/intranet），默认按配置自动选择')
+    parser.add_argument('--model', type=str, default=None, help='模型名称')
+    parser.add_argument('--source-lang', type=str, default='zh', help='源语言代码')
+    parser.add_argument('--target-lang', type=str, default='en', help='目标语言代码')
+    parser.add_argument('--output-format', type=str, default='bilingual', choices=['bilingual', 'translation_only'],
+                        help='输出格式')
+    parser.add_argument('--no-terminology', action='store_true', help='不使用术语库')
+    parser.add_argument('--preprocess-terms', action='store_true', help='启用术语预处理')
+    parser.add_argument('--export-pdf', action='store_true', help='同时导出PDF')
+    parser.add_argument('--force', action='store_true', help='忽略已有译文，全部重新翻译')
+    parser.add_argument('--trace', action='store_true', help='为每个文件保存Chrome trace-event追踪文件')
+    parser.add_argument('--profile', action='store_true',
+                        help='用cProfile和tracemalloc剖析每个文件的翻译，保存pstats、火焰图折叠栈和内存报告'
+                             '（也可设置环境变量 TRANSLATION_PROFILE=1）')
+    parser.add_argument('--verbose', action='store_true', help='输出明细日志')
+    args = parser.parse_args(argv)
+
+    setup_logging(args.verbose)
+
+    input_root = Path(args.input_dir).resolve()
+    output_root = Path(args.output_dir).resolve()
+    if not input_root.is_dir():
+        print(f"输入目录不存在: {input_root}", file=sys.stderr)
+        return 1
+
+    pending, skipped, conflicts = collect_files(input_root, output_root, args.force)
+    for source in conflicts:
+        print(f"译文路径冲突，不翻译: {source.relative_to(input_root)}", file=sys.stderr)
+    if not pending:
+        print(f"没有需要翻译的文件（跳过已是最新的 {skipped} 个）")
+        return 1 if conflicts else 0
+    logger.info(f"待翻译 {len(pending)} 个文件，跳过已是最新的 {skipped} 个")
+
+    # 翻译服务和术语库只初始化一次，所有工作线程共用
+    logger.info("正在初始化翻译服务...")
+    translator = TranslationService(preferred_engine=args.engine, preferred_model=args.model)
+    if not args.engine:
+        # 未指定引擎时由后台探测结果选择默认引擎，先等探测结束，避免翻译中途切换引擎
+        translator.wait_for_probes(timeout=10)
+    if args.model and not args.engine:
+        translator.set_model(args.model)
+
+    is_cn_to_foreign = args.source_lang == 'zh'
+    terminology_lang = args.target_lang if is_cn_to_foreign else args.source_lang
+    target_language = LANGUAGE_NAMES.get(terminology_lang, terminology_lang)
+    terminology = {}
+    if not args.no_terminology:
+        terminology = load_terminology()
+        terminology.setdefault(target_language, {})
+        logger.info(f"术语库 '{target_language}': {len(terminology[target_language])} 个术语")
+
+    base_spec = {
+        'target_language': target_language,
+        'terminology': terminology,
+        'source_lang': args.source_lang,
+        'target_lang': args.target_lang,
+        'use_terminology': not args.no_terminology,
+        'preprocess_terms': args.preprocess_terms,
+        'export_pdf': args.export_pdf,
+        'output_format': args.output_format,
+        'is_cn_to_foreign': is_cn_to_foreign,
+        'trace': True if args.trace else None,
+        'profile': True if args.profile else None
+    }
+
+    completed = 0
+    failed = len(conflicts)
+    print_lock = threading.Lock()
+    started = time.perf_counter()
+    workers = resolve_max_workers({'max_workers': args.workers or 'auto'}, translator)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-translate") as executor:
+        futures = {
+            executor.submit(translate_one, source, target, translator, base_spec): (source, target)
+            for source, target in pending
+        }
+        for index, future in enumerate(as_completed(futures), 1):
+            source, target = futures[future]
+            relative = source.relative_to(input_root)
+            try:
+                info = future.result()
+                completed += 1
+                with print_lock:
+                    print(f"[{index}/{len(pending)}] 完成 {relative} -> {target.relative_to(output_root)} "
+                          f"({info['elapsed']:.1f}s)")
+            except Exception as e:
+                failed += 1
+                with print_lock:
+                    print(f"[{index}/{len(pending)}] 失败 {relative}: {str(e)}", file=sys.stderr)
+
+    print_summary(completed, failed, skipped, time.perf_counter() - started, translator.get_usage_stats(), workers)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
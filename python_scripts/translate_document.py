@@ -56,6 +56,9 @@ def translate_document(config):
         doc_processor.preprocess_terms = config.get('preprocess_terms', True)
         doc_processor.export_pdf = config.get('export_pdf', False)
         doc_processor.output_format = config.get('output_format', 'bilingual')
+        if hasattr(doc_processor, 'incremental'):
+            doc_processor.incremental = config.get('incremental', False)
+            doc_processor.previous_source_path = config.get('previous_file_path')
         
         # 加载术语表
         terminology = load_terminology()
@@ -92,6 +95,10 @@ def translate_document(config):
             "status_message": "翻译完成"
         }
         
+        # 增量翻译统计
+        if getattr(doc_processor, 'incremental_summary', None):
+            result["incremental_summary"] = doc_processor.incremental_summary
+        
         # 如果导出了PDF，添加PDF路径
         if doc_processor.export_pdf:
             pdf_path = os.path.splitext(output_path)[0] + ".pdf"
@@ -1,6 +1,18 @@
+import re
 from abc import ABC, abstractmethod
 from typing import Optional, Dict
 
+_CJK_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数：中日韩字符约每字1个token，其他字符约每4个字符1个token"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
 class BaseTranslator(ABC):
     @abstractmethod
     def translate(self, text: str, terminology_dict: Optional[Dict] = None, source_lang: str = "zh", target_lang: str = "en", prompt: str = None) -> str:
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨任务的片段微批处理
+并发任务各自逐个请求短片段。聚合器在很短的时间窗口（默认30毫秒）内收集所有任务待翻译的短片段，
+按（引擎、模型、语言对、提示词、术语上下文）分组，窗口结束或达到token预算时把同组片段编号后合并成一次请求，
+再把逐条译文交回各任务。片段自身的少量术语合并后随批次发送，与批次中已有术语的译法冲突时先发送已收集的批次。只有一个片段、批量请求失败或译文编号对不上时，各片段改为单独翻译。
+批量请求在聚合器的线程中发送，提示词统计、追踪时间段和任务日志按各片段加入时捕获的上下文记回所属任务
+"""
+
+import re
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .base_translator import estimate_tokens
+from .prompt_builder import account_prompts, current_prompt_accounting
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_MS = 30          # 收集窗口（毫秒）
+DEFAULT_MAX_TOKENS = 1500       # 单个批次的估算token预算（原文和术语）
+DEFAULT_MAX_SEGMENTS = 20       # 单个批次的最大片段数
+DEFAULT_MAX_CHARS = 200         # 超过该长度的片段不参与合并
+DEFAULT_MERGE_TERMS = 30        # 术语不超过该数量时视为片段自身的术语，同组片段的术语合并后一起发送
+DEFAULT_WORKERS = 4             # 同时发送的批量请求数
+DEFAULT_MAX_PARSE_FAILURES = 3  # 同一引擎连续多少次译文编号对不上后不再合并该引擎的片段
+
+# 批量请求附加的翻译指令
+BATCH_INSTRUCTION = (
+    "输入是若干行带编号的独立片段，格式为“[编号] 原文”。请逐条翻译，每条译文单独一行，"
+    "保留行首的编号，不要合并、拆分或遗漏任何一条"
+)
+
+_NUMBERED_LINE = re.compile(r'^\s*\[(\d+)\]\s?(.*)$')
+
+
+def number_segments(texts: List[str]) -> str:
+    """把片段编号后合并成一段文本"""
+    return "\n".join(f"[{index}] {text.strip()}" for index, text in enumerate(texts, 1))
+
+
+def split_numbered(translation: str, count: int) -> List[str]:
+    """按编号拆分批量译文，编号缺失、重复或为空时抛出ValueError"""
+    results: Dict[int, List[str]] = {}
+    current = None
+    for line in (translation or "").splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if match:
+            current = int(match.group(1))
+            if current in results:
+                raise ValueError(f"批量译文编号重复: {current}")
+            results[current] = [match.group(2)]
+        elif current is not None and line.strip():
+            # 模型偶尔把一条译文分成多行
+            results[current].append(line.strip())
+    translations = [" ".join(results.get(index, [])).strip() for index in range(1, count + 1)]
+    if len(results) != count or not all(translations):
+        raise ValueError(f"批量译文条数不符: 期望 {count} 条，得到 {len(results)} 条")
+    return translations
+
+
+class _Batch:
+    """一组待合并的片段"""
+
+    def __init__(self, key: str, context, deadline: float):
+        self.key = key
+        self.context = context
+        self.deadline = deadline
+        self.texts: List[str] = []
+        self.terms: Dict[str, str] = {}
+        self.futures: List[Future] = []
+        self.contexts: List[contextvars.Context] = []  # 各片段所属任务的上下文（任务ID、追踪、提示词统计）
+        self.tokens = 0
+
+
+class BatchAggregator:
+    """跨任务收集短片段并按组合并成批量请求"""
+
+    def __init__(self, dispatch: Callable[[object, List[str], Dict[str, str]], List[str]], enabled: bool = False,
+                 window_ms: float = DEFAULT_WINDOW_MS, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 max_segments: int = DEFAULT_MAX_SEGMENTS, max_chars: int = DEFAULT_MAX_CHARS,
+                 merge_terms: int = DEFAULT_MERGE_TERMS, workers: int = DEFAULT_WORKERS):
+        """
+        Args:
+            dispatch: 发送批量请求的函数 dispatch(context, texts, terms)，返回与 texts 一一对应的译文
+            enabled: 是否启用
+            window_ms: 收集窗口（毫秒），从组内第一个片段到达时开始计时
+            max_tokens: 单个批次的估算token预算，达到后立即发送
+            max_segments: 单个批次的最大片段数，达到后立即发送
+            max_chars: 参与合并的片段最大长度
+            merge_terms: 片段术语不超过该数量时同组合并发送
+            workers: 同时发送的批量请求数
+        """
+        self.dispatch = dispatch
+        self.enabled = enabled
+        self.window = max(float(window_ms), 1.0) / 1000.0
+        self.max_tokens = max(int(max_tokens), 1)
+        self.max_segments = max(int(max_segments), 2)
+        self.max_chars = max(int(max_chars), 1)
+        self.merge_terms = max(int(merge_terms), 0)
+        self.workers = max(int(workers), 1)
+        self._batches: Dict[str, _Batch] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._parse_failures: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, dispatch, config: Optional[Dict]) -> "BatchAggregator":
+        """按配置（config.json 中的 batch_aggregation 节）创建"""
+        config = config or {}
+        return cls(
+            dispatch,
+            enabled=config.get('enabled', False),
+            window_ms=config.get('window_ms', DEFAULT_WINDOW_MS),
+            max_tokens=config.get('max_tokens', DEFAULT_MAX_TOKENS),
+            max_segments=config.get('max_segments', DEFAULT_MAX_SEGMENTS),
+            max_chars=config.get('max_chars', DEFAULT_MAX_CHARS),
+            merge_terms=config.get('merge_terms', DEFAULT_MERGE_TERMS),
+            workers=config.get('workers', DEFAULT_WORKERS)
+        )
+
+    def accepts(self, engine: str, text: str) -> bool:
+        """片段是否可以参与合并：单行短片段，且该引擎的批量译文近期能按编号拆分"""
+        if not self.enabled or len(text) > self.max_chars or "\n" in text.strip():
+            return False
+        with self._condition:
+            return self._parse_failures.get(engine, 0) < DEFAULT_MAX_PARSE_FAILURES
+
+    def is_shared_terms(self, terminology_dict: Optional[Dict]) -> bool:
+        """术语词典是否作为分组依据（较大的词典整组共用；较小的视为片段自身的术语，同组合并）"""
+        return bool(terminology_dict) and len(terminology_dict) > self.merge_terms
+
+    def record_parse(self, engine: str, ok: bool) -> None:
+        """记录批量译文能否按编号拆分，连续失败的引擎不再合并"""
+        with self._condition:
+            failures = 0 if ok else self._parse_failures.get(engine, 0) + 1
+            self._parse_failures[engine] = failures
+        if failures == DEFAULT_MAX_PARSE_FAILURES:
+            logger.warning(f"{engine}的批量译文多次无法按编号拆分，该引擎的片段不再合并请求")
+
+    def submit(self, key: str, context, text: str, terminology_dict: Optional[Dict] = None) -> Future:
+        """
+        加入分组等待合并，返回的 Future 结果为译文；结果为None时调用方应单独翻译该片段
+
+        Args:
+            key: 分组键（引擎、模型、语言对、提示词和共用的术语词典）
+            context: 传给 dispatch 的分组上下文（同组相同）
+            text: 片段原文
+            terminology_dict: 片段自身的术语（同组合并发送，与批次中已有术语的译法冲突时另起批次）
+        """
+        future = Future()
+        ready = []
+        terms = terminology_dict if terminology_dict and not self.is_shared_terms(terminology_dict) else {}
+        with self._condition:
+            self._ensure_started()
+            batch = self._batches.get(key)
+            if batch is not None and any(batch.terms.get(source, target) != target for source, target in terms.items()):
+                # 同一术语在批次中已有不同译法（来自其他任务的术语表）：先发送已收集的片段，本片段开始新批次
+                ready.append(self._batches.pop(key))
+                batch = None
+            if batch is None:
+                batch = _Batch(key, context, time.monotonic() + self.window)
+                self._batches[key] = batch
+            batch.texts.append(text)
+            batch.futures.append(future)
+            batch.contexts.append(contextvars.copy_context())
+            batch.tokens += estimate_tokens(text)
+            for source, target in terms.items():
+                if source not in batch.terms:
+                    batch.terms[source] = target
+                    batch.tokens += estimate_tokens(f"{source}: {target}")
+            if batch.tokens >= self.max_tokens or len(batch.texts) >= self.max_segments:
+                ready.append(self._batches.pop(key))
+            else:
+                self._condition.notify()
+        for batch in ready:
+            self._executor.submit(self._send, batch)
+        return future
+
+    def _ensure_started(self) -> None:
+        """启动计时线程和发送线程池（调用方持有锁）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._executor = self._executor or ThreadPoolExecutor(max_workers=self.workers,
+                                                                  thread_name_prefix="batch-aggregator")
+            self._thread = threading.Thread(target=self._run, name="batch-aggregator-timer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """等待各分组的窗口结束并发送"""
+        while True:
+            with self._condition:
+                while not self._batches:
+                    self._condition.wait()
+                now = time.monotonic()
+                due = [key for key, batch in self._batches.items() if batch.deadline <= now]
+                if not due:
+                    self._condition.wait(min(batch.deadline for batch in self._batches.values()) - now)
+                    continue
+                ready = [self._batches.pop(key) for key in due]
+            for batch in ready:
+                self._executor.submit(self._send, batch)
+
+    def _send(self, batch: _Batch) -> None:
+        """发送一个批次；只有一个片段或发送失败时各片段结果为None（由调用方单独翻译）"""
+        translations: List[Optional[str]] = [None] * len(batch.texts)
+        if len(batch.texts) > 1:
+            started = time.perf_counter()
+            error = None
+            # 批量请求的提示词单独统计，发送后按片段所占比例记回各所属任务
+            with account_prompts() as accounting:
+                try:
+                    translations = self.dispatch(batch.context, batch.texts, batch.terms)
+                except Exception as e:
+                    error = str(e)
+            self._attribute(batch, accounting.report(), started, time.perf_counter() - started, error)
+        for future, translation in zip(batch.futures, translations):
+            future.set_result(translation)
+
+    def _attribute(self, batch: _Batch, report: Dict, started: float, elapsed: float, error: Optional[str]) -> None:
+        """在各片段所属任务的上下文中记录批量请求：提示词统计份额、追踪时间段和任务日志"""
+        weights = [max(estimate_tokens(text), 1) for text in batch.texts]
+        total = sum(weights)
+        shares: Dict[int, list] = {}
+        for context, weight in zip(batch.contexts, weights):
+            # 同一任务的多个片段在一个批次中时合并计算份额，日志也只输出一次
+            accounting = context.run(current_prompt_accounting)
+            entry = shares.setdefault(id(accounting) if accounting is not None else id(context), [accounting, 0, context])
+            entry[1] += weight
+            context.run(tracing.record_span, "batch", "engine", started, elapsed,
+                        segment_id=context.run(tracing.current_segment_id), segments=len(batch.texts),
+                        outcome="error" if error else "ok")
+
+        for accounting, weight, context in shares.values():
+            if accounting is not None:
+                accounting.add_share(report, weight / total)
+            if error:
+                context.run(logger.warning, f"合并的 {len(batch.texts)} 个片段批量翻译失败，改为逐个翻译: {error}")
+            else:
+                context.run(logger.debug, f"与其他任务的片段合并翻译，本批次 {len(batch.texts)} 个片段，耗时 {elapsed:.2f}s")
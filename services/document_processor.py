@@ -6,11 +6,19 @@ import re
 import traceback
 from docx import Document
 from docx.shared import RGBColor
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from .translator import TranslationService
 import pandas as pd
 from datetime import datetime
 from utils.term_extractor import TermExtractor
+from utils.progress_channel import create_progress_channel
+from utils.job_context import wrap_with_context
+from utils.metrics import StageTimer
+from utils.hot_log import HotPathLogger, CATEGORY_TERMS, CATEGORY_PROGRESS, CATEGORY_SEGMENTS, lazy
+from .segment_index import create_incremental_session
+from .prompt_builder import segment_kind, KIND_CELL
+from .translation_checks import validate_translation_result
+from concurrent.futures import ThreadPoolExecutor
 try:
     from docx2pdf import convert as docx2pdf_convert
     DOCX2PDF_AVAILABLE = True
@@ -20,6 +28,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 翻译对照表中增量模式复用上一版本译文的片段的来源
+ENGINE_REUSED = "复用上一版本"
+
 class DocumentProcessor:
     def __init__(self, translator: TranslationService):
         self.translator = translator
@@ -31,13 +42,21 @@ class DocumentProcessor:
         self.target_lang = "en"  # 默认目标语言为英文
         self.is_cn_to_foreign = True  # 默认翻译方向为中文→外语
         self.progress_callback = None  # 进度回调函数
+        self.progress_channel = None  # 进度通道（非阻塞、合并推送）
         self.retry_count = 3  # 翻译失败重试次数
         self.retry_delay = 1  # 重试延迟（秒）
         self.output_format = "bilingual"  # 输出格式：bilingual（双语）或translation_only（仅翻译）
+        self.output_dir = None  # 输出目录，为None时使用程序根目录下的“输出”目录
+        self.incremental = False  # 是否启用增量翻译（复用上一版本未变化片段的译文）
+        self.previous_source_path = None  # 用户指定的上一版源文件，为空时自动匹配
+        self.incremental_summary = None  # 最近一次增量翻译统计
+        self._incremental_session = None
 
         # 配置日志记录器
         self.logger = logging.getLogger(__name__)
         self.web_logger = logging.getLogger('web_logger')
+        # 热路径日志：逐段落明细按类别分级和采样，任务结束时输出汇总
+        self.hot = HotPathLogger(self.logger, mirror=self.web_logger)
 
         # 初始化日志配置
         self.logger.info("DocumentProcessor initialized")
@@ -52,8 +71,9 @@ class DocumentProcessor:
         ]
 
     def set_progress_callback(self, callback):
-        """设置进度回调函数"""
+        """设置进度回调函数（也可以直接传入ProgressChannel）"""
         self.progress_callback = callback
+        self.progress_channel = create_progress_channel(callback)
 
     def process_document(self, file_path: str, target_language: str, terminology: Dict, source_lang: str = "zh", target_lang: str = "en") -> str:
         """
@@ -69,6 +89,13 @@ class DocumentProcessor:
         Returns:
             str: 输出文件路径
         """
+        # 重置热路径日志统计
+        self.hot.reset()
+        self.term_extractor.hot.reset()
+        self.term_extractor.match_seconds = 0.0
+        stages = StageTimer("docx")
+        self.stage_durations = {}
+
         # 更新进度：开始处理
         self._update_progress(0.01, "开始处理文档...")
 
@@ -86,7 +113,7 @@ class DocumentProcessor:
             raise Exception("文件不存在")
 
         # 在程序根目录下创建输出目录
-        output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+        output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
@@ -125,6 +152,7 @@ class DocumentProcessor:
             self.web_logger.info(f"Starting to copy document: {os.path.basename(file_path)}")
 
             # 创建Word文档
+            stages.begin("parse")
             doc = self._copy_document(file_path, output_path)
             logger.info(f"成功复制原文档到: {output_path}")
             self.web_logger.info(f"Document copied successfully to: {os.path.basename(output_path)}")
@@ -171,9 +199,19 @@ class DocumentProcessor:
         # 创建一个列表来收集翻译结果
         translation_results = []
 
+        # 增量翻译：对齐上一版本的片段
+        self.incremental_summary = None
+        self._incremental_session = None
+        if self.incremental:
+            self._incremental_session = create_incremental_session(
+                file_path, self.source_lang, self.target_lang, engine=self.translator.get_current_translator_type(),
+                model=self.translator.get_current_model(), terminology=target_terminology)
+            self._incremental_session.begin(self._collect_segment_texts(doc), self.previous_source_path)
+
         try:
             # 更新进度：处理段落（与C#版本保持一致，先处理段落）
             self._update_progress(0.2, "处理文档段落...")
+            stages.begin("translate")
 
             # 处理段落
             self._process_paragraphs(doc, target_terminology, translation_results)
@@ -181,11 +219,20 @@ class DocumentProcessor:
             # 更新进度：处理表格
             self._update_progress(0.4, "处理文档表格...")
 
-            # 处理表格
-            self._process_tables(doc, target_terminology, translation_results)
+            # 处理表格（表格单元格使用按单元格长度选择的提示词档位）
+            with segment_kind(KIND_CELL):
+                self._process_tables(doc, target_terminology, translation_results)
+
+            # 保存片段索引并统计增量翻译结果
+            if self._incremental_session:
+                self.incremental_summary = self._incremental_session.finish()
+                self._incremental_session = None
+                self.web_logger.info(f"Incremental translation: {self.incremental_summary['reused']} reused, "
+                                     f"{self.incremental_summary['changed']} changed, {self.incremental_summary['added']} added")
 
             # 更新进度：保存文档
             self._update_progress(0.8, "保存文档...")
+            stages.begin("write")
 
             # 保存文档
             try:
@@ -200,11 +247,15 @@ class DocumentProcessor:
 
             # 保存JSON结果
             json_output = os.path.join(output_dir, f"{file_name}_翻译结果_{time_stamp}.json")
+            json_result = {"status": "success", "file": output_path}
+            if self.incremental_summary:
+                json_result["incremental"] = self.incremental_summary
             with open(json_output, 'w', encoding='utf-8') as f:
-                json.dump({"status": "success", "file": output_path}, f, ensure_ascii=False, indent=2)
+                json.dump(json_result, f, ensure_ascii=False, indent=2)
 
             # 更新进度：导出Excel
             self._update_progress(0.85, "导出翻译对照表...")
+            stages.begin("export")
 
             # 翻译完成后，导出Excel文件
             if translation_results:
@@ -224,6 +275,18 @@ class DocumentProcessor:
                 with open(json_output, 'w', encoding='utf-8') as f:
                     json.dump(json_data, f, ensure_ascii=False, indent=2)
 
+            # 输出本次任务的日志汇总（替代逐段落明细）
+            self.hot.merge(self.term_extractor.hot)
+            self.hot.log_summary("文档翻译汇总")
+            self.stage_durations = self._finish_stages(stages)
+
+            # 在JSON结果中写入各阶段耗时
+            with open(json_output, 'r', encoding='utf-8') as f:
+                json_data = json.load(f)
+            json_data["stages"] = self.stage_durations
+            with open(json_output, 'w', encoding='utf-8') as f:
+                json.dump(json_data, f, ensure_ascii=False, indent=2)
+
             # 更新进度：完成
             self._update_progress(1.0, "翻译完成！")
 
@@ -231,10 +294,41 @@ class DocumentProcessor:
 
         except Exception as e:
             logger.error(f"翻译过程出错: {str(e)}")
+            self._incremental_session = None
+            self.stage_durations = self._finish_stages(stages)
             # 更新进度：出错
             self._update_progress(-1, f"翻译出错: {str(e)}")
             raise
 
+    def _finish_stages(self, stages: StageTimer) -> Dict[str, float]:
+        """结束阶段计时：翻译阶段中的术语匹配耗时单独计为 term_match"""
+        stages.end()
+        stages.split("translate", "term_match", self.term_extractor.match_seconds)
+        return stages.finish()
+
+    def _collect_segment_texts(self, doc: Document) -> List[str]:
+        """按处理顺序收集文档中的段落和表格单元格文本，用于增量翻译的版本匹配"""
+        segments = [paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()]
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    cell_text = cell.text.strip()
+                    # 无需翻译的单元格（数值、单位等）不参与增量翻译
+                    if cell_text and not self._should_skip_translation(self._extract_latex_formulas(cell_text)[0]):
+                        segments.append(cell_text)
+        return segments
+
+    def _lookup_incremental(self, text: str):
+        """增量模式下查找片段的历史译文，未启用或片段已变化时返回None"""
+        if not self._incremental_session:
+            return None
+        return self._incremental_session.lookup(text)
+
+    def _record_incremental(self, text: str, translation: str) -> None:
+        """增量模式下记录片段译文"""
+        if self._incremental_session:
+            self._incremental_session.record(text, translation)
+
     def _copy_document(self, source_path: str, target_path: str) -> Document:
         """复制文档"""
         import threading
@@ -281,7 +375,8 @@ class DocumentProcessor:
                 except Exception as e:
                     exception[0] = e
 
-            thread = threading.Thread(target=worker)
+            # 加载线程继承当前任务上下文，加载日志仍归属于本任务
+            thread = threading.Thread(target=wrap_with_context(worker))
             thread.daemon = True
             thread.start()
 
@@ -314,40 +409,37 @@ class DocumentProcessor:
 
     def _process_tables(self, doc: Document, terminology: Dict, translation_results: list) -> None:
         """处理文档中的表格"""
-        self.logger.info("开始处理文档表格")
-        self.web_logger.info("Processing document tables...")
+        self.hot.log(CATEGORY_SEGMENTS, "开始处理文档表格")
 
         # 如果启用了术语预处理，先收集所有使用的术语
         used_terminology = {}
         if self.preprocess_terms:
-            self.logger.info("=== 表格术语预处理已启用，开始收集术语 ===")
-            self.logger.info(f"翻译方向: {self.source_lang} -> {self.target_lang}")
-            self.logger.info(f"术语库大小: {len(terminology)} 个术语")
+            self.hot.log(CATEGORY_TERMS, "=== 表格术语预处理已启用，开始收集术语 ===")
+            self.hot.log(CATEGORY_SEGMENTS, "翻译方向: %s -> %s", self.source_lang, self.target_lang)
+            self.hot.log(CATEGORY_TERMS, "术语库大小: %s 个术语", len(terminology))
 
             # 显示术语库样本
             if terminology:
-                sample_terms = list(terminology.items())[:5]
-                self.logger.info(f"术语库样本（前5个）: {sample_terms}")
+                self.hot.log(CATEGORY_TERMS, "术语库样本（前5个）: %s", lazy(lambda: list(terminology.items())[:5]))
 
             # 对于外语→中文翻译模式，预先将术语库键值对调并缓存
             if self.source_lang != "zh":
-                self.logger.info("外语→中文翻译模式，预先对调术语库键值并缓存...")
+                self.hot.log(CATEGORY_TERMS, "外语→中文翻译模式，预先对调术语库键值并缓存...")
                 self.reversed_terminology = self._create_reversed_terminology(terminology)
-                self.logger.info(f"对调后的术语库大小: {len(self.reversed_terminology)} 个术语")
+                self.hot.log(CATEGORY_TERMS, "对调后的术语库大小: %s 个术语", len(self.reversed_terminology))
 
                 # 显示对调后的术语库样本
                 if self.reversed_terminology:
-                    reversed_sample = list(self.reversed_terminology.items())[:5]
-                    self.logger.info(f"对调后术语库样本（前5个）: {reversed_sample}")
+                    self.hot.log(CATEGORY_TERMS, "对调后术语库样本（前5个）: %s", lazy(lambda: list(self.reversed_terminology.items())[:5]))
             else:
                 self.reversed_terminology = None
 
             # 先遍历所有表格内容，收集使用的术语
             table_count = len(doc.tables)
-            self.logger.info(f"开始分析 {table_count} 个表格中的术语...")
+            self.hot.log(CATEGORY_TERMS, "开始分析 %s 个表格中的术语...", table_count)
 
             for table_idx, table in enumerate(doc.tables, 1):
-                self.web_logger.info(f"Processing table {table_idx}/{table_count}")
+                self.hot.sample(CATEGORY_SEGMENTS, "Processing table %s/%s", table_idx, table_count)
                 for row in table.rows:
                     for cell in row.cells:
                         if cell.text.strip():
@@ -355,24 +447,24 @@ class DocumentProcessor:
                                 # 根据翻译方向选择不同的术语提取方法
                                 if self.source_lang == "zh":
                                     # 中文 → 外语
-                                    self.logger.info(f"从中文表格单元格提取术语: {cell.text[:50]}...")
+                                    self.hot.sample(CATEGORY_TERMS, "从中文表格单元格提取术语: %s...", cell.text[:50])
                                     cell_terms = self.term_extractor.extract_terms(cell.text, terminology)
-                                    self.logger.info(f"从中文文本提取术语: {len(cell_terms)} 个")
+                                    self.hot.sample(CATEGORY_TERMS, "从中文文本提取术语: %s 个", len(cell_terms))
                                 else:
                                     # 外语 → 中文，使用缓存的反向术语库
-                                    self.logger.info(f"从外语表格单元格提取术语: {cell.text[:50]}...")
+                                    self.hot.sample(CATEGORY_TERMS, "从外语表格单元格提取术语: %s...", cell.text[:50])
                                     if hasattr(self, 'reversed_terminology') and self.reversed_terminology:
                                         # 使用缓存的反向术语库进行高效匹配
                                         cell_terms = self.term_extractor.extract_foreign_terms_from_reversed_dict(cell.text, self.reversed_terminology)
-                                        self.logger.info(f"从外语文本提取术语（使用缓存）: {len(cell_terms)} 个")
+                                        self.hot.sample(CATEGORY_TERMS, "从外语文本提取术语（使用缓存）: %s 个", len(cell_terms))
                                     else:
                                         # 回退到原始方法
                                         cell_terms = self.term_extractor.extract_foreign_terms_by_chinese_values(cell.text, terminology)
-                                        self.logger.info(f"从外语文本提取术语（原始方法）: {len(cell_terms)} 个")
+                                        self.hot.sample(CATEGORY_TERMS, "从外语文本提取术语（原始方法）: %s 个", len(cell_terms))
 
                                 # 显示提取到的术语
                                 if cell_terms:
-                                    self.logger.info(f"表格单元格提取到的术语: {list(cell_terms.items())[:3]}")
+                                    self.hot.sample(CATEGORY_TERMS, "表格单元格提取到的术语: %s", lazy(lambda: list(cell_terms.items())[:3]))
 
                                 # 更新使用的术语词典
                                 used_terminology.update(cell_terms)
@@ -380,12 +472,11 @@ class DocumentProcessor:
                                 self.logger.error(f"术语提取失败: {str(e)}")
                                 self.web_logger.error(f"Term extraction failed: {str(e)}")
 
-            self.logger.info(f"从表格中提取了 {len(used_terminology)} 个术语")
-            self.web_logger.info(f"Extracted {len(used_terminology)} terms from tables")
+            self.hot.log(CATEGORY_TERMS, "从表格中提取了 %s 个术语", len(used_terminology))
 
         # 处理表格翻译（与C#版本保持一致，直接遍历所有单元格）
         total_tables = len(doc.tables)
-        logger.info(f"开始处理 {total_tables} 个表格")
+        self.hot.log(CATEGORY_SEGMENTS, "开始处理 %s 个表格", total_tables)
 
         # 收集所有单元格
         all_cells = []
@@ -400,9 +491,10 @@ class DocumentProcessor:
                             'cell_idx': cell_idx
                         })
 
-        logger.info(f"共找到 {len(all_cells)} 个非空单元格")
+        self.hot.log(CATEGORY_SEGMENTS, "共找到 %s 个非空单元格", len(all_cells))
 
-        # 处理每个单元格
+        # 第一遍：提取单元格文本并确定需要翻译的内容（不修改文档）
+        pending = []
         for cell_info in all_cells:
             cell = cell_info['cell']
             table_idx = cell_info['table_idx']
@@ -411,7 +503,7 @@ class DocumentProcessor:
 
             # 更完整地提取单元格文本，确保不遗漏内容
             cell_text = self._extract_complete_cell_text(cell).strip()
-            logger.debug(f"检查表格 {table_idx} 行 {row_idx} 列 {cell_idx}: '{cell_text}'")
+            self.hot.sample(CATEGORY_SEGMENTS, "检查表格 %s 行 %s 列 %s: '%s'", table_idx, row_idx, cell_idx, cell_text, level=logging.DEBUG)
 
             # 验证文本提取的完整性
             if not self._validate_cell_text_completeness(cell, cell_text):
@@ -419,7 +511,7 @@ class DocumentProcessor:
                 # 尝试使用备用方法提取
                 alternative_text = cell.text.strip()
                 if len(alternative_text) > len(cell_text):
-                    logger.info(f"使用备用方法获得更完整的文本: '{alternative_text}'")
+                    self.hot.sample(CATEGORY_SEGMENTS, "使用备用方法获得更完整的文本: '%s'", alternative_text)
                     cell_text = alternative_text
 
             # 使用诊断方法进行详细的翻译决策分析
@@ -429,46 +521,62 @@ class DocumentProcessor:
             if not diagnosis['should_translate']:
                 continue
 
-            logger.info(f"正在翻译表格 {table_idx} 行 {row_idx} 列 {cell_idx}: {cell_text[:50]}...")
-            logger.info(f"单元格包含 {len(cell.paragraphs)} 个段落")
+            self.hot.count("segments")
+            self.hot.sample(CATEGORY_SEGMENTS, "正在翻译表格 %s 行 %s 列 %s: %s...", table_idx, row_idx, cell_idx, cell_text[:50])
+            self.hot.sample(CATEGORY_SEGMENTS, "单元格包含 %s 个段落", len(cell.paragraphs))
 
-            # 先保存原始格式信息，再根据模式处理内容
-            original_format = self._save_format_info(cell.paragraphs)
-
-            if self.output_format == "translation_only":
-                # 仅翻译模式：保存原文并清空单元格
-                original_text = cell_text
-                for para in cell.paragraphs:
-                    para.clear()
-            else:
-                # 双语对照模式：保持原文不变
-                original_text = cell_text
+            # 原文在两种模式下都是完整的单元格文本（仅翻译模式在写入译文前清空单元格）
+            original_text = cell_text
 
             # 检查单元格中是否包含数学公式
             # 使用原始文本进行公式提取，确保不遗漏内容
             text, formulas = self._extract_latex_formulas(original_text)
 
-            # 检查是否需要翻译（数值、单位等可能不需要翻译）
+            # 检查是否需要翻译（数值、单位等可能不需要翻译），无需翻译的单元格不登记到增量会话
             if self._should_skip_translation(text):
-                logger.info(f"单元格内容无需翻译: {text}")
-                translation = text  # 保持原文
+                self.hot.sample(CATEGORY_SEGMENTS, "单元格内容无需翻译: %s", text)
+                cell_info.update(translation=text, engine="", skipped=True)  # 保持原文
             else:
-                # 翻译单元格内容（不包含公式部分）
-                translation = ""
-                logger.info(f"开始翻译单元格内容: {text[:50]}...")
-                logger.info(f"preprocess_terms: {self.preprocess_terms}")
-                logger.info(f"source_lang: {self.source_lang}")
-                logger.info(f"target_lang: {self.target_lang}")
+                # 增量模式下未变化的单元格直接复用上一版本的译文
+                reused_translation = self._lookup_incremental(original_text)
+                if reused_translation is not None:
+                    self.hot.count("segments_reused")
+                    self.hot.sample(CATEGORY_SEGMENTS, "表格 %s 行 %s 列 %s 内容未变化，复用上一版本译文", table_idx, row_idx, cell_idx)
+                    cell_info.update(translation=reused_translation, engine=ENGINE_REUSED)
+                    formulas = []
+
+            cell_info.update(cell_text=cell_text, original_text=original_text, text=text, formulas=formulas)
+            pending.append(cell_info)
+
+        # 第二遍：翻译单元格内容（不包含公式部分），启用多引擎负载均衡时并发翻译
+        to_translate = [cell_info for cell_info in pending if 'translation' not in cell_info]
+        self._translate_cells(to_translate, terminology)
+
+        # 第三遍：按原顺序写回文档
+        for cell_info in pending:
+            cell = cell_info['cell']
+            table_idx = cell_info['table_idx']
+            row_idx = cell_info['row_idx']
+            cell_idx = cell_info['cell_idx']
+            cell_text = cell_info['cell_text']
+            original_text = cell_info['original_text']
+            formulas = cell_info['formulas']
+            translation = cell_info['translation']
 
-                # 使用带重试机制的翻译方法
-                translation = self._translate_cell_with_retry(text, terminology, table_idx, row_idx, cell_idx)
+            if self.output_format == "translation_only":
+                # 仅翻译模式：清空单元格
+                for para in cell.paragraphs:
+                    para.clear()
 
             try:
                 # 将公式重新插入到翻译后的文本中
                 if formulas:
                     translation = self._restore_latex_formulas(translation, formulas)
 
-                logger.info(f"表格 {table_idx} 行 {row_idx} 列 {cell_idx} 翻译完成: {translation[:50]}...")
+                self.hot.sample(CATEGORY_SEGMENTS, "表格 %s 行 %s 列 %s 翻译完成: %s...", table_idx, row_idx, cell_idx, translation[:50])
+                # 翻译失败（保留原文）和无需翻译的单元格不写入索引，下次增量翻译时重新翻译
+                if not cell_info.get('failed') and not cell_info.get('skipped'):
+                    self._record_incremental(original_text, translation)
 
                 # 验证翻译结果质量
                 location = f"表格 {table_idx} 行 {row_idx} 列 {cell_idx}"
@@ -483,77 +591,104 @@ class DocumentProcessor:
                     'original': cell_text if self.output_format == "bilingual" else original_text,
                     'translated': translation,
                     'location': location,
+                    'engine': cell_info['engine'],
                     'validation_issues': validation_issues  # 添加验证问题信息
                 })
 
                 # 使用C#版本一致的方法更新单元格文本
                 self._update_table_cell_text(cell.paragraphs, original_text, translation)
-                logger.info(f"表格 {table_idx} 行 {row_idx} 列 {cell_idx} 处理完成")
+                self.hot.sample(CATEGORY_SEGMENTS, "表格 %s 行 %s 列 %s 处理完成", table_idx, row_idx, cell_idx)
 
             except Exception as e:
                 logger.error(f"处理表格 {table_idx} 行 {row_idx} 列 {cell_idx} 的翻译结果时失败: {str(e)}")
                 # 即使添加翻译失败，也要继续处理下一个单元格
                 continue
 
+    def _translate_cells(self, cells: List[Dict], terminology: Dict) -> None:
+        """
+        翻译单元格内容，译文和翻译来源写回各单元格信息的 translation/engine；
+        翻译服务启用多引擎负载均衡时按各引擎并发上限之和并发翻译，否则逐个翻译
+        """
+        def translate(cell_info: Dict) -> None:
+            text = cell_info['text']
+            self.hot.sample(CATEGORY_SEGMENTS, "开始翻译单元格内容: %s...", text[:50])
+            self.translator.take_last_engine()
+            # 使用带重试机制的翻译方法，所有重试都失败时保留原文并标记失败
+            translation = self._translate_cell_with_retry(
+                text, terminology, cell_info['table_idx'], cell_info['row_idx'], cell_info['cell_idx'])
+            cell_info['failed'] = translation is None
+            cell_info['translation'] = text if translation is None else translation
+            cell_info['engine'] = self.translator.take_last_engine() or ""
+
+        workers = min(self.translator.segment_concurrency(), len(cells))
+        if workers <= 1:
+            for cell_info in cells:
+                translate(cell_info)
+            return
+
+        self.hot.log(CATEGORY_SEGMENTS, "多引擎负载均衡：%s 个单元格并发翻译，并发数 %s", len(cells), workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cell-translate") as executor:
+            # 每个任务单独捕获上下文（任务ID、追踪、提示词统计等）
+            futures = [executor.submit(wrap_with_context(translate), cell_info) for cell_info in cells]
+            for future in futures:
+                future.result()
+
     def _process_paragraphs(self, doc: Document, terminology: Dict, translation_results: list) -> None:
         """处理文档中的段落"""
-        self.logger.info("开始处理文档段落")
-        self.web_logger.info("Processing document paragraphs...")
+        self.hot.log(CATEGORY_SEGMENTS, "开始处理文档段落")
 
         # 如果启用了术语预处理，先收集所有使用的术语
         used_terminology = {}
         if self.preprocess_terms:
-            self.logger.info("=== 术语预处理已启用，开始收集段落术语 ===")
-            self.logger.info(f"翻译方向: {self.source_lang} -> {self.target_lang}")
-            self.logger.info(f"术语库大小: {len(terminology)} 个术语")
+            self.hot.log(CATEGORY_TERMS, "=== 术语预处理已启用，开始收集段落术语 ===")
+            self.hot.log(CATEGORY_SEGMENTS, "翻译方向: %s -> %s", self.source_lang, self.target_lang)
+            self.hot.log(CATEGORY_TERMS, "术语库大小: %s 个术语", len(terminology))
 
             # 显示术语库样本
             if terminology:
-                sample_terms = list(terminology.items())[:5]
-                self.logger.info(f"术语库样本（前5个）: {sample_terms}")
+                self.hot.log(CATEGORY_TERMS, "术语库样本（前5个）: %s", lazy(lambda: list(terminology.items())[:5]))
 
             # 对于外语→中文翻译模式，预先将术语库键值对调并缓存
             if self.source_lang != "zh":
-                self.logger.info("外语→中文翻译模式，预先对调术语库键值并缓存...")
+                self.hot.log(CATEGORY_TERMS, "外语→中文翻译模式，预先对调术语库键值并缓存...")
                 self.reversed_terminology = self._create_reversed_terminology(terminology)
-                self.logger.info(f"对调后的术语库大小: {len(self.reversed_terminology)} 个术语")
+                self.hot.log(CATEGORY_TERMS, "对调后的术语库大小: %s 个术语", len(self.reversed_terminology))
 
                 # 显示对调后的术语库样本
                 if self.reversed_terminology:
-                    reversed_sample = list(self.reversed_terminology.items())[:5]
-                    self.logger.info(f"对调后术语库样本（前5个）: {reversed_sample}")
+                    self.hot.log(CATEGORY_TERMS, "对调后术语库样本（前5个）: %s", lazy(lambda: list(self.reversed_terminology.items())[:5]))
             else:
                 self.reversed_terminology = None
 
             # 先遍历所有段落，收集使用的术语
             para_count = len(doc.paragraphs)
-            self.logger.info(f"开始分析 {para_count} 个段落中的术语...")
+            self.hot.log(CATEGORY_TERMS, "开始分析 %s 个段落中的术语...", para_count)
 
             for para_idx, paragraph in enumerate(doc.paragraphs, 1):
-                self.web_logger.info(f"Processing paragraph {para_idx}/{para_count}")
+                self.hot.sample(CATEGORY_SEGMENTS, "Processing paragraph %s/%s", para_idx, para_count)
                 if paragraph.text.strip():
                     try:
                         # 根据翻译方向选择不同的术语提取方法
                         if self.source_lang == "zh":
                             # 中文 → 外语
-                            self.logger.info(f"从中文段落提取术语: {paragraph.text[:50]}...")
+                            self.hot.sample(CATEGORY_TERMS, "从中文段落提取术语: %s...", paragraph.text[:50])
                             para_terms = self.term_extractor.extract_terms(paragraph.text, terminology)
-                            self.logger.info(f"从中文段落提取术语: {len(para_terms)} 个")
+                            self.hot.sample(CATEGORY_TERMS, "从中文段落提取术语: %s 个", len(para_terms))
                         else:
                             # 外语 → 中文，使用缓存的反向术语库
-                            self.logger.info(f"从外语段落提取术语: {paragraph.text[:50]}...")
+                            self.hot.sample(CATEGORY_TERMS, "从外语段落提取术语: %s...", paragraph.text[:50])
                             if self.reversed_terminology:
                                 # 使用缓存的反向术语库进行高效匹配
                                 para_terms = self.term_extractor.extract_foreign_terms_from_reversed_dict(paragraph.text, self.reversed_terminology)
-                                self.logger.info(f"从外语段落提取术语（使用缓存）: {len(para_terms)} 个")
+                                self.hot.sample(CATEGORY_TERMS, "从外语段落提取术语（使用缓存）: %s 个", len(para_terms))
                             else:
                                 # 回退到原始方法
                                 para_terms = self.term_extractor.extract_foreign_terms_by_chinese_values(paragraph.text, terminology)
-                                self.logger.info(f"从外语段落提取术语（原始方法）: {len(para_terms)} 个")
+                                self.hot.sample(CATEGORY_TERMS, "从外语段落提取术语（原始方法）: %s 个", len(para_terms))
 
                         # 显示提取到的术语
                         if para_terms:
-                            self.logger.info(f"段落提取到的术语: {list(para_terms.items())[:3]}")
+                            self.hot.sample(CATEGORY_TERMS, "段落提取到的术语: %s", lazy(lambda: list(para_terms.items())[:3]))
 
                         # 更新使用的术语词典
                         used_terminology.update(para_terms)
@@ -561,8 +696,7 @@ class DocumentProcessor:
                         self.logger.error(f"段落术语提取失败: {str(e)}")
                         self.web_logger.error(f"Paragraph term extraction failed: {str(e)}")
 
-            self.logger.info(f"从段落中提取了 {len(used_terminology)} 个术语")
-            self.web_logger.info(f"Extracted {len(used_terminology)} terms from paragraphs")
+            self.hot.log(CATEGORY_TERMS, "从段落中提取了 %s 个术语", len(used_terminology))
 
             # 如果有使用的术语，导出到Excel文件
             if used_terminology:
@@ -573,7 +707,8 @@ class DocumentProcessor:
         for paragraph in doc.paragraphs:
             if paragraph.text.strip():
                 paragraph_count += 1
-                logger.info(f"正在翻译段落 {paragraph_count}: {paragraph.text[:50]}...")
+                self.hot.count("segments")
+                self.hot.sample(CATEGORY_SEGMENTS, "正在翻译段落 %s: %s...", paragraph_count, paragraph.text[:50])
 
                 # 保存原文文本（在所有模式下都需要）
                 original_text = paragraph.text
@@ -590,55 +725,62 @@ class DocumentProcessor:
                 # 检查段落中是否包含数学公式
                 text, formulas = self._extract_latex_formulas(paragraph.text if self.output_format == "bilingual" else original_text)
 
+                # 增量模式下未变化的段落直接复用上一版本的译文
+                reused_translation = self._lookup_incremental(original_text)
+
                 # 翻译段落内容（不包含公式部分）
+                self.translator.take_last_engine()
                 try:
-                    if self.preprocess_terms:
+                    if reused_translation is not None:
+                        self.hot.count("segments_reused")
+                        self.hot.sample(CATEGORY_SEGMENTS, "段落 %s 内容未变化，复用上一版本译文", paragraph_count)
+                        translation = reused_translation
+                        formulas = []
+                    elif self.preprocess_terms:
                         # 使用术语预处理方式翻译
                         if self.is_cn_to_foreign:
                             # 中文 → 外语
                             # 检查是否有可用的术语
                             if not used_terminology:
                                 # 如果没有术语，使用常规翻译
-                                logger.info("未找到匹配术语，使用常规翻译（带术语库）")
+                                self.hot.sample(CATEGORY_TERMS, "未找到匹配术语，使用常规翻译（带术语库）")
                                 translation = self.translator.translate_text(text, terminology, self.source_lang, self.target_lang)
                             else:
                                 # 直接使用翻译器的内置术语处理功能
-                                logger.info(f"使用翻译器内置术语处理功能，找到 {len(used_terminology)} 个匹配术语")
+                                self.hot.sample(CATEGORY_TERMS, "使用翻译器内置术语处理功能，找到 %s 个匹配术语", len(used_terminology))
                                 # 记录术语样本（仅记录前5个术语，避免日志过大）
-                                terms_sample = list(used_terminology.items())[:5]
-                                logger.info(f"术语样本（前5个）: {terms_sample}")
+                                self.hot.sample(CATEGORY_TERMS, "术语样本（前5个）: %s", lazy(lambda: list(used_terminology.items())[:5]))
 
                                 translation = self.translator.translate_text(text, used_terminology, self.source_lang, self.target_lang)
-                                logger.info(f"最终翻译结果前100个字符: {translation[:100]}")
+                                self.hot.sample(CATEGORY_SEGMENTS, "最终翻译结果前100个字符: %s", translation[:100])
                         else:
                             # 外语 → 中文
                             # 检查是否有可用的术语
                             if not used_terminology:
                                 # 如果没有术语，使用常规翻译
-                                logger.info("未找到匹配术语，使用常规翻译")
+                                self.hot.sample(CATEGORY_TERMS, "未找到匹配术语，使用常规翻译")
                                 translation = self.translator.translate_text(text, None, self.source_lang, self.target_lang)
                             else:
                                 # 使用term_extractor的占位符系统进行术语预处理
                                 # used_terminology已经是 {外语术语: 中文术语} 格式，直接使用
                                 reverse_terminology = used_terminology
 
-                                logger.info(f"使用术语预处理方式翻译，找到 {len(reverse_terminology)} 个匹配术语")
+                                self.hot.sample(CATEGORY_TERMS, "使用术语预处理方式翻译，找到 %s 个匹配术语", len(reverse_terminology))
                                 # 记录术语样本（仅记录前5个术语，避免日志过大）
-                                terms_sample = list(reverse_terminology.items())[:5]
-                                logger.info(f"术语样本（前5个）: {terms_sample}")
+                                self.hot.sample(CATEGORY_TERMS, "术语样本（前5个）: %s", lazy(lambda: list(reverse_terminology.items())[:5]))
 
                                 processed_text = self.term_extractor.replace_foreign_terms_with_placeholders(text, reverse_terminology)
-                                logger.info(f"替换后的文本前100个字符: {processed_text[:100]}")
+                                self.hot.sample(CATEGORY_SEGMENTS, "替换后的文本前100个字符: %s", processed_text[:100])
 
                                 # 翻译处理后的文本（不使用术语库，因为已经预处理了）
-                                logger.info("开始翻译含占位符的文本...")
+                                self.hot.sample(CATEGORY_SEGMENTS, "开始翻译含占位符的文本...")
                                 translated_with_placeholders = self.translator.translate_text(processed_text, None, self.source_lang, self.target_lang)
-                                logger.info(f"翻译后的文本前100个字符: {translated_with_placeholders[:100]}")
+                                self.hot.sample(CATEGORY_SEGMENTS, "翻译后的文本前100个字符: %s", translated_with_placeholders[:100])
 
                                 # 将占位符替换回中文术语
-                                logger.info("开始将占位符替换回中文术语...")
+                                self.hot.sample(CATEGORY_TERMS, "开始将占位符替换回中文术语...")
                                 translation = self.term_extractor.restore_placeholders_with_chinese_terms(translated_with_placeholders)
-                                logger.info(f"最终翻译结果前100个字符: {translation[:100]}")
+                                self.hot.sample(CATEGORY_SEGMENTS, "最终翻译结果前100个字符: %s", translation[:100])
                     else:
                         # 使用常规方式翻译
                         if self.is_cn_to_foreign:
@@ -652,11 +794,14 @@ class DocumentProcessor:
                     # 返回错误信息而不是抛出异常，这样可以继续处理其他段落
                     translation = f"翻译失败: {str(e)}"
 
+                engine = ENGINE_REUSED if reused_translation is not None else (self.translator.take_last_engine() or "")
+
                 # 将公式重新插入到翻译后的文本中
                 if formulas:
                     translation = self._restore_latex_formulas(translation, formulas)
 
-                logger.info(f"段落翻译完成: {translation[:50]}")
+                self.hot.sample(CATEGORY_SEGMENTS, "段落翻译完成: %s", translation[:50])
+                self._record_incremental(original_text, translation)
 
                 # 验证翻译结果质量
                 location = f"段落 {paragraph_count}"
@@ -671,12 +816,14 @@ class DocumentProcessor:
                     'original': paragraph.text if self.output_format == "bilingual" else original_text,
                     'translated': translation,
                     'location': location,
+                    'engine': engine,
                     'validation_issues': validation_issues  # 添加验证问题信息
                 })
 
                 # 在原文后添加翻译
                 self._add_translation_with_format([paragraph], translation, original_format)
-                time.sleep(0.1)  # 添加小延迟，避免API请求过快
+                if reused_translation is None:
+                    time.sleep(0.1)  # 添加小延迟，避免API请求过快
 
     def _extract_latex_formulas(self, text: str) -> Tuple[str, List[Tuple[str, str]]]:
         """
@@ -1197,82 +1344,12 @@ class DocumentProcessor:
 
     def _validate_translation_result(self, original_text: str, translated_text: str, location: str) -> list:
         """
-        验证翻译结果的质量，检测潜在问题
-
-        Args:
-            original_text: 原文
-            translated_text: 译文
-            location: 位置信息
+        验证翻译结果的质量，检测潜在问题（检查规则见 translation_checks.validate_translation_result）
 
         Returns:
             list: 发现的问题列表
         """
-        issues = []
-
-        if not translated_text or not translated_text.strip():
-            issues.append(f"{location}: 翻译结果为空")
-            return issues
-
-        # 1. 检查是否包含思考过程残留
-        thinking_indicators = [
-            "让我", "我来", "我需要", "首先", "根据", "考虑到", "分析", "思考",
-            "这个术语", "在材料科学", "在英文中", "最合适", "最准确", "最恰当",
-            "应该翻译", "可以翻译", "比较合适", "在这个语境"
-        ]
-
-        for indicator in thinking_indicators:
-            if indicator in translated_text:
-                issues.append(f"{location}: 翻译结果包含思考过程 - '{indicator}'")
-                break
-
-        # 2. 检查是否包含提示词残留
-        prompt_indicators = [
-            "翻译结果", "译文", "以下是", "这是", "请将", "将以下",
-            "translation:", "translate:", "result:"
-        ]
-
-        for indicator in prompt_indicators:
-            if indicator.lower() in translated_text.lower():
-                issues.append(f"{location}: 翻译结果包含提示词 - '{indicator}'")
-                break
-
-        # 3. 检查中文→英文翻译是否完整
-        if self.source_lang == "zh" and self.target_lang == "en":
-            # 检查原文中的中文是否都被翻译
-            original_chinese = re.findall(r'[\u4e00-\u9fff]', original_text)
-            translated_chinese = re.findall(r'[\u4e00-\u9fff]', translated_text)
-
-            if len(original_chinese) > 0 and len(translated_chinese) > len(original_chinese) * 0.5:
-                issues.append(f"{location}: 可能存在未翻译的中文内容")
-
-            # 检查译文是否主要包含英文
-            english_chars = len(re.findall(r'[a-zA-Z]', translated_text))
-            total_chars = len(re.sub(r'\s', '', translated_text))
-            if total_chars > 0 and english_chars / total_chars < 0.3:
-                issues.append(f"{location}: 译文英文字符比例过低，可能翻译不完整")
-
-        # 4. 检查英文→中文翻译是否完整
-        elif self.source_lang == "en" and self.target_lang == "zh":
-            # 检查译文是否包含足够的中文
-            chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', translated_text))
-            total_chars = len(re.sub(r'\s', '', translated_text))
-            if total_chars > 0 and chinese_chars / total_chars < 0.3:
-                issues.append(f"{location}: 译文中文字符比例过低，可能翻译不完整")
-
-        # 5. 检查是否原文和译文完全相同（可能未翻译）
-        if original_text.strip() == translated_text.strip() and len(original_text.strip()) > 3:
-            issues.append(f"{location}: 原文和译文完全相同，可能未翻译")
-
-        # 6. 检查长度异常
-        original_len = len(original_text.strip())
-        translated_len = len(translated_text.strip())
-
-        if translated_len < original_len * 0.2:
-            issues.append(f"{location}: 译文过短，可能翻译不完整")
-        elif translated_len > original_len * 5:
-            issues.append(f"{location}: 译文过长，可能包含多余内容")
-
-        return issues
+        return validate_translation_result(original_text, translated_text, location, self.source_lang, self.target_lang)
 
     def _contains_mixed_languages(self, text: str) -> bool:
         """检查文本是否包含混合语言"""
@@ -1335,6 +1412,9 @@ class DocumentProcessor:
                 '原文': [item['original'] for item in translation_results],
                 f'{target_language}翻译': [item['translated'] for item in translation_results]
             })
+            # 记录每条译文的来源引擎（多引擎负载均衡、复杂度路由时各片段可能来自不同引擎）
+            if any(item.get('engine') for item in translation_results):
+                df['翻译引擎'] = [item.get('engine', '') for item in translation_results]
 
             # 生成保存路径
             file_name = os.path.basename(original_file_path)
@@ -1342,7 +1422,7 @@ class DocumentProcessor:
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
             # 使用与主文档相同的输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
 
             # 确保输出目录存在
             os.makedirs(output_dir, exist_ok=True)
@@ -1414,7 +1494,7 @@ class DocumentProcessor:
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
             # 使用与主文档相同的输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
 
             # 确保输出目录存在
             os.makedirs(output_dir, exist_ok=True)
@@ -1462,58 +1542,14 @@ class DocumentProcessor:
         """更新进度"""
         # 记录进度到日志
         if progress >= 0:
-            logger.info(f"进度: {progress*100:.1f}% - {message}")
-            self.web_logger.info(f"Progress: {progress*100:.1f}% - {message}")
+            self.hot.log(CATEGORY_PROGRESS, "进度: %.1f%% - %s", progress*100, message)
         else:
             logger.error(f"进度: 错误 - {message}")
             self.web_logger.error(f"Progress: Error - {message}")
 
-        if self.progress_callback:
-            import asyncio
-            import threading
-
-            def safe_callback():
-                """安全的回调函数执行"""
-                try:
-                    # 尝试异步调用回调函数
-                    if asyncio.iscoroutinefunction(self.progress_callback):
-                        # 检查是否已有事件循环在运行
-                        try:
-                            loop = asyncio.get_event_loop()
-                            if loop.is_running():
-                                # 如果当前事件循环正在运行，创建一个任务而不是新的事件循环
-                                asyncio.create_task(self.progress_callback(progress, message))
-                            else:
-                                # 如果当前事件循环不在运行，使用它来运行协程
-                                loop.run_until_complete(self.progress_callback(progress, message))
-                        except RuntimeError:
-                            # 如果没有事件循环，创建一个新的
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            try:
-                                loop.run_until_complete(self.progress_callback(progress, message))
-                            finally:
-                                loop.close()
-                    else:
-                        # 同步回调函数
-                        self.progress_callback(progress, message)
-                except Exception as e:
-                    logger.error(f"更新进度失败: {str(e)}")
-
-            # 在单独线程中执行回调，避免阻塞主线程
-            try:
-                callback_thread = threading.Thread(target=safe_callback)
-                callback_thread.daemon = True
-                callback_thread.start()
-
-                # 等待最多1秒，避免进度更新阻塞太久
-                callback_thread.join(timeout=1.0)
-
-                if callback_thread.is_alive():
-                    logger.warning("进度回调执行超时，跳过此次更新")
-
-            except Exception as e:
-                logger.error(f"执行进度回调时出错: {str(e)}")
+        # 通过进度通道发布，不阻塞翻译线程
+        if self.progress_channel:
+            self.progress_channel.publish(progress, message)
 
     def _translate_with_retry(self, text: str, terminology: Dict = None) -> str:
         """带重试机制的翻译"""
@@ -1588,14 +1624,14 @@ class DocumentProcessor:
                     mapped_language = language_map.get(target_language)
                     if mapped_language and mapped_language in terminology:
                         terms_dict = terminology.get(mapped_language, {})
-                        logger.info(f"使用映射后的语言名称 '{mapped_language}' 获取术语库")
+                        self.hot.sample(CATEGORY_TERMS, "使用映射后的语言名称 '%s' 获取术语库", mapped_language)
 
                 # 记录术语库大小
-                logger.info(f"使用{target_language}术语库，包含 {len(terms_dict)} 个术语")
+                self.hot.sample(CATEGORY_TERMS, "使用%s术语库，包含 %s 个术语", target_language, len(terms_dict))
 
                 # 记录术语预处理状态
-                logger.info(f"术语预处理功能状态: {'启用' if self.preprocess_terms else '禁用'}")
-                logger.info(f"翻译方向: {'中文→外语' if self.is_cn_to_foreign else '外语→中文'}")
+                self.hot.sample(CATEGORY_TERMS, "术语预处理功能状态: %s", '启用' if self.preprocess_terms else '禁用')
+                self.hot.sample(CATEGORY_SEGMENTS, "翻译方向: %s", '中文→外语' if self.is_cn_to_foreign else '外语→中文')
 
                 # 如果术语库为空，直接使用常规翻译
                 if not terms_dict:
@@ -1606,118 +1642,113 @@ class DocumentProcessor:
                 if self.preprocess_terms:
                     try:
                         # 记录术语库内容（仅记录前5个术语，避免日志过大）
-                        terms_sample = list(terms_dict.items())[:5]
-                        logger.info(f"术语库样本（前5个）: {terms_sample}")
+                        self.hot.sample(CATEGORY_TERMS, "术语库样本（前5个）: %s", lazy(lambda: list(terms_dict.items())[:5]))
 
                         # 根据翻译方向选择不同的术语处理方法
                         if self.is_cn_to_foreign:
                             # 中文 → 外语
-                            logger.info(f"使用中文→外语术语预处理流程")
+                            self.hot.sample(CATEGORY_TERMS, "使用中文→外语术语预处理流程")
 
                             # 提取文本中使用的术语
-                            logger.info(f"开始从中文文本中提取术语，文本前50个字符: {text[:50]}")
+                            self.hot.sample(CATEGORY_TERMS, "开始从中文文本中提取术语，文本前50个字符: %s", text[:50])
                             used_terms = self.term_extractor.extract_terms(text, terms_dict)
-                            logger.info(f"从中文文本中提取了 {len(used_terms)} 个术语")
+                            self.hot.sample(CATEGORY_TERMS, "从中文文本中提取了 %s 个术语", len(used_terms))
 
                             # 记录提取到的术语（仅记录前5个，避免日志过大）
                             if used_terms:
-                                terms_sample = list(used_terms.items())[:5]
-                                logger.info(f"提取到的术语样本（前5个）: {terms_sample}")
+                                self.hot.sample(CATEGORY_TERMS, "提取到的术语样本（前5个）: %s", lazy(lambda: list(used_terms.items())[:5]))
                             else:
                                 logger.warning("未从文本中提取到任何术语")
 
                             # 如果没有找到术语，使用常规翻译
                             if not used_terms:
-                                logger.info("未找到匹配术语，使用常规翻译（带术语库）")
+                                self.hot.sample(CATEGORY_TERMS, "未找到匹配术语，使用常规翻译（带术语库）")
                                 return self._translate_with_retry(text, terms_dict)
 
                             # 直接使用翻译器的内置术语处理功能
-                            logger.info(f"使用翻译器内置术语处理功能，找到 {len(used_terms)} 个匹配术语")
+                            self.hot.sample(CATEGORY_TERMS, "使用翻译器内置术语处理功能，找到 %s 个匹配术语", len(used_terms))
                             # 记录术语样本（仅记录前5个术语，避免日志过大）
-                            terms_sample = list(used_terms.items())[:5]
-                            logger.info(f"术语样本（前5个）: {terms_sample}")
+                            self.hot.sample(CATEGORY_TERMS, "术语样本（前5个）: %s", lazy(lambda: list(used_terms.items())[:5]))
 
                             result = self._translate_with_retry(text, used_terms)
-                            logger.info(f"最终翻译结果: {result[:100]}...")
+                            self.hot.sample(CATEGORY_SEGMENTS, "最终翻译结果: %s...", result[:100])
                             return result
                         else:
                             # 外语 → 中文
-                            logger.info(f"使用外语→中文术语预处理流程")
+                            self.hot.sample(CATEGORY_TERMS, "使用外语→中文术语预处理流程")
 
                             try:
                                 # 提取文本中使用的术语，优先使用缓存的反向术语库
-                                logger.info(f"开始从外语文本中提取术语，文本前50个字符: {text[:50]}")
+                                self.hot.sample(CATEGORY_TERMS, "开始从外语文本中提取术语，文本前50个字符: %s", text[:50])
 
                                 # 检查是否有缓存的反向术语库
                                 if hasattr(self, 'reversed_terminology') and self.reversed_terminology:
                                     # 使用缓存的反向术语库进行高效匹配
-                                    logger.info("使用缓存的反向术语库进行术语提取")
+                                    self.hot.sample(CATEGORY_TERMS, "使用缓存的反向术语库进行术语提取")
                                     used_terms = self.term_extractor.extract_foreign_terms_from_reversed_dict(text, self.reversed_terminology)
-                                    logger.info(f"从外语文本中提取了 {len(used_terms)} 个术语（使用缓存）")
+                                    self.hot.sample(CATEGORY_TERMS, "从外语文本中提取了 %s 个术语（使用缓存）", len(used_terms))
                                 else:
                                     # 回退到原始方法，但先创建反向术语库缓存
-                                    logger.info("缓存不可用，创建反向术语库并使用")
+                                    self.hot.sample(CATEGORY_TERMS, "缓存不可用，创建反向术语库并使用")
                                     self.reversed_terminology = self._create_reversed_terminology(terms_dict)
                                     if self.reversed_terminology:
                                         used_terms = self.term_extractor.extract_foreign_terms_from_reversed_dict(text, self.reversed_terminology)
-                                        logger.info(f"从外语文本中提取了 {len(used_terms)} 个术语（新建缓存）")
+                                        self.hot.sample(CATEGORY_TERMS, "从外语文本中提取了 %s 个术语（新建缓存）", len(used_terms))
                                     else:
                                         # 最后的回退方案
                                         used_terms = self.term_extractor.extract_foreign_terms_by_chinese_values(text, terms_dict)
-                                        logger.info(f"从外语文本中提取了 {len(used_terms)} 个术语（原始方法）")
+                                        self.hot.sample(CATEGORY_TERMS, "从外语文本中提取了 %s 个术语（原始方法）", len(used_terms))
 
                                 # 记录提取到的术语（仅记录前5个，避免日志过大）
                                 if used_terms:
-                                    terms_sample = list(used_terms.items())[:5]
-                                    logger.info(f"提取到的术语样本（前5个）: {terms_sample}")
+                                    self.hot.sample(CATEGORY_TERMS, "提取到的术语样本（前5个）: %s", lazy(lambda: list(used_terms.items())[:5]))
                                 else:
                                     logger.warning("未从外语文本中提取到任何术语")
 
                                 # 如果没有找到术语，使用常规翻译
                                 if not used_terms:
-                                    logger.info("未找到匹配术语，使用常规翻译（不带术语库）")
+                                    self.hot.sample(CATEGORY_TERMS, "未找到匹配术语，使用常规翻译（不带术语库）")
                                     return self._translate_with_retry(text, None)
 
                                 # 使用term_extractor的占位符系统进行术语预处理
                                 # used_terms已经是 {外语术语: 中文术语} 格式，直接使用
                                 reverse_terminology = used_terms
 
-                                logger.info(f"使用术语预处理方式翻译，找到 {len(reverse_terminology)} 个匹配术语")
+                                self.hot.sample(CATEGORY_TERMS, "使用术语预处理方式翻译，找到 %s 个匹配术语", len(reverse_terminology))
                                 # 记录术语样本（仅记录前5个术语，避免日志过大）
-                                terms_sample = list(reverse_terminology.items())[:5]
-                                logger.info(f"术语样本（前5个）: {terms_sample}")
+                                self.hot.sample(CATEGORY_TERMS, "术语样本（前5个）: %s", lazy(lambda: list(reverse_terminology.items())[:5]))
 
                                 processed_text = self.term_extractor.replace_foreign_terms_with_placeholders(text, reverse_terminology)
-                                logger.info(f"已将术语替换为占位符: {processed_text[:100]}...")
+                                self.hot.sample(CATEGORY_TERMS, "已将术语替换为占位符: %s...", processed_text[:100])
 
                                 # 翻译处理后的文本（不使用术语库，因为已经预处理了）
-                                logger.info("开始翻译含占位符的文本...")
+                                self.hot.sample(CATEGORY_SEGMENTS, "开始翻译含占位符的文本...")
                                 translated_with_placeholders = self._translate_with_retry(processed_text, None)
-                                logger.info(f"带占位符的翻译结果: {translated_with_placeholders[:100]}...")
+                                self.hot.sample(CATEGORY_SEGMENTS, "带占位符的翻译结果: %s...", translated_with_placeholders[:100])
 
                                 # 将占位符替换回中文术语
-                                logger.info("开始将占位符替换回中文术语...")
+                                self.hot.sample(CATEGORY_TERMS, "开始将占位符替换回中文术语...")
                                 result = self.term_extractor.restore_placeholders_with_chinese_terms(translated_with_placeholders)
-                                logger.info(f"最终翻译结果（替换回术语）: {result[:100]}...")
+                                self.hot.sample(CATEGORY_TERMS, "最终翻译结果（替换回术语）: %s...", result[:100])
                                 return result
                             except Exception as e:
                                 logger.error(f"外语→中文术语处理失败: {str(e)}")
                                 logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
                                 # 如果术语处理失败，使用常规翻译
-                                logger.info("术语处理失败，回退到常规翻译（不带术语库）")
+                                self.hot.sample(CATEGORY_TERMS, "术语处理失败，回退到常规翻译（不带术语库）")
                                 return self._translate_with_retry(text, None)
                     except Exception as e:
                         logger.error(f"术语预处理失败: {str(e)}")
                         # 如果术语预处理失败，回退到常规翻译
-                        logger.info("术语预处理失败，回退到常规翻译（带术语库）")
+                        self.hot.sample(CATEGORY_TERMS, "术语预处理失败，回退到常规翻译（带术语库）")
                         return self._translate_with_retry(text, terms_dict)
                 else:
                     # 使用常规方式翻译
-                    logger.info("使用常规方式翻译（带术语库）")
+                    self.hot.sample(CATEGORY_TERMS, "使用常规方式翻译（带术语库）")
                     return self._translate_with_retry(text, terms_dict)
             else:
                 # 不使用术语库的翻译
-                logger.info("不使用术语库进行翻译")
+                self.hot.sample(CATEGORY_TERMS, "不使用术语库进行翻译")
                 return self._translate_with_retry(text, None)
 
         except Exception as e:
@@ -1725,7 +1756,7 @@ class DocumentProcessor:
             # 返回错误信息而不是抛出异常，这样可以继续处理其他段落
             return f"翻译失败: {str(e)}"
 
-    def _translate_cell_with_retry(self, text: str, terminology: Dict, table_idx: int, row_idx: int, cell_idx: int, max_retries: int = 3) -> str:
+    def _translate_cell_with_retry(self, text: str, terminology: Dict, table_idx: int, row_idx: int, cell_idx: int, max_retries: int = 3) -> Optional[str]:
         """
         带重试机制的表格单元格翻译方法
 
@@ -1738,46 +1769,44 @@ class DocumentProcessor:
             max_retries: 最大重试次数
 
         Returns:
-            str: 翻译结果
+            Optional[str]: 翻译结果，所有重试都失败时为None（由调用方保留原文）
         """
         last_error = None
 
         for attempt in range(max_retries):
             try:
-                logger.info(f"表格 {table_idx} 行 {row_idx} 列 {cell_idx} 翻译尝试 {attempt + 1}/{max_retries}")
+                self.hot.sample(CATEGORY_SEGMENTS, "表格 %s 行 %s 列 %s 翻译尝试 %s/%s", table_idx, row_idx, cell_idx, attempt + 1, max_retries)
 
                 if self.preprocess_terms:
                     # 使用术语预处理方式翻译
                     if self.source_lang == "zh":
                         # 中文 → 外语：使用新的直接术语替换策略
                         cell_terminology = self.term_extractor.extract_terms(text, terminology)
-                        logger.info(f"从单元格提取到 {len(cell_terminology)} 个术语")
+                        self.hot.sample(CATEGORY_TERMS, "从单元格提取到 %s 个术语", len(cell_terminology))
 
                         if cell_terminology:
-                            terms_sample = list(cell_terminology.items())[:5]
-                            logger.info(f"术语样本（前5个）: {terms_sample}")
-                            logger.info("使用新的直接术语替换策略进行翻译")
+                            self.hot.sample(CATEGORY_TERMS, "术语样本（前5个）: %s", lazy(lambda: list(cell_terminology.items())[:5]))
+                            self.hot.sample(CATEGORY_TERMS, "使用新的直接术语替换策略进行翻译")
                             # 直接使用提取的术语进行翻译，翻译器内部会处理术语替换
                             translation = self.translator.translate_text(text, cell_terminology, self.source_lang, self.target_lang)
                         else:
-                            logger.info("未找到匹配术语，使用常规翻译（带完整术语库）")
+                            self.hot.sample(CATEGORY_TERMS, "未找到匹配术语，使用常规翻译（带完整术语库）")
                             translation = self.translator.translate_text(text, terminology, self.source_lang, self.target_lang)
                     else:
                         # 外语 → 中文：使用新的直接术语替换策略
                         cell_terminology = self.term_extractor.extract_foreign_terms(text, terminology)
-                        logger.info(f"从单元格提取到 {len(cell_terminology)} 个外语术语")
+                        self.hot.sample(CATEGORY_TERMS, "从单元格提取到 %s 个外语术语", len(cell_terminology))
 
                         if cell_terminology:
-                            terms_sample = list(cell_terminology.items())[:5]
-                            logger.info(f"术语样本（前5个）: {terms_sample}")
-                            logger.info("使用新的直接术语替换策略进行翻译")
+                            self.hot.sample(CATEGORY_TERMS, "术语样本（前5个）: %s", lazy(lambda: list(cell_terminology.items())[:5]))
+                            self.hot.sample(CATEGORY_TERMS, "使用新的直接术语替换策略进行翻译")
                             translation = self.translator.translate_text(text, cell_terminology, self.source_lang, self.target_lang)
                         else:
-                            logger.info("未找到匹配术语，使用常规翻译")
+                            self.hot.sample(CATEGORY_TERMS, "未找到匹配术语，使用常规翻译")
                             translation = self.translator.translate_text(text, None, self.source_lang, self.target_lang)
                 else:
                     # 不使用术语预处理，直接翻译
-                    logger.info("不使用术语预处理，使用常规翻译")
+                    self.hot.sample(CATEGORY_TERMS, "不使用术语预处理，使用常规翻译")
                     if self.source_lang == "zh":
                         translation = self.translator.translate_text(text, terminology, self.source_lang, self.target_lang)
                     else:
@@ -1797,7 +1826,7 @@ class DocumentProcessor:
                         else:
                             logger.error(f"多次重试后仍有占位符残留: {translation}")
 
-                    logger.info(f"表格 {table_idx} 行 {row_idx} 列 {cell_idx} 翻译成功")
+                    self.hot.sample(CATEGORY_SEGMENTS, "表格 %s 行 %s 列 %s 翻译成功", table_idx, row_idx, cell_idx)
                     return translation
                 else:
                     raise Exception("翻译结果为空")
@@ -1809,11 +1838,11 @@ class DocumentProcessor:
                 if attempt < max_retries - 1:
                     import time
                     wait_time = (attempt + 1) * 2  # 递增等待时间
-                    logger.info(f"等待 {wait_time} 秒后重试...")
+                    self.hot.sample(CATEGORY_SEGMENTS, "等待 %s 秒后重试...", wait_time)
                     time.sleep(wait_time)
                 else:
                     logger.error(f"表格 {table_idx} 行 {row_idx} 列 {cell_idx} 所有重试均失败")
 
-        # 所有重试都失败，返回原文
+        # 所有重试都失败，由调用方保留原文（而不是写入错误信息）
         logger.error(f"表格 {table_idx} 行 {row_idx} 列 {cell_idx} 翻译最终失败: {str(last_error)}")
-        return text  # 返回原文而不是错误信息
\ No newline at end of file
+        return None
\ No newline at end of file
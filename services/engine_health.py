@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译引擎健康监测
+为每个已配置的翻译引擎维护指数加权的请求耗时和错误率：真实翻译请求的结果随时计入，
+后台线程按固定间隔向近期没有请求的引擎发送极小的探测请求。
+翻译服务据此在关键路径上直接选择最快的健康引擎，路由和备用切换都不再临时探测
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 引擎状态
+STATE_UNKNOWN = "unknown"     # 尚无样本
+STATE_HEALTHY = "healthy"
+STATE_DEGRADED = "degraded"   # 错误率偏高
+STATE_DOWN = "down"           # 连续失败
+
+# 排序时各状态的优先级：健康 > 未知 > 降级 > 不可用
+_STATE_RANK = {STATE_HEALTHY: 0, STATE_UNKNOWN: 1, STATE_DEGRADED: 2, STATE_DOWN: 3}
+
+DEFAULT_INTERVAL = 60.0             # 后台探测间隔（秒）
+DEFAULT_PROBE_TIMEOUT = 10.0        # 单次探测超时（秒）
+DEFAULT_ALPHA = 0.3                 # 指数加权系数，越大越偏向最近的样本
+DEFAULT_DOWN_AFTER = 3              # 连续失败多少次判定为不可用
+DEFAULT_DEGRADED_ERROR_RATE = 0.5   # 加权错误率达到该值判定为降级
+
+PROBE_MESSAGE = "hi"
+
+
+class EngineHealth:
+    """单个引擎的健康状态"""
+
+    def __init__(self, engine: str, alpha: float = DEFAULT_ALPHA):
+        self.engine = engine
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.last_ok: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[float] = None
+        self.last_request: Optional[float] = None
+
+    def record(self, latency: float, ok: bool, error: Optional[str] = None, probe: bool = False) -> None:
+        now = time.time()
+        self.last_checked = now
+        if not probe:
+            self.last_request = now
+        if self.samples == 0:
+            self.error_rate = 0.0 if ok else 1.0
+        else:
+            self.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_rate
+        self.samples += 1
+        if ok:
+            # 失败请求的耗时（多为超时）不计入耗时均值
+            self.latency_ewma = latency if self.latency_ewma is None else \
+                self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+            self.consecutive_failures = 0
+            self.last_ok = now
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+
+    def state(self, down_after: int, degraded_error_rate: float) -> str:
+        if self.samples == 0:
+            return STATE_UNKNOWN
+        if self.consecutive_failures >= down_after:
+            return STATE_DOWN
+        if self.error_rate >= degraded_error_rate:
+            return STATE_DEGRADED
+        return STATE_HEALTHY
+
+    def snapshot(self, down_after: int, degraded_error_rate: float) -> Dict:
+        return {
+            "state": self.state(down_after, degraded_error_rate),
+            "latency_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "samples": self.samples,
+            "consecutive_failures": self.consecutive_failures,
+            "last_ok": self.last_ok,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error
+        }
+
+
+class EngineHealthMonitor:
+    """翻译引擎健康监测器"""
+
+    def __init__(self, service, interval: float = DEFAULT_INTERVAL, probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+                 alpha: float = DEFAULT_ALPHA, down_after: int = DEFAULT_DOWN_AFTER,
+                 degraded_error_rate: float = DEFAULT_DEGRADED_ERROR_RATE, probing: bool = True):
+        """
+        初始化监测器
+
+        Args:
+            service: 翻译服务（读取其 translators 中已配置的引擎）
+            interval: 后台探测间隔（秒）
+            probe_timeout: 单次探测超时（秒）
+            alpha: 指数加权系数
+            down_after: 连续失败多少次判定为不可用
+            degraded_error_rate: 加权错误率达到该值判定为降级
+            probing: 是否启用后台探测（关闭时只统计真实请求）
+        """
+        self.service = service
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.alpha = alpha
+        self.down_after = down_after
+        self.degraded_error_rate = degraded_error_rate
+        self.probing = probing
+        self._engines: Dict[str, EngineHealth] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, service, config: Optional[Dict]) -> "EngineHealthMonitor":
+        """按配置（config.json 中的 engine_health 节）创建"""
+        config = config or {}
+        return cls(
+            service,
+            interval=max(float(config.get('interval', DEFAULT_INTERVAL)), 5.0),
+            probe_timeout=float(config.get('probe_timeout', DEFAULT_PROBE_TIMEOUT)),
+            alpha=min(max(float(config.get('alpha', DEFAULT_ALPHA)), 0.01), 1.0),
+            down_after=max(int(config.get('down_after', DEFAULT_DOWN_AFTER)), 1),
+            degraded_error_rate=float(config.get('degraded_error_rate', DEFAULT_DEGRADED_ERROR_RATE)),
+            probing=config.get('enabled', True)
+        )
+
+    def _health(self, engine: str) -> EngineHealth:
+        health = self._engines.get(engine)
+        if health is None:
+            health = EngineHealth(engine, self.alpha)
+            self._engines[engine] = health
+        return health
+
+    def record(self, engine: str, latency: float, ok: bool, error: Optional[str] = None, probe: bool = False) -> None:
+        """计入一次请求（或探测）的结果"""
+        with self._lock:
+            health = self._health(engine)
+            health.record(latency, ok, error, probe)
+            state = health.state(self.down_after, self.degraded_error_rate)
+            latency_ewma = health.latency_ewma
+        metrics.ENGINE_UP.set(0 if state == STATE_DOWN else 1, engine=engine)
+        if latency_ewma is not None:
+            metrics.ENGINE_LATENCY_EWMA.set(latency_ewma, engine=engine)
+
+    def state(self, engine: str) -> str:
+        with self._lock:
+            health = self._engines.get(engine)
+            return health.state(self.down_after, self.degraded_error_rate) if health else STATE_UNKNOWN
+
+    def is_available(self, engine: str) -> Optional[bool]:
+        """引擎是否可用，尚无样本时返回None"""
+        state = self.state(engine)
+        if state == STATE_UNKNOWN:
+            return None
+        return state != STATE_DOWN
+
+    def latency(self, engine: str) -> Optional[float]:
+        """引擎请求耗时的指数加权均值（秒），尚无成功样本时返回None"""
+        with self._lock:
+            health = self._engines.get(engine)
+            return health.latency_ewma if health else None
+
+    def rank(self, engines: Iterable[str]) -> List[str]:
+        """按健康状态和加权耗时排序：健康的在前、同状态下耗时短的在前，无耗时数据的保持原顺序"""
+        engines = list(engines)
+        with self._lock:
+            keys = {}
+            for index, engine in enumerate(engines):
+                health = self._engines.get(engine)
+                state = health.state(self.down_after, self.degraded_error_rate) if health else STATE_UNKNOWN
+                latency = health.latency_ewma if health and health.latency_ewma is not None else float('inf')
+                keys[engine] = (_STATE_RANK[state], latency, index)
+        return sorted(engines, key=lambda engine: keys[engine])
+
+    def choose(self, engines: Iterable[str]) -> Optional[str]:
+        """从候选引擎中选出最快的可用引擎，全部不可用时返回None"""
+        for engine in self.rank(engines):
+            if self.state(engine) != STATE_DOWN:
+                return engine
+        return None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """各引擎的健康状态（含已配置但尚无样本的引擎）"""
+        engines = list(getattr(self.service, 'translators', {}).keys())
+        with self._lock:
+            for engine in engines:
+                self._health(engine)
+            return {engine: health.snapshot(self.down_after, self.degraded_error_rate)
+                    for engine, health in self._engines.items()}
+
+    # ---- 后台探测 ----
+
+    def start(self) -> None:
+        """启动后台探测线程（配置关闭探测时不启动）"""
+        if not self.probing or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="engine-health-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"翻译引擎健康监测已启动，探测间隔 {self.interval:.0f}s")
+
+    def stop(self, wait: bool = False) -> None:
+        """停止后台探测；进行中的探测不等待（守护线程），wait=True 时等待其结束"""
+        self._stop_event.set()
+        if self._thread is not None:
+            if wait:
+                self._thread.join(timeout=self.probe_timeout + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.probe_all(only_idle=True)
+            except Exception as e:
+                logger.error(f"翻译引擎健康探测失败: {str(e)}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def probe_all(self, only_idle: bool = False) -> Dict[str, bool]:
+        """
+        并发探测所有已配置的引擎
+
+        Args:
+            only_idle: 只探测最近一个探测间隔内没有真实请求的引擎（真实请求已经提供了样本）
+        """
+        now = time.time()
+        engines = []
+        for engine in list(getattr(self.service, 'translators', {}).keys()):
+            with self._lock:
+                last_request = self._health(engine).last_request
+            if only_idle and last_request is not None and now - last_request < self.interval:
+                continue
+            engines.append(engine)
+
+        results: Dict[str, bool] = {}
+        threads = [threading.Thread(target=lambda engine=engine: results.__setitem__(engine, self.probe(engine)),
+                                    name=f"engine-health-{engine}", daemon=True) for engine in engines]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=self.probe_timeout + 1)
+        return results
+
+    def probe(self, engine: str) -> bool:
+        """向引擎发送一次极小的探测请求并计入结果；引擎未配置凭据时不计入"""
+        translator = getattr(self.service, 'translators', {}).get(engine)
+        if translator is None:
+            return False
+        started = time.perf_counter()
+        try:
+            ok = self._send_probe(engine, translator)
+            error = None if ok else "探测请求未成功"
+        except _NotConfigured:
+            return False
+        except Exception as e:
+            ok, error = False, str(e)
+        if not ok:
+            logger.debug(f"引擎 {engine} 健康探测失败: {error}")
+        self.record(engine, time.perf_counter() - started, ok, error, probe=True)
+        return ok
+
+    def _send_probe(self, engine: str, translator) -> bool:
+        timeout = self.probe_timeout
+        if engine == "ollama":
+            response = requests.get(f"{translator.base_url}/api/tags", timeout=timeout)
+            if response.status_code != 200:
+                return False
+            installed = [model.get('name') for model in response.json().get('models', [])]
+            if translator.model and translator.model not in installed:
+                raise Exception(f"模型 {translator.model} 未安装")
+            return True
+
+        if not getattr(translator, 'api_key', True):
+            raise _NotConfigured()
+        payload = {
+            "model": translator.model,
+            "messages": [{"role": "user", "content": PROBE_MESSAGE}],
+            "max_tokens": 1,
+            "stream": False
+        }
+        if engine == "siliconflow":
+            translator.client.chat.completions.create(timeout=timeout, **payload)
+            return True
+        headers = {"Content-Type": "application/json"}
+        if engine == "zhipuai":
+            headers["Authorization"] = f"Bearer {translator.api_key}"
+        response = requests.post(translator.api_url, headers=headers, json=payload, timeout=timeout)
+        return response.status_code == 200
+
+
+class _NotConfigured(Exception):
+    """引擎未配置凭据，不进行探测"""
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译引擎后台探测
+外网连通性、Ollama 已安装模型等探测在后台线程中并发执行，不阻塞翻译服务的创建；
+探测结果带时间戳缓存到磁盘（data/engine_probes.json），有效期内的结果在启动时直接使用，
+离线或内网部署重启时无需再等待网络超时
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 缓存文件默认存放在程序根目录的 data 目录下
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "engine_probes.json")
+
+DEFAULT_CACHE_TTL = 600         # 探测结果有效期（秒）
+DEFAULT_NETWORK_TIMEOUT = 1.5   # 外网连通性探测的连接超时（秒）
+
+# 外网连通性探测的目标地址
+EXTERNAL_HOSTS = (("8.8.8.8", 53), ("www.baidu.com", 80))
+
+
+class ProbeCache:
+    """带有效期的探测结果磁盘缓存"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = self._load()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "ProbeCache":
+        """按配置（config.json 中的 engine_probe 节）创建"""
+        config = config or {}
+        return cls(ttl=float(config.get('cache_ttl', DEFAULT_CACHE_TTL)))
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取引擎探测缓存失败: {str(e)}")
+            return {}
+
+    def get(self, key: str) -> Optional[Any]:
+        """返回有效期内的探测结果，没有或已过期时返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or time.time() - entry.get('checked_at', 0) > self.ttl:
+            return None
+        return entry.get('value')
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = {'value': value, 'checked_at': time.time()}
+            entries = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"保存引擎探测缓存失败: {str(e)}")
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """清除指定探测（为空时清除全部）的缓存"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class EngineProber:
+    """在后台线程中执行探测，结果写入缓存并回调"""
+
+    def __init__(self, cache: Optional[ProbeCache] = None):
+        self.cache = cache or ProbeCache()
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+
+    def submit(self, key: str, probe: Callable[[], Any], callback: Optional[Callable[[Any], None]] = None,
+               use_cache: bool = True) -> Future:
+        """
+        提交一个探测
+
+        Args:
+            key: 探测名称，同名探测正在执行时直接返回其 Future
+            probe: 执行探测的函数（在后台线程中调用）
+            callback: 拿到结果后调用；命中缓存时在当前线程中立即调用
+            use_cache: 是否使用有效期内的缓存结果
+
+        Returns:
+            Future: 探测结果
+        """
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                self._run_callback(key, callback, cached)
+                return future
+
+        with self._lock:
+            running = self._futures.get(key)
+            if running is not None and not running.done():
+                return running
+            future = Future()
+            self._futures[key] = future
+
+        def run():
+            started = time.perf_counter()
+            try:
+                value = probe()
+            except Exception as e:
+                logger.warning(f"引擎探测 {key} 失败: {str(e)}")
+                future.set_exception(e)
+                return
+            logger.info(f"引擎探测 {key} 完成，耗时 {time.perf_counter() - started:.2f}s")
+            if value is not None:
+                self.cache.put(key, value)
+            future.set_result(value)
+            self._run_callback(key, callback, value)
+
+        # 守护线程：探测未结束时不阻止程序退出
+        threading.Thread(target=run, name=f"engine-probe-{key}", daemon=True).start()
+        return future
+
+    @staticmethod
+    def _run_callback(key: str, callback: Optional[Callable[[Any], None]], value: Any) -> None:
+        if callback is None:
+            return
+        try:
+            callback(value)
+        except Exception as e:
+            logger.error(f"处理引擎探测 {key} 的结果失败: {str(e)}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待所有进行中的探测结束，返回是否全部完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.exception(timeout=remaining)
+            except Exception:
+                return False
+        return True
+
+    def status(self) -> Dict[str, str]:
+        """各探测的状态（running/done/failed）"""
+        with self._lock:
+            futures = dict(self._futures)
+        return {
+            key: "running" if not future.done() else ("failed" if future.exception() else "done")
+            for key, future in futures.items()
+        }
+
+
+def probe_external_network(timeout: float = DEFAULT_NETWORK_TIMEOUT) -> bool:
+    """检测能否连接外网，任一目标地址可连接即返回True"""
+    for host, port in EXTERNAL_HOSTS:
+        try:
+            socket.create_connection((host, port), timeout=timeout).close()
+            return True
+        except (socket.timeout, socket.error):
+            continue
+    return False
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按片段复杂度选择翻译引擎
+根据片段长度、术语密度和中英文混排程度给每个片段打分：简单片段（如表格中的“备注”）交给本地的小模型，
+复杂片段交给当前选择的远程大模型。本地译文都要通过译文质量检查，未通过时再交给远程模型重新翻译；
+级联模式下放宽得分上限，较简单的片段都先由本地模型生成草稿
+"""
+
+import re
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 路由模式
+MODE_ROUTE = "route"        # 按复杂度分流
+MODE_CASCADE = "cascade"    # 放宽本地草稿的得分上限，靠质量检查把未通过的草稿升级到远程模型
+
+# 路由结果
+ROUTE_LOCAL = "local"
+ROUTE_REMOTE = "remote"
+ROUTE_ESCALATED = "escalated"
+
+DEFAULT_LOCAL_ENGINE = "ollama"
+DEFAULT_LOCAL_MODEL = "qwen3:0.6b"
+DEFAULT_COMPLEX_CHARS = 120         # 达到该长度的片段长度得分为满分
+DEFAULT_MAX_TERMS = 3               # 片段中出现该数量的术语时术语得分为满分
+DEFAULT_LOCAL_MAX_SCORE = 0.25      # 得分不超过该值的片段交给本地模型
+DEFAULT_CASCADE_MAX_SCORE = 0.5     # 级联模式下得分不超过该值的片段先由本地模型生成草稿
+DEFAULT_WEIGHTS = {'length': 0.5, 'terms': 0.3, 'script': 0.2}
+
+_CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+_LATIN_PATTERN = re.compile(r'[A-Za-z]')
+
+
+def complexity_score(text: str, terminology_dict: Optional[Dict] = None, complex_chars: int = DEFAULT_COMPLEX_CHARS,
+                     max_terms: int = DEFAULT_MAX_TERMS, weights: Optional[Dict[str, float]] = None) -> float:
+    """
+    片段复杂度得分（0~1）：长度、片段中出现的术语数和中英文混排程度的加权和
+
+    Args:
+        text: 待翻译片段
+        terminology_dict: 术语词典（只统计片段中出现的术语）
+        complex_chars: 长度得分为满分的字符数
+        max_terms: 术语得分为满分的术语数
+        weights: 各项权重（length/terms/script）
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    stripped = text.strip()
+    if not stripped:
+        return 0.0
+
+    length_score = min(len(stripped) / complex_chars, 1.0)
+
+    term_hits = sum(1 for source in (terminology_dict or {}) if source and source in stripped)
+    term_score = min(term_hits / max_terms, 1.0)
+
+    # 混排程度：中文和拉丁字母中占少数的一方所占比例，完全混排（各占一半）时为满分
+    cjk = len(_CJK_PATTERN.findall(stripped))
+    latin = len(_LATIN_PATTERN.findall(stripped))
+    script_score = min(cjk, latin) * 2 / (cjk + latin) if cjk and latin else 0.0
+
+    total = (weights.get('length', 0) * length_score + weights.get('terms', 0) * term_score
+             + weights.get('script', 0) * script_score)
+    weight_sum = sum(weights.get(name, 0) for name in ('length', 'terms', 'script')) or 1.0
+    return total / weight_sum
+
+
+class ComplexityRouter:
+    """按片段复杂度决定使用本地模型还是远程模型"""
+
+    def __init__(self, enabled: bool = False, mode: str = MODE_ROUTE, local_engine: str = DEFAULT_LOCAL_ENGINE,
+                 local_model: str = DEFAULT_LOCAL_MODEL, complex_chars: int = DEFAULT_COMPLEX_CHARS,
+                 max_terms: int = DEFAULT_MAX_TERMS, local_max_score: float = DEFAULT_LOCAL_MAX_SCORE,
+                 cascade_max_score: float = DEFAULT_CASCADE_MAX_SCORE, weights: Optional[Dict[str, float]] = None):
+        self.enabled = enabled
+        self.mode = mode if mode in (MODE_ROUTE, MODE_CASCADE) else MODE_ROUTE
+        self.local_engine = local_engine
+        self.local_model = local_model
+        self.complex_chars = max(int(complex_chars), 1)
+        self.max_terms = max(int(max_terms), 1)
+        self.local_max_score = local_max_score
+        self.cascade_max_score = max(cascade_max_score, local_max_score)
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "ComplexityRouter":
+        """按配置（config.json 中的 engine_routing 节）创建"""
+        config = config or {}
+        return cls(
+            enabled=config.get('enabled', False),
+            mode=config.get('mode', MODE_ROUTE),
+            local_engine=config.get('local_engine', DEFAULT_LOCAL_ENGINE),
+            local_model=config.get('local_model', DEFAULT_LOCAL_MODEL),
+            complex_chars=config.get('complex_chars', DEFAULT_COMPLEX_CHARS),
+            max_terms=config.get('max_terms', DEFAULT_MAX_TERMS),
+            local_max_score=float(config.get('local_max_score', DEFAULT_LOCAL_MAX_SCORE)),
+            cascade_max_score=float(config.get('cascade_max_score', DEFAULT_CASCADE_MAX_SCORE)),
+            weights=config.get('weights')
+        )
+
+    @property
+    def cascade(self) -> bool:
+        return self.mode == MODE_CASCADE
+
+    @property
+    def signature(self) -> str:
+        """路由设置的标识（计入片段缓存键，路由设置不同时不复用缓存的译文）"""
+        return f"{self.mode}:{self.local_engine}/{self.local_model}:{self.local_max_score}:{self.cascade_max_score}"
+
+    def score(self, text: str, terminology_dict: Optional[Dict] = None) -> float:
+        return complexity_score(text, terminology_dict, self.complex_chars, self.max_terms, self.weights)
+
+    def decide(self, text: str, terminology_dict: Optional[Dict] = None) -> str:
+        """返回 ROUTE_LOCAL（交给本地模型，级联模式下为本地草稿）或 ROUTE_REMOTE"""
+        limit = self.cascade_max_score if self.cascade else self.local_max_score
+        return ROUTE_LOCAL if self.score(text, terminology_dict) <= limit else ROUTE_REMOTE
@@ -15,6 +15,10 @@ from datetime import datetime
 from typing import Dict, List, Any
 import re
 from utils.term_extractor import TermExtractor
+from utils.progress_channel import create_progress_channel
+from utils.metrics import StageTimer
+from .segment_index import create_incremental_session
+from .prompt_builder import segment_kind, KIND_CELL
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +38,14 @@ class ExcelProcessor:
         self.target_lang = "en"
         self.is_cn_to_foreign = True
         self.preprocess_terms = False
+        self.output_dir = None  # 输出目录，为None时使用程序根目录下的“输出”目录
         self.reversed_terminology = {}
         self.progress_callback = None  # 进度回调函数
+        self.progress_channel = None  # 进度通道（非阻塞、合并推送）
+        self.incremental = False  # 是否启用增量翻译（复用上一版本未变化单元格的译文）
+        self.previous_source_path = None  # 用户指定的上一版源文件，为空时自动匹配
+        self.incremental_summary = None  # 最近一次增量翻译统计
+        self._incremental_session = None
 
         # 配置日志记录器 - 添加Web日志记录器以确保日志同步
         self.web_logger = logging.getLogger('web_logger')
@@ -51,35 +61,15 @@ class ExcelProcessor:
 6. 保持简洁和专业性"""
 
     def set_progress_callback(self, callback):
-        """设置进度回调函数"""
+        """设置进度回调函数（也可以直接传入ProgressChannel）"""
         self.progress_callback = callback
+        self.progress_channel = create_progress_channel(callback)
 
     def _update_progress(self, progress: float, message: str = ""):
         """更新进度"""
-        if self.progress_callback:
-            import asyncio
-            try:
-                # 尝试异步调用回调函数
-                if asyncio.iscoroutinefunction(self.progress_callback):
-                    # 检查是否已有事件循环在运行
-                    try:
-                        loop = asyncio.get_event_loop()
-                        if loop.is_running():
-                            # 如果当前事件循环正在运行，创建一个任务而不是新的事件循环
-                            asyncio.create_task(self.progress_callback(progress, message))
-                        else:
-                            # 如果当前事件循环不在运行，使用它来运行协程
-                            loop.run_until_complete(self.progress_callback(progress, message))
-                    except RuntimeError:
-                        # 如果没有事件循环，创建一个新的
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            loop.run_until_complete(self.progress_callback(progress, message))
-                        finally:
-                            loop.close()
-            except Exception as e:
-                logger.error(f"更新进度失败: {str(e)}")
+        # 通过进度通道发布，不阻塞翻译线程
+        if self.progress_channel:
+            self.progress_channel.publish(progress, message)
 
         # 记录进度到日志
         if progress >= 0:
@@ -104,6 +94,9 @@ class ExcelProcessor:
         """
         # 更新进度：开始处理
         self._update_progress(0.01, "开始处理Excel文档...")
+        self.term_extractor.match_seconds = 0.0
+        stages = StageTimer("excel")
+        self.stage_durations = {}
 
         # 设置翻译参数
         self.source_lang = source_lang
@@ -126,7 +119,7 @@ class ExcelProcessor:
             raise Exception("文件不存在")
 
         # 创建输出目录
-        output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+        output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
@@ -169,6 +162,7 @@ class ExcelProcessor:
         try:
             # 更新进度：读取Excel文件
             self._update_progress(0.15, "读取Excel文件...")
+            stages.begin("parse")
 
             # 读取Excel文件
             if ext.lower() == '.xlsx':
@@ -188,8 +182,18 @@ class ExcelProcessor:
 
             logger.info(f"成功读取Excel文件: {file_path}")
 
+            # 增量翻译：对齐上一版本的单元格
+            self.incremental_summary = None
+            self._incremental_session = None
+            if getattr(self, 'incremental', False):
+                self._incremental_session = create_incremental_session(
+                    file_path, self.source_lang, self.target_lang, engine=self.translator.get_current_translator_type(),
+                    model=self.translator.get_current_model(), terminology=terminology)
+                self._incremental_session.begin(self._collect_segment_texts(workbook), self.previous_source_path)
+
             # 更新进度：开始处理工作表
             self._update_progress(0.2, "开始处理工作表...")
+            stages.begin("translate")
 
             # 处理每个工作表
             total_sheets = len(workbook.sheetnames)
@@ -201,10 +205,19 @@ class ExcelProcessor:
                 sheet_progress = 0.2 + (i / total_sheets) * 0.6
                 self._update_progress(sheet_progress, f"处理工作表: {sheet_name}")
 
-                self._process_worksheet(worksheet, terminology, translation_results, used_terminology)
+                with segment_kind(KIND_CELL):
+                    self._process_worksheet(worksheet, terminology, translation_results, used_terminology)
+
+            # 保存片段索引并统计增量翻译结果
+            if self._incremental_session:
+                self.incremental_summary = self._incremental_session.finish()
+                self._incremental_session = None
+                self.web_logger.info(f"Incremental translation: {self.incremental_summary['reused']} reused, "
+                                     f"{self.incremental_summary['changed']} changed, {self.incremental_summary['added']} added")
 
             # 更新进度：保存文件
             self._update_progress(0.85, "保存翻译后的文件...")
+            stages.begin("write")
 
             # 保存翻译后的文件
             workbook.save(output_path)
@@ -212,6 +225,7 @@ class ExcelProcessor:
 
             # 更新进度：导出结果
             self._update_progress(0.9, "导出翻译结果...")
+            stages.begin("export")
 
             # 导出翻译结果到Excel
             if translation_results:
@@ -221,6 +235,8 @@ class ExcelProcessor:
             if used_terminology:
                 self.export_used_terminology(used_terminology, file_path)
 
+            self.stage_durations = self._finish_stages(stages)
+
             # 更新进度：完成
             self._update_progress(1.0, "Excel翻译完成！")
 
@@ -228,8 +244,28 @@ class ExcelProcessor:
 
         except Exception as e:
             logger.error(f"处理Excel文件时出错: {str(e)}")
+            self._incremental_session = None
+            self.stage_durations = self._finish_stages(stages)
             raise Exception(f"处理Excel文件失败: {str(e)}")
 
+    def _finish_stages(self, stages: StageTimer) -> Dict[str, float]:
+        """结束阶段计时：翻译阶段中的术语匹配耗时单独计为 term_match"""
+        stages.end()
+        stages.split("translate", "term_match", self.term_extractor.match_seconds)
+        return stages.finish()
+
+    def _collect_segment_texts(self, workbook: Any) -> List[str]:
+        """按处理顺序收集工作簿中需要翻译的单元格文本，用于增量翻译的版本匹配"""
+        segments = []
+        for sheet_name in workbook.sheetnames:
+            for row in workbook[sheet_name].iter_rows():
+                for cell in row:
+                    if isinstance(cell.value, str) and cell.value.strip():
+                        text = cell.value.strip()
+                        if not self._should_skip_cell(text):
+                            segments.append(text)
+        return segments
+
     def _process_worksheet(self, worksheet: Any, terminology: Dict,
                           translation_results: List, used_terminology: Dict) -> None:
         """处理单个工作表"""
@@ -251,9 +287,14 @@ class ExcelProcessor:
                             logger.debug(f"跳过翻译单元格 {cell.coordinate}: {original_text}")
                             continue
 
+                        # 增量模式下未变化的单元格直接复用上一版本的译文
+                        reused_translation = None
+                        if self._incremental_session:
+                            reused_translation = self._incremental_session.lookup(original_text)
+
                         # 提取术语（如果启用术语预处理）
                         preprocess_terms = getattr(self, 'preprocess_terms', False)
-                        if preprocess_terms and target_terms:
+                        if reused_translation is None and preprocess_terms and target_terms:
                             if self.source_lang == "zh":
                                 # 中文 → 外语
                                 cell_terms = self.term_extractor.extract_terms(original_text, target_terms)
@@ -270,8 +311,13 @@ class ExcelProcessor:
                             used_terminology.update(cell_terms)
 
                         # 翻译单元格内容
-                        translated_text = self._translate_cell_content(
-                            original_text, terminology, used_terminology)
+                        if reused_translation is not None:
+                            translated_text = reused_translation
+                        else:
+                            translated_text = self._translate_cell_content(
+                                original_text, terminology, used_terminology)
+                            if self._incremental_session:
+                                self._incremental_session.record(original_text, translated_text)
 
                         # 根据输出格式设置单元格内容
                         output_format = getattr(self, 'output_format', 'bilingual')
@@ -397,7 +443,7 @@ class ExcelProcessor:
         """将翻译结果导出到Excel文件"""
         try:
             # 创建输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
             if not os.path.exists(output_dir):
                 os.makedirs(output_dir)
 
@@ -423,7 +469,7 @@ class ExcelProcessor:
         """导出使用的术语"""
         try:
             # 创建输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
             if not os.path.exists(output_dir):
                 os.makedirs(output_dir)
 
@@ -3,6 +3,8 @@ import json
 import logging
 from typing import Optional, Dict
 from .base_translator import BaseTranslator
+from .prompt_builder import (build_messages, glossary_block, report_usage, choose_profile, compact_system,
+                             minimal_system, record_prompt, PROFILE_FULL, PROFILE_COMPACT)
 
 logger = logging.getLogger(__name__)
 
@@ -61,67 +63,42 @@ class IntranetTranslator(BaseTranslator):
         source_lang_name = lang_map.get(source_lang, source_lang)
         target_lang_name = lang_map.get(target_lang, target_lang)
 
-        # 构建翻译提示词
-        if terminology_dict and len(terminology_dict) > 0:
-            # 有术语的情况
-            terminology_text = "\n".join([f"{k}: {v}" for k, v in terminology_dict.items()])
-
-            prompt_core = (
-                f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n\n"
-                "通用翻译要求：\n"
-                "1. 确保翻译专业、准确且自然流畅。\n"
-                "2. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-                "3. 严格按照提供的术语对照表进行翻译，确保术语翻译的一致性和准确性。\n\n"
-                f"术语对照表：\n{terminology_text}\n"
-            )
-
-            if prompt:
-                prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-            if target_lang == "zh":
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"
-                    "请提供纯中文翻译："
-                )
-            else:
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"
-                    f"请提供纯{target_lang_name}翻译："
-                )
-        else:
-            # 没有术语的情况
-            prompt_core = (
-                f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n\n"
-                "通用翻译要求：\n"
-                "1. 确保翻译专业、准确且自然流畅。\n"
-                "2. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-            )
-
-            if prompt:
-                prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-            if target_lang == "zh":
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"
-                    "请提供纯中文翻译："
-                )
-            else:
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"
-                    f"请提供纯{target_lang_name}翻译："
-                )
-
+        # 短片段使用精简的提示词档位，术语对照表只保留片段中出现的术语
+        profile = choose_profile(text)
+        if profile != PROFILE_FULL:
+            system_builder = compact_system if profile == PROFILE_COMPACT else minimal_system
+            used_terms = {source: target for source, target in (terminology_dict or {}).items() if source in text}
+            messages = build_messages(system_builder(source_lang_name, target_lang_name, prompt), text,
+                                      glossary=glossary_block(used_terms))
+            record_prompt("intranet", profile, messages, text)
+            return self._send(messages, source_lang, target_lang)
+
+        # 构建消息：固定的系统指令在前，术语对照表（按原文排序，整个任务相同）其次，待翻译文本最后
+        system_prompt = (
+            f"你是一位高度熟练的专业翻译员。请将用户提供的{source_lang_name}文本翻译成{target_lang_name}，"
+            "严格遵循用户提供的所有翻译指令，特别是关于术语和占位符的指令。\n\n"
+            "通用翻译要求：\n"
+            "1. 确保翻译专业、准确且自然流畅。\n"
+            "2. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
+            "3. 提供了术语对照表时，严格按照术语对照表进行翻译，确保术语翻译的一致性和准确性。\n"
+        )
+        if prompt:
+            system_prompt += f"\n额外的用户提供风格/语气指导：{prompt}\n"
+
+        messages = build_messages(
+            system_prompt,
+            f"待翻译文本：\n{text}\n\n请提供纯{target_lang_name}翻译：",
+            glossary=glossary_block(terminology_dict)
+        )
+        record_prompt("intranet", profile, messages, text)
+        return self._send(messages, source_lang, target_lang)
+
+    def _send(self, messages: list, source_lang: str, target_lang: str) -> str:
+        """发送翻译请求并过滤输出"""
         # 构建请求数据
         data = {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": "你是一位专业的翻译助手，请严格遵循用户提供的所有翻译指令，特别是关于术语和占位符的指令。"},
-                {"role": "user", "content": final_prompt_text}
-            ],
+            "messages": messages,
             "stream": False,
             "temperature": 0.2
         }
@@ -137,6 +114,7 @@ class IntranetTranslator(BaseTranslator):
             if response.status_code == 200:
                 try:
                     result = response.json()
+                    report_usage("intranet", result.get("usage"))
                     raw_translation = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
 
                     # 过滤思维链和其他不必要的输出
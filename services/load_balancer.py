@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多引擎负载均衡
+把一个任务的片段分摊到多个已配置的翻译引擎（如智谱AI、硅基流动、内网DeepSeek）：
+每个引擎有独立的并发上限，按权重（平滑加权轮询）或按实时处理能力（空闲槽位 × 权重 / 加权耗时）选择引擎，
+所有引擎都已满载时等待空出的槽位。片段翻译失败时由翻译服务排除该引擎后重新选择
+"""
+
+import time
+import logging
+import threading
+import contextlib
+from typing import Dict, Iterable, Iterator, Optional
+
+from .engine_health import STATE_DOWN
+
+logger = logging.getLogger(__name__)
+
+# 选择策略
+STRATEGY_WEIGHTED = "weighted"    # 按权重平滑轮询
+STRATEGY_CAPACITY = "capacity"    # 按空闲槽位和加权耗时估算的实时处理能力
+
+DEFAULT_WEIGHT = 1.0
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_ACQUIRE_TIMEOUT = 300.0   # 等待空闲槽位的最长时间（秒）
+DEFAULT_LATENCY = 1.0             # 尚无耗时数据的引擎按该耗时（秒）估算
+
+
+class EngineLoadBalancer:
+    """按权重或实时处理能力在多个引擎之间分配片段，并限制每个引擎的并发数"""
+
+    def __init__(self, engines: Optional[Dict[str, Dict]] = None, strategy: str = STRATEGY_WEIGHTED,
+                 health=None, enabled: bool = False, acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        """
+        Args:
+            engines: 参与负载均衡的引擎及其设置，如 {"zhipuai": {"weight": 2, "max_concurrency": 4}}
+            strategy: 选择策略（weighted/capacity）
+            health: 引擎健康监测器（跳过不可用的引擎，capacity 策略读取加权耗时）
+            enabled: 是否启用负载均衡
+            acquire_timeout: 所有引擎满载时等待空闲槽位的最长时间（秒）
+        """
+        engines = engines or {}
+        self.weights = {name: max(float(settings.get('weight', DEFAULT_WEIGHT)), 0.0)
+                        for name, settings in engines.items()}
+        self.limits = {name: max(int(settings.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)), 1)
+                       for name, settings in engines.items()}
+        self.strategy = strategy if strategy in (STRATEGY_WEIGHTED, STRATEGY_CAPACITY) else STRATEGY_WEIGHTED
+        self.health = health
+        self.enabled = enabled and bool(engines)
+        self.acquire_timeout = acquire_timeout
+        self._active = {name: 0 for name in engines}
+        self._served = {name: 0 for name in engines}
+        self._current_weights = {name: 0.0 for name in engines}
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict], health=None) -> "EngineLoadBalancer":
+        """按配置（config.json 中的 load_balancing 节）创建"""
+        config = config or {}
+        return cls(
+            engines=config.get('engines'),
+            strategy=config.get('strategy', STRATEGY_WEIGHTED),
+            health=health,
+            enabled=config.get('enabled', False),
+            acquire_timeout=float(config.get('acquire_timeout', DEFAULT_ACQUIRE_TIMEOUT))
+        )
+
+    @property
+    def engines(self) -> list:
+        return list(self.limits)
+
+    @property
+    def signature(self) -> str:
+        """负载均衡设置的标识（计入片段缓存键）"""
+        return "balanced:" + ",".join(sorted(self.limits))
+
+    def capacity(self, available: Optional[Iterable[str]] = None) -> int:
+        """参与负载均衡的（可用）引擎并发上限之和"""
+        engines = self.limits if available is None else [name for name in available if name in self.limits]
+        return sum(self.limits[name] for name in engines)
+
+    def _candidates(self, available: Iterable[str], exclude: Iterable[str]) -> list:
+        """可选的引擎：已初始化、未被排除且权重大于0；健康监测判定不可用的引擎只在没有其他引擎时保留"""
+        excluded = set(exclude)
+        candidates = [name for name in self.limits
+                      if name in available and name not in excluded and self.weights[name] > 0]
+        if self.health is not None:
+            healthy = [name for name in candidates if self.health.state(name) != STATE_DOWN]
+            candidates = healthy or candidates
+        return candidates
+
+    def _pick(self, engines: list) -> str:
+        """从有空闲槽位的引擎中选出一个（调用方持有锁）"""
+        if self.strategy == STRATEGY_CAPACITY:
+            def throughput(name: str) -> float:
+                latency = self.health.latency(name) if self.health is not None else None
+                free = self.limits[name] - self._active[name]
+                return free * self.weights[name] / max(latency or DEFAULT_LATENCY, 0.001)
+            return max(engines, key=throughput)
+
+        # 平滑加权轮询：每轮各引擎累加自身权重，选出累计值最大的引擎并减去总权重
+        total = sum(self.weights[name] for name in engines)
+        for name in engines:
+            self._current_weights[name] += self.weights[name]
+        chosen = max(engines, key=lambda name: self._current_weights[name])
+        self._current_weights[chosen] -= total
+        return chosen
+
+    def acquire(self, available: Iterable[str], exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        占用一个引擎槽位并返回引擎名；没有可选引擎或等待超时时返回None
+
+        Args:
+            available: 已初始化的引擎
+            exclude: 本片段已失败、不再选择的引擎
+        """
+        available = set(available)
+        exclude = set(exclude)
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while True:
+                candidates = self._candidates(available, exclude)
+                if not candidates:
+                    return None
+                free = [name for name in candidates if self._active[name] < self.limits[name]]
+                if free:
+                    engine = self._pick(free)
+                    self._active[engine] += 1
+                    self._served[engine] += 1
+                    return engine
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"等待翻译引擎空闲槽位超时（{self.acquire_timeout}秒）")
+                    return None
+                self._condition.wait(remaining)
+
+    def release(self, engine: str) -> None:
+        with self._condition:
+            if self._active.get(engine, 0) > 0:
+                self._active[engine] -= 1
+            self._condition.notify()
+
+    @contextlib.contextmanager
+    def slot(self, available: Iterable[str], exclude: Iterable[str] = ()) -> Iterator[Optional[str]]:
+        """占用一个引擎槽位，退出时释放；没有可用引擎时得到None"""
+        engine = self.acquire(available, exclude)
+        try:
+            yield engine
+        finally:
+            if engine is not None:
+                self.release(engine)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """各引擎的权重、并发上限、当前并发数和累计分配的片段数"""
+        with self._condition:
+            return {name: {"weight": self.weights[name], "max_concurrency": self.limits[name],
+                           "active": self._active[name], "served": self._served[name]}
+                    for name in self.limits}
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型列表缓存
+按引擎缓存可用模型列表：有效期内直接返回；过期后先返回旧列表，同时在后台刷新（stale-while-revalidate）；
+尚无缓存时返回默认列表并在后台加载。界面切换面板、Web 获取模型列表都不会等待网络请求或子进程，
+只有用户明确要求刷新时才同步重新加载
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300   # 模型列表有效期（秒）
+
+
+class ModelCatalog:
+    """按引擎缓存的模型列表"""
+
+    def __init__(self, loader: Callable[[str], List[str]], ttl: float = DEFAULT_TTL,
+                 defaults: Optional[Callable[[str], List[str]]] = None):
+        """
+        初始化模型列表缓存
+
+        Args:
+            loader: 加载指定引擎模型列表的函数（可能访问网络或执行子进程）
+            ttl: 有效期（秒）
+            defaults: 尚无缓存时返回的默认列表（如配置文件中记录的模型），为空时返回空列表
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.defaults = defaults
+        self._entries: Dict[str, tuple] = {}      # 引擎 -> (模型列表, 加载时间)
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, loader: Callable[[str], List[str]], config: Optional[Dict],
+                    defaults: Optional[Callable[[str], List[str]]] = None) -> "ModelCatalog":
+        """按配置（config.json 中的 model_catalog 节）创建"""
+        config = config or {}
+        return cls(loader, ttl=float(config.get('ttl', DEFAULT_TTL)), defaults=defaults)
+
+    def get(self, engine: str) -> List[str]:
+        """返回模型列表，不等待加载：过期或没有缓存时在后台刷新"""
+        with self._lock:
+            entry = self._entries.get(engine)
+        if entry is not None:
+            models, loaded_at = entry
+            if time.time() - loaded_at > self.ttl:
+                self._load_async(engine)
+            return list(models)
+
+        self._load_async(engine)
+        if self.defaults is not None:
+            try:
+                return list(self.defaults(engine) or [])
+            except Exception:
+                return []
+        return []
+
+    def refresh(self, engine: str, timeout: Optional[float] = None) -> List[str]:
+        """重新加载并等待结果（用户明确要求刷新时使用），加载失败时返回已有的列表"""
+        future = self._load_async(engine)
+        try:
+            return list(future.result(timeout=timeout))
+        except Exception as e:
+            logger.warning(f"刷新 {engine} 模型列表失败: {str(e)}")
+            with self._lock:
+                entry = self._entries.get(engine)
+            return list(entry[0]) if entry else []
+
+    def put(self, engine: str, models: List[str]) -> None:
+        """写入已由其他途径获得的模型列表（如启动探测的结果）"""
+        with self._lock:
+            self._entries[engine] = (list(models), time.time())
+
+    def invalidate(self, engine: Optional[str] = None) -> None:
+        """使指定引擎（为空时全部引擎）的缓存失效，下次获取时重新加载"""
+        with self._lock:
+            if engine is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(engine, None)
+
+    def _load_async(self, engine: str) -> Future:
+        """在后台加载模型列表，同一引擎已在加载时复用进行中的加载"""
+        with self._lock:
+            running = self._loading.get(engine)
+            if running is not None:
+                return running
+            future = Future()
+            self._loading[engine] = future
+
+        def run():
+            try:
+                models = self.loader(engine) or []
+            except Exception as e:
+                logger.warning(f"加载 {engine} 模型列表失败: {str(e)}")
+                with self._lock:
+                    self._loading.pop(engine, None)
+                future.set_exception(e)
+                return
+            with self._lock:
+                # 加载结果为空且已有缓存时保留旧列表（多为服务暂时不可达），有效期重新计算，避免反复加载
+                previous = self._entries.get(engine)
+                kept = models or (previous[0] if previous else [])
+                self._entries[engine] = (list(kept), time.time())
+                self._loading.pop(engine, None)
+            future.set_result(models)
+
+        threading.Thread(target=run, name=f"model-catalog-{engine}", daemon=True).start()
+        return future
+
+    def status(self) -> Dict[str, Dict]:
+        """各引擎缓存状态：模型数、缓存时长（秒）、是否正在加载"""
+        now = time.time()
+        with self._lock:
+            return {
+                engine: {
+                    "models": len(models),
+                    "age": round(now - loaded_at, 1),
+                    "stale": now - loaded_at > self.ttl,
+                    "loading": engine in self._loading
+                }
+                for engine, (models, loaded_at) in self._entries.items()
+            }
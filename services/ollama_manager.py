@@ -4,23 +4,43 @@ import logging
 import psutil
 import requests
 from typing import List, Dict
+from .model_catalog import ModelCatalog
 
 logger = logging.getLogger(__name__)
 
+# 服务检测和模型列表查询的超时（秒），避免Ollama未响应时长时间阻塞
+DEFAULT_TIMEOUT = 3
+
+# 已安装模型列表缓存（ollama list 需要启动子进程，所有 OllamaManager 实例共用）
+_installed_models = ModelCatalog(lambda _engine: OllamaManager()._list_installed_models())
+
 class OllamaManager:
-    def __init__(self):
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
         self.api_url = "http://localhost:11434/api"
+        self.timeout = timeout
         
     def check_ollama_running(self) -> bool:
         """检查Ollama服务是否运行"""
         try:
-            response = requests.get(f"{self.api_url}/tags")
+            response = requests.get(f"{self.api_url}/tags", timeout=self.timeout)
             return response.status_code == 200
         except:
             return False
             
-    def get_installed_models(self) -> List[str]:
-        """获取已安装的模型列表"""
+    def get_installed_models(self, refresh: bool = False) -> List[str]:
+        """
+        获取已安装的模型列表
+
+        Args:
+            refresh: 是否重新执行 ollama list 并等待结果；为False时返回缓存的列表（过期时在后台刷新，
+                     尚无缓存时返回空列表）
+        """
+        if refresh:
+            return _installed_models.refresh('ollama')
+        return _installed_models.get('ollama')
+
+    def _list_installed_models(self) -> List[str]:
+        """执行 ollama list 获取已安装的模型列表"""
         try:
             # 使用subprocess运行ollama list命令
             process = subprocess.Popen(
@@ -29,7 +49,12 @@ class OllamaManager:
                 stderr=subprocess.PIPE,
                 text=True
             )
-            output, error = process.communicate()
+            try:
+                output, error = process.communicate(timeout=self.timeout * 2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                logger.error("获取模型列表超时")
+                return []
             
             if process.returncode == 0:
                 # 解析输出获取模型名称
@@ -128,15 +153,24 @@ class OllamaManager:
             logger.error(f"拉取模型失败: {str(e)}")
             return False
 
-def setup_ollama() -> List[str]:
-    """设置Ollama环境并返回可用的模型列表"""
-    manager = OllamaManager()
+def setup_ollama(pull_missing: bool = False, timeout: float = DEFAULT_TIMEOUT) -> List[str]:
+    """
+    设置Ollama环境并返回可用的模型列表
+
+    Args:
+        pull_missing: 推荐的模型未安装时是否拉取；拉取可能耗时数分钟，只在用户明确要求时启用
+        timeout: 服务检测和模型列表查询的超时（秒）
+    """
+    manager = OllamaManager(timeout=timeout)
     
     if not manager.check_ollama_running():
         logger.warning("Ollama服务未运行")
         return []
     
-    installed_models = manager.get_installed_models()
+    installed_models = manager.get_installed_models(refresh=True)
+    if not pull_missing:
+        return installed_models
+
     recommended_model = manager.get_recommended_model()
     
     if recommended_model not in installed_models:
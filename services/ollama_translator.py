@@ -1,22 +1,153 @@
+import os
+import time
 import requests
 import logging
 import json
-from typing import Optional, Dict
-from .base_translator import BaseTranslator
+import threading
+from typing import Optional, Dict, List
+from urllib.parse import urlparse
+from .base_translator import BaseTranslator, estimate_tokens
+from .prompt_builder import (build_messages, choose_profile, compact_system, minimal_system, record_prompt,
+                             PROFILE_FULL, PROFILE_COMPACT)
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_KEEP_ALIVE = "30m"   # 翻译任务进行期间模型在Ollama中的保留时长
+MIN_NUM_CTX = 2048           # 上下文长度的下限（Ollama的默认值）
+DEFAULT_MAX_NUM_CTX = 8192   # 按片段长度自动调整上下文长度时的上限
+
 class OllamaTranslator(BaseTranslator):
-    def __init__(self, model: str, api_url: str, model_list_timeout: int = 10, translate_timeout: int = 60):
+    def __init__(self, model: str, api_url: str, model_list_timeout: int = 10, translate_timeout: int = 60,
+                 keep_alive: Optional[str] = DEFAULT_KEEP_ALIVE, idle_keep_alive: Optional[str] = None,
+                 num_ctx: Optional[int] = None, max_num_ctx: int = DEFAULT_MAX_NUM_CTX,
+                 num_parallel: Optional[int] = None):
+        """
+        Args:
+            keep_alive: 翻译任务进行期间每次请求附带的 keep_alive，避免模型在任务中途被卸载
+            idle_keep_alive: 没有任务时的 keep_alive，任务全部结束后发送一次；为空时沿用Ollama服务端的设置
+            num_ctx: 固定的上下文长度；为空时按片段长度自动选择（只增不减，避免频繁重新加载模型）
+            max_num_ctx: 自动选择上下文长度时的上限
+            num_parallel: 服务端的并行槽位数（OLLAMA_NUM_PARALLEL）；为空时本机服务读取同名环境变量
+        """
         self.model = model
         # 统一使用正确的API端点
         if "localhost:11434" in api_url:
             self.base_url = "http://localhost:11434"
         else:
             self.base_url = api_url.rstrip('/api')  # 移除末尾的/api
-        self.api_url = f"{self.base_url}/api/generate"
+        self.api_url = f"{self.base_url}/api/chat"
         self.model_list_timeout = model_list_timeout
         self.translate_timeout = translate_timeout
+        self.keep_alive = keep_alive
+        self.idle_keep_alive = idle_keep_alive
+        self.fixed_num_ctx = num_ctx
+        self.max_num_ctx = max(int(max_num_ctx), MIN_NUM_CTX)
+        self.num_parallel = num_parallel
+
+        self._lock = threading.Lock()
+        self._active_jobs = 0
+        self._num_ctx = num_ctx or MIN_NUM_CTX
+        # 系统提示词按语言对和风格指导缓存，同一任务的所有请求使用完全相同的系统消息，
+        # Ollama 可以复用已计算的提示词前缀
+        self._system_prompts: Dict[tuple, str] = {}
+
+    @property
+    def parallel_slots(self) -> Optional[int]:
+        """服务端可同时处理的请求数，未知时返回None"""
+        if self.num_parallel:
+            return int(self.num_parallel)
+        host = urlparse(self.base_url).hostname or ""
+        if host in ("localhost", "127.0.0.1", "::1"):
+            try:
+                value = int(os.getenv('OLLAMA_NUM_PARALLEL', '0'))
+            except ValueError:
+                value = 0
+            if value > 0:
+                return value
+        return None
+
+    def begin_job(self) -> None:
+        """翻译任务开始：第一个任务开始时在后台预热模型，任务期间的请求都带上 keep_alive"""
+        with self._lock:
+            self._active_jobs += 1
+            first = self._active_jobs == 1
+        if first:
+            threading.Thread(target=self.warm_up, name="ollama-warm-up", daemon=True).start()
+
+    def end_job(self) -> None:
+        """翻译任务结束：全部任务结束后恢复空闲时的 keep_alive，上下文长度回到初始值"""
+        with self._lock:
+            self._active_jobs = max(0, self._active_jobs - 1)
+            if self._active_jobs:
+                return
+            num_ctx = self._num_ctx
+            self._num_ctx = self.fixed_num_ctx or MIN_NUM_CTX
+        if self.idle_keep_alive is not None:
+            threading.Thread(target=self._load_model, args=(self.idle_keep_alive, num_ctx),
+                             name="ollama-release", daemon=True).start()
+
+    def warm_up(self) -> bool:
+        """加载模型（不生成内容），使任务的第一个片段不必等待模型加载"""
+        with self._lock:
+            num_ctx = self._num_ctx
+        started = time.perf_counter()
+        ok = self._load_model(self.keep_alive, num_ctx)
+        if ok:
+            logger.info(f"Ollama模型 {self.model} 预热完成，耗时 {time.perf_counter() - started:.2f}s")
+        return ok
+
+    def _load_model(self, keep_alive: Optional[str], num_ctx: int) -> bool:
+        """发送不含消息的请求：Ollama只加载模型并按 keep_alive 设置保留时长"""
+        data = {"model": self.model, "messages": [], "options": {"num_ctx": num_ctx}}
+        if keep_alive is not None:
+            data["keep_alive"] = keep_alive
+        try:
+            response = requests.post(self.api_url, json=data, timeout=self.translate_timeout)
+            if response.status_code != 200:
+                logger.warning(f"Ollama模型 {self.model} 加载请求失败: HTTP {response.status_code}")
+                return False
+            return True
+        except Exception as e:
+            logger.warning(f"Ollama模型 {self.model} 加载请求失败: {str(e)}")
+            return False
+
+    def _current_keep_alive(self) -> Optional[str]:
+        return self.keep_alive if self._active_jobs else self.idle_keep_alive
+
+    def _context_size(self, messages: List[Dict], text: str) -> int:
+        """
+        按本次请求的长度选择上下文长度：提示词加上预留的输出（约为原文的2倍）向上取2的幂。
+        Ollama 在上下文长度变化时会重新加载模型，因此任务期间只增不减
+        """
+        if self.fixed_num_ctx:
+            return self.fixed_num_ctx
+        needed = sum(estimate_tokens(message["content"]) for message in messages) + estimate_tokens(text) * 2 + 128
+        size = MIN_NUM_CTX
+        while size < needed and size < self.max_num_ctx:
+            size *= 2
+        size = min(size, self.max_num_ctx)
+        with self._lock:
+            if size > self._num_ctx:
+                logger.info(f"片段较长，Ollama上下文长度调整为 {size}")
+                self._num_ctx = size
+            return self._num_ctx
+
+    def _system_prompt(self, source_lang_name: str, target_lang_name: str, prompt: Optional[str]) -> str:
+        """系统提示词：只与语言对和风格指导有关，同样的参数返回同一个字符串"""
+        key = (source_lang_name, target_lang_name, prompt)
+        system_prompt = self._system_prompts.get(key)
+        if system_prompt is None:
+            system_prompt = (
+                f"你是一位高度熟练的专业翻译员。请将用户提供的{source_lang_name}文本翻译成{target_lang_name}。\n\n"
+                "通用翻译要求：\n"
+                "1. 用户给出术语指令或术语映射时必须严格遵守，占位符按术语指令翻译。\n"
+                "2. 其余文本确保翻译专业、准确且自然流畅。\n"
+                "3. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
+            )
+            if prompt:
+                system_prompt += f"\n额外的用户提供风格/语气指导：{prompt}\n"
+            self._system_prompts[key] = system_prompt
+        return system_prompt
 
     def get_available_models(self) -> list:
         """获取可用的模型列表"""
@@ -50,7 +181,6 @@ class OllamaTranslator(BaseTranslator):
 
         # --- 术语预处理和提示构建逻辑开始 ---
         processed_text_for_llm = str(text)  # 将发送给LLM的文本（可能包含占位符）
-        final_prompt_text = ""  # LLM的完整提示字符串
 
         term_instructions_for_llm = []
         placeholders_used = False
@@ -76,89 +206,41 @@ class OllamaTranslator(BaseTranslator):
                 processed_text_for_llm = temp_processed_text
         # --- 术语预处理和提示构建逻辑结束 ---
 
-        # 构建 prompt_content
-        if placeholders_used:
-            instruction_block = "术语指令 (请严格遵守)：\n" + "\n".join(term_instructions_for_llm)
-            prompt_core = (
-                f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n"
-                f"{instruction_block}\n\n"
-                "通用翻译要求：\n"
-                "1. 对于任何占位符，请严格遵守上述术语指令。\n"
-                "2. 对于文本中未被占位符覆盖的部分，请确保翻译专业、准确且自然流畅。\n"
-                "3. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-            )
-            if prompt:
-                prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-            if target_lang == "zh":
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本 (可能包含占位符)：\n{processed_text_for_llm}\n\n"
-                    "请提供纯中文翻译："
-                )
-            else:
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本 (可能包含占位符)：\n{processed_text_for_llm}\n\n"
-                    f"请提供纯{target_lang_name}翻译："
-                )
-        elif terminology_dict:  # 术语存在，但未找到术语进行占位符替换
-            prompt_core = (
-                f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n\n"
-                "请严格使用此术语映射：\n"
-            )
-            for s_term, t_term in terminology_dict.items(): # 假设 terminology_dict 已正确定向
-                prompt_core += f"[{s_term}] → [{t_term}]\n"
-
-            prompt_core += (
-                "\n通用翻译要求：\n"
-                "1. 上述映射中的所有术语必须按规定翻译。\n"
-                "2. 其余文本确保翻译专业、准确且自然流畅。\n"
-                "3. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-            )
-            if prompt:
-                prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-            if target_lang == "zh":
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"  # 此处为原始文本
-                    "请提供纯中文翻译："
-                )
-            else:
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"  # 此处为原始文本
-                    f"请提供纯{target_lang_name}翻译："
-                )
-        else:  # 完全没有术语
-            prompt_core = (
-                f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n\n"
-                "通用翻译要求：\n"
-                "1. 确保翻译专业、准确且自然流畅。\n"
-                "2. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-            )
-            if prompt:
-                prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-            if target_lang == "zh":
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"
-                    "请提供纯中文翻译："
-                )
-            else:
-                final_prompt_text = (
-                    prompt_core +
-                    f"\n待翻译文本：\n{text}\n\n"
-                    f"请提供纯{target_lang_name}翻译："
+        # 构建消息：系统消息固定不变，术语指令和待翻译文本放在用户消息中；
+        # 短片段使用精简的提示词档位，只附带片段中出现的术语指令
+        profile = choose_profile(text)
+        if profile != PROFILE_FULL:
+            system_builder = compact_system if profile == PROFILE_COMPACT else minimal_system
+            user_content = processed_text_for_llm
+            if placeholders_used:
+                user_content = "\n".join(term_instructions_for_llm) + "\n\n" + user_content
+            messages = build_messages(system_builder(source_lang_name, target_lang_name, prompt), user_content)
+        else:
+            if placeholders_used:
+                user_content = (
+                    "术语指令 (请严格遵守)：\n" + "\n".join(term_instructions_for_llm) + "\n\n"
+                    f"待翻译文本 (可能包含占位符)：\n{processed_text_for_llm}\n\n"
                 )
+            elif terminology_dict:  # 术语存在，但未找到术语进行占位符替换
+                user_content = "请严格使用此术语映射：\n"
+                for s_term, t_term in terminology_dict.items(): # 假设 terminology_dict 已正确定向
+                    user_content += f"[{s_term}] → [{t_term}]\n"
+                user_content += f"\n待翻译文本：\n{text}\n\n"  # 此处为原始文本
+            else:  # 完全没有术语
+                user_content = f"待翻译文本：\n{text}\n\n"
+            user_content += f"请提供纯{target_lang_name}翻译："
+            messages = build_messages(self._system_prompt(source_lang_name, target_lang_name, prompt), user_content)
+        record_prompt("ollama", profile, messages, text)
 
         data = {
             "model": self.model,
-            "prompt": final_prompt_text,
-            "stream": False
+            "messages": messages,
+            "stream": False,
+            "options": {"num_ctx": self._context_size(messages, text)}
         }
+        keep_alive = self._current_keep_alive()
+        if keep_alive is not None:
+            data["keep_alive"] = keep_alive
 
         try:
             # 使用统一的API URL
@@ -172,10 +254,11 @@ class OllamaTranslator(BaseTranslator):
                     raise Exception(f"服务器返回了无效的JSON数据: {response.text[:200]}")
 
                 # 过滤输出结果
-                translation = self._filter_output(result.get("response", ""), source_lang, target_lang)
+                content = (result.get("message") or {}).get("content", "")
+                translation = self._filter_output(content, source_lang, target_lang)
                 # 如果过滤后为空，返回原始响应
                 if not translation:
-                    translation = result.get("response", "").strip()
+                    translation = content.strip()
 
                 # 如果使用了占位符，需要将占位符替换回实际术语
                 if placeholders_used and terminology_dict:
@@ -10,6 +10,8 @@ from .translator import TranslationService
 import pandas as pd
 from datetime import datetime
 from utils.term_extractor import TermExtractor
+from utils.progress_channel import create_progress_channel
+from utils.metrics import StageTimer
 from docx import Document
 from docx.shared import Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH as WD_ALIGN_PARAGRAPH
@@ -32,10 +34,12 @@ class PDFProcessor:
         self.term_extractor = TermExtractor()  # 术语提取器
         self.export_pdf = False  # 是否导出PDF
         self.output_format = "bilingual"  # 默认双语对照
+        self.output_dir = None  # 输出目录，为None时使用程序根目录下的“输出”目录
         self.source_lang = "en"  # 默认源语言为英文
         self.target_lang = "zh"  # 默认目标语言为中文
         self.is_cn_to_foreign = False  # 默认翻译方向为外语→中文
         self.progress_callback = None  # 进度回调函数
+        self.progress_channel = None  # 进度通道（非阻塞、合并推送）
         self.retry_count = 3  # 翻译失败重试次数
         self.retry_delay = 1  # 重试延迟（秒）
 
@@ -117,36 +121,22 @@ class PDFProcessor:
 
         return reversed_dict
 
+    def _finish_stages(self, stages: StageTimer) -> Dict[str, float]:
+        """结束阶段计时：翻译阶段中的术语匹配耗时单独计为 term_match"""
+        stages.end()
+        stages.split("translate", "term_match", self.term_extractor.match_seconds)
+        return stages.finish()
+
     def set_progress_callback(self, callback):
-        """设置进度回调函数"""
+        """设置进度回调函数（也可以直接传入ProgressChannel）"""
         self.progress_callback = callback
+        self.progress_channel = create_progress_channel(callback)
 
     def _update_progress(self, progress: float, message: str = ""):
         """更新进度"""
-        if self.progress_callback:
-            import asyncio
-            try:
-                # 尝试异步调用回调函数
-                if asyncio.iscoroutinefunction(self.progress_callback):
-                    # 检查是否已有事件循环在运行
-                    try:
-                        loop = asyncio.get_event_loop()
-                        if loop.is_running():
-                            # 如果当前事件循环正在运行，创建一个任务而不是新的事件循环
-                            asyncio.create_task(self.progress_callback(progress, message))
-                        else:
-                            # 如果当前事件循环不在运行，使用它来运行协程
-                            loop.run_until_complete(self.progress_callback(progress, message))
-                    except RuntimeError:
-                        # 如果没有事件循环，创建一个新的
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            loop.run_until_complete(self.progress_callback(progress, message))
-                        finally:
-                            loop.close()
-            except Exception as e:
-                logger.error(f"更新进度失败: {str(e)}")
+        # 通过进度通道发布，不阻塞翻译线程
+        if self.progress_channel:
+            self.progress_channel.publish(progress, message)
 
         # 记录进度到日志
         if progress >= 0:
@@ -170,6 +160,9 @@ class PDFProcessor:
         """
         # 更新进度：开始处理
         self._update_progress(0.01, "开始处理PDF文档...")
+        self.term_extractor.match_seconds = 0.0
+        stages = StageTimer("pdf")
+        self.stage_durations = {}
 
         # 设置翻译方向
         self.source_lang = source_lang
@@ -188,7 +181,7 @@ class PDFProcessor:
         self._update_progress(0.05, "准备输出目录...")
 
         # 在程序根目录下创建输出目录
-        output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+        output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
@@ -217,6 +210,7 @@ class PDFProcessor:
         try:
             # 更新进度：打开PDF文件
             self._update_progress(0.2, "打开PDF文件并提取文本...")
+            stages.begin("parse")
 
             # 打开PDF文件并提取文本
             with pdfplumber.open(file_path) as pdf:
@@ -306,8 +300,9 @@ class PDFProcessor:
                     if used_terminology:
                         self._export_used_terminology(used_terminology)
 
-                # 更新进度：开始处理页面
+                # 更新进度：开始处理页面（页面文本提取与翻译交替进行，统一计入翻译阶段）
                 self._update_progress(0.3, "开始处理PDF页面...")
+                stages.begin("translate")
 
                 # 处理每一页
                 for i, page in enumerate(pdf.pages):
@@ -945,6 +940,7 @@ class PDFProcessor:
 
             # 更新进度：保存文档
             self._update_progress(0.8, "保存文档...")
+            stages.begin("write")
 
             # 保存文档
             try:
@@ -967,6 +963,7 @@ class PDFProcessor:
 
             # 更新进度：导出Excel
             self._update_progress(0.85, "导出翻译对照表...")
+            stages.begin("export")
 
             # 翻译完成后，导出Excel文件
             if translation_results:
@@ -989,6 +986,15 @@ class PDFProcessor:
                 else:
                     logger.warning("PDF导出功能不可用，请安装docx2pdf模块")
 
+            self.stage_durations = self._finish_stages(stages)
+
+            # 在JSON结果中写入各阶段耗时
+            with open(json_output, 'r', encoding='utf-8') as f:
+                json_data = json.load(f)
+            json_data["stages"] = self.stage_durations
+            with open(json_output, 'w', encoding='utf-8') as f:
+                json.dump(json_data, f, ensure_ascii=False, indent=2)
+
             # 更新进度：完成
             self._update_progress(1.0, "翻译完成！")
 
@@ -1002,6 +1008,7 @@ class PDFProcessor:
         except Exception as e:
             logger.error(f"PDF处理过程出错: {str(e)}")
             self.web_logger.error(f"PDF processing failed: {str(e)}")
+            self.stage_durations = self._finish_stages(stages)
             # 更新进度：出错
             self._update_progress(-1, f"翻译出错: {str(e)}")
             raise
@@ -1672,7 +1679,7 @@ class PDFProcessor:
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
             # 使用与主文档相同的输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
 
             # 确保输出目录存在
             os.makedirs(output_dir, exist_ok=True)
@@ -2046,7 +2053,7 @@ class PDFProcessor:
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
             # 使用与主文档相同的输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
 
             # 确保输出目录存在
             os.makedirs(output_dir, exist_ok=True)
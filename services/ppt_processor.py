@@ -5,9 +5,12 @@ import json
 import re
 from typing import Dict, List, Tuple, Any
 from .translator import TranslationService
+from .prompt_builder import segment_kind, KIND_CELL, KIND_SLIDE
 import pandas as pd
 from datetime import datetime
 from utils.term_extractor import TermExtractor
+from utils.progress_channel import create_progress_channel
+from utils.metrics import StageTimer
 from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
@@ -32,9 +35,12 @@ class PPTProcessor:
         self.term_extractor = TermExtractor()  # 术语提取器
         self.export_pdf = False  # 是否导出PDF
         self.output_format = "bilingual"  # 默认双语对照
+        self.output_dir = None  # 输出目录，为None时使用程序根目录下的“输出”目录
         self.source_lang = "zh"  # 默认源语言为中文
         self.target_lang = "en"  # 默认目标语言为英文
         self.is_cn_to_foreign = True  # 默认翻译方向为中文→外语
+        self.progress_callback = None  # 进度回调函数
+        self.progress_channel = None  # 进度通道（非阻塞、合并推送）
         # 数学公式正则表达式模式
         self.latex_patterns = [
             r'\$\$(.*?)\$\$',  # 行间公式 $$...$$
@@ -46,6 +52,23 @@ class PPTProcessor:
         # PPT特定的翻译提示词
         self.ppt_prompt = "这是一个PPT演示文稿的内容，请提供简洁明了的翻译，保持专业术语的准确性，并确保翻译后的文本长度适合在幻灯片上显示。"
 
+    def set_progress_callback(self, callback):
+        """设置进度回调函数（也可以直接传入ProgressChannel）"""
+        self.progress_callback = callback
+        self.progress_channel = create_progress_channel(callback)
+
+    def _update_progress(self, progress: float, message: str = ""):
+        """更新进度"""
+        # 通过进度通道发布，不阻塞翻译线程
+        if self.progress_channel:
+            self.progress_channel.publish(progress, message)
+
+        # 记录进度到日志
+        if progress >= 0:
+            logger.info(f"进度: {progress*100:.1f}% - {message}")
+        else:
+            logger.error(f"进度: 错误 - {message}")
+
     def process_document(self, file_path: str, target_language: str, terminology: Dict, source_lang: str = "zh", target_lang: str = "en") -> str:
         """
         处理PPT文档翻译
@@ -60,6 +83,12 @@ class PPTProcessor:
         Returns:
             str: 输出文件路径
         """
+        # 更新进度：开始处理
+        self._update_progress(0.01, "开始处理PPT文档...")
+        self.term_extractor.match_seconds = 0.0
+        stages = StageTimer("pptx")
+        self.stage_durations = {}
+
         # 设置翻译方向
         self.source_lang = source_lang
         self.target_lang = target_lang
@@ -74,7 +103,7 @@ class PPTProcessor:
             raise Exception("文件不存在")
 
         # 在程序根目录下创建输出目录
-        output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+        output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
@@ -112,9 +141,14 @@ class PPTProcessor:
                 raise Exception(f"无法写入输出目录，请检查权限或以管理员身份运行程序。")
 
             # 复制PPT文档
+            self._update_progress(0.1, "复制PPT文档...")
+            stages.begin("parse")
             ppt = self._copy_presentation(file_path, output_path)
             logger.info(f"成功复制原PPT文档到: {output_path}")
 
+            # 术语预处理的匹配耗时计入翻译阶段，结束时单独计为 term_match
+            stages.begin("translate")
+
             # 如果启用了术语预处理，先收集所有使用的术语
             used_terminology = {}
             if self.preprocess_terms:
@@ -139,9 +173,12 @@ class PPTProcessor:
                     self._export_used_terminology(used_terminology)
 
             # 处理PPT文档
+            self._update_progress(0.2, "处理幻灯片...")
             self._process_slides(ppt, target_terminology, translation_results, used_terminology)
 
             # 保存PPT文档
+            self._update_progress(0.8, "保存PPT文档...")
+            stages.begin("write")
             try:
                 ppt.save(output_path)
                 logger.info(f"文件已保存到: {output_path}")
@@ -158,15 +195,28 @@ class PPTProcessor:
                 json.dump({"status": "success", "file": output_path}, f, ensure_ascii=False, indent=2)
 
             # 翻译完成后，导出Excel文件
+            self._update_progress(0.9, "导出翻译对照表...")
+            stages.begin("export")
             if translation_results:
                 self.export_to_excel(translation_results, file_path, target_language)
 
+            self.stage_durations = self._finish_stages(stages)
+
+            self._update_progress(1.0, "PPT翻译完成！")
             return output_path
 
         except Exception as e:
             logger.error(f"PPT处理过程出错: {str(e)}")
+            self._update_progress(-1, f"翻译出错: {str(e)}")
+            self.stage_durations = self._finish_stages(stages)
             raise
 
+    def _finish_stages(self, stages: StageTimer) -> Dict[str, float]:
+        """结束阶段计时：翻译阶段中的术语匹配耗时单独计为 term_match"""
+        stages.end()
+        stages.split("translate", "term_match", self.term_extractor.match_seconds)
+        return stages.finish()
+
     def _copy_presentation(self, source_path: str, target_path: str) -> Presentation:
         """复制PPT文档"""
         ppt = Presentation(source_path)
@@ -257,11 +307,13 @@ class PPTProcessor:
             for shape in slide.shapes:
                 # 处理文本框
                 if hasattr(shape, "text") and shape.text.strip():
-                    self._process_text_shape(shape, terminology, translation_results, used_terminology)
+                    with segment_kind(KIND_SLIDE):
+                        self._process_text_shape(shape, terminology, translation_results, used_terminology)
 
                 # 处理表格
                 if shape.has_table:
-                    self._process_table(shape.table, terminology, translation_results, used_terminology)
+                    with segment_kind(KIND_CELL):
+                        self._process_table(shape.table, terminology, translation_results, used_terminology)
 
     def _process_text_shape(self, shape: Any, terminology: Dict, translation_results: List, used_terminology: Dict = None) -> None:
         """处理文本形状"""
@@ -529,7 +581,7 @@ class PPTProcessor:
         """导出使用的术语到Excel文件，包含使用统计信息"""
         try:
             # 创建输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
             if not os.path.exists(output_dir):
                 os.makedirs(output_dir)
 
@@ -598,7 +650,7 @@ class PPTProcessor:
         """
         try:
             # 创建输出目录
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
+            output_dir = self.output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "输出")
             if not os.path.exists(output_dir):
                 os.makedirs(output_dir)
 
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词布局
+各翻译器按统一的顺序组织消息：固定的系统指令、few-shot 示例、文档级术语表，最后才是逐片段变化的内容。
+同一任务中所有请求的前缀逐字节相同，服务端（智谱、硅基流动、vLLM、Ollama）可以复用已计算的前缀，
+缩短首个token的等待时间并降低费用；接口返回的命中缓存token数计入用量统计和指标。
+
+提示词分为 full/compact/minimal 三档，按片段长度和类型（表格单元格、段落、幻灯片）自动选择：
+两三个字的单元格不必附带完整的要求和示例。每次请求的估算token数按提示词开销和片段内容分开统计，
+任务结束时输出汇总
+"""
+
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils import metrics
+from utils.hot_log import HotPathLogger, CATEGORY_PROMPTS
+from .base_translator import estimate_tokens
+
+logger = logging.getLogger(__name__)
+_hot = HotPathLogger(logger)  # 逐请求的token估算按提示词类别分级和采样
+
+# 提示词档位
+PROFILE_FULL = "full"          # 完整的要求说明和示例
+PROFILE_COMPACT = "compact"    # 简短的要求说明，不带示例
+PROFILE_MINIMAL = "minimal"    # 只有一句翻译指令
+PROFILES = (PROFILE_FULL, PROFILE_COMPACT, PROFILE_MINIMAL)
+
+# 片段类型
+KIND_PARAGRAPH = "paragraph"
+KIND_CELL = "cell"
+KIND_SLIDE = "slide"
+
+DEFAULT_MINIMAL_MAX_CHARS = 12
+# 各类型的片段不超过该长度时使用 compact 档
+DEFAULT_COMPACT_MAX_CHARS = {KIND_CELL: 200, KIND_SLIDE: 200, KIND_PARAGRAPH: 80}
+
+# 每条消息的格式开销（角色标记等）的估算token数
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_reported = threading.local()
+_segment_kind: contextvars.ContextVar = contextvars.ContextVar("segment_kind", default=KIND_PARAGRAPH)
+_current_accounting: contextvars.ContextVar = contextvars.ContextVar("prompt_accounting", default=None)
+
+_config_lock = threading.Lock()
+_config = {
+    "mode": "auto",
+    "minimal_max_chars": DEFAULT_MINIMAL_MAX_CHARS,
+    "compact_max_chars": dict(DEFAULT_COMPACT_MAX_CHARS),
+}
+
+
+def configure_prompt_profiles(config: Optional[Dict]) -> None:
+    """
+    根据配置（config.json 中的 prompt_profiles 节）调整提示词档位的选择
+
+    示例:
+        {"mode": "auto", "minimal_max_chars": 12, "compact_max_chars": {"cell": 200, "slide": 200, "paragraph": 80}}
+        mode 为 full/compact/minimal 时所有请求固定使用该档位
+    """
+    if not config:
+        return
+    with _config_lock:
+        mode = config.get("mode", "auto")
+        _config["mode"] = mode if mode in PROFILES else "auto"
+        if "minimal_max_chars" in config:
+            _config["minimal_max_chars"] = int(config["minimal_max_chars"])
+        for kind, limit in (config.get("compact_max_chars") or {}).items():
+            _config["compact_max_chars"][kind] = int(limit)
+
+
+@contextmanager
+def segment_kind(kind: str):
+    """在 with 块内把翻译的片段标记为指定类型（文档处理器在处理表格、段落、幻灯片时设置）"""
+    token = _segment_kind.set(kind)
+    try:
+        yield
+    finally:
+        _segment_kind.reset(token)
+
+
+def current_segment_kind() -> str:
+    return _segment_kind.get()
+
+
+def choose_profile(text: str, kind: Optional[str] = None) -> str:
+    """按片段长度和类型选择提示词档位"""
+    with _config_lock:
+        mode = _config["mode"]
+        minimal_max_chars = _config["minimal_max_chars"]
+        compact_limits = dict(_config["compact_max_chars"])
+    if mode != "auto":
+        return mode
+    kind = kind or current_segment_kind()
+    length = len(text.strip())
+    if length <= minimal_max_chars:
+        return PROFILE_MINIMAL
+    if length <= compact_limits.get(kind, compact_limits.get(KIND_PARAGRAPH, 0)):
+        return PROFILE_COMPACT
+    return PROFILE_FULL
+
+
+def compact_system(source_lang_name: str, target_lang_name: str, prompt: Optional[str] = None) -> str:
+    """compact 档的系统指令"""
+    system = (f"你是专业翻译员。请将用户提供的{source_lang_name}文本翻译成{target_lang_name}，"
+              "严格遵守给出的术语指令，保持原文结构，只输出译文，不含任何解释或标记。")
+    if prompt:
+        system += f"\n风格要求：{prompt}"
+    return system
+
+
+def minimal_system(source_lang_name: str, target_lang_name: str, prompt: Optional[str] = None) -> str:
+    """minimal 档的系统指令"""
+    system = f"将{source_lang_name}翻译成{target_lang_name}，只输出译文。"
+    if prompt:
+        system += f"风格：{prompt}"
+    return system
+
+
+def glossary_block(terminology: Optional[Dict[str, str]], title: str = "术语对照表：",
+                   line_format: str = "{source}: {target}") -> str:
+    """
+    术语表文本块：按原文排序，同样的术语表无论传入顺序如何都得到相同的文本
+
+    Args:
+        terminology: 术语表 {原文: 译文}
+        title: 标题行
+        line_format: 每个术语的格式，可使用 {source} 和 {target}
+    """
+    if not terminology:
+        return ""
+    lines = [line_format.format(source=source, target=target)
+             for source, target in sorted(terminology.items(), key=lambda item: str(item[0]))]
+    return title + "\n" + "\n".join(lines)
+
+
+def build_messages(system: str, segment: str, few_shots: Sequence[Tuple[str, str]] = (),
+                   glossary: str = "") -> List[Dict[str, str]]:
+    """
+    按前缀稳定的顺序组织消息：系统指令 → few-shot 示例 → 术语表 → 片段内容
+
+    Args:
+        system: 系统指令（只能包含整个任务不变的内容，如语言对和风格指导）
+        segment: 本次请求的片段内容（含逐片段的术语指令）
+        few_shots: 示例 [(用户消息, 助手回复)]
+        glossary: 文档级术语表文本块，放在最后一条用户消息的开头
+
+    Returns:
+        消息列表
+    """
+    messages = [{"role": "system", "content": system}]
+    for user, assistant in few_shots:
+        messages.append({"role": "user", "content": user})
+        messages.append({"role": "assistant", "content": assistant})
+    content = f"{glossary}\n\n{segment}" if glossary else segment
+    messages.append({"role": "user", "content": content})
+    return messages
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def report_usage(engine: str, usage: Any) -> Dict[str, int]:
+    """
+    记录接口返回的提示词token数和命中前缀缓存的token数
+
+    兼容 OpenAI 格式的 usage（字典或 openai 的响应对象）：prompt_tokens，
+    prompt_tokens_details.cached_tokens（部分服务直接返回 cached_tokens 或 prompt_cache_hit_tokens）
+
+    Returns:
+        {'prompt_tokens': 提示词token数, 'cached_tokens': 命中缓存的token数}
+    """
+    prompt_tokens = _field(usage, 'prompt_tokens') or 0
+    cached_tokens = (_field(_field(usage, 'prompt_tokens_details'), 'cached_tokens')
+                     or _field(usage, 'cached_tokens')
+                     or _field(usage, 'prompt_cache_hit_tokens')
+                     or 0)
+    result = {'prompt_tokens': int(prompt_tokens), 'cached_tokens': int(cached_tokens)}
+    accounting = _current_accounting.get()
+    if accounting is not None:
+        accounting.add_measured(result['prompt_tokens'], result['cached_tokens'])
+    if prompt_tokens:
+        metrics.ENGINE_PROMPT_TOKENS.inc(result['prompt_tokens'], engine=engine, kind="prompt")
+        metrics.ENGINE_PROMPT_TOKENS.inc(result['cached_tokens'], engine=engine, kind="cached")
+        logger.debug(f"{engine} 提示词 {result['prompt_tokens']} token，命中缓存 {result['cached_tokens']} token")
+    _reported.usage = result
+    return result
+
+
+def take_reported_usage() -> Optional[Dict[str, int]]:
+    """取出当前线程最近一次 report_usage 记录的用量（取出后清除），翻译服务据此汇总任务用量"""
+    usage = getattr(_reported, 'usage', None)
+    _reported.usage = None
+    return usage
+
+
+class PromptAccounting:
+    """一个翻译任务的提示词token统计：提示词开销（指令、示例、术语表）与片段内容分开计算"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.payload_tokens = 0
+        self.prompt_tokens = 0
+        self.measured_prompt_tokens = 0
+        self.cached_tokens = 0
+        self.profiles: Dict[str, Dict[str, int]] = {}
+
+    def add(self, profile: str, prompt_tokens: int, payload_tokens: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.payload_tokens += payload_tokens
+            stats = self.profiles.setdefault(profile, {"requests": 0, "prompt_tokens": 0, "payload_tokens": 0})
+            stats["requests"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["payload_tokens"] += payload_tokens
+
+    def add_measured(self, prompt_tokens: int, cached_tokens: int) -> None:
+        with self._lock:
+            self.measured_prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+
+    def add_share(self, report: Dict, share: float) -> None:
+        """
+        计入多个任务合并发送的请求中属于本任务的部分：每个请求计1次，token数按份额（本任务片段所占比例）折算
+
+        Args:
+            report: 合并请求单独统计得到的 report()
+            share: 本任务所占份额（0~1）
+        """
+        def part(value: int) -> int:
+            return int(round(value * share))
+
+        with self._lock:
+            self.requests += report["requests"]
+            self.prompt_tokens += part(report["prompt_tokens"])
+            self.payload_tokens += part(report["payload_tokens"])
+            self.measured_prompt_tokens += part(report["measured_prompt_tokens"])
+            self.cached_tokens += part(report["cached_tokens"])
+            for profile, batch_stats in report["profiles"].items():
+                stats = self.profiles.setdefault(profile, {"requests": 0, "prompt_tokens": 0, "payload_tokens": 0})
+                stats["requests"] += batch_stats["requests"]
+                stats["prompt_tokens"] += part(batch_stats["prompt_tokens"])
+                stats["payload_tokens"] += part(batch_stats["payload_tokens"])
+
+    def report(self) -> Dict:
+        """汇总：请求数、估算的提示词总token数、片段内容token数、开销token数及占比，各档位明细和接口实测值"""
+        with self._lock:
+            overhead = self.prompt_tokens - self.payload_tokens
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "payload_tokens": self.payload_tokens,
+                "overhead_tokens": overhead,
+                "overhead_ratio": round(overhead / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+                "profiles": {profile: dict(stats) for profile, stats in self.profiles.items()},
+                "measured_prompt_tokens": self.measured_prompt_tokens,
+                "cached_tokens": self.cached_tokens
+            }
+
+
+@contextmanager
+def account_prompts():
+    """在 with 块内统计提示词token（每个翻译任务一个），返回 PromptAccounting"""
+    accounting = PromptAccounting()
+    token = _current_accounting.set(accounting)
+    try:
+        yield accounting
+    finally:
+        _current_accounting.reset(token)
+
+
+def current_prompt_accounting() -> Optional[PromptAccounting]:
+    """当前任务的提示词统计，不在 account_prompts() 块内时返回None"""
+    return _current_accounting.get()
+
+
+def estimate_message_tokens(messages: Sequence[Dict[str, str]]) -> int:
+    """估算消息列表的token数（离线估算，不调用分词器）"""
+    return sum(estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def record_prompt(engine: str, profile: str, messages: Sequence[Dict[str, str]], payload: str) -> int:
+    """
+    记录一次请求的估算token数：写入当前任务的统计并输出调试日志
+
+    Args:
+        engine: 引擎名称
+        profile: 提示词档位
+        messages: 发送的消息
+        payload: 片段内容（不含指令的原文）
+
+    Returns:
+        int: 估算的提示词token数
+    """
+    prompt_tokens = estimate_message_tokens(messages)
+    payload_tokens = estimate_tokens(payload)
+    accounting = _current_accounting.get()
+    if accounting is not None:
+        accounting.add(profile, prompt_tokens, payload_tokens)
+    _hot.sample(CATEGORY_PROMPTS, "%s 请求(%s/%s): 估算提示词 %s token，其中片段内容 %s token",
+                engine, profile, current_segment_kind(), prompt_tokens, payload_tokens)
+    return prompt_tokens
+
+
+def format_prompt_report(report: Dict) -> str:
+    """把任务的提示词统计整理为一行日志"""
+    profiles = "，".join(f"{profile} {stats['requests']}次" for profile, stats in sorted(report["profiles"].items()))
+    text = (f"请求 {report['requests']} 次（{profiles or '无'}），估算提示词 {report['prompt_tokens']} token，"
+            f"片段内容 {report['payload_tokens']} token，提示词开销 {report['overhead_tokens']} token"
+            f"（{report['overhead_ratio']:.0%}）")
+    if report["measured_prompt_tokens"]:
+        text += f"；接口实测提示词 {report['measured_prompt_tokens']} token，命中缓存 {report['cached_tokens']} token"
+    return text
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档片段指纹索引
+为修订版文档提供增量翻译：按内容哈希和位置对齐新旧片段，
+未变化的片段直接复用上一次的译文，只有新增或修改的片段才提交给翻译引擎
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 索引默认存放在程序根目录的 data/segment_index 下
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "segment_index")
+
+# 自动匹配上一版本时要求的最小片段重合率
+MIN_OVERLAP_RATIO = 0.3
+
+# 影响译文的翻译设置：与历史记录不一致时不复用其译文
+TRANSLATION_SETTINGS = ('source_lang', 'target_lang', 'engine', 'model', 'glossary_version')
+
+
+def compute_segment_hash(text: str) -> str:
+    """计算片段内容哈希（忽略首尾空白并合并连续空白）"""
+    normalized = re.sub(r'\s+', ' ', (text or '').strip())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def compute_document_fingerprint(segment_hashes: List[str]) -> str:
+    """根据片段哈希序列计算文档指纹"""
+    return hashlib.sha1('\n'.join(segment_hashes).encode('utf-8')).hexdigest()
+
+
+def compute_glossary_version(terminology: Optional[Dict]) -> str:
+    """术语表版本（条目内容哈希，与条目顺序无关），没有术语时为 none"""
+    if not terminology:
+        return "none"
+    payload = json.dumps(sorted((str(k), str(v)) for k, v in terminology.items()), ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def compute_file_hash(file_path: str) -> Optional[str]:
+    """计算源文件内容哈希，用于定位用户指定的上一版本"""
+    try:
+        sha1 = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+    except Exception as e:
+        logger.error(f"计算文件哈希失败: {file_path}, 错误: {str(e)}")
+        return None
+
+
+class SegmentIndex:
+    """片段指纹索引的磁盘存储，每个已翻译文档保存为一条记录"""
+
+    def __init__(self, index_dir: str = None):
+        self.index_dir = index_dir or DEFAULT_INDEX_DIR
+        self.manifest_path = os.path.join(self.index_dir, "manifest.json")
+        self._lock = threading.Lock()
+
+    def _record_path(self, fingerprint: str) -> str:
+        return os.path.join(self.index_dir, f"{fingerprint}.json")
+
+    def _load_manifest(self) -> Dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取片段索引清单失败，将重建: {str(e)}")
+            return {}
+
+    def load_record(self, fingerprint: str) -> Optional[Dict]:
+        """按文档指纹加载记录"""
+        path = self._record_path(fingerprint)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"读取片段索引记录失败: {path}, 错误: {str(e)}")
+            return None
+
+    @staticmethod
+    def _same_settings(entry: Dict, settings: Dict) -> bool:
+        """历史记录的翻译设置（语言对、引擎、模型、术语表版本）是否与本次一致，缺少设置的旧记录视为不一致"""
+        return all(entry.get(name) == settings.get(name) for name in TRANSLATION_SETTINGS)
+
+    def find_by_file_hash(self, file_hash: str, settings: Dict) -> Optional[Dict]:
+        """按源文件哈希查找翻译设置相同的历史记录（用户显式指定上一版源文件时使用）"""
+        with self._lock:
+            manifest = self._load_manifest()
+
+        candidates = [
+            (entry.get('created', ''), fingerprint)
+            for fingerprint, entry in manifest.items()
+            if entry.get('file_hash') == file_hash and self._same_settings(entry, settings)
+        ]
+        if not candidates:
+            return None
+        return self.load_record(max(candidates)[1])
+
+    def find_best_match(self, segment_hashes: List[str], settings: Dict, source_name: str = None) -> Optional[Dict]:
+        """
+        在索引中查找与当前文档最相似、翻译设置相同的历史版本
+
+        Args:
+            segment_hashes: 当前文档的片段哈希序列
+            settings: 本次的翻译设置（语言对、引擎、模型、术语表版本）
+            source_name: 当前源文件名，同名记录优先
+
+        Returns:
+            Optional[Dict]: 匹配到的历史记录，未找到返回None
+        """
+        current = set(segment_hashes)
+        if not current:
+            return None
+
+        best_fingerprint = None
+        best_score = 0.0
+        with self._lock:
+            manifest = self._load_manifest()
+
+        for fingerprint, entry in manifest.items():
+            if not self._same_settings(entry, settings):
+                continue
+            overlap = len(current.intersection(entry.get('hashes', [])))
+            ratio = overlap / len(current)
+            if ratio < MIN_OVERLAP_RATIO:
+                continue
+            # 同名文件加权，创建时间较新的记录在分数相同时胜出
+            score = ratio + (0.5 if source_name and entry.get('source_name') == source_name else 0.0)
+            if score > best_score or (score == best_score and best_fingerprint
+                                      and entry.get('created', '') > manifest[best_fingerprint].get('created', '')):
+                best_fingerprint = fingerprint
+                best_score = score
+
+        if not best_fingerprint:
+            return None
+        return self.load_record(best_fingerprint)
+
+    def save_record(self, record: Dict) -> None:
+        """保存文档记录并更新清单"""
+        fingerprint = record['fingerprint']
+        with self._lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            with open(self._record_path(fingerprint), 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+
+            manifest = self._load_manifest()
+            manifest[fingerprint] = {
+                'source_name': record.get('source_name'),
+                'file_hash': record.get('file_hash'),
+                **{name: record.get(name) for name in TRANSLATION_SETTINGS},
+                'created': record.get('created'),
+                'hashes': [segment['hash'] for segment in record.get('segments', [])]
+            }
+            tmp_path = self.manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+
+
+class IncrementalTranslationSession:
+    """单次文档翻译的增量会话，负责片段对齐、译文复用和统计"""
+
+    def __init__(self, index: SegmentIndex, source_lang: str, target_lang: str,
+                 source_name: str = None, file_hash: str = None, engine: str = None, model: str = None,
+                 glossary_version: str = None):
+        self.index = index
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.source_name = source_name
+        self.file_hash = file_hash
+        # 只复用语言对、引擎、模型和术语表版本都相同的历史译文
+        self.settings = {'source_lang': source_lang, 'target_lang': target_lang,
+                         'engine': engine, 'model': model, 'glossary_version': glossary_version}
+
+        self.previous_record = None
+        self._previous_hashes: List[str] = []
+        self._previous_translations: Dict[str, str] = {}
+        self._current_hashes = set()
+        self._segments: List[Dict] = []
+        # 已登记、等待记录译文的片段位置（按片段哈希），登记和记录译文之间可以穿插其他片段
+        self._pending: Dict[str, List[int]] = {}
+        self.stats = {'reused': 0, 'changed': 0, 'added': 0}
+
+    def begin(self, current_segments: List[str], previous_file_path: Optional[str] = None) -> bool:
+        """
+        确定上一版本并建立对齐数据
+
+        Args:
+            current_segments: 当前文档的片段文本（按处理顺序）
+            previous_file_path: 用户指定的上一版源文件，为None时通过片段指纹自动查找
+
+        Returns:
+            bool: 是否找到可复用的上一版本
+        """
+        current_hashes = [compute_segment_hash(text) for text in current_segments]
+        self._current_hashes = set(current_hashes)
+
+        record = None
+        if previous_file_path:
+            previous_hash = compute_file_hash(previous_file_path)
+            if previous_hash:
+                record = self.index.find_by_file_hash(previous_hash, self.settings)
+            if record is None:
+                logger.warning(f"索引中没有上一版文档在相同翻译设置（语言、引擎、模型、术语表）下的译文记录: "
+                               f"{os.path.basename(previous_file_path)}，改为自动匹配")
+
+        if record is None:
+            record = self.index.find_best_match(current_hashes, self.settings, self.source_name)
+
+        if record is None:
+            logger.info("未找到可复用的历史版本，本次将完整翻译")
+            return False
+
+        self.previous_record = record
+        self._previous_hashes = [segment['hash'] for segment in record.get('segments', [])]
+        self._previous_translations = {
+            segment['hash']: segment['translation']
+            for segment in record.get('segments', [])
+            if segment.get('translation')
+        }
+        logger.info(f"增量翻译: 匹配到历史版本 {record.get('source_name')} ({record.get('created')})，"
+                    f"可复用译文 {len(self._previous_translations)} 条")
+        return True
+
+    def lookup(self, text: str) -> Optional[str]:
+        """
+        登记当前片段并返回可复用的译文
+
+        Args:
+            text: 片段原文
+
+        Returns:
+            Optional[str]: 未变化片段的历史译文；新增或修改的片段返回None
+        """
+        segment_hash = compute_segment_hash(text)
+        position = len(self._segments)
+        reused = self._previous_translations.get(segment_hash)
+        self._segments.append({'hash': segment_hash, 'source': text, 'translation': reused})
+
+        if reused is not None:
+            self.stats['reused'] += 1
+            return reused
+        self._pending.setdefault(segment_hash, []).append(position)
+
+        # 同一位置的旧片段已不在新文档中，视为修改；否则为新增
+        previous_hash = self._previous_hashes[position] if position < len(self._previous_hashes) else None
+        if previous_hash is not None and previous_hash not in self._current_hashes:
+            self.stats['changed'] += 1
+        else:
+            self.stats['added'] += 1
+        return None
+
+    def record(self, text: str, translation: str) -> None:
+        """记录已登记片段的译文（按原文哈希对应到最早登记、尚未记录译文的位置），失败的翻译不写入索引"""
+        if not translation:
+            return
+        if translation.startswith("翻译失败") or translation.startswith("[翻译失败"):
+            return
+        positions = self._pending.get(compute_segment_hash(text))
+        if not positions:
+            return
+        self._segments[positions.pop(0)]['translation'] = translation
+
+    def finish(self) -> Dict:
+        """保存本次翻译的片段记录并返回增量统计"""
+        hashes = [segment['hash'] for segment in self._segments]
+        record = {
+            'fingerprint': compute_document_fingerprint(hashes),
+            'source_name': self.source_name,
+            'file_hash': self.file_hash,
+            **self.settings,
+            'created': datetime.now().isoformat(),
+            'segments': self._segments
+        }
+        try:
+            self.index.save_record(record)
+        except Exception as e:
+            logger.error(f"保存片段索引失败: {str(e)}")
+
+        removed = len(set(self._previous_hashes) - self._current_hashes)
+        summary = {
+            'reused': self.stats['reused'],
+            'changed': self.stats['changed'],
+            'added': self.stats['added'],
+            'removed': removed,
+            'total': len(self._segments),
+            'previous_version': self.previous_record.get('source_name') if self.previous_record else None
+        }
+        logger.info(f"增量翻译统计: 复用 {summary['reused']}，修改 {summary['changed']}，"
+                    f"新增 {summary['added']}，删除 {summary['removed']}")
+        return summary
+
+
+# 全局片段索引实例
+_segment_index = None
+
+
+def get_segment_index() -> SegmentIndex:
+    """获取全局片段索引实例"""
+    global _segment_index
+    if _segment_index is None:
+        _segment_index = SegmentIndex()
+    return _segment_index
+
+
+def create_incremental_session(file_path: str, source_lang: str, target_lang: str, engine: str = None,
+                               model: str = None, terminology: Optional[Dict] = None) -> IncrementalTranslationSession:
+    """
+    为待翻译文件创建增量翻译会话
+
+    Args:
+        file_path: 待翻译文件
+        source_lang: 源语言代码
+        target_lang: 目标语言代码
+        engine: 翻译引擎类型
+        model: 模型名称
+        terminology: 本次使用的术语表（按内容计算版本）
+    """
+    return IncrementalTranslationSession(
+        get_segment_index(),
+        source_lang,
+        target_lang,
+        source_name=os.path.basename(file_path),
+        file_hash=compute_file_hash(file_path),
+        engine=engine,
+        model=model,
+        glossary_version=compute_glossary_version(terminology)
+    )
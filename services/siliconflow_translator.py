@@ -1,7 +1,8 @@
-from openai import OpenAI
 import logging
 from typing import Optional, Dict
 from .base_translator import BaseTranslator
+from .prompt_builder import (build_messages, glossary_block, report_usage, choose_profile, compact_system,
+                             minimal_system, record_prompt, PROFILE_FULL, PROFILE_COMPACT)
 
 logger = logging.getLogger(__name__)
 
@@ -10,12 +11,19 @@ class SiliconFlowTranslator(BaseTranslator):
         self.api_key = api_key
         self.model = model
         self.timeout = timeout
-        if api_key:
-            self.client = OpenAI(
-                api_key=api_key,
+        self._client = None
+
+    @property
+    def client(self):
+        """OpenAI客户端，首次使用时才导入openai并创建，加快翻译服务启动"""
+        if self._client is None and self.api_key:
+            from openai import OpenAI
+            self._client = OpenAI(
+                api_key=self.api_key,
                 base_url="https://api.siliconflow.cn/v1",
-                timeout=timeout
+                timeout=self.timeout
             )
+        return self._client
 
     def translate(self, text: str, terminology_dict: Optional[Dict] = None, source_lang: str = "zh", target_lang: str = "en", prompt: str = None) -> str:
         """
@@ -38,7 +46,6 @@ class SiliconFlowTranslator(BaseTranslator):
 
             # --- 术语预处理和提示构建逻辑开始 ---
             processed_text_for_llm = str(text)  # 将发送给LLM的文本（可能包含占位符）
-            final_prompt_text = ""  # LLM的完整提示字符串
 
             term_instructions_for_llm = []
             placeholders_used = False
@@ -64,93 +71,36 @@ class SiliconFlowTranslator(BaseTranslator):
                     processed_text_for_llm = temp_processed_text
             # --- 术语预处理和提示构建逻辑结束 ---
 
-            # 构建 prompt_content
-            if placeholders_used:
-                instruction_block = "术语指令 (请严格遵守)：\n" + "\n".join(term_instructions_for_llm)
-                prompt_core = (
-                    f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n"
-                    f"{instruction_block}\n\n"
-                    "通用翻译要求：\n"
-                    "1. 对于任何占位符，请严格遵守上述术语指令。\n"
-                    "2. 对于文本中未被占位符覆盖的部分，请确保翻译专业、准确且自然流畅。\n"
-                    "3. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-                )
-                if prompt:
-                    prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-                if target_lang == "zh":
-                    final_prompt_text = (
-                        prompt_core +
-                        f"\n待翻译文本 (可能包含占位符)：\n{processed_text_for_llm}\n\n"
-                        "请提供纯中文翻译："
-                    )
-                else:
-                    final_prompt_text = (
-                        prompt_core +
-                        f"\n待翻译文本 (可能包含占位符)：\n{processed_text_for_llm}\n\n"
-                        f"请提供纯{target_lang_name}翻译："
-                    )
-            elif terminology_dict:  # 术语存在，但未找到术语进行占位符替换
-                prompt_core = (
-                    f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n\n"
-                    "请严格使用此术语映射：\n"
-                )
-                for s_term, t_term in terminology_dict.items(): # 假设 terminology_dict 已正确定向
-                    prompt_core += f"[{s_term}] → [{t_term}]\n"
-
-                prompt_core += (
-                    "\n通用翻译要求：\n"
-                    "1. 上述映射中的所有术语必须按规定翻译。\n"
-                    "2. 其余文本确保翻译专业、准确且自然流畅。\n"
-                    "3. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-                )
-                if prompt:
-                    prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-                if target_lang == "zh":
-                    final_prompt_text = (
-                        prompt_core +
-                        f"\n待翻译文本：\n{text}\n\n"  # 此处为原始文本
-                        "请提供纯中文翻译："
-                    )
-                else:
-                    final_prompt_text = (
-                        prompt_core +
-                        f"\n待翻译文本：\n{text}\n\n"  # 此处为原始文本
-                        f"请提供纯{target_lang_name}翻译："
-                    )
-            else:  # 完全没有术语
-                prompt_core = (
-                    f"你是一位高度熟练的专业翻译员。请将以下{source_lang_name}文本翻译成{target_lang_name}。\n\n"
-                    "通用翻译要求：\n"
-                    "1. 确保翻译专业、准确且自然流畅。\n"
-                    "2. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
-                )
-                if prompt:
-                    prompt_core += f"\n额外的用户提供风格/语气指导：{prompt}\n"
-
-                if target_lang == "zh":
-                    final_prompt_text = (
-                        prompt_core +
-                        f"\n待翻译文本：\n{text}\n\n"
-                        "请提供纯中文翻译："
-                    )
-                else:
-                    final_prompt_text = (
-                        prompt_core +
-                        f"\n待翻译文本：\n{text}\n\n"
-                        f"请提供纯{target_lang_name}翻译："
-                    )
+            # 构建消息：系统消息只包含语言对和风格指导，术语指令和待翻译文本放在最后；
+            # 短片段使用精简的提示词档位，只附带片段中出现的术语指令
+            profile = choose_profile(text)
+            if profile != PROFILE_FULL:
+                system_builder = compact_system if profile == PROFILE_COMPACT else minimal_system
+                segment_content = processed_text_for_llm
+                if placeholders_used:
+                    segment_content = "\n".join(term_instructions_for_llm) + "\n\n" + segment_content
+                messages = build_messages(system_builder(source_lang_name, target_lang_name, prompt), segment_content)
+            else:
+                segment_content = ""
+                if placeholders_used:
+                    segment_content = "术语指令 (请严格遵守)：\n" + "\n".join(term_instructions_for_llm) + "\n\n"
+                    segment_content += f"待翻译文本 (可能包含占位符)：\n{processed_text_for_llm}\n\n"
+                elif terminology_dict:  # 术语存在，但未找到术语进行占位符替换
+                    segment_content = glossary_block(terminology_dict, "请严格使用此术语映射：", "[{source}] → [{target}]") + "\n\n"
+                    segment_content += f"待翻译文本：\n{text}\n\n"  # 此处为原始文本
+                else:  # 完全没有术语
+                    segment_content = f"待翻译文本：\n{text}\n\n"
+                segment_content += f"请提供纯{target_lang_name}翻译："
+                messages = build_messages(self._system_prompt(source_lang_name, target_lang_name, prompt), segment_content)
+            record_prompt("siliconflow", profile, messages, text)
 
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "你是一位专业的翻译助手，请严格遵循用户提供的所有翻译指令，特别是关于术语和占位符的指令。"},
-                    {"role": "user", "content": final_prompt_text}
-                ],
+                messages=messages,
                 temperature=0.2,
                 stream=False
             )
+            report_usage("siliconflow", getattr(response, 'usage', None))
 
             raw_translation = response.choices[0].message.content.strip()
             # 过滤思维链
@@ -208,6 +158,20 @@ class SiliconFlowTranslator(BaseTranslator):
             logger.error(f"硅基流动翻译失败: {str(e)}")
             raise Exception(f"硅基流动翻译失败: {str(e)}")
 
+    def _system_prompt(self, source_lang_name: str, target_lang_name: str, prompt: Optional[str]) -> str:
+        """系统提示词：只与语言对和风格指导有关，同一任务的所有请求完全相同"""
+        system_prompt = (
+            f"你是一位高度熟练的专业翻译员。请将用户提供的{source_lang_name}文本翻译成{target_lang_name}，"
+            "严格遵循用户提供的所有翻译指令，特别是关于术语和占位符的指令。\n\n"
+            "通用翻译要求：\n"
+            "1. 对于任何占位符或术语映射，请严格遵守术语指令。\n"
+            "2. 其余文本确保翻译专业、准确且自然流畅。\n"
+            "3. 最终输出必须仅为翻译后的文本，不含任何额外评论、分析或如 '原文：' 或 '译文：' 等标记。\n"
+        )
+        if prompt:
+            system_prompt += f"\n额外的用户提供风格/语气指导：{prompt}\n"
+        return system_prompt
+
     # 使用BaseTranslator中的_filter_output方法
 
     def _get_language_name(self, lang_code: str) -> str:
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合并进行中的相同请求
+多个任务同时翻译同一模板的不同版本时，页眉、固定条款、表头等相同片段会被并发请求。
+同一键的请求正在进行时，后来的调用方等待同一个 Future，不再重复请求翻译引擎
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按键合并并发调用：同一键同时只执行一次，其余调用方共享结果（或异常）"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "SingleFlight":
+        """按配置（config.json 中的 inflight_coalescing 节）创建"""
+        config = config or {}
+        return cls(enabled=config.get('enabled', True))
+
+    def do(self, key: str, func: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        执行 func 或等待同一键正在进行的调用
+
+        Returns:
+            (结果, 是否共享了其他调用方的结果)
+        """
+        if not self.enabled:
+            return func(), False
+
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        """正在进行的（去重后的）调用数"""
+        with self._lock:
+            return len(self._calls)
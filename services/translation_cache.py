@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+片段翻译缓存
+同一翻译服务内按（引擎、模型、语言、提示词、术语、原文）缓存片段译文，
+批量翻译的多个文档之间共享，页眉页脚、表头、固定条款等重复片段只请求一次翻译引擎
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 20000
+
+# 整库传入的术语词典较大，按对象记住其指纹和条目快照，避免每个片段都排序、序列化整库
+_LARGE_TERMINOLOGY = 200
+_MAX_FINGERPRINT_MEMO = 8
+
+
+def is_failed_translation(translation: Optional[str]) -> bool:
+    """判断译文是否为失败结果（失败结果不进入缓存）"""
+    if not translation or not translation.strip():
+        return True
+    return translation.startswith("翻译失败") or translation.startswith("[翻译失败")
+
+
+class SegmentTranslationCache:
+    """线程安全的LRU片段译文缓存"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled and max_entries > 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._fingerprints: "OrderedDict[int, tuple]" = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "SegmentTranslationCache":
+        """根据配置（config.json 中的 translation_cache 节）创建缓存"""
+        config = config or {}
+        return cls(max_entries=int(config.get('max_entries', DEFAULT_MAX_ENTRIES)),
+                   enabled=bool(config.get('enabled', True)))
+
+    def make_key(self, engine: str, model: str, text: str, terminology_dict: Optional[Dict],
+                 source_lang: str, target_lang: str, prompt: Optional[str]) -> str:
+        """计算缓存键，术语词典以其条目指纹参与计算"""
+        payload = json.dumps(
+            [engine, model, source_lang, target_lang, prompt or "",
+             self._terminology_fingerprint(terminology_dict), text],
+            ensure_ascii=False
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _terminology_fingerprint(self, terminology_dict: Optional[Dict]) -> str:
+        if not terminology_dict:
+            return ""
+        if len(terminology_dict) < _LARGE_TERMINOLOGY:
+            return json.dumps(sorted(terminology_dict.items()), ensure_ascii=False)
+
+        with self._lock:
+            memo = self._fingerprints.get(id(terminology_dict))
+            # 记录中保留词典引用，保证id不会被其他对象复用；与条目快照逐条比较，
+            # 原地修改（包括条目数不变的译法修改）后重新计算指纹
+            if memo is not None and memo[0] is terminology_dict and memo[1] == terminology_dict:
+                return memo[2]
+        snapshot = dict(terminology_dict)
+        fingerprint = hashlib.sha1(
+            json.dumps(sorted(snapshot.items()), ensure_ascii=False).encode('utf-8')).hexdigest()
+        with self._lock:
+            self._fingerprints[id(terminology_dict)] = (terminology_dict, snapshot, fingerprint)
+            while len(self._fingerprints) > _MAX_FINGERPRINT_MEMO:
+                self._fingerprints.popitem(last=False)
+        return fingerprint
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return translation
+
+    def put(self, key: str, translation: str) -> None:
+        if not self.enabled or is_failed_translation(translation):
+            return
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """返回缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译结果质量检查
+检测译文中的思考过程、提示词残留、未翻译内容和长度异常；文档处理器据此记录质量问题，
+翻译服务的级联路由据此决定本地草稿是否需要交给远程模型重新翻译
+"""
+
+import re
+
+
+def validate_translation_result(original_text: str, translated_text: str, location: str,
+                                source_lang: str, target_lang: str) -> list:
+    """
+    验证翻译结果的质量，检测潜在问题
+
+    Args:
+        original_text: 原文
+        translated_text: 译文
+        location: 位置信息
+        source_lang: 源语言代码
+        target_lang: 目标语言代码
+
+    Returns:
+        list: 发现的问题列表
+    """
+    issues = []
+
+    if not translated_text or not translated_text.strip():
+        issues.append(f"{location}: 翻译结果为空")
+        return issues
+
+    # 1. 检查是否包含思考过程残留
+    thinking_indicators = [
+        "让我", "我来", "我需要", "首先", "根据", "考虑到", "分析", "思考",
+        "这个术语", "在材料科学", "在英文中", "最合适", "最准确", "最恰当",
+        "应该翻译", "可以翻译", "比较合适", "在这个语境"
+    ]
+
+    for indicator in thinking_indicators:
+        if indicator in translated_text:
+            issues.append(f"{location}: 翻译结果包含思考过程 - '{indicator}'")
+            break
+
+    # 2. 检查是否包含提示词残留
+    prompt_indicators = [
+        "翻译结果", "译文", "以下是", "这是", "请将", "将以下",
+        "translation:", "translate:", "result:"
+    ]
+
+    for indicator in prompt_indicators:
+        if indicator.lower() in translated_text.lower():
+            issues.append(f"{location}: 翻译结果包含提示词 - '{indicator}'")
+            break
+
+    # 3. 检查中文→英文翻译是否完整
+    if source_lang == "zh" and target_lang == "en":
+        # 检查原文中的中文是否都被翻译
+        original_chinese = re.findall(r'[\u4e00-\u9fff]', original_text)
+        translated_chinese = re.findall(r'[\u4e00-\u9fff]', translated_text)
+
+        if len(original_chinese) > 0 and len(translated_chinese) > len(original_chinese) * 0.5:
+            issues.append(f"{location}: 可能存在未翻译的中文内容")
+
+        # 检查译文是否主要包含英文
+        english_chars = len(re.findall(r'[a-zA-Z]', translated_text))
+        total_chars = len(re.sub(r'\s', '', translated_text))
+        if total_chars > 0 and english_chars / total_chars < 0.3:
+            issues.append(f"{location}: 译文英文字符比例过低，可能翻译不完整")
+
+    # 4. 检查英文→中文翻译是否完整
+    elif source_lang == "en" and target_lang == "zh":
+        # 检查译文是否包含足够的中文
+        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', translated_text))
+        total_chars = len(re.sub(r'\s', '', translated_text))
+        if total_chars > 0 and chinese_chars / total_chars < 0.3:
+            issues.append(f"{location}: 译文中文字符比例过低，可能翻译不完整")
+
+    # 5. 检查是否原文和译文完全相同（可能未翻译）
+    if original_text.strip() == translated_text.strip() and len(original_text.strip()) > 3:
+        issues.append(f"{location}: 原文和译文完全相同，可能未翻译")
+
+    # 6. 检查长度异常
+    original_len = len(original_text.strip())
+    translated_len = len(translated_text.strip())
+
+    if translated_len < original_len * 0.2:
+        issues.append(f"{location}: 译文过短，可能翻译不完整")
+    elif translated_len > original_len * 5:
+        issues.append(f"{location}: 译文过长，可能包含多余内容")
+
+    return issues
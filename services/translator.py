@@ -5,14 +5,30 @@ import os
 from typing import Dict, Optional
 from abc import ABC, abstractmethod
 from .ollama_manager import setup_ollama
-import pandas as pd
 from datetime import datetime
-from .ollama_translator import OllamaTranslator
-from .base_translator import BaseTranslator
+from .ollama_translator import OllamaTranslator, DEFAULT_KEEP_ALIVE, DEFAULT_MAX_NUM_CTX
+from .base_translator import BaseTranslator, estimate_tokens
 from .siliconflow_translator import SiliconFlowTranslator
 from .zhipuai_translator import ZhipuAITranslator
 from .intranet_translator import IntranetTranslator
+import re
+import time
+import threading
 import traceback
+import contextlib
+from collections import Counter
+from utils.hot_log import configure_hot_path_logging
+from .translation_cache import SegmentTranslationCache, is_failed_translation
+from .singleflight import SingleFlight
+from .batch_aggregator import BatchAggregator, BATCH_INSTRUCTION, number_segments, split_numbered
+from .engine_probe import EngineProber, ProbeCache, probe_external_network, DEFAULT_NETWORK_TIMEOUT
+from .engine_health import EngineHealthMonitor, STATE_DOWN, STATE_HEALTHY
+from .model_catalog import ModelCatalog
+from .prompt_builder import take_reported_usage, configure_prompt_profiles
+from .load_balancer import EngineLoadBalancer
+from .engine_router import ComplexityRouter, ROUTE_LOCAL, ROUTE_REMOTE, ROUTE_ESCALATED
+from .translation_checks import validate_translation_result
+from utils import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +53,18 @@ class TranslationService:
         self.preferred_model = preferred_model
         self.load_config()
 
+        # 片段翻译缓存（同一服务实例翻译的所有文档共享）
+        self.segment_cache = SegmentTranslationCache.from_config(self.config.get('translation_cache'))
+        # 合并进行中的相同片段请求（并发任务翻译同一模板时相同片段只请求一次）
+        self.inflight = SingleFlight.from_config(self.config.get('inflight_coalescing'))
+        # 跨任务的短片段微批处理（同时有多个片段在翻译时才合并）
+        self.aggregator = BatchAggregator.from_config(self._translate_batch, self.config.get('batch_aggregation'))
+        self._pending_segments = 0
+
+        # 翻译用量统计（片段数、估算token数等）
+        self.usage = Counter()
+        self._usage_lock = threading.Lock()
+
         # 初始化 translators 字典
         self.translators = {}
 
@@ -50,6 +78,34 @@ class TranslationService:
         self._stop_flag = False  # 停止标志
         self._current_operations = []  # 当前正在进行的操作
 
+        # 后台探测（外网连通性、Ollama模型列表），结果缓存到磁盘
+        probe_config = self.config.get('engine_probe', {})
+        self.prober = EngineProber(ProbeCache.from_config(probe_config))
+        self._network_timeout = float(probe_config.get('network_timeout', DEFAULT_NETWORK_TIMEOUT))
+        # 用户在探测结束前手动切换过翻译器时，探测结果不再改动当前选择
+        self._translator_selected = bool(preferred_engine)
+
+        # 各引擎模型列表缓存：获取时不等待网络，过期后在后台刷新
+        self.models = ModelCatalog.from_config(self._load_models, self.config.get('model_catalog'),
+                                               defaults=self._configured_models)
+
+        # 引擎健康监测：真实请求随时计入，后台探测由 start_health_monitor() 启动
+        health_config = self.config.get('engine_health', {})
+        self.health = EngineHealthMonitor.from_config(self, health_config)
+        self._route_around_down = health_config.get('route_around_down', True)
+        self._routed_engine = None
+
+        # 多引擎负载均衡：按权重或实时处理能力把片段分摊到多个引擎，每个引擎有独立的并发上限
+        self.balancer = EngineLoadBalancer.from_config(self.config.get('load_balancing'), self.health)
+        # 当前线程最近一个片段由哪个引擎翻译（写入翻译对照表）
+        self._attribution = threading.local()
+
+        # 按片段复杂度路由：简单片段交给本地小模型（本地翻译器在首次使用时创建）
+        self.router = ComplexityRouter.from_config(self.config.get('engine_routing'))
+        self._local_translator = None
+        self._local_translator_lock = threading.Lock()
+        self._local_retry_at = 0.0
+
         # 根据用户选择初始化对应的翻译器
         try:
             if preferred_engine:
@@ -63,23 +119,104 @@ class TranslationService:
             logger.error(f"初始化翻译器失败: {str(e)}")
             logger.error(traceback.format_exc())
 
-        # 设置Ollama环境（如果需要）
+        # 负载均衡的引擎都需要初始化
+        if self.balancer.enabled:
+            for engine in self.balancer.engines:
+                if engine not in self.translators:
+                    self._init_selected_translator(engine)
+            logger.info(f"多引擎负载均衡已启用（{self.balancer.strategy}）: "
+                        f"{[engine for engine in self.balancer.engines if engine in self.translators]}")
+
+        # 查询Ollama已安装的模型（后台执行，不自动拉取模型）
         if preferred_engine == 'ollama' or not preferred_engine:
-            available_models = setup_ollama()
-            if available_models:
-                self.config['fallback_translator']['available_models'] = available_models
-                if self.config['fallback_translator']['model'] not in available_models:
-                    self.config['fallback_translator']['model'] = available_models[0]
+            self.prober.submit('ollama_models', setup_ollama, self._apply_ollama_models)
 
-        # 如果没有指定首选引擎，则进行智能选择
+        # 如果没有指定首选引擎，则进行智能选择：配置或环境变量已指明内网时立即选择，否则在后台检测外网后选择
         if not preferred_engine:
-            # 检查是否为内网环境
-            is_intranet = self._detect_intranet_environment()
-            # 智能选择默认翻译器
-            self._smart_select_default_translator(is_intranet)
-
-        # 初始化时只进行一次轻量级检测，不进行网络连接测试
-        logger.info("翻译服务初始化完成，将在用户选择时进行服务状态检测")
+            if self._configured_intranet_mode():
+                self._smart_select_default_translator(True)
+            else:
+                self.prober.submit('external_network', lambda: probe_external_network(self._network_timeout),
+                                   self._on_network_detected)
+
+        # 初始化时不进行任何阻塞的网络检测
+        logger.info("翻译服务初始化完成，引擎探测在后台进行，将在用户选择时进行服务状态检测")
+
+    def _apply_ollama_models(self, available_models: list) -> None:
+        """Ollama模型列表探测完成：更新可用模型，当前模型未安装时改用第一个已安装的模型"""
+        if not available_models:
+            return
+        self.models.put('ollama', available_models)
+        fallback_config = self.config.setdefault('fallback_translator', {})
+        fallback_config['available_models'] = available_models
+        if fallback_config.get('model') not in available_models:
+            fallback_config['model'] = available_models[0]
+            ollama = self.translators.get('ollama')
+            if ollama is not None and getattr(ollama, 'model', None) not in available_models:
+                ollama.model = available_models[0]
+
+    def _on_network_detected(self, online: bool) -> None:
+        """外网连通性探测完成：用户尚未手动选择时智能选择默认翻译器"""
+        if self._translator_selected:
+            return
+        self._smart_select_default_translator(not online)
+
+    def start_health_monitor(self) -> None:
+        """启动引擎健康监测的后台探测（Web服务启动时调用）"""
+        self.health.start()
+
+    def stop_health_monitor(self) -> None:
+        self.health.stop()
+
+    def get_engine_health(self) -> Dict[str, Dict]:
+        """各引擎的健康状态：状态、加权耗时（毫秒）、加权错误率等"""
+        return self.health.snapshot()
+
+    @contextlib.contextmanager
+    def job_session(self):
+        """
+        翻译任务期间的引擎会话：任务开始时通知当前引擎（Ollama据此预热模型并在任务期间保持加载），
+        任务结束时通知其释放
+        """
+        engines = [self.translators.get(self.current_translator_type)]
+        if self.balancer.enabled:
+            engines.extend(self.translators.get(engine) for engine in self.balancer.engines)
+        if self.router.enabled:
+            # 复杂度路由启用时同时预热本地小模型
+            engines.append(self._local_draft_translator())
+        engines = [engine for engine in dict.fromkeys(engines) if engine is not None]
+        for engine in engines:
+            if hasattr(engine, 'begin_job'):
+                engine.begin_job()
+        try:
+            yield
+        finally:
+            for engine in engines:
+                if hasattr(engine, 'end_job'):
+                    engine.end_job()
+
+    def engine_capacity(self, translator_type: str = None) -> Optional[int]:
+        """指定引擎（默认当前引擎，启用负载均衡时为各引擎并发上限之和）可同时处理的请求数，未知时返回None"""
+        if translator_type is None and self.balancer.enabled:
+            return self.balancer.capacity(self.translators) or None
+        engine = self.translators.get(translator_type or self.current_translator_type)
+        return getattr(engine, 'parallel_slots', None)
+
+    def segment_concurrency(self) -> int:
+        """一个任务内可同时翻译的片段数：启用负载均衡时为各引擎并发上限之和，否则逐个翻译"""
+        if self.balancer.enabled:
+            return max(self.balancer.capacity(self.translators), 1)
+        return 1
+
+    def take_last_engine(self) -> Optional[str]:
+        """取出并清除当前线程最近一个片段的翻译来源（引擎名，片段缓存命中时为"cache"）"""
+        engine = getattr(self._attribution, 'engine', None)
+        self._attribution.engine = None
+        return engine
+
+    def wait_for_probes(self, timeout: Optional[float] = None) -> bool:
+        """等待后台引擎探测结束（命令行等需要确定引擎后再开始的场景使用），返回是否全部完成"""
+        return self.prober.wait(timeout)
 
     def _init_selected_translator(self, engine_type, model_name=None):
         """
@@ -151,6 +288,11 @@ class TranslationService:
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = json.load(f)
 
+        # 应用热路径日志配置
+        configure_hot_path_logging(self.config.get('hot_path_logging'))
+        # 应用提示词档位配置
+        configure_prompt_profiles(self.config.get('prompt_profiles'))
+
         # 初始化主要翻译器
         try:
             primary_config = self.config['primary_translator']
@@ -211,6 +353,7 @@ class TranslationService:
                 logger.info(f"跳过网络检查，快速切换到: {translator_type}")
 
             self.current_translator_type = translator_type
+            self._translator_selected = True
             # 更新配置文件
             self.config["current_translator_type"] = translator_type
             config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
@@ -279,22 +422,27 @@ class TranslationService:
             pass
 
     def _check_translator_availability(self, translator_type: str) -> bool:
-        """检查指定翻译器的可用性"""
+        """检查指定翻译器的可用性，结果同时计入健康监测"""
+        started = time.perf_counter()
         try:
             if translator_type == "zhipuai":
-                return self._check_zhipuai_available()
+                available = self._check_zhipuai_available()
             elif translator_type == "ollama":
-                return self.check_ollama_service()
+                available = self.check_ollama_service()
             elif translator_type == "siliconflow":
-                return self.check_siliconflow_service()
+                available = self.check_siliconflow_service()
             elif translator_type == "intranet":
-                return self.check_intranet_service()
+                available = self.check_intranet_service()
             else:
                 logger.warning(f"未知的翻译器类型: {translator_type}")
                 return False
         except Exception as e:
             logger.error(f"检查翻译器 {translator_type} 可用性失败: {str(e)}")
-            return False
+            available = False
+        if translator_type in self.translators:
+            self.health.record(translator_type, time.perf_counter() - started, available,
+                               None if available else "可用性检查失败", probe=True)
+        return available
 
     def set_model(self, model: str):
         """设置当前翻译器使用的模型"""
@@ -347,14 +495,36 @@ class TranslationService:
         return True
 
     def get_available_models(self, translator_type: str = None) -> list:
-        """获取指定翻译器类型的可用模型列表"""
+        """获取指定翻译器类型的可用模型列表（来自模型列表缓存，不等待网络；过期时在后台刷新）"""
         if translator_type is None:
             translator_type = self.current_translator_type
+        return self.models.get(translator_type)
+
+    def _load_models(self, translator_type: str) -> list:
+        """从翻译器加载模型列表（模型列表缓存的加载函数，在后台线程中调用）"""
+        translator = self.translators.get(translator_type)
+        if translator and hasattr(translator, "get_available_models"):
+            models = translator.get_available_models()
+            if translator_type == "ollama" and models:
+                self.config.setdefault('fallback_translator', {})['available_models'] = models
+            return models
+        return []
 
+    def _configured_models(self, translator_type: str) -> list:
+        """配置文件中记录的模型列表，模型列表首次加载完成前使用"""
+        section = {
+            "zhipuai": "zhipuai_translator",
+            "ollama": "fallback_translator",
+            "siliconflow": "siliconflow_translator",
+            "intranet": "intranet_translator"
+        }.get(translator_type)
+        models = self.config.get(section, {}).get('available_models') if section else None
+        if models:
+            return models
         translator = self.translators.get(translator_type)
-        if translator:
-            if hasattr(translator, "get_available_models"):
-                return translator.get_available_models()
+        # 远程引擎的模型列表是内置的，直接读取不访问网络
+        if translator_type != "ollama" and translator and hasattr(translator, "get_available_models"):
+            return translator.get_available_models()
         return []
 
     def get_current_translator_type(self) -> str:
@@ -392,25 +562,17 @@ class TranslationService:
             translator_type = self.current_translator_type
 
         if translator_type == "ollama":
-            # 刷新Ollama模型列表
-            available_models = setup_ollama()
+            # 刷新Ollama模型列表（重新加载，不使用缓存）
+            available_models = self.models.refresh("ollama")
             if available_models:
-                self.config['fallback_translator']['available_models'] = available_models
+                self.prober.cache.invalidate('ollama_models')
                 # 重新初始化Ollama翻译器
                 self.translators["ollama"] = self._init_ollama_translator()
                 return available_models
-        elif translator_type == "zhipuai":
-            # 对于智谱AI，重新检查连接并返回模型列表
-            if self._check_zhipuai_available():
-                return self.translators["zhipuai"].get_available_models()
-        elif translator_type == "siliconflow":
-            # 对于硅基流动，检查连接并返回模型列表
-            if self.check_siliconflow_service():
-                return self.translators["siliconflow"].get_available_models()
-        elif translator_type == "intranet":
-            # 对于内网翻译器，检查连接并返回模型列表
-            if self.check_intranet_service():
-                return self.translators["intranet"].get_available_models()
+        elif translator_type in ("zhipuai", "siliconflow", "intranet"):
+            # 远程引擎的可用性以健康监测为准，不在刷新时临时检测连接
+            if translator_type in self.translators and self.health.is_available(translator_type) is not False:
+                return self.models.refresh(translator_type)
 
         return []
 
@@ -453,29 +615,103 @@ class TranslationService:
         if not text.strip():
             return ""
 
+        with self._usage_lock:
+            self._pending_segments += 1
+        try:
+            with tracing.segment_span(chars=len(text)):
+                return self._translate_segment(text, terminology_dict, source_lang, target_lang, prompt)
+        finally:
+            with self._usage_lock:
+                self._pending_segments -= 1
+
+    def _translate_segment(self, text: str, terminology_dict: Optional[Dict], source_lang: str, target_lang: str, prompt: Optional[str]) -> str:
+        """查询片段缓存，未命中时调用翻译引擎并写入缓存；相同片段正在翻译时等待其结果，不重复请求"""
+        cache_key = None
+        if self.segment_cache.enabled or self.inflight.enabled:
+            model = self.get_current_model()
+            if self.router.enabled:
+                model = f"{model}|{self.router.signature}"
+            if self.balancer.enabled:
+                model = f"{model}|{self.balancer.signature}"
+            cache_key = self.segment_cache.make_key(self.current_translator_type, model, text,
+                                                    terminology_dict, source_lang, target_lang, prompt)
+        if self.segment_cache.enabled:
+            cached = self.segment_cache.get(cache_key)
+            metrics.SEGMENT_CACHE.inc(result="hit" if cached is not None else "miss")
+            if cached is not None:
+                self._attribution.engine = "cache"
+                self._record_usage(text, cached, cached=True)
+                return cached
+
+        if cache_key is None:
+            translation = self._translate_text_uncached(text, terminology_dict, source_lang, target_lang, prompt)
+            self._record_usage(text, translation, cached=False)
+            return translation
+
+        def translate() -> tuple:
+            translation = self._translate_text_uncached(text, terminology_dict, source_lang, target_lang, prompt)
+            if self.segment_cache.enabled:
+                self.segment_cache.put(cache_key, translation)
+            return translation, getattr(self._attribution, 'engine', None)
+
+        (translation, engine), coalesced = self.inflight.do(cache_key, translate)
+        if coalesced:
+            # 等待了其他任务对同一片段的请求，译文来源沿用该请求的引擎
+            self._attribution.engine = engine
+            metrics.SEGMENT_COALESCED.inc()
+        self._record_usage(text, translation, cached=False, coalesced=coalesced)
+        return translation
+
+    def _record_usage(self, text: str, translation: str, cached: bool, coalesced: bool = False) -> None:
+        metrics.SEGMENTS.inc(engine=self.current_translator_type)
+        with self._usage_lock:
+            self.usage['segments'] += 1
+            if cached:
+                self.usage['cache_hits'] += 1
+            elif coalesced:
+                self.usage['coalesced'] += 1
+            else:
+                self.usage['input_tokens'] += estimate_tokens(text)
+                self.usage['output_tokens'] += estimate_tokens(translation or "")
+
+    def get_usage_stats(self) -> Dict:
+        """
+        返回翻译用量统计：片段数、缓存命中数、合并到进行中请求的片段数、估算的输入/输出token数，
+        以及接口返回的提示词token数和其中命中服务端前缀缓存的token数
+        """
+        with self._usage_lock:
+            return dict(self.usage)
+
+    def _translate_text_uncached(self, text: str, terminology_dict: Optional[Dict] = None, source_lang: str = "zh", target_lang: str = "en", prompt: str = None) -> str:
+        """调用当前翻译器（失败时切换备用翻译器）翻译单个文本片段，不经过缓存"""
         # 检查是否需要停止
         if self._stop_flag:
             logger.info("翻译操作被停止")
             return ""
 
-        translator = self.translators.get(self.current_translator_type)
+        if self.router.enabled:
+            translation = self._translate_local_draft(text, terminology_dict, source_lang, target_lang, prompt)
+            if translation is not None:
+                return translation
+
+        if self.balancer.enabled:
+            return self._translate_balanced(text, terminology_dict, source_lang, target_lang, prompt)
+
+        engine_type = self._route_engine()
+        translator = self.translators.get(engine_type)
+        if translator and self._pending_segments > 1 and self.aggregator.accepts(engine_type, text):
+            translation = self._translate_aggregated(engine_type, translator, text, terminology_dict, source_lang, target_lang, prompt)
+            if translation is not None:
+                return translation
         if not translator:
-            logger.error(f"未找到{self.current_translator_type}翻译器")
+            logger.error(f"未找到{engine_type}翻译器")
             # 尝试切换到备用翻译器
-            fallback_type = "ollama" if self.current_translator_type != "ollama" else "zhipuai"
-            fallback_translator = self.translators.get(fallback_type)
+            fallback_type = self._choose_fallback(engine_type)
+            fallback_translator = self.translators.get(fallback_type) if fallback_type else None
             if fallback_translator:
                 logger.warning(f"尝试使用{fallback_type}作为备用翻译器")
                 try:
-                    # 检查翻译器类型并使用正确的参数调用
-                    if fallback_type == "ollama" and isinstance(fallback_translator, OllamaTranslator):
-                        # OllamaTranslator.translate 方法的参数与其他翻译器不同
-                        return fallback_translator.translate(text, terminology_dict)
-                    elif isinstance(fallback_translator, (ZhipuAITranslator, SiliconFlowTranslator)):
-                        return fallback_translator.translate(text, terminology_dict, source_lang, target_lang, prompt)
-                    else:
-                        # 对于其他可能的翻译器，如果它们有统一的接口
-                        return fallback_translator.translate(text, terminology_dict, source_lang, target_lang, prompt)
+                    return self._call_engine(fallback_type, fallback_translator, text, terminology_dict, source_lang, target_lang, prompt)
                 except Exception as e:
                     logger.error(f"{fallback_type}翻译失败: {str(e)}")
                     raise
@@ -483,36 +719,207 @@ class TranslationService:
 
         try:
             # 确保将 terminology_dict 传递给实际的翻译器
-            if isinstance(translator, (ZhipuAITranslator, SiliconFlowTranslator, IntranetTranslator)):
-                return translator.translate(text, terminology_dict, source_lang, target_lang, prompt)
-            elif isinstance(translator, OllamaTranslator):
-                 # OllamaTranslator.translate 方法的参数与其他翻译器不同
-                return translator.translate(text, terminology_dict)
-            else:
-                # 对于其他可能的翻译器，如果它们有统一的接口
-                return translator.translate(text, terminology_dict, source_lang, target_lang, prompt)
+            return self._call_engine(engine_type, translator, text, terminology_dict, source_lang, target_lang, prompt)
         except Exception as e:
-            logger.error(f"{self.current_translator_type}翻译失败: {str(e)}")
+            logger.error(f"{engine_type}翻译失败: {str(e)}")
             # 尝试切换到备用翻译器
-            fallback_type = "ollama" if self.current_translator_type != "ollama" else "zhipuai"
-            fallback_translator = self.translators.get(fallback_type)
+            fallback_type = self._choose_fallback(engine_type)
+            fallback_translator = self.translators.get(fallback_type) if fallback_type else None
             if fallback_translator:
                 logger.warning(f"尝试使用{fallback_type}作为备用翻译器")
                 try:
-                    # 检查翻译器类型并使用正确的参数调用
-                    if fallback_type == "ollama" and isinstance(fallback_translator, OllamaTranslator):
-                        # OllamaTranslator.translate 方法的参数与其他翻译器不同
-                        return fallback_translator.translate(text, terminology_dict)
-                    elif isinstance(fallback_translator, (ZhipuAITranslator, SiliconFlowTranslator, IntranetTranslator)):
-                        return fallback_translator.translate(text, terminology_dict, source_lang, target_lang, prompt)
-                    else:
-                        # 对于其他可能的翻译器，如果它们有统一的接口
-                        return fallback_translator.translate(text, terminology_dict, source_lang, target_lang, prompt)
+                    return self._call_engine(fallback_type, fallback_translator, text, terminology_dict, source_lang, target_lang, prompt)
                 except Exception as fallback_e:
                     logger.error(f"{fallback_type}翻译失败: {str(fallback_e)}")
-                    raise Exception(f"{self.current_translator_type}翻译失败: {str(e)}; {fallback_type}翻译失败: {str(fallback_e)}")
+                    raise Exception(f"{engine_type}翻译失败: {str(e)}; {fallback_type}翻译失败: {str(fallback_e)}")
             raise
 
+    def _translate_local_draft(self, text: str, terminology_dict: Optional[Dict], source_lang: str, target_lang: str, prompt: Optional[str]) -> Optional[str]:
+        """
+        按复杂度路由：简单片段交给本地小模型并返回译文；复杂片段、本地模型不可用、本地翻译失败，
+        以及未通过质量检查的本地译文返回None，由当前（远程）翻译器翻译
+        """
+        translator = self._local_draft_translator()
+        if translator is None:
+            return None
+        if self.router.decide(text, terminology_dict) != ROUTE_LOCAL:
+            metrics.ROUTED_SEGMENTS.inc(route=ROUTE_REMOTE)
+            return None
+
+        try:
+            draft = self._call_engine(self.router.local_engine, translator, text, terminology_dict, source_lang, target_lang, prompt)
+        except Exception as e:
+            logger.warning(f"本地模型翻译失败，改用{self.current_translator_type}: {str(e)}")
+            draft = None
+
+        # 两种模式都检查本地译文（含译文文字是否符合目标语言），未通过时交给当前翻译器
+        if draft is None or is_failed_translation(draft):
+            issues = ["本地模型翻译失败"]
+        else:
+            issues = validate_translation_result(text, draft, "本地草稿", source_lang, target_lang)
+
+        if issues:
+            logger.debug(f"本地草稿未采用，交给{self.current_translator_type}重新翻译: {issues}")
+            metrics.ROUTED_SEGMENTS.inc(route=ROUTE_ESCALATED)
+            with self._usage_lock:
+                self.usage['escalated_segments'] += 1
+            return None
+
+        metrics.ROUTED_SEGMENTS.inc(route=ROUTE_LOCAL)
+        with self._usage_lock:
+            self.usage['local_segments'] += 1
+        return draft
+
+    def _translate_aggregated(self, engine_type: str, translator, text: str, terminology_dict: Optional[Dict], source_lang: str, target_lang: str, prompt: Optional[str]) -> Optional[str]:
+        """交给微批聚合器与其他任务的同组短片段合并翻译，未能合并时返回None（由调用方单独翻译）"""
+        model = self.get_current_model() if engine_type == self.current_translator_type else ""
+        shared_terms = terminology_dict if self.aggregator.is_shared_terms(terminology_dict) else None
+        key = self.segment_cache.make_key(engine_type, model, "", shared_terms, source_lang, target_lang, prompt)
+        context = (engine_type, translator, shared_terms, source_lang, target_lang, prompt)
+        translation = self.aggregator.submit(key, context, text, terminology_dict).result()
+        if translation is None:
+            metrics.BATCHED_SEGMENTS.inc(result="single")
+            return None
+        metrics.BATCHED_SEGMENTS.inc(result="batched")
+        self._attribution.engine = engine_type
+        with self._usage_lock:
+            self.usage['batched'] += 1
+        return translation
+
+    def _translate_batch(self, context: tuple, texts: list, terms: Dict[str, str]) -> list:
+        """微批聚合器的发送函数：把同组片段编号后合并成一次请求，按编号拆分译文"""
+        engine_type, translator, shared_terms, source_lang, target_lang, prompt = context
+        glossary = dict(shared_terms or {})
+        glossary.update(terms)
+        instruction = f"{BATCH_INSTRUCTION}\n{prompt}" if prompt else BATCH_INSTRUCTION
+        translation = self._call_engine(engine_type, translator, number_segments(texts), glossary or None,
+                                        source_lang, target_lang, instruction)
+        if is_failed_translation(translation):
+            raise Exception(translation or "翻译结果为空")
+        try:
+            translations = split_numbered(translation, len(texts))
+        except ValueError:
+            self.aggregator.record_parse(engine_type, False)
+            raise
+        self.aggregator.record_parse(engine_type, True)
+        return translations
+
+    def _translate_balanced(self, text: str, terminology_dict: Optional[Dict], source_lang: str, target_lang: str, prompt: Optional[str]) -> str:
+        """负载均衡模式：选出有空闲槽位的引擎翻译片段，失败时排除该引擎后改用其他引擎"""
+        tried = []
+        errors = []
+        failed_translation = None
+        while True:
+            with self.balancer.slot(self.translators, exclude=tried) as engine_type:
+                if engine_type is None:
+                    break
+                tried.append(engine_type)
+                try:
+                    translation = self._call_engine(engine_type, self.translators[engine_type], text, terminology_dict, source_lang, target_lang, prompt)
+                except Exception as e:
+                    logger.warning(f"{engine_type}翻译失败，改用其他引擎: {str(e)}")
+                    errors.append(f"{engine_type}翻译失败: {str(e)}")
+                    continue
+                if not is_failed_translation(translation):
+                    return translation
+                logger.warning(f"{engine_type}翻译结果无效，改用其他引擎")
+                failed_translation = translation
+
+        if failed_translation is not None:
+            return failed_translation
+        if errors:
+            raise Exception("; ".join(errors))
+        raise Exception("未找到可用的翻译器")
+
+    def _local_draft_translator(self):
+        """
+        复杂度路由使用的本地翻译器：当前翻译器就是该本地模型、本地翻译器无法创建
+        或健康监测判定本地引擎不可用时返回None
+        """
+        router = self.router
+        if self.current_translator_type == router.local_engine and self.get_current_model() == router.local_model:
+            return None
+        if self.health.is_available(router.local_engine) is False:
+            # 本地引擎不在后台探测范围内时（只为路由创建），每个探测间隔放行一次请求以便恢复后重新使用
+            if router.local_engine in self.translators or time.time() - self._local_retry_at < self.health.interval:
+                return None
+            self._local_retry_at = time.time()
+
+        with self._local_translator_lock:
+            if self._local_translator is None:
+                existing = self.translators.get(router.local_engine)
+                if existing is not None and getattr(existing, 'model', None) == router.local_model:
+                    self._local_translator = existing
+                elif router.local_engine == 'ollama':
+                    self._local_translator = self._init_ollama_translator(router.local_model)
+                if self._local_translator is None:
+                    logger.warning(f"无法创建本地翻译器 {router.local_engine}/{router.local_model}，停用复杂度路由")
+                    router.enabled = False
+                else:
+                    logger.info(f"复杂度路由已启用（{router.mode}），简单片段使用 {router.local_engine}/{router.local_model}")
+            return self._local_translator
+
+    def _route_engine(self) -> str:
+        """
+        选择本次请求使用的引擎：通常是当前翻译器；健康监测判定当前翻译器不可用且有健康的引擎时，
+        改用其中最快的一个（只影响本次请求，不改变用户的选择，当前翻译器恢复后自动切回）
+        """
+        current = self.current_translator_type
+        routed = current
+        if self._route_around_down and self.health.probing and self.health.state(current) == STATE_DOWN:
+            alternative = self.health.choose(engine for engine in self.translators if engine != current)
+            if alternative and self.health.state(alternative) == STATE_HEALTHY:
+                routed = alternative
+        if routed != self._routed_engine:
+            if routed != current:
+                logger.warning(f"{current}翻译器当前不可用，临时改用{routed}")
+            elif self._routed_engine is not None and self._routed_engine != current:
+                logger.info(f"{current}翻译器已恢复")
+            self._routed_engine = routed
+        return routed
+
+    def _choose_fallback(self, failed_engine: str) -> Optional[str]:
+        """选择备用翻译器：已配置的其他引擎中最快的可用引擎，没有健康数据时沿用原来的顺序（Ollama优先，其次智谱AI）"""
+        default = "ollama" if failed_engine != "ollama" else "zhipuai"
+        candidates = [engine for engine in [default] + list(self.translators)
+                      if engine != failed_engine and engine in self.translators]
+        candidates = list(dict.fromkeys(candidates))
+        if not candidates:
+            return None
+        return self.health.choose(candidates) or candidates[0]
+
+    def _call_engine(self, engine_type: str, translator, text: str, terminology_dict: Optional[Dict], source_lang: str, target_lang: str, prompt: Optional[str]) -> str:
+        """调用指定翻译器翻译一个片段，并记录该引擎的请求耗时、结果和估算token数"""
+        started = time.perf_counter()
+        outcome = "error"
+        error = None
+        take_reported_usage()
+        try:
+            translation = translator.translate(text, terminology_dict, source_lang, target_lang, prompt)
+            outcome = "failed" if is_failed_translation(translation) else "ok"
+            reported = take_reported_usage()
+            if reported:
+                # 接口返回的提示词token数和命中前缀缓存的token数
+                with self._usage_lock:
+                    self.usage['prompt_tokens'] += reported['prompt_tokens']
+                    self.usage['cached_tokens'] += reported['cached_tokens']
+            if outcome == "ok":
+                self._attribution.engine = engine_type
+                metrics.ENGINE_TOKENS.inc(estimate_tokens(text), engine=engine_type, direction="in")
+                metrics.ENGINE_TOKENS.inc(estimate_tokens(translation), engine=engine_type, direction="out")
+            return translation
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.health.record(engine_type, elapsed, outcome == "ok", error or (None if outcome == "ok" else "翻译结果无效"))
+            metrics.ENGINE_LATENCY.observe(elapsed, engine=engine_type)
+            metrics.ENGINE_REQUESTS.inc(engine=engine_type, outcome=outcome)
+            tracing.record_span(engine_type, "engine", started, elapsed, segment_id=tracing.current_segment_id(),
+                                model=self.get_current_model() if engine_type == self.current_translator_type else None,
+                                outcome=outcome)
+
     def check_ollama_service(self) -> bool:
         """检查Ollama服务是否可用"""
         try:
@@ -597,7 +1004,8 @@ class TranslationService:
             if not hasattr(self, 'translation_pairs') or not self.translation_pairs:
                 return None
 
-            # 创建DataFrame
+            # 创建DataFrame（pandas只在导出时导入，加快翻译服务启动）
+            import pandas as pd
             df = pd.DataFrame({
                 '原文': [pair[0] for pair in self.translation_pairs],
                 f'{target_language}翻译': [pair[1] for pair in self.translation_pairs]
@@ -657,7 +1065,12 @@ class TranslationService:
                     model=model,
                     api_url=api_url,
                     model_list_timeout=model_list_timeout,
-                    translate_timeout=translate_timeout
+                    translate_timeout=translate_timeout,
+                    keep_alive=ollama_config.get("keep_alive", DEFAULT_KEEP_ALIVE),
+                    idle_keep_alive=ollama_config.get("idle_keep_alive"),
+                    num_ctx=ollama_config.get("num_ctx"),
+                    max_num_ctx=ollama_config.get("max_num_ctx", DEFAULT_MAX_NUM_CTX),
+                    num_parallel=ollama_config.get("num_parallel")
                 )
         except Exception as e:
             logger.error(f"初始化Ollama翻译器失败: {str(e)}")
@@ -761,50 +1174,48 @@ class TranslationService:
             logger.error(f"初始化内网翻译器失败: {str(e)}")
         return None
 
-    def _detect_intranet_environment(self) -> bool:
-        """检测是否为内网环境"""
-        try:
-            import os
-            import socket
+    def _configured_intranet_mode(self) -> bool:
+        """配置文件或环境变量是否已指明内网/离线环境（不进行网络检测）"""
+        # 1. 检查配置文件设置
+        env_config = self.config.get('environment', {})
+        if env_config.get('intranet_mode', False):
+            logger.info("配置文件中启用了内网模式")
+            return True
 
-            # 1. 检查配置文件设置
-            env_config = self.config.get('environment', {})
-            if env_config.get('intranet_mode', False):
-                logger.info("配置文件中启用了内网模式")
-                return True
+        if env_config.get('offline_mode', False):
+            logger.info("配置文件中启用了离线模式")
+            return True
 
-            if env_config.get('offline_mode', False):
-                logger.info("配置文件中启用了离线模式")
-                return True
+        if env_config.get('skip_network_checks', False):
+            logger.info("配置文件中设置跳过网络检查")
+            return True
 
-            if env_config.get('skip_network_checks', False):
-                logger.info("配置文件中设置跳过网络检查")
-                return True
+        # 2. 检查环境变量
+        if os.getenv('OFFLINE_MODE', '').lower() in ['true', '1', 'yes']:
+            logger.info("检测到离线模式环境变量")
+            return True
 
-            # 2. 检查环境变量
-            if os.getenv('OFFLINE_MODE', '').lower() in ['true', '1', 'yes']:
-                logger.info("检测到离线模式环境变量")
-                return True
+        if os.getenv('INTRANET_MODE', '').lower() in ['true', '1', 'yes']:
+            logger.info("检测到内网模式环境变量")
+            return True
+
+        return False
 
-            if os.getenv('INTRANET_MODE', '').lower() in ['true', '1', 'yes']:
-                logger.info("检测到内网模式环境变量")
+    def _detect_intranet_environment(self) -> bool:
+        """检测是否为内网环境（优先使用后台探测的结果，尚无结果时等待探测完成）"""
+        try:
+            if self._configured_intranet_mode():
                 return True
 
-            # 3. 尝试连接外网进行检测（快速检测）
-            try:
-                # 尝试连接DNS服务器（快速）
-                socket.create_connection(("8.8.8.8", 53), timeout=2)
+            # 3. 尝试连接外网进行检测（与后台探测共用结果和缓存）
+            online = self.prober.submit(
+                'external_network', lambda: probe_external_network(self._network_timeout)
+            ).result()
+            if online:
                 logger.info("检测到外网连接，非内网环境")
                 return False
-            except (socket.timeout, socket.error):
-                try:
-                    # 再尝试连接国内常用网站
-                    socket.create_connection(("www.baidu.com", 80), timeout=2)
-                    logger.info("检测到外网连接，非内网环境")
-                    return False
-                except (socket.timeout, socket.error):
-                    logger.warning("无法连接外网，判断为内网环境")
-                    return True
+            logger.warning("无法连接外网，判断为内网环境")
+            return True
 
         except Exception as e:
             logger.error(f"检测内网环境失败: {str(e)}")
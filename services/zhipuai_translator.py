@@ -8,6 +8,9 @@ import ssl
 import os
 from typing import Optional, Dict
 from .base_translator import BaseTranslator
+from .prompt_builder import (build_messages, report_usage, choose_profile, compact_system, minimal_system,
+                             record_prompt, PROFILE_FULL, PROFILE_COMPACT)
+from utils.hot_log import HotPathLogger, CATEGORY_TERMS, CATEGORY_PROMPTS, CATEGORY_SEGMENTS
 from urllib3.exceptions import InsecureRequestWarning
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -28,6 +31,30 @@ class TLSAdapter(HTTPAdapter):
 
 logger = logging.getLogger(__name__)
 
+# 系统消息中固定的工作要求和示例说明
+SYSTEM_MESSAGE = (
+    "你是一位专业的翻译助手。请严格按照以下要求工作：\n"
+    "1. 只输出最终的翻译结果，不要包含任何分析、解释、思考过程或多余的文字\n"
+    "2. 不要使用'让我分析'、'根据上下文'、'这个术语'等表述\n"
+    "3. 不要输出'翻译结果：'、'译文：'等标记\n"
+    "4. 直接给出准确、自然的翻译结果\n"
+    "5. 如果文本包含多个条目（用分号、句号或数字序号分隔），必须完整翻译所有条目，不要遗漏任何部分\n"
+    "6. 保持原文的结构和格式，包括数字序号、分号等分隔符\n\n"
+    "示例：\n"
+    "原文：1、产品质量合格；2、包装完整。\n"
+    "正确翻译：1. Product quality is qualified; 2. Packaging is complete.\n"
+    "错误翻译（不完整）：Packaging is complete.\n\n"
+    "原文：备注：1、按照标准A分类；2、按照标准B检测。\n"
+    "正确翻译：Note: 1. Classify according to standard A; 2. Test according to standard B.\n"
+    "错误翻译（不完整）：Test according to standard B."
+)
+
+# Few-shot 示例对话
+FEW_SHOT_EXAMPLES = (
+    ("请翻译：1、产品质量合格；2、包装完整。", "1. Product quality is qualified; 2. Packaging is complete."),
+    ("请翻译：备注：1、按照标准A分类；2、按照标准B检测。", "Note: 1. Classify according to standard A; 2. Test according to standard B."),
+)
+
 class ZhipuAITranslator(BaseTranslator):
     def __init__(self, api_key: str = None, model: str = "glm-4-flash-250414", temperature: float = 0.2, timeout: int = 60):
         # 优先从环境变量读取API Key
@@ -47,6 +74,7 @@ class ZhipuAITranslator(BaseTranslator):
         self.model = model
         self.temperature = temperature
         self.timeout = timeout
+        self.hot = HotPathLogger(logger)  # 逐请求明细日志按类别分级和采样
 
         # 使用测试确认的正确URL
         self.api_url = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
@@ -214,13 +242,12 @@ class ZhipuAITranslator(BaseTranslator):
         try:
             # 检查是否为多条目内容，如果是，则分别翻译
             if self._is_multi_item_content(text):
-                logger.info("检测到多条目内容，使用分段翻译策略")
+                self.hot.sample(CATEGORY_SEGMENTS, "检测到多条目内容，使用分段翻译策略")
                 return self._translate_multi_item_content(text, terminology_dict, source_lang, target_lang, prompt)
 
             # 构建提示词
             # --- 新的直接术语替换策略开始 ---
             processed_text_for_llm = str(text)  # 将发送给LLM的文本
-            final_prompt_text = ""  # LLM的完整提示字符串
 
             # 记录替换的术语，用于日志
             replaced_terms = []
@@ -260,7 +287,7 @@ class ZhipuAITranslator(BaseTranslator):
                             # 验证替换是否成功
                             if before_replace != temp_processed_text:
                                 replaced_terms.append((source_term_from_dict, target_term_from_dict))
-                                logger.info(f"直接替换术语: {source_term_from_dict} -> {target_term_from_dict} (匹配次数: {len(matches)})")
+                                self.hot.sample(CATEGORY_TERMS, "直接替换术语: %s -> %s (匹配次数: %s)", source_term_from_dict, target_term_from_dict, len(matches))
                             else:
                                 logger.warning(f"术语替换失败: {source_term_from_dict}")
                         else:
@@ -269,18 +296,17 @@ class ZhipuAITranslator(BaseTranslator):
                             temp_processed_text = temp_processed_text.replace(source_term_from_dict, target_term_from_dict)
                             if before_replace != temp_processed_text:
                                 replaced_terms.append((source_term_from_dict, target_term_from_dict))
-                                logger.info(f"使用简单替换术语: {source_term_from_dict} -> {target_term_from_dict}")
+                                self.hot.sample(CATEGORY_TERMS, "使用简单替换术语: %s -> %s", source_term_from_dict, target_term_from_dict)
                     else:
-                        logger.debug(f"术语未在文本中找到: {source_term_from_dict}")
+                        self.hot.sample(CATEGORY_TERMS, "术语未在文本中找到: %s", source_term_from_dict, level=logging.DEBUG)
 
                 processed_text_for_llm = temp_processed_text
 
                 # 记录替换统计
                 if replaced_terms:
-                    logger.info(f"共替换了 {len(replaced_terms)} 个术语")
+                    self.hot.sample(CATEGORY_TERMS, "共替换了 %s 个术语", len(replaced_terms))
                     # 记录前5个替换的术语样本
-                    terms_sample = replaced_terms[:5]
-                    logger.info(f"替换术语样本（前5个）: {terms_sample}")
+                    self.hot.sample(CATEGORY_TERMS, "替换术语样本（前5个）: %s", replaced_terms[:5])
             # --- 新的直接术语替换策略结束 ---
 
             # 构建明确的翻译提示词 - 强调直接输出结果
@@ -288,76 +314,36 @@ class ZhipuAITranslator(BaseTranslator):
             source_lang_name = self._get_language_name(source_lang)
             target_lang_name = self._get_language_name(target_lang)
 
-            # 构建强调直接输出的提示词
-            base_instruction = f"请直接将以下{source_lang_name}文本翻译成{target_lang_name}，只输出翻译结果，不要包含任何分析、解释或思考过程。如果文本包含多个条目（用分号、句号或数字序号分隔），必须完整翻译所有条目，保持原文结构"
-
-            # 构建更强化的提示词，特别强调完整翻译
-            complete_instruction = (
-                f"{base_instruction}\n\n"
-                "特别注意：\n"
-                "- 如果文本包含数字序号（如1、2、3、），必须翻译所有序号对应的内容\n"
-                "- 如果文本包含分号（；）分隔的多个部分，必须翻译所有部分\n"
-                "- 不要省略任何条目或内容\n"
-                "- 保持原文的完整结构和所有信息\n\n"
-                "要翻译的文本："
-            )
-
-            if terminology_dict and replaced_terms:
-                # 有术语且进行了替换
-                final_prompt_text = f"{complete_instruction}\n{processed_text_for_llm}"
-            elif terminology_dict:  # 术语存在，但未找到术语进行替换
-                # 明确的翻译指令
-                final_prompt_text = f"{complete_instruction}\n{text}"
-            else:  # 完全没有术语
-                # 明确的翻译指令
-                final_prompt_text = f"{complete_instruction}\n{text}"
-
-            # 如果有用户自定义提示词，添加到开头
-            if prompt:
-                final_prompt_text = f"翻译风格要求：{prompt}\n\n" + final_prompt_text
+            # 替换过术语时发送替换后的文本，否则发送原文
+            segment_text = processed_text_for_llm if terminology_dict and replaced_terms else text
 
             headers = {
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {self.api_key}"
             }
 
-            # 构建强调直接输出的系统消息，包含示例
-            system_message = (
-                "你是一位专业的翻译助手。请严格按照以下要求工作：\n"
-                "1. 只输出最终的翻译结果，不要包含任何分析、解释、思考过程或多余的文字\n"
-                "2. 不要使用'让我分析'、'根据上下文'、'这个术语'等表述\n"
-                "3. 不要输出'翻译结果：'、'译文：'等标记\n"
-                "4. 直接给出准确、自然的翻译结果\n"
-                "5. 如果文本包含多个条目（用分号、句号或数字序号分隔），必须完整翻译所有条目，不要遗漏任何部分\n"
-                "6. 保持原文的结构和格式，包括数字序号、分号等分隔符\n\n"
-                "示例：\n"
-                "原文：1、产品质量合格；2、包装完整。\n"
-                "正确翻译：1. Product quality is qualified; 2. Packaging is complete.\n"
-                "错误翻译（不完整）：Packaging is complete.\n\n"
-                "原文：备注：1、按照标准A分类；2、按照标准B检测。\n"
-                "正确翻译：Note: 1. Classify according to standard A; 2. Test according to standard B.\n"
-                "错误翻译（不完整）：Test according to standard B."
-            )
-
-            # 构建Few-shot学习的消息序列
-            messages = [
-                {"role": "system", "content": system_message},
-                # 添加示例对话
-                {"role": "user", "content": "请翻译：1、产品质量合格；2、包装完整。"},
-                {"role": "assistant", "content": "1. Product quality is qualified; 2. Packaging is complete."},
-                {"role": "user", "content": "请翻译：备注：1、按照标准A分类；2、按照标准B检测。"},
-                {"role": "assistant", "content": "Note: 1. Classify according to standard A; 2. Test according to standard B."},
-                # 实际要翻译的内容
-                {"role": "user", "content": final_prompt_text}
-            ]
+            # 消息顺序：系统消息（含语言对和风格要求）→ few-shot 示例 → 待翻译文本，
+            # 前两部分整个任务不变，服务端可以复用已计算的前缀；短片段使用精简的档位，不附带示例
+            profile = choose_profile(text)
+            if profile == PROFILE_FULL:
+                messages = build_messages(
+                    self._system_message(source_lang_name, target_lang_name, prompt),
+                    f"请翻译：{segment_text}",
+                    few_shots=FEW_SHOT_EXAMPLES
+                )
+            else:
+                system_builder = compact_system if profile == PROFILE_COMPACT else minimal_system
+                messages = build_messages(system_builder(source_lang_name, target_lang_name, prompt), segment_text)
+            record_prompt("zhipuai", profile, messages, text)
 
             data = {
                 "model": self.model,
                 "messages": messages,
                 "temperature": self.temperature
             }
+            self.hot.sample(CATEGORY_PROMPTS, "翻译提示词: %s", segment_text[:200], level=logging.DEBUG)
 
-            logger.info(f"发送翻译请求到智谱AI，模型: {self.model}")
+            self.hot.sample(CATEGORY_PROMPTS, "发送翻译请求到智谱AI，模型: %s", self.model)
 
             # 创建一个会话对象
             session = requests.Session()
@@ -386,6 +372,7 @@ class ZhipuAITranslator(BaseTranslator):
 
             if response.status_code == 200:
                 result = response.json()
+                report_usage("zhipuai", result.get("usage"))
                 raw_translation = result["choices"][0]["message"]["content"].strip()
                 # 过滤思维链
                 translation = self._filter_output(raw_translation, source_lang, target_lang)
@@ -393,14 +380,14 @@ class ZhipuAITranslator(BaseTranslator):
                 # 新的直接术语替换策略不需要占位符还原
                 # 术语已经在翻译前直接替换，翻译结果应该包含正确的目标术语
                 if terminology_dict and replaced_terms:
-                    logger.info(f"使用直接术语替换策略，已替换 {len(replaced_terms)} 个术语，无需后处理")
+                    self.hot.sample(CATEGORY_TERMS, "使用直接术语替换策略，已替换 %s 个术语，无需后处理", len(replaced_terms))
 
                 # 翻译质量检查
                 quality_issues = self._check_translation_quality(text, translation, source_lang, target_lang)
                 if quality_issues:
                     logger.warning(f"翻译质量检查发现问题: {quality_issues}")
 
-                logger.info(f"智谱AI翻译成功，结果长度: {len(translation)}")
+                self.hot.sample(CATEGORY_SEGMENTS, "智谱AI翻译成功，结果长度: %s", len(translation))
                 return translation
             else:
                 error_info = response.json() if response.text else {"error": "未知错误"}
@@ -412,6 +399,21 @@ class ZhipuAITranslator(BaseTranslator):
             logger.error(f"智谱AI翻译失败: {str(e)}")
             raise Exception(f"智谱AI翻译失败: {str(e)}")
 
+    def _system_message(self, source_lang_name: str, target_lang_name: str, prompt: Optional[str]) -> str:
+        """系统消息：固定的工作要求、示例说明、语言对和风格要求，同一任务的所有请求完全相同"""
+        system_message = SYSTEM_MESSAGE + (
+            f"\n\n请直接将用户提供的{source_lang_name}文本翻译成{target_lang_name}，只输出翻译结果，不要包含任何分析、解释或思考过程。"
+            "如果文本包含多个条目（用分号、句号或数字序号分隔），必须完整翻译所有条目，保持原文结构\n\n"
+            "特别注意：\n"
+            "- 如果文本包含数字序号（如1、2、3、），必须翻译所有序号对应的内容\n"
+            "- 如果文本包含分号（；）分隔的多个部分，必须翻译所有部分\n"
+            "- 不要省略任何条目或内容\n"
+            "- 保持原文的完整结构和所有信息"
+        )
+        if prompt:
+            system_message += f"\n\n翻译风格要求：{prompt}"
+        return system_message
+
     def _get_language_name(self, lang_code: str) -> str:
         """
         根据语言代码获取语言名称
@@ -693,24 +695,22 @@ class ZhipuAITranslator(BaseTranslator):
         source_lang_name = self._get_language_name(source_lang)
         target_lang_name = self._get_language_name(target_lang)
 
-        simple_instruction = f"请直接将以下{source_lang_name}文本翻译成{target_lang_name}，只输出翻译结果："
-
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
 
-        # 简化的系统消息
+        # 简化的系统消息（含语言对，同一任务的各条目相同），待翻译文本放在最后
         simple_system_message = (
             "你是一位专业的翻译助手。请直接输出翻译结果，不要包含任何分析、解释或多余的文字。"
+            f"请直接将用户提供的{source_lang_name}文本翻译成{target_lang_name}，只输出翻译结果。"
         )
 
+        messages = build_messages(simple_system_message, text)
+        record_prompt("zhipuai", PROFILE_COMPACT, messages, text)
         data = {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": simple_system_message},
-                {"role": "user", "content": f"{simple_instruction}\n{text}"}
-            ],
+            "messages": messages,
             "temperature": self.temperature
         }
 
@@ -729,6 +729,7 @@ class ZhipuAITranslator(BaseTranslator):
 
         if response.status_code == 200:
             result = response.json()
+            report_usage("zhipuai", result.get("usage"))
             translation = result["choices"][0]["message"]["content"].strip()
             # 简单过滤
             translation = self._filter_output(translation, source_lang, target_lang)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""跨任务微批聚合器的测试"""
+
+import threading
+
+import pytest
+
+from services.batch_aggregator import BatchAggregator, number_segments, split_numbered
+from services.prompt_builder import account_prompts, current_prompt_accounting
+
+
+class RecordingDispatch:
+    """记录每个批次的发送函数，译文为原文加后缀"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, context, texts, terms):
+        with self.lock:
+            self.batches.append((list(texts), dict(terms)))
+        if self.fail:
+            raise RuntimeError("接口超时")
+        return [f"{text}-T" for text in texts]
+
+
+def test_number_and_split_round_trip():
+    joined = number_segments(["备注", " 单位 "])
+    assert joined == "[1] 备注\n[2] 单位"
+    assert split_numbered("[1] Remarks\n[2] Unit\n  (per item)", 2) == ["Remarks", "Unit (per item)"]
+
+
+@pytest.mark.parametrize("translation", ["[1] A", "[1] A\n[1] B", "[1] A\n[2] ", "A\nB"])
+def test_split_rejects_mismatched_numbering(translation):
+    with pytest.raises(ValueError):
+        split_numbered(translation, 2)
+
+
+def test_segments_in_one_window_share_a_request():
+    dispatch = RecordingDispatch()
+    aggregator = BatchAggregator(dispatch, enabled=True, window_ms=50)
+
+    futures = [aggregator.submit("group", None, text) for text in ("备注", "单位", "合计")]
+
+    assert [future.result(5) for future in futures] == ["备注-T", "单位-T", "合计-T"]
+    assert dispatch.batches == [(["备注", "单位", "合计"], {})]
+
+
+def test_groups_are_sent_separately_and_single_segments_fall_back():
+    dispatch = RecordingDispatch()
+    aggregator = BatchAggregator(dispatch, enabled=True, window_ms=30)
+
+    alone = aggregator.submit("ja", None, "备注")
+    pair = [aggregator.submit("en", None, text) for text in ("备注", "单位")]
+
+    assert alone.result(5) is None
+    assert [future.result(5) for future in pair] == ["备注-T", "单位-T"]
+    assert dispatch.batches == [(["备注", "单位"], {})]
+
+
+def test_segment_limit_sends_immediately():
+    dispatch = RecordingDispatch()
+    aggregator = BatchAggregator(dispatch, enabled=True, window_ms=60000, max_segments=2)
+
+    futures = [aggregator.submit("group", None, text) for text in ("甲", "乙")]
+
+    assert [future.result(5) for future in futures] == ["甲-T", "乙-T"]
+
+
+def test_conflicting_term_mappings_never_share_a_batch():
+    dispatch = RecordingDispatch()
+    aggregator = BatchAggregator(dispatch, enabled=True, window_ms=50)
+
+    futures = [
+        aggregator.submit("group", None, "苹果手机", {"苹果": "apple"}),
+        aggregator.submit("group", None, "苹果公司", {"苹果": "Apple Inc."}),
+        aggregator.submit("group", None, "梨", {"梨": "pear"}),
+        aggregator.submit("group", None, "苹果股价", {"苹果": "Apple Inc."}),
+    ]
+
+    assert [future.result(5) for future in futures] == [None, "苹果公司-T", "梨-T", "苹果股价-T"]
+    assert dispatch.batches == [(["苹果公司", "梨", "苹果股价"], {"苹果": "Apple Inc.", "梨": "pear"})]
+
+
+def test_failed_batch_returns_none_for_every_segment():
+    aggregator = BatchAggregator(RecordingDispatch(fail=True), enabled=True, window_ms=20)
+
+    futures = [aggregator.submit("group", None, text) for text in ("甲", "乙")]
+
+    assert [future.result(5) for future in futures] == [None, None]
+
+
+def test_engine_stops_batching_after_repeated_parse_failures():
+    aggregator = BatchAggregator(RecordingDispatch(), enabled=True)
+    assert aggregator.accepts("ollama", "备注")
+    for _ in range(3):
+        aggregator.record_parse("ollama", False)
+
+    assert not aggregator.accepts("ollama", "备注")
+    assert aggregator.accepts("zhipuai", "备注")
+    assert not aggregator.accepts("zhipuai", "第一行\n第二行")
+    assert not aggregator.accepts("zhipuai", "长" * 500)
+
+
+def test_prompt_usage_is_attributed_to_each_job():
+    def dispatch(context, texts, terms):
+        current_prompt_accounting().add("compact", 100, 40)
+        return [f"{text}-T" for text in texts]
+
+    aggregator = BatchAggregator(dispatch, enabled=True, window_ms=50)
+    reports = {}
+    barrier = threading.Barrier(2)
+
+    def job(name, text):
+        with account_prompts() as accounting:
+            barrier.wait()
+            assert aggregator.submit("group", None, text).result(5) == f"{text}-T"
+        reports[name] = accounting.report()
+
+    threads = [threading.Thread(target=job, args=("A", "甲")), threading.Thread(target=job, args=("B", "乙"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert reports['A']['requests'] == reports['B']['requests'] == 1
+    assert reports['A']['prompt_tokens'] + reports['B']['prompt_tokens'] == pytest.approx(100, abs=1)
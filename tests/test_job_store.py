@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""持久化任务队列和租约的测试"""
+
+import time
+
+import pytest
+
+from web.job_store import JobStore, STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING, STATUS_PROCESSING
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def test_claim_takes_jobs_in_submission_order(store):
+    store.create_job("a", "a.docx", {})
+    time.sleep(0.001)
+    store.create_job("b", "b.docx", {})
+
+    first = store.claim_next("worker-1")
+    second = store.claim_next("worker-2")
+
+    assert (first['task_id'], first['lease_owner'], first['attempts']) == ("a", "worker-1", 1)
+    assert second['task_id'] == "b"
+    assert store.claim_next("worker-3") is None
+
+
+def test_expired_lease_is_reclaimed_and_stale_owner_cannot_finish(store):
+    store.create_job("a", "a.docx", {})
+    store.claim_next("worker-1", lease_seconds=0.01)
+    time.sleep(0.05)
+
+    reclaimed = store.claim_next("worker-2", lease_seconds=60)
+    assert reclaimed['lease_owner'] == "worker-2"
+    assert not store.renew_lease("a", "worker-1")
+
+    # 原持有者的结果被丢弃，以接管者的结果为准
+    assert not store.complete_job("a", "stale.docx", owner="worker-1")
+    assert not store.fail_job("a", "超时", owner="worker-1")
+    assert store.get_job("a")['status'] == STATUS_PROCESSING
+
+    assert store.complete_job("a", "fresh.docx", owner="worker-2")
+    job = store.get_job("a")
+    assert (job['status'], job['output_file'], job['lease_owner']) == (STATUS_COMPLETED, "fresh.docx", None)
+    assert not store.fail_job("a", "迟到的失败", owner="worker-2")
+
+
+def test_jobs_over_attempt_limit_fail(store):
+    store.create_job("a", "a.docx", {})
+    for _ in range(2):
+        store.claim_next("worker", lease_seconds=0.01)
+        time.sleep(0.02)
+
+    assert store.claim_next("worker", max_attempts=2) is None
+    assert store.get_job("a")['status'] == STATUS_FAILED
+
+
+def test_release_and_recover_return_jobs_to_queue(store):
+    store.create_job("a", "a.docx", {})
+    store.create_job("b", "b.docx", {})
+    store.claim_next("worker", lease_seconds=60)
+    store.claim_next("worker", lease_seconds=0.01)
+    time.sleep(0.02)
+
+    store.release_lease("a", "worker")
+    assert store.get_job("a")['status'] == STATUS_PENDING
+    assert store.get_job("a")['attempts'] == 0
+
+    assert store.recover_unfinished() == 1
+    assert store.get_job("b")['status'] == STATUS_PENDING
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""进度通道的测试"""
+
+import time
+import asyncio
+import threading
+
+from utils.progress_channel import ProgressChannel, create_progress_channel
+
+
+def test_pull_mode_coalesces_intermediate_updates():
+    channel = ProgressChannel()
+    for step in range(10):
+        channel.publish(step / 10, f"第 {step} 步")
+    assert channel.drain() == [(0.9, "第 9 步")]
+
+    # 终态取代尚未取出的中间进度，之后的进度不会覆盖终态
+    channel.publish(0.95)
+    channel.publish(-1, "出错")
+    channel.publish(0.1, "重试")
+    channel.publish(0.2, "重试")
+
+    assert channel.drain() == [(-1, "出错"), (0.2, "重试")]
+    assert channel.drain() == []
+
+
+def test_push_mode_throttles_and_delivers_last_update():
+    received = []
+    done = threading.Event()
+
+    def callback(progress, message):
+        received.append(progress)
+        if progress == 0.99:
+            done.set()
+
+    channel = ProgressChannel(callback, min_interval=0.05)
+    for step in range(100):
+        channel.publish(step / 100)
+
+    assert done.wait(1.0), "被合并的最后一条进度应由尾随刷新送达"
+    assert received[0] == 0.0
+    assert received[-1] == 0.99
+    assert len(received) < 10
+
+
+def test_terminal_updates_are_never_coalesced():
+    received = []
+    channel = ProgressChannel(lambda progress, message: received.append((progress, message)), min_interval=10)
+    channel.publish(0.1)
+    channel.publish(0.2)
+    channel.publish(-1, "出错")
+    channel.publish(1.0, "完成")
+
+    assert received == [(0.1, ""), (-1, "出错"), (1.0, "完成")]
+
+
+def test_async_callback_runs_on_owning_loop():
+    async def scenario():
+        loop_threads = []
+
+        async def callback(progress, message):
+            loop_threads.append(threading.get_ident())
+
+        channel = ProgressChannel(callback, min_interval=0)
+        publisher = threading.Thread(target=lambda: [channel.publish(p) for p in (0.5, 1.0)])
+        publisher.start()
+        publisher.join()
+        for _ in range(20):
+            if len(loop_threads) == 2:
+                break
+            await asyncio.sleep(0.01)
+        return loop_threads
+
+    loop_thread = []
+
+    async def main():
+        loop_thread.append(threading.get_ident())
+        return await scenario()
+
+    threads = asyncio.run(main())
+    assert threads == loop_thread * 2
+
+
+def test_create_progress_channel_reuses_existing_channel():
+    channel = ProgressChannel()
+    assert create_progress_channel(channel) is channel
+    assert create_progress_channel(None) is None
+    assert isinstance(create_progress_channel(lambda progress, message: None), ProgressChannel)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""实时日志环形缓冲区和序号游标的测试"""
+
+from web.realtime_logger import RealtimeLogMonitor
+
+
+def add(monitor, count, level="INFO"):
+    for index in range(count):
+        monitor._add_log_entry({'timestamp': f"2026-01-01T00:00:{index % 60:02d}", 'level': level,
+                                'location': "test", 'message': str(index), 'raw': str(index)})
+
+
+def test_cursor_returns_only_newer_entries():
+    monitor = RealtimeLogMonitor(max_buffer_size=10)
+    add(monitor, 5)
+
+    assert [log['seq'] for log in monitor.get_logs_after(3)] == [4, 5]
+    assert monitor.get_logs_after(5) == []
+    assert [log['seq'] for log in monitor.get_logs_after(0)] == [1, 2, 3, 4, 5]
+
+
+def test_cursor_behind_buffer_returns_whole_buffer():
+    monitor = RealtimeLogMonitor(max_buffer_size=10)
+    add(monitor, 25)
+
+    assert [log['seq'] for log in monitor.get_logs_after(2)] == list(range(16, 26))
+
+
+def test_cursor_ahead_of_server_is_treated_as_reset():
+    # 服务重启后序号重新开始，客户端仍持有旧游标
+    monitor = RealtimeLogMonitor(max_buffer_size=10)
+    add(monitor, 3)
+
+    assert [log['seq'] for log in monitor.get_logs_after(500)] == [1, 2, 3]
+
+
+def test_exception_stats_follow_evictions():
+    monitor = RealtimeLogMonitor(max_buffer_size=3)
+    add(monitor, 2, level="ERROR")
+    add(monitor, 1, level="WARNING")
+    assert (monitor.error_count, monitor.warning_count) == (2, 1)
+
+    add(monitor, 2)
+
+    assert (monitor.error_count, monitor.warning_count) == (0, 1)
+    assert monitor.get_exception_stats()['last_seq'] == 5
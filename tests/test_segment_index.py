@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""增量翻译片段索引的测试"""
+
+import pytest
+
+from services.segment_index import (SegmentIndex, IncrementalTranslationSession, compute_glossary_version)
+
+GLOSSARY_VERSION = compute_glossary_version({"苹果": "apple"})
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SegmentIndex(str(tmp_path))
+
+
+def make_session(index, file_hash, target_lang="en", model="glm-4", glossary_version=GLOSSARY_VERSION):
+    return IncrementalTranslationSession(index, "zh", target_lang, source_name="a.docx", file_hash=file_hash,
+                                         engine="zhipuai", model=model, glossary_version=glossary_version)
+
+
+def translate_all(session, segments, translations=None):
+    """模拟处理器：先登记全部片段，再按任意顺序记录译文"""
+    session.begin(segments)
+    reused = [session.lookup(text) for text in segments]
+    translations = translations or {text: f"{text}-T" for text in segments}
+    for text, previous in zip(reversed(segments), reversed(reused)):
+        if previous is None:
+            session.record(text, translations[text])
+    return reused, session.finish()
+
+
+def test_unchanged_segments_are_reused(index):
+    translate_all(make_session(index, "v1"), ["甲", "乙", "丙"])
+
+    reused, summary = translate_all(make_session(index, "v2"), ["甲", "乙", "丁"])
+
+    assert reused == ["甲-T", "乙-T", None]
+    assert (summary["reused"], summary["changed"], summary["added"], summary["removed"]) == (2, 1, 0, 1)
+
+
+def test_repeated_segments_recorded_out_of_order(index):
+    translate_all(make_session(index, "v1"), ["甲", "甲", "乙"])
+
+    reused, _ = translate_all(make_session(index, "v2"), ["甲", "甲", "乙"])
+
+    assert reused == ["甲-T", "甲-T", "乙-T"]
+
+
+@pytest.mark.parametrize("changes", [
+    {"model": "glm-4-flash"},
+    {"glossary_version": compute_glossary_version({"苹果": "Apple Inc."})},
+    {"target_lang": "ja"},
+])
+def test_changed_settings_skip_reuse(index, changes):
+    translate_all(make_session(index, "v1"), ["甲", "乙"])
+
+    reused, summary = translate_all(make_session(index, "v2", **changes), ["甲", "乙"])
+
+    assert reused == [None, None]
+    assert summary["reused"] == 0
+
+
+def test_failed_translations_are_not_indexed(index):
+    translate_all(make_session(index, "v1"), ["甲", "乙"], {"甲": "翻译失败: 超时", "乙": "乙-T"})
+
+    reused, _ = translate_all(make_session(index, "v2"), ["甲", "乙"])
+
+    assert reused == [None, "乙-T"]
+
+
+def test_glossary_version_ignores_entry_order():
+    assert compute_glossary_version({"a": "1", "b": "2"}) == compute_glossary_version({"b": "2", "a": "1"})
+    assert compute_glossary_version({}) == compute_glossary_version(None) == "none"
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""合并进行中相同请求的测试"""
+
+import threading
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, func, count):
+    """count 个线程同时以同一键调用，返回各自的 (结果, 是否共享)"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def call(index):
+        barrier.wait()
+        results[index] = flight.do(key, func)
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def translate():
+        calls.append(1)
+        release.wait(5)
+        return "译文"
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = run_concurrently(flight, "页眉", translate, 5)
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["译文"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert flight.coalesced == 4
+    assert flight.in_flight() == 0
+
+
+def test_exception_is_shared_and_key_is_released():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("引擎不可用")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ["引擎不可用"] * 3
+    assert flight.do("k", lambda: "恢复") == ("恢复", False)
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == (1, False)
+    assert flight.do("k", lambda: 2) == (2, False)
+    assert flight.coalesced == 0
+
+
+def test_disabled_flight_always_executes():
+    flight = SingleFlight(enabled=False)
+    calls = []
+    run_concurrently(flight, "k", lambda: calls.append(1), 3)
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("config, enabled", [(None, True), ({'enabled': False}, False)])
+def test_from_config(config, enabled):
+    assert SingleFlight.from_config(config).enabled is enabled
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""片段翻译缓存的测试"""
+
+from services.translation_cache import SegmentTranslationCache, is_failed_translation
+
+
+def key(cache, text="你好", terminology=None, **overrides):
+    args = dict(engine="zhipuai", model="glm-4", source_lang="zh", target_lang="en", prompt=None)
+    args.update(overrides)
+    return cache.make_key(args['engine'], args['model'], text, terminology, args['source_lang'],
+                          args['target_lang'], args['prompt'])
+
+
+def test_key_covers_every_translation_setting():
+    cache = SegmentTranslationCache()
+    base = key(cache)
+
+    assert key(cache) == base
+    for overrides in ({'engine': "ollama"}, {'model': "glm-4-flash"}, {'target_lang': "ja"},
+                      {'prompt': "正式语气"}, {'text': "再见"}, {'terminology': {"你好": "hi"}}):
+        assert key(cache, **overrides) != base
+
+
+def test_small_glossary_key_ignores_entry_order():
+    cache = SegmentTranslationCache()
+    assert key(cache, terminology={"a": "1", "b": "2"}) == key(cache, terminology={"b": "2", "a": "1"})
+
+
+def test_large_glossary_edited_in_place_changes_key():
+    cache = SegmentTranslationCache()
+    glossary = {f"术语{index}": f"term {index}" for index in range(500)}
+    before = key(cache, terminology=glossary)
+    assert key(cache, terminology=glossary) == before
+
+    glossary["术语1"] = "renamed term"
+
+    assert key(cache, terminology=glossary) != before
+    assert key(cache, terminology=dict(glossary)) == key(cache, terminology=glossary)
+
+
+def test_lru_eviction_and_failed_translations():
+    cache = SegmentTranslationCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    cache.put("d", "翻译失败: 超时")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c"), cache.get("d")) == ("A", "C", None)
+    assert is_failed_translation("[翻译失败: 超时]") and is_failed_translation("  ")
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SegmentTranslationCache(enabled=False)
+    cache.put("a", "A")
+    assert cache.get("a") is None
+    assert cache.stats()['entries'] == 0
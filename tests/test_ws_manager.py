@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""WebSocket发送队列和背压处理的测试"""
+
+import json
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from web.ws_manager import ClientChannel, ConnectionManager
+
+
+class FakeWebSocket:
+    """记录发送帧的WebSocket替身，slow=True 时发送一直不返回"""
+
+    def __init__(self, slow: bool = False):
+        self.slow = slow
+        self.frames = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.slow:
+            await asyncio.sleep(3600)
+        self.frames.append(frame)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+def messages_in(frame: str) -> list:
+    payload = json.loads(frame)
+    return payload['data'] if payload['type'] == "batch" else [payload]
+
+
+def test_logs_are_bounded_and_drop_is_reported():
+    channel = ClientChannel("c", FakeWebSocket(), max_queue=3)
+    for index in range(5):
+        channel.put_log(json.dumps({"type": "log", "data": index}))
+    channel.put_control(json.dumps({"type": "task_status", "data": "done"}))
+
+    control, logs = channel.drain()
+
+    assert [json.loads(message)['data'] for message in control] == ["done"]
+    assert json.loads(logs[0]) == {"type": "log_dropped", "data": {"count": 2}}
+    assert [json.loads(message)['data'] for message in logs[1:]] == [2, 3, 4]
+    assert channel.dropped_logs == 2
+
+
+def test_progress_with_same_key_keeps_only_latest():
+    channel = ClientChannel("c", FakeWebSocket(), max_queue=10)
+    channel.put_control("p1", coalesce_key="progress:t1")
+    channel.put_control("status")
+    channel.put_control("p2", coalesce_key="progress:t1")
+
+    assert channel.drain() == (["p2", "status"], [])
+
+
+def test_messages_are_batched_into_one_frame():
+    async def scenario():
+        manager = ConnectionManager(flush_interval=0.1)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "c")
+        manager.queue_message("c", json.dumps({"type": "task_status", "data": 1}))
+        manager.publish_log("line")
+        await asyncio.sleep(0.25)
+        manager.disconnect("c")
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    assert len(websocket.frames) == 1
+    assert [message['type'] for message in messages_in(websocket.frames[0])] == ["task_status", "system_log"]
+
+
+def test_send_timeout_closes_client_and_redelivers_control_messages():
+    async def scenario():
+        manager = ConnectionManager(flush_interval=0.1, send_timeout=0.1)
+        slow = FakeWebSocket(slow=True)
+        await manager.connect(slow, "c")
+        manager.queue_message("c", json.dumps({"type": "task_status", "data": "completed"}))
+        manager.publish_log("line")
+        await asyncio.sleep(0.4)
+        assert slow.close_code == 1013
+        assert not manager.has_connections()
+
+        fresh = FakeWebSocket()
+        await manager.connect(fresh, "c")
+        await asyncio.sleep(0.25)
+        stats = manager.stats()
+        manager.disconnect("c")
+        return fresh, stats
+
+    fresh, stats = asyncio.run(scenario())
+
+    # 日志行可以丢弃，任务状态在重新连接后补发
+    assert [message['type'] for message in messages_in(fresh.frames[0])] == ["task_status"]
+    assert stats['dropped_logs'] == 1
+    assert stats['slow_disconnects'] == 1
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热路径日志开销基准测试
+对1000个段落预先完成术语提取，只计量逐段落日志本身的开销，比较：
+- baseline: 旧写法（f-string立即格式化 + 术语样本切片 + web_logger重复输出）
+- hot_path: HotPathLogger默认配置（类别分级 + 采样 + 任务汇总）
+- hot_path_verbose: HotPathLogger所有类别打开到DEBUG
+每种模式都挂载一个会格式化记录的处理器，模拟文件和WebSocket处理器的开销
+
+用法:
+    python tools/benchmark_hot_log.py [段落数]
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hot_log import HotPathLogger, configure_hot_path_logging, CATEGORY_TERMS, CATEGORY_SEGMENTS, lazy
+from utils.term_extractor import TermExtractor
+
+
+def build_terminology(size: int = 500) -> dict:
+    return {f"术语{i}号设备": f"equipment term {i}" for i in range(size)}
+
+
+def build_segments(count: int) -> list:
+    return [f"第{i}段：检查术语{i % 50}号设备与术语{(i * 7) % 500}号设备的运行状态，记录温度和压力。" for i in range(count)]
+
+
+def setup_logging() -> io.StringIO:
+    """根日志挂载格式化处理器，模拟文件/WebSocket处理器"""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    return stream
+
+
+def run_baseline(segments: list, extracted: list) -> None:
+    log = logging.getLogger("bench.baseline")
+    web_logger = logging.getLogger("web_logger")
+    for idx, (text, terms) in enumerate(zip(segments, extracted), 1):
+        web_logger.info(f"Processing paragraph {idx}/{len(segments)}")
+        log.info(f"从中文段落提取术语: {text[:50]}...")
+        log.info(f"从中文段落提取术语: {len(terms)} 个")
+        if terms:
+            log.info(f"段落提取到的术语: {list(terms.items())[:3]}")
+        log.info(f"术语样本（前5个）: {list(terms.items())[:5]}")
+        log.info(f"正在翻译段落 {idx}: {text[:50]}...")
+        log.info(f"段落翻译完成: {text[:50]}")
+
+
+def run_hot_path(segments: list, extracted: list) -> None:
+    hot = HotPathLogger(logging.getLogger("bench.hot"))
+    for idx, (text, terms) in enumerate(zip(segments, extracted), 1):
+        hot.count("segments")
+        hot.sample(CATEGORY_SEGMENTS, "Processing paragraph %s/%s", idx, len(segments))
+        hot.sample(CATEGORY_TERMS, "从中文段落提取术语: %s...", text[:50])
+        hot.sample(CATEGORY_TERMS, "从中文段落提取术语: %s 个", len(terms))
+        if terms:
+            hot.sample(CATEGORY_TERMS, "段落提取到的术语: %s", lazy(lambda: list(terms.items())[:3]))
+        hot.sample(CATEGORY_TERMS, "术语样本（前5个）: %s", lazy(lambda: list(terms.items())[:5]))
+        hot.sample(CATEGORY_SEGMENTS, "正在翻译段落 %s: %s...", idx, text[:50])
+        hot.sample(CATEGORY_SEGMENTS, "段落翻译完成: %s", text[:50])
+    hot.log_summary("基准测试汇总")
+
+
+def run_no_logging(segments: list, extracted: list) -> None:
+    for idx, (text, terms) in enumerate(zip(segments, extracted), 1):
+        pass
+
+
+def measure(name: str, func, segments: list, extracted: list, stream: io.StringIO) -> float:
+    stream.seek(0)
+    stream.truncate()
+    start = time.perf_counter()
+    func(segments, extracted)
+    elapsed = time.perf_counter() - start
+    lines = stream.getvalue().count("\n")
+    print(f"{name:<18} 总耗时 {elapsed * 1000:9.1f} ms   每1000段落 {elapsed * 1000 / len(segments) * 1000:9.1f} ms   日志行数 {lines}")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    segments = build_segments(count)
+    terminology = build_terminology()
+    stream = setup_logging()
+
+    # 预先提取术语，基准只计量日志开销
+    extractor = TermExtractor()
+    extracted = [extractor.extract_terms(text, terminology) for text in segments]
+
+    processing = measure("no_logging", run_no_logging, segments, extracted, stream)
+    baseline = measure("baseline", run_baseline, segments, extracted, stream)
+    hot_path = measure("hot_path", run_hot_path, segments, extracted, stream)
+
+    configure_hot_path_logging({"levels": {"terms": "DEBUG", "prompts": "DEBUG", "segments": "DEBUG"},
+                                "sample_rate": 1e9, "sample_burst": 10 ** 9})
+    measure("hot_path_verbose", run_hot_path, segments, extracted, stream)
+
+    per_k = 1000 / count
+    print()
+    print(f"日志开销（每1000段落）: baseline {(baseline - processing) * 1000 * per_k:.1f} ms, "
+          f"hot_path {(hot_path - processing) * 1000 * per_k:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from services.document_factory import DocumentProcessorFactory
 from services.translator import TranslationService
 from services.ollama_translator import OllamaTranslator
 from utils.safe_ui_logger import setup_safe_ui_logger_horizontal
+from utils.progress_channel import ProgressChannel
 import threading
 import os
 import time
@@ -1029,16 +1030,8 @@ def create_ui(root, terminology, translator=None):
                 # 将输出格式选项传递给文档处理器
                 doc_processor.output_format = output_format_var.get()
 
-                # 设置进度回调函数
-                def update_progress(progress, message):
-                    """更新进度显示"""
-                    def update_ui():
-                        progress_var.set(progress * 100)
-                        progress_text_var.set(message)
-                        status_var.set(f"翻译进度: {progress:.1%}")
-                    root.after(0, update_ui)
-
-                doc_processor.set_progress_callback(update_progress)
+                # 设置进度通道，由主线程轮询更新界面
+                doc_processor.set_progress_callback(progress_channel)
 
                 # 记录日志
                 logger.info(f"开始翻译文档: {file_path}")
@@ -1135,7 +1128,27 @@ def create_ui(root, terminology, translator=None):
                 if root.winfo_exists():  # 确保根窗口仍然存在
                     root.after(100, enable_button)  # 增加延迟，避免可能的竞态条件
 
-        threading.Thread(target=translation_task, daemon=True).start()
+        # 进度通道：翻译线程只发布进度，主线程定时取出最新进度更新界面
+        progress_channel = ProgressChannel()
+        translation_thread = threading.Thread(target=translation_task, daemon=True)
+
+        def poll_progress():
+            """更新进度显示"""
+            try:
+                updates = progress_channel.drain()
+                if updates:
+                    progress, message = updates[-1]
+                    if progress >= 0:
+                        progress_var.set(progress * 100)
+                        progress_text_var.set(message)
+                        status_var.set(f"翻译进度: {progress:.1%}")
+                if translation_thread.is_alive() and root.winfo_exists():
+                    root.after(100, poll_progress)
+            except Exception as e:
+                logger.error(f"更新进度显示时出错: {str(e)}")
+
+        translation_thread.start()
+        root.after(100, poll_progress)
 
     # 翻译按钮 - 放在翻译卡片中
     translate_btn = ttk.Button(translate_card, text="🚀 开始翻译", command=start_translation)
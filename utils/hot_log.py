@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热路径日志
+逐段落/逐单元格/逐术语的明细日志按类别分级，使用惰性格式化和限速采样，
+任务结束时输出一条汇总记录，避免明细日志拖慢翻译并淹没WebSocket和日志文件
+"""
+
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 热路径日志类别
+CATEGORY_TERMS = "terms"        # 术语提取、匹配、占位符替换
+CATEGORY_PROMPTS = "prompts"    # 提示词、请求和响应内容
+CATEGORY_PROGRESS = "progress"  # 阶段进度
+CATEGORY_SEGMENTS = "segments"  # 逐段落/单元格的处理明细
+
+# 各类别的默认输出级别：低于该级别的记录直接丢弃，不做任何格式化
+DEFAULT_LEVELS = {
+    CATEGORY_TERMS: logging.WARNING,
+    CATEGORY_PROMPTS: logging.WARNING,
+    CATEGORY_PROGRESS: logging.INFO,
+    CATEGORY_SEGMENTS: logging.INFO,
+}
+
+# 采样：每个类别每秒最多输出的明细记录数（令牌桶）
+DEFAULT_SAMPLE_RATE = 5.0
+DEFAULT_SAMPLE_BURST = 10
+
+_config_lock = threading.Lock()
+_config = {
+    "levels": dict(DEFAULT_LEVELS),
+    "sample_rate": DEFAULT_SAMPLE_RATE,
+    "sample_burst": DEFAULT_SAMPLE_BURST,
+}
+
+
+def _parse_level(level) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def configure_hot_path_logging(config: Optional[Dict]) -> None:
+    """
+    根据配置（config.json 中的 hot_path_logging 节）调整热路径日志
+
+    示例:
+        {"levels": {"terms": "DEBUG", "prompts": "INFO"}, "sample_rate": 5, "sample_burst": 10}
+    """
+    if not config:
+        return
+    with _config_lock:
+        for category, level in (config.get("levels") or {}).items():
+            _config["levels"][category] = _parse_level(level)
+        if "sample_rate" in config:
+            _config["sample_rate"] = float(config["sample_rate"])
+        if "sample_burst" in config:
+            _config["sample_burst"] = int(config["sample_burst"])
+
+
+class lazy:
+    """延迟求值的日志参数，只有在记录真正输出时才调用函数"""
+
+    __slots__ = ("func",)
+
+    def __init__(self, func: Callable[[], object]):
+        self.func = func
+
+    def __str__(self) -> str:
+        return str(self.func())
+
+    __repr__ = __str__
+
+
+class HotPathLogger:
+    """
+    热路径日志记录器
+
+    - log(): 按类别级别过滤，通过 logging 的 %-参数实现惰性格式化
+    - sample(): 在 log() 基础上按令牌桶限速，超出部分只计数
+    - count(): 记录业务计数（段落数、术语匹配数等），用于任务汇总
+    """
+
+    def __init__(self, target: logging.Logger, mirror: Optional[logging.Logger] = None):
+        """
+        Args:
+            target: 实际输出记录的日志记录器
+            mirror: 汇总记录额外输出到的日志记录器（如 web_logger）
+        """
+        self.target = target
+        self.mirror = mirror
+        self.emitted = Counter()
+        self.suppressed = Counter()
+        self.counters = Counter()
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def enabled(self, category: str, level: int = logging.INFO) -> bool:
+        """判断某类别、某级别的记录是否会输出，用于包住需要额外计算的日志代码块"""
+        return level >= _config["levels"].get(category, logging.INFO) and self.target.isEnabledFor(level)
+
+    def log(self, category: str, msg: str, *args, level: int = logging.INFO) -> None:
+        """输出一条分类日志（参数使用 %-格式，过滤后才格式化）"""
+        if not self.enabled(category, level):
+            self._bump(self.suppressed, category)
+            return
+        self._bump(self.emitted, category)
+        self.target.log(level, msg, *args, stacklevel=2)
+
+    def sample(self, category: str, msg: str, *args, level: int = logging.INFO) -> None:
+        """输出一条限速采样的明细日志，超出速率的记录只计数"""
+        if not self.enabled(category, level) or not self._take_token(category):
+            self._bump(self.suppressed, category)
+            return
+        self._bump(self.emitted, category)
+        self.target.log(level, msg, *args, stacklevel=2)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """累加业务计数"""
+        self._bump(self.counters, name, n)
+
+    def _bump(self, counter: Counter, key: str, n: int = 1) -> None:
+        # 表格单元格并发翻译时多个线程共用同一个记录器
+        with self._lock:
+            counter[key] += n
+
+    def merge(self, other: "HotPathLogger") -> None:
+        """合并另一个记录器的统计（如处理器合并其术语提取器的统计）"""
+        with other._lock:
+            emitted, suppressed, counters = Counter(other.emitted), Counter(other.suppressed), Counter(other.counters)
+        with self._lock:
+            self.emitted.update(emitted)
+            self.suppressed.update(suppressed)
+            self.counters.update(counters)
+
+    def reset(self) -> None:
+        """清空统计，开始新任务时调用"""
+        with self._lock:
+            self.emitted.clear()
+            self.suppressed.clear()
+            self.counters.clear()
+        self._started = time.perf_counter()
+
+    def summary(self) -> Dict:
+        """返回本任务的日志和业务计数汇总"""
+        with self._lock:
+            return {
+                "elapsed": round(time.perf_counter() - self._started, 3),
+                "counters": dict(self.counters),
+                "emitted": dict(self.emitted),
+                "suppressed": dict(self.suppressed),
+            }
+
+    def log_summary(self, title: str) -> Dict:
+        """输出一条任务汇总记录"""
+        summary = self.summary()
+        counters = "，".join(f"{name}={value}" for name, value in sorted(summary["counters"].items())) or "无"
+        suppressed = sum(summary["suppressed"].values())
+        self.target.info(f"{title}: 耗时 {summary['elapsed']:.2f}s，{counters}，"
+                         f"输出明细日志 {sum(summary['emitted'].values())} 条，省略 {suppressed} 条")
+        if self.mirror is not None:
+            self.mirror.info(f"{title}: {summary['counters']}, {suppressed} detail records suppressed")
+        return summary
+
+    def _take_token(self, category: str) -> bool:
+        rate = _config["sample_rate"]
+        burst = _config["sample_burst"]
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(category)
+            if bucket is None:
+                bucket = self._buckets[category] = [float(burst), now]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                return False
+            bucket[0] = tokens - 1.0
+            return True
+
+
+def get_hot_logger(name: str, mirror: Optional[logging.Logger] = None) -> HotPathLogger:
+    """为模块创建热路径日志记录器"""
+    return HotPathLogger(logging.getLogger(name), mirror)
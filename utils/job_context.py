@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务上下文和任务日志路由
+当前任务ID保存在 contextvars 中，随协程、工作线程（经 copy_context 传递）和处理器调用链传播；
+根日志记录器上只安装一个路由处理器，按记录产生时的任务ID把日志交给订阅了该任务的接收方，
+每条记录只格式化一次、只投递给自己任务的订阅者，并发任务之间的日志互不串扰
+"""
+
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_job_id: contextvars.ContextVar = contextvars.ContextVar("current_job_id", default=None)
+
+
+def get_current_job_id() -> Optional[str]:
+    """获取当前上下文所属的任务ID，不在任务中时返回None"""
+    return _current_job_id.get()
+
+
+def bind_job(job_id: Optional[str]) -> contextvars.Token:
+    """把当前上下文绑定到任务，返回用于 unbind_job 的令牌"""
+    return _current_job_id.set(job_id)
+
+
+def unbind_job(token: contextvars.Token) -> None:
+    """恢复绑定前的任务上下文"""
+    _current_job_id.reset(token)
+
+
+@contextmanager
+def job_scope(job_id: Optional[str]):
+    """在 with 块内把当前上下文绑定到任务"""
+    token = bind_job(job_id)
+    try:
+        yield
+    finally:
+        unbind_job(token)
+
+
+def wrap_with_context(func: Callable) -> Callable:
+    """
+    捕获当前上下文，返回在该上下文中执行 func 的可调用对象
+
+    线程池和 threading.Thread 不会自动继承 contextvars，提交到其他线程的函数需要先包装
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return run
+
+
+class JobLogRouter(logging.Handler):
+    """按任务ID投递日志的处理器"""
+
+    def __init__(self, level: int = logging.INFO):
+        super().__init__(level)
+        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+        self._sub_lock = threading.Lock()
+
+    def subscribe(self, job_id: str, sink: Callable[[str], None]) -> Callable[[], None]:
+        """
+        订阅任务日志
+
+        Args:
+            job_id: 任务ID
+            sink: 接收格式化日志行的函数，可能在任意线程中调用，应当立即返回
+
+        Returns:
+            取消订阅的函数
+        """
+        with self._sub_lock:
+            # 复制后替换，emit 读取时无需加锁
+            subscribers = dict(self._subscribers)
+            subscribers[job_id] = subscribers.get(job_id, []) + [sink]
+            self._subscribers = subscribers
+
+        def unsubscribe():
+            with self._sub_lock:
+                subscribers = dict(self._subscribers)
+                remaining = [item for item in subscribers.get(job_id, []) if item is not sink]
+                if remaining:
+                    subscribers[job_id] = remaining
+                else:
+                    subscribers.pop(job_id, None)
+                self._subscribers = subscribers
+
+        return unsubscribe
+
+    def has_subscribers(self, job_id: str) -> bool:
+        return job_id in self._subscribers
+
+    def dispatch(self, job_id: str, line: str) -> None:
+        """把已格式化的日志行投递给任务的订阅者（用于转发工作进程中产生的日志）"""
+        for sink in self._subscribers.get(job_id, ()):
+            try:
+                sink(line)
+            except Exception:
+                pass
+
+    def emit(self, record):
+        job_id = _current_job_id.get()
+        if job_id is None:
+            return
+        sinks = self._subscribers.get(job_id)
+        if not sinks:
+            return
+        try:
+            line = self.format(record)
+        except Exception:
+            return
+        for sink in sinks:
+            try:
+                sink(line)
+            except Exception:
+                pass
+
+
+# 全局任务日志路由实例
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_job_log_router() -> JobLogRouter:
+    """获取任务日志路由，首次调用时安装到根日志记录器"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = JobLogRouter()
+            logging.getLogger().addHandler(_router)
+        return _router
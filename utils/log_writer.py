@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台批量日志写入器
+日志处理器只把格式化好的文本放入有界队列，由后台线程按时间或数量批量写入文件，
+文件超过大小上限时轮转，旧文件使用gzip压缩，避免文件I/O阻塞翻译线程
+"""
+
+import os
+import gzip
+import time
+import queue
+import shutil
+import threading
+from typing import List, Optional
+
+# 默认参数
+DEFAULT_QUEUE_SIZE = 10000          # 队列最大记录数，超出后丢弃并计数
+DEFAULT_BATCH_SIZE = 200            # 攒够多少条立即写入
+DEFAULT_FLUSH_INTERVAL = 0.5        # 最长多久写入一次（秒）
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024  # 单个日志文件大小上限
+DEFAULT_BACKUP_COUNT = 5            # 保留的历史压缩文件数
+
+_STOP = object()
+
+
+class BackgroundLogWriter:
+    """
+    单个日志文件的后台写入器
+
+    - write(): 非阻塞入队，队列满时丢弃记录并计入 dropped
+    - 后台线程在攒够 batch_size 条或距上次写入超过 flush_interval 秒时一次性写入
+    - 文件大小超过 max_bytes 时轮转为 name.1.gz、name.2.gz ...，最多保留 backup_count 个
+    """
+
+    def __init__(self, file_path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 backup_count: int = DEFAULT_BACKUP_COUNT, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 header: Optional[str] = None, truncate: bool = False):
+        """
+        初始化写入器并启动后台线程
+
+        Args:
+            file_path: 日志文件路径
+            max_bytes: 轮转阈值（字节），0表示不轮转
+            backup_count: 保留的历史压缩文件数
+            batch_size: 触发写入的记录数
+            flush_interval: 触发写入的最长间隔（秒）
+            queue_size: 队列容量
+            header: 每次新建文件（包括轮转后）写入的首行
+            truncate: 启动时是否清空已有文件
+        """
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.header = header
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._closed = False
+
+        # 统计信息
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+
+        self._open(truncate)
+        self._thread = threading.Thread(target=self._run, name=f"log-writer-{os.path.basename(file_path)}",
+                                        daemon=True)
+        self._thread.start()
+
+    def write(self, text: str, block: bool = False) -> bool:
+        """
+        提交一段待写入的文本
+
+        Args:
+            text: 已格式化的文本（包含换行）
+            block: 队列满时是否短暂等待（错误记录使用，尽量不丢）
+
+        Returns:
+            bool: 是否成功入队
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put(text, block=block, timeout=0.1 if block else None)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """等待队列中已提交的记录全部写入文件"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline and self._thread.is_alive():
+            time.sleep(0.01)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """写完剩余记录后停止后台线程并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """返回写入统计"""
+        return {
+            'file': self.file_path,
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'rotations': self.rotations,
+            'pending': self._queue.qsize()
+        }
+
+    def _open(self, truncate: bool = False) -> None:
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.file_path, 'w' if truncate else 'a', encoding='utf-8')
+        if self.header and (truncate or self._file.tell() == 0):
+            self._file.write(self.header)
+            self._file.flush()
+
+    def _run(self) -> None:
+        """后台线程：按数量或时间攒批写入"""
+        stopping = False
+        while not stopping:
+            batch: List[str] = []
+            try:
+                item = self._queue.get()
+            except Exception:
+                continue
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            batch.append(item)
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+        # 停止前写完队列中剩余的记录
+        rest: List[str] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+            self._queue.task_done()
+        self._write_batch(rest)
+
+        try:
+            self._file.close()
+        except Exception:
+            pass
+
+    def _write_batch(self, batch: List[str]) -> None:
+        if not batch:
+            return
+        try:
+            self._file.write(''.join(batch))
+            self._file.flush()
+            self.written += len(batch)
+            self.batches += 1
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            # 日志写入器不能再通过logging报告自身错误，否则会递归
+            print(f"日志写入失败: {self.file_path}, 错误: {e}")
+
+    def _rotate(self) -> None:
+        """轮转当前文件：name -> name.1.gz，已有的 name.N.gz 依次后移"""
+        self._file.close()
+        try:
+            if self.backup_count > 0:
+                for index in range(self.backup_count - 1, 0, -1):
+                    src = f"{self.file_path}.{index}.gz"
+                    if os.path.exists(src):
+                        os.replace(src, f"{self.file_path}.{index + 1}.gz")
+                with open(self.file_path, 'rb') as f_in, gzip.open(f"{self.file_path}.1.gz", 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+            os.remove(self.file_path)
+            self.rotations += 1
+        except Exception as e:
+            print(f"日志轮转失败: {self.file_path}, 错误: {e}")
+        self._open(truncate=True)
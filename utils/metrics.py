@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译流水线指标
+不依赖 prometheus_client 的轻量实现：计数器、仪表和直方图按标签维护，
+由 /metrics 接口以 Prometheus 文本格式输出，用于容量规划和性能回退告警。
+片段吞吐量等速率指标由 Prometheus 对计数器求 rate() 得到
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.tracing import record_span
+
+# 引擎请求耗时的分桶（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 任务阶段和整体耗时的分桶（秒）
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 180.0, 600.0, 1800.0, 3600.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """可增可减的仪表；也可以指定回调函数，在输出时读取当前值"""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """输出时调用 function 取值（仅用于无标签的仪表）"""
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各分桶计数..., 超出最大分桶的计数, 总和]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """记录 with 块的执行耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标登记表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """以 Prometheus 文本格式输出全部指标"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标登记表
+registry = MetricsRegistry()
+
+# 翻译引擎
+ENGINE_REQUESTS = registry.counter(
+    "translation_engine_requests_total", "翻译引擎请求次数（outcome: ok/failed/error）", ("engine", "outcome"))
+ENGINE_LATENCY = registry.histogram(
+    "translation_engine_request_seconds", "翻译引擎单次请求耗时", ("engine",), LATENCY_BUCKETS)
+ENGINE_TOKENS = registry.counter(
+    "translation_engine_tokens_total", "翻译引擎估算token数（direction: in/out）", ("engine", "direction"))
+SEGMENTS = registry.counter(
+    "translation_segments_total", "已翻译的片段数（含缓存命中）", ("engine",))
+SEGMENT_CACHE = registry.counter(
+    "translation_segment_cache_total", "片段翻译缓存查询次数（result: hit/miss）", ("result",))
+SEGMENT_COALESCED = registry.counter(
+    "translation_segment_coalesced_total", "等待进行中的相同片段请求、未重复请求翻译引擎的片段数")
+BATCHED_SEGMENTS = registry.counter(
+    "translation_batched_segments_total", "交给微批聚合器的片段数（result: batched 合并翻译/single 改为单独翻译）", ("result",))
+RESULT_CACHE = registry.counter(
+    "translation_result_cache_total", "翻译结果缓存查询次数（result: hit/miss）", ("result",))
+ENGINE_PROMPT_TOKENS = registry.counter(
+    "translation_engine_prompt_tokens_total", "翻译引擎接口返回的提示词token数（kind: prompt/cached）", ("engine", "kind"))
+ROUTED_SEGMENTS = registry.counter(
+    "translation_routed_segments_total", "复杂度路由的片段数（route: local/remote/escalated）", ("route",))
+ENGINE_UP = registry.gauge(
+    "translation_engine_up", "翻译引擎健康监测判定是否可用（1可用/0不可用）", ("engine",))
+ENGINE_LATENCY_EWMA = registry.gauge(
+    "translation_engine_latency_ewma_seconds", "翻译引擎请求耗时的指数加权均值", ("engine",))
+
+# 翻译任务
+JOB_STAGE_SECONDS = registry.histogram(
+    "translation_job_stage_seconds", "翻译任务各阶段耗时（parse/term_match/translate/write/export）",
+    ("doc_type", "stage"), STAGE_BUCKETS)
+JOB_SECONDS = registry.histogram(
+    "translation_job_seconds", "翻译任务总耗时", ("status",), STAGE_BUCKETS)
+JOBS_TOTAL = registry.counter(
+    "translation_jobs_total", "已结束的翻译任务数", ("status",))
+JOBS_ACTIVE = registry.gauge(
+    "translation_jobs_active", "正在执行的翻译任务数")
+JOB_QUEUE_DEPTH = registry.gauge(
+    "translation_job_queue_depth", "等待执行的翻译任务数")
+
+# WebSocket
+WEBSOCKET_CLIENTS = registry.gauge(
+    "websocket_clients", "已连接的WebSocket客户端数")
+WEBSOCKET_QUEUE_DEPTH = registry.gauge(
+    "websocket_queue_depth", "各WebSocket客户端待发送消息总数")
+WEBSOCKET_DROPPED_LOGS = registry.gauge(
+    "websocket_dropped_logs", "因客户端接收过慢而丢弃的日志行累计数")
+
+
+class StageTimer:
+    """
+    记录一个翻译任务各阶段的耗时
+
+    begin() 开始新阶段并结束上一阶段；同一阶段可多次进入，耗时累加；
+    finish() 时写入阶段耗时直方图并返回各阶段耗时（秒）
+    """
+
+    def __init__(self, doc_type: str):
+        self.doc_type = doc_type
+        self.durations: Dict[str, float] = {}
+        self._current: Optional[Tuple[str, float]] = None
+
+    def begin(self, name: str) -> None:
+        self.end()
+        self._current = (name, time.perf_counter())
+
+    def end(self) -> None:
+        if self._current is not None:
+            name, started = self._current
+            self._current = None
+            duration = time.perf_counter() - started
+            self.add(name, duration)
+            record_span(name, "stage", started, duration, doc_type=self.doc_type)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def split(self, source: str, name: str, seconds: float) -> None:
+        """把 source 阶段中的一部分耗时单独计为 name 阶段（如翻译阶段中的术语匹配）"""
+        if seconds <= 0:
+            return
+        seconds = min(seconds, self.durations.get(source, seconds))
+        if source in self.durations:
+            self.durations[source] -= seconds
+        self.add(name, seconds)
+
+    def finish(self) -> Dict[str, float]:
+        self.end()
+        record_stage_durations(self.doc_type, self.durations)
+        return {name: round(seconds, 3) for name, seconds in self.durations.items()}
+
+
+def record_stage_durations(doc_type: str, durations: Dict[str, float]) -> None:
+    """写入任务各阶段耗时（进程模式下由主进程根据工作进程返回的结果补记）"""
+    for name, seconds in durations.items():
+        JOB_STAGE_SECONDS.observe(seconds, doc_type=doc_type, stage=name)
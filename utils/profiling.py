@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务级CPU和内存剖析
+按需为单个翻译任务启用 cProfile 和 tracemalloc，任务结束后在译文旁写出：
+pstats 文件（<译文名>_profile.pstats，可用 snakeviz 等工具查看）、
+折叠调用栈文本（<译文名>_profile.folded，可直接交给 flamegraph.pl / speedscope 生成火焰图）
+和内存报告（<译文名>_memory.txt，峰值和分配最多的代码位置）。
+未启用时不安装任何钩子，对任务没有额外开销
+"""
+
+import os
+import io
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from utils.job_context import get_current_job_id
+
+logger = logging.getLogger(__name__)
+
+# 环境变量开关：设置后所有任务都启用剖析（任务参数显式关闭的除外）
+PROFILE_ENV_VAR = "TRANSLATION_PROFILE"
+
+DEFAULT_MEMORY_FRAMES = 1         # tracemalloc 为每次分配保存的调用栈深度（报告按分配所在行统计，1帧即可，开销最小）
+DEFAULT_TOP_ALLOCATIONS = 30      # 内存报告中列出的分配位置数
+DEFAULT_TOP_FUNCTIONS = 40        # 内存报告末尾附带的累计耗时最多的函数数
+FOLDED_MAX_DEPTH = 64             # 折叠调用栈的最大深度
+FOLDED_MIN_MICROSECONDS = 1.0     # 小于该值的调用路径不写入折叠调用栈
+MEMORY_SAMPLE_INTERVAL = 2.0      # 检查内存占用的间隔（秒）
+MEMORY_SAMPLE_GROWTH = 1.25       # 占用超过上次快照的该倍数时重新拍摄快照
+MEMORY_SAMPLE_MIN_BYTES = 1 << 20  # 占用低于该值时不拍摄快照
+
+# tracemalloc 是进程级的，并发的剖析任务共用一次跟踪，最后一个任务结束时停止
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def profile_requested(value: Optional[bool] = None) -> bool:
+    """任务是否启用剖析：任务参数优先，为None时按环境变量 TRANSLATION_PROFILE"""
+    if value is not None:
+        return bool(value)
+    return os.getenv(PROFILE_ENV_VAR, '').lower() in ['true', '1', 'yes']
+
+
+def profile_paths_for(output_path: str) -> Dict[str, str]:
+    """剖析文件路径：与译文同目录，以译文名为前缀"""
+    stem = os.path.splitext(output_path)[0]
+    return {
+        'profile_stats': stem + "_profile.pstats",
+        'flamegraph': stem + "_profile.folded",
+        'memory': stem + "_memory.txt"
+    }
+
+
+def _acquire_tracemalloc(frames: int) -> bool:
+    """开始内存跟踪，返回是否与其他任务共用"""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users += 1
+        if _tracemalloc_users == 1 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            return False
+        return True
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _frame_label(func) -> str:
+    """pstats 函数键 (文件, 行号, 函数名) 转为调用栈中的一帧"""
+    filename, line, name = func
+    if filename == '~':
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    # 分号是折叠格式的帧分隔符
+    return label.replace(';', ',')
+
+
+def collapse_stats(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    把 cProfile 的调用关系展开为折叠调用栈
+
+    cProfile 只记录调用者到被调用者的边，没有完整调用栈：这里从没有调用者的根函数出发
+    沿边向下展开，被调用者的耗时按各调用边的累计耗时比例分摊到每条路径上，结果是近似的火焰图
+
+    Returns:
+        Dict[str, float]: {"根;...;函数": 自身耗时（微秒）}
+    """
+    entries = stats.stats
+    children: Dict = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, {})[func] = edge
+    roots = [func for func, (_, _, _, _, callers) in entries.items() if not callers]
+
+    folded: Dict[str, float] = {}
+    on_stack = set()
+
+    def walk(func, path, fraction):
+        _, _, tottime, cumtime, _ = entries[func]
+        path = path + (_frame_label(func),)
+        self_us = tottime * fraction * 1e6
+        if self_us >= FOLDED_MIN_MICROSECONDS:
+            key = ";".join(path)
+            folded[key] = folded.get(key, 0.0) + self_us
+        if len(path) >= FOLDED_MAX_DEPTH:
+            return
+        on_stack.add(func)
+        for child, edge in children.get(func, {}).items():
+            if child in on_stack or child not in entries:
+                continue
+            child_cumtime = entries[child][3]
+            if child_cumtime <= 0:
+                continue
+            child_fraction = fraction * min(edge[3] / child_cumtime, 1.0)
+            if child_cumtime * child_fraction * 1e6 < FOLDED_MIN_MICROSECONDS:
+                continue
+            walk(child, path, child_fraction)
+        on_stack.discard(func)
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return folded
+
+
+# 内存报告中忽略的分配位置（剖析本身产生的分配）
+_IGNORED_ALLOCATION_FILES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>")
+
+
+class JobProfiler:
+    """
+    单个任务的CPU和内存剖析
+
+    tracemalloc 只能给出峰值大小，不能在峰值时刻拍摄快照：剖析期间由后台线程定期检查占用，
+    占用明显增长时重新拍摄快照，报告中的“峰值附近”分配位置来自最大的一次快照
+    """
+
+    def __init__(self, job_id: Optional[str] = None, memory_frames: int = DEFAULT_MEMORY_FRAMES,
+                 top_allocations: int = DEFAULT_TOP_ALLOCATIONS):
+        self.job_id = job_id
+        self.memory_frames = memory_frames
+        self.top_allocations = top_allocations
+        self._profile: Optional[cProfile.Profile] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_snapshot_bytes = 0
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+        self._memory_shared = False
+        self._tracing_memory = False
+        self.peak_bytes = 0
+        self.elapsed = 0.0
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._memory_shared = _acquire_tracemalloc(self.memory_frames)
+        self._tracing_memory = True
+        if not self._memory_shared:
+            tracemalloc.reset_peak()
+        self._sampler = threading.Thread(target=self._sample_memory, name="job-profiler-memory", daemon=True)
+        self._sampler.start()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            self._profile = profile
+        except ValueError as e:
+            # 同一线程已有其他剖析工具在运行
+            logger.warning(f"无法启用CPU剖析: {str(e)}")
+        self._started = time.perf_counter()
+
+    def stop(self) -> None:
+        self.elapsed = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        if self._tracing_memory:
+            try:
+                self.peak_bytes = tracemalloc.get_traced_memory()[1]
+                self._snapshot = tracemalloc.take_snapshot()
+            finally:
+                self._tracing_memory = False
+                _release_tracemalloc()
+
+    def _sample_memory(self) -> None:
+        """后台检查内存占用，明显增长时拍摄快照"""
+        while not self._stop_sampling.wait(MEMORY_SAMPLE_INTERVAL):
+            try:
+                current = tracemalloc.get_traced_memory()[0]
+                if current >= max(self._peak_snapshot_bytes * MEMORY_SAMPLE_GROWTH, MEMORY_SAMPLE_MIN_BYTES):
+                    self._peak_snapshot = tracemalloc.take_snapshot()
+                    self._peak_snapshot_bytes = current
+            except Exception as e:
+                logger.debug(f"内存快照失败: {str(e)}")
+                return
+
+    def save(self, output_path: str) -> Dict[str, str]:
+        """
+        在译文旁写出剖析文件
+
+        Returns:
+            Dict[str, str]: 已写出的文件 {'profile_stats': ..., 'flamegraph': ..., 'memory': ...}
+        """
+        paths = profile_paths_for(output_path)
+        saved = {}
+        stats = None
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile)
+            stats.dump_stats(paths['profile_stats'])
+            saved['profile_stats'] = paths['profile_stats']
+
+            folded = collapse_stats(stats)
+            with open(paths['flamegraph'], 'w', encoding='utf-8') as f:
+                for stack, microseconds in sorted(folded.items()):
+                    f.write(f"{stack} {int(round(microseconds))}\n")
+            saved['flamegraph'] = paths['flamegraph']
+
+        if self._snapshot is not None or stats is not None:
+            with open(paths['memory'], 'w', encoding='utf-8') as f:
+                f.write(self._memory_report(stats))
+            saved['memory'] = paths['memory']
+        return saved
+
+    def _memory_report(self, stats: Optional[pstats.Stats]) -> str:
+        lines = [f"任务: {self.job_id or ''}", f"耗时: {self.elapsed:.2f}s"]
+        if self._snapshot is not None:
+            lines.append(f"内存峰值: {self.peak_bytes / 1024 / 1024:.1f} MiB")
+            if self._memory_shared:
+                lines.append("注意: 有其他任务同时在剖析，峰值和分配统计包含这些任务")
+            if self._peak_snapshot is not None:
+                lines.append("")
+                lines.append(f"峰值附近（占用 {self._peak_snapshot_bytes / 1024 / 1024:.1f} MiB 时）"
+                             f"占用内存最多的 {self.top_allocations} 个分配位置:")
+                lines.extend(self._format_allocations(self._peak_snapshot))
+            lines.append("")
+            lines.append(f"任务结束时仍占用内存最多的 {self.top_allocations} 个分配位置:")
+            lines.extend(self._format_allocations(self._snapshot))
+        if stats is not None:
+            buffer = io.StringIO()
+            stats.stream = buffer
+            stats.sort_stats('cumulative').print_stats(DEFAULT_TOP_FUNCTIONS)
+            lines.append("")
+            lines.append(f"累计耗时最多的 {DEFAULT_TOP_FUNCTIONS} 个函数:")
+            lines.append(buffer.getvalue().strip())
+        return "\n".join(lines) + "\n"
+
+    def _format_allocations(self, snapshot: tracemalloc.Snapshot):
+        lines = []
+        for stat in snapshot.statistics('lineno'):
+            frame = stat.traceback[0]
+            if frame.filename in _IGNORED_ALLOCATION_FILES:
+                continue
+            lines.append(f"{len(lines) + 1:3d}. {frame.filename}:{frame.lineno}  "
+                         f"{stat.size / 1024:.1f} KiB，{stat.count} 个对象")
+            if len(lines) >= self.top_allocations:
+                break
+        return lines
+
+
+@contextmanager
+def profile_job(job_id: Optional[str] = None, **kwargs):
+    """在 with 块内剖析当前任务，产出 JobProfiler"""
+    profiler = JobProfiler(job_id or get_current_job_id(), **kwargs)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度通道
+文档处理器在翻译线程中非阻塞地发布进度，通道按最大频率合并更新，
+由Web端的事件循环或GUI主线程各自消费，避免每次进度更新都创建线程或事件循环
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认最小推送间隔（秒），即最多每秒推送5次进度
+DEFAULT_MIN_INTERVAL = 0.2
+
+
+def is_terminal_progress(progress: float) -> bool:
+    """完成(>=1.0)和出错(<0)属于终态，必须送达，不参与合并"""
+    return progress >= 1.0 or progress < 0
+
+
+class ProgressChannel:
+    """
+    线程安全的进度通道
+
+    两种消费方式：
+    - 推送模式：提供回调函数（同步或异步）。创建时如果处于事件循环中，
+      回调通过 call_soon_threadsafe 在该事件循环上执行；否则在发布线程中直接调用
+    - 拉取模式：不提供回调，由消费者（如GUI的 after 轮询）调用 drain() 取出合并后的更新
+    """
+
+    def __init__(self, callback: Optional[Callable] = None, min_interval: float = DEFAULT_MIN_INTERVAL,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        初始化进度通道
+
+        Args:
+            callback: 进度回调函数 callback(progress, message)，可以是协程函数；为None时使用拉取模式
+            min_interval: 推送模式下两次推送之间的最小间隔（秒）
+            loop: 执行回调的事件循环，为None时自动获取当前正在运行的事件循环
+        """
+        self.callback = callback
+        self.min_interval = min_interval
+        self.is_async_callback = asyncio.iscoroutinefunction(callback)
+
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+        self.loop = loop
+
+        self._lock = threading.Lock()
+        self._deliver_lock = threading.Lock()
+        self._pending: Optional[Tuple[float, str]] = None
+        self._last_sent = 0.0
+        self._flush_scheduled = False
+        self._queue = deque()
+
+        # 统计信息
+        self.published = 0
+        self.delivered = 0
+
+    def publish(self, progress: float, message: str = "") -> None:
+        """
+        发布进度更新（非阻塞）
+
+        Args:
+            progress: 进度值（0-1），负数表示出错
+            message: 进度说明
+        """
+        update = (progress, message)
+        terminal = is_terminal_progress(progress)
+
+        if self.callback is None:
+            with self._lock:
+                self.published += 1
+                # 拉取模式：连续的中间进度只保留最新一条，终态始终保留
+                if self._queue and not is_terminal_progress(self._queue[-1][0]):
+                    self._queue[-1] = update
+                else:
+                    self._queue.append(update)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self.published += 1
+            if not terminal and now - self._last_sent < self.min_interval:
+                # 频率过高，暂存为待推送更新，由尾随刷新送出
+                self._pending = update
+                if not self._flush_scheduled:
+                    self._flush_scheduled = True
+                    self._schedule_flush(self.min_interval - (now - self._last_sent))
+                return
+            self._pending = None
+            self._last_sent = now
+
+        self._deliver(update)
+
+    def drain(self) -> List[Tuple[float, str]]:
+        """取出拉取模式下累积的进度更新（按发布顺序）"""
+        with self._lock:
+            updates = list(self._queue)
+            self._queue.clear()
+        return updates
+
+    def close(self) -> None:
+        """立即送出尚未推送的进度更新"""
+        self._flush_pending()
+
+    def _schedule_flush(self, delay: float) -> None:
+        """安排一次尾随刷新，确保被合并掉的最后一条进度最终送达"""
+        delay = max(delay, 0.0)
+        if self.loop is not None and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.loop.call_later, delay, self._flush_pending)
+                return
+            except RuntimeError:
+                pass
+        timer = threading.Timer(delay, self._flush_pending)
+        timer.daemon = True
+        timer.start()
+
+    def _flush_pending(self) -> None:
+        with self._lock:
+            update = self._pending
+            self._pending = None
+            self._flush_scheduled = False
+            if update is None:
+                return
+            self._last_sent = time.monotonic()
+        self._deliver(update)
+
+    def _deliver(self, update: Tuple[float, str]) -> None:
+        """把进度交给消费者，不等待回调完成"""
+        if self.loop is not None and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self._invoke, update)
+                return
+            except RuntimeError:
+                # 事件循环已关闭，退回到直接调用
+                pass
+
+        with self._deliver_lock:
+            if self.is_async_callback:
+                try:
+                    asyncio.run(self.callback(*update))
+                    self.delivered += 1
+                except Exception as e:
+                    logger.error(f"更新进度失败: {str(e)}")
+            else:
+                self._invoke(update)
+
+    def _invoke(self, update: Tuple[float, str]) -> None:
+        try:
+            if self.is_async_callback:
+                task = asyncio.ensure_future(self.callback(*update))
+                task.add_done_callback(self._log_task_error)
+            else:
+                self.callback(*update)
+            self.delivered += 1
+        except Exception as e:
+            logger.error(f"更新进度失败: {str(e)}")
+
+    @staticmethod
+    def _log_task_error(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"更新进度失败: {str(task.exception())}")
+
+
+def create_progress_channel(callback) -> Optional[ProgressChannel]:
+    """把进度回调包装为进度通道；传入的已是进度通道时直接返回"""
+    if callback is None:
+        return None
+    if isinstance(callback, ProgressChannel):
+        return callback
+    return ProgressChannel(callback)
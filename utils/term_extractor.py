@@ -1,9 +1,29 @@
 import logging
 import re
+import time
+import functools
+import threading
 from typing import Dict
+from utils.hot_log import HotPathLogger, CATEGORY_TERMS, lazy
 
 logger = logging.getLogger(__name__)
 
+
+def _timed_match(func):
+    """累计术语匹配和替换耗时，用于统计任务的 term_match 阶段"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            # 表格单元格并发翻译时多个线程共用同一个术语提取器
+            with self._stats_lock:
+                self.match_seconds += elapsed
+    return wrapper
+
+
 class TermExtractor:
     """术语提取和替换工具类"""
 
@@ -12,7 +32,11 @@ class TermExtractor:
         self.placeholder_format = "[术语{index}]"  # 使用中文格式的占位符，更容易被翻译模型保留
         self.term_map = {}  # 术语映射表 {占位符: (原文术语, 目标语术语)}
         self.match_count = {}  # 记录每个术语的匹配次数
+        self.hot = HotPathLogger(logger)  # 逐术语明细日志按类别分级和采样
+        self.match_seconds = 0.0  # 术语匹配和替换累计耗时（秒）
+        self._stats_lock = threading.Lock()
 
+    @_timed_match
     def extract_terms(self, text: str, terminology: Dict[str, str]) -> Dict[str, str]:
         """
         从中文文本中提取存在的术语
@@ -39,16 +63,15 @@ class TermExtractor:
         used_terms = {}
 
         # 记录术语库内容（仅记录前5个术语，避免日志过大）
-        terms_sample = list(terminology.items())[:5]
-        logger.info(f"术语库样本（前5个）: {terms_sample}")
-        logger.info(f"术语库大小: {len(terminology)}")
-        logger.info(f"要分析的文本前50个字符: {text[:50]}")
+        self.hot.log(CATEGORY_TERMS, "术语库样本（前5个）: %s", lazy(lambda: list(terminology.items())[:5]))
+        self.hot.log(CATEGORY_TERMS, "术语库大小: %s", len(terminology))
+        self.hot.log(CATEGORY_TERMS, "要分析的文本前50个字符: %s", text[:50])
 
         # 按照术语长度降序排序，确保优先匹配最长的术语
         sorted_terms = sorted(terminology.items(), key=lambda x: len(x[0]), reverse=True)
 
-        logger.info(f"开始从文本中提取术语，术语库大小: {len(terminology)}")
-        logger.debug(f"文本前100个字符: {text[:100]}")
+        self.hot.log(CATEGORY_TERMS, "开始从文本中提取术语，术语库大小: %s", len(terminology))
+        self.hot.log(CATEGORY_TERMS, "文本前100个字符: %s", text[:100], level=logging.DEBUG)
 
         for cn_term, foreign_term in sorted_terms:
             # 跳过空术语
@@ -64,25 +87,25 @@ class TermExtractor:
                 matches = list(re.finditer(pattern, text))
                 if matches:
                     used_terms[cn_term] = foreign_term
-                    logger.info(f"在文本中找到术语: {cn_term} -> {foreign_term} (匹配次数: {len(matches)})")
+                    self.hot.count("terms_matched")
+                    self.hot.sample(CATEGORY_TERMS, "在文本中找到术语: %s -> %s (匹配次数: %s)", cn_term, foreign_term, len(matches))
 
                     # 记录匹配位置
-                    match_positions = [f"({m.start()}-{m.end()})" for m in matches[:3]]  # 仅记录前3个匹配位置
-                    logger.debug(f"术语 '{cn_term}' 匹配位置: {', '.join(match_positions)}")
+                    self.hot.sample(CATEGORY_TERMS, "术语 '%s' 匹配位置: %s", cn_term, lazy(lambda: ', '.join(f"({m.start()}-{m.end()})" for m in matches[:3])), level=logging.DEBUG)
             except Exception as e:
                 logger.error(f"匹配术语时出错: {str(e)}, 术语: {cn_term}")
                 logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
                 continue
 
-        logger.info(f"从中文文本中提取了 {len(used_terms)} 个术语")
+        self.hot.log(CATEGORY_TERMS, "从中文文本中提取了 %s 个术语", len(used_terms))
 
         # 记录提取到的术语样本（仅记录前5个术语，避免日志过大）
         if used_terms:
-            terms_sample = list(used_terms.items())[:5]
-            logger.info(f"提取到的术语样本（前5个）: {terms_sample}")
+            self.hot.log(CATEGORY_TERMS, "提取到的术语样本（前5个）: %s", lazy(lambda: list(used_terms.items())[:5]))
 
         return used_terms
 
+    @_timed_match
     def extract_foreign_terms(self, text: str, terminology: Dict[str, str]) -> Dict[str, str]:
         """
         从外语文本中提取存在的术语
@@ -121,14 +144,16 @@ class TermExtractor:
                 # 对于外语术语，使用单词边界
                 if re.search(r'\b' + re.escape(foreign_term) + r'\b', text):
                     used_terms[foreign_term] = cn_term
-                    logger.debug(f"在外语文本中找到术语: {foreign_term} -> {cn_term}")
+                    self.hot.count("terms_matched")
+                    self.hot.sample(CATEGORY_TERMS, "在外语文本中找到术语: %s -> %s", foreign_term, cn_term, level=logging.DEBUG)
             except Exception as e:
                 logger.error(f"匹配外语术语时出错: {str(e)}, 术语: {foreign_term}")
                 continue
 
-        logger.info(f"从外语文本中提取了 {len(used_terms)} 个术语")
+        self.hot.log(CATEGORY_TERMS, "从外语文本中提取了 %s 个术语", len(used_terms))
         return used_terms
 
+    @_timed_match
     def extract_foreign_terms_by_chinese_values(self, text: str, terminology: Dict[str, str]) -> Dict[str, str]:
         """
         从外语文本中提取存在的术语，通过匹配中文术语对应的外语值
@@ -159,10 +184,9 @@ class TermExtractor:
         used_terms = {}
 
         # 记录术语库内容（仅记录前5个术语，避免日志过大）
-        terms_sample = list(terminology.items())[:5]
-        logger.info(f"术语库样本（前5个）: {terms_sample}")
-        logger.info(f"术语库大小: {len(terminology)}")
-        logger.info(f"要分析的文本前50个字符: {text[:50]}")
+        self.hot.log(CATEGORY_TERMS, "术语库样本（前5个）: %s", lazy(lambda: list(terminology.items())[:5]))
+        self.hot.log(CATEGORY_TERMS, "术语库大小: %s", len(terminology))
+        self.hot.log(CATEGORY_TERMS, "要分析的文本前50个字符: %s", text[:50])
 
         # 创建值到键的映射 {外语术语: [中文术语1, 中文术语2, ...]}
         # 因为可能有多个中文术语对应同一个外语术语
@@ -182,11 +206,10 @@ class TermExtractor:
         # 按照外语术语长度降序排序，确保优先匹配最长的术语
         sorted_terms = sorted(value_to_keys.items(), key=lambda x: len(x[0]), reverse=True)
 
-        logger.info(f"开始从外语文本中提取术语，有效术语数量: {len(value_to_keys)}")
+        self.hot.log(CATEGORY_TERMS, "开始从外语文本中提取术语，有效术语数量: %s", len(value_to_keys))
 
         # 记录排序后的术语样本（仅记录前5个术语，避免日志过大）
-        terms_sample = sorted_terms[:5]
-        logger.info(f"排序后的术语样本（前5个）: {terms_sample}")
+        self.hot.log(CATEGORY_TERMS, "排序后的术语样本（前5个）: %s", sorted_terms[:5])
 
         # 遍历术语目标语种的值
         for foreign_term, cn_terms in sorted_terms:
@@ -205,25 +228,25 @@ class TermExtractor:
                     # 如果有多个中文术语对应同一个外语术语，选择最长的中文术语
                     cn_term = sorted(cn_terms, key=len, reverse=True)[0]
                     used_terms[foreign_term] = cn_term
-                    logger.info(f"在外语文本中找到术语值匹配: {foreign_term} -> {cn_term} (匹配次数: {len(matches)})")
+                    self.hot.count("terms_matched")
+                    self.hot.sample(CATEGORY_TERMS, "在外语文本中找到术语值匹配: %s -> %s (匹配次数: %s)", foreign_term, cn_term, len(matches))
 
                     # 记录匹配位置
-                    match_positions = [f"({m.start()}-{m.end()})" for m in matches[:3]]  # 仅记录前3个匹配位置
-                    logger.debug(f"术语 '{foreign_term}' 匹配位置: {', '.join(match_positions)}")
+                    self.hot.sample(CATEGORY_TERMS, "术语 '%s' 匹配位置: %s", foreign_term, lazy(lambda: ', '.join(f"({m.start()}-{m.end()})" for m in matches[:3])), level=logging.DEBUG)
             except Exception as e:
                 logger.error(f"匹配外语术语值时出错: {str(e)}, 术语: {foreign_term}")
                 logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
                 continue
 
-        logger.info(f"通过中文术语对应的外语值匹配，从外语文本中提取了 {len(used_terms)} 个术语")
+        self.hot.log(CATEGORY_TERMS, "通过中文术语对应的外语值匹配，从外语文本中提取了 %s 个术语", len(used_terms))
 
         # 记录提取到的术语样本（仅记录前5个术语，避免日志过大）
         if used_terms:
-            terms_sample = list(used_terms.items())[:5]
-            logger.info(f"提取到的术语样本（前5个）: {terms_sample}")
+            self.hot.log(CATEGORY_TERMS, "提取到的术语样本（前5个）: %s", lazy(lambda: list(used_terms.items())[:5]))
 
         return used_terms
 
+    @_timed_match
     def extract_foreign_terms_from_reversed_dict(self, text: str, reversed_terminology: Dict[str, str]) -> Dict[str, str]:
         """
         从外语文本中提取存在的术语，使用预先对调的术语库（高效版本）
@@ -247,19 +270,17 @@ class TermExtractor:
         used_terms = {}
 
         # 记录术语库内容（仅记录前5个术语，避免日志过大）
-        terms_sample = list(reversed_terminology.items())[:5]
-        logger.info(f"反向术语库样本（前5个）: {terms_sample}")
-        logger.info(f"反向术语库大小: {len(reversed_terminology)}")
-        logger.info(f"要分析的文本前50个字符: {text[:50]}")
+        self.hot.log(CATEGORY_TERMS, "反向术语库样本（前5个）: %s", lazy(lambda: list(reversed_terminology.items())[:5]))
+        self.hot.log(CATEGORY_TERMS, "反向术语库大小: %s", len(reversed_terminology))
+        self.hot.log(CATEGORY_TERMS, "要分析的文本前50个字符: %s", text[:50])
 
         # 按照外语术语长度降序排序，确保优先匹配最长的术语
         sorted_terms = sorted(reversed_terminology.items(), key=lambda x: len(x[0]), reverse=True)
 
-        logger.info(f"开始从外语文本中提取术语，使用缓存的反向术语库，术语数量: {len(reversed_terminology)}")
+        self.hot.log(CATEGORY_TERMS, "开始从外语文本中提取术语，使用缓存的反向术语库，术语数量: %s", len(reversed_terminology))
 
         # 记录排序后的术语样本（仅记录前5个术语，避免日志过大）
-        terms_sample = sorted_terms[:5]
-        logger.info(f"排序后的术语样本（前5个）: {terms_sample}")
+        self.hot.log(CATEGORY_TERMS, "排序后的术语样本（前5个）: %s", sorted_terms[:5])
 
         # 遍历反向术语库
         for foreign_term, cn_term in sorted_terms:
@@ -276,19 +297,20 @@ class TermExtractor:
                 matches = list(re.finditer(pattern, text))
                 if matches:
                     used_terms[foreign_term] = cn_term
-                    logger.info(f"在外语文本中找到术语匹配（缓存版本）: {foreign_term} -> {cn_term} (匹配次数: {len(matches)})")
+                    self.hot.count("terms_matched")
+                    self.hot.sample(CATEGORY_TERMS, "在外语文本中找到术语匹配（缓存版本）: %s -> %s (匹配次数: %s)", foreign_term, cn_term, len(matches))
 
                     # 记录匹配位置
-                    match_positions = [f"({m.start()}-{m.end()})" for m in matches[:3]]  # 仅记录前3个匹配位置
-                    logger.debug(f"术语 '{foreign_term}' 匹配位置: {', '.join(match_positions)}")
+                    self.hot.sample(CATEGORY_TERMS, "术语 '%s' 匹配位置: %s", foreign_term, lazy(lambda: ', '.join(f"({m.start()}-{m.end()})" for m in matches[:3])), level=logging.DEBUG)
             except Exception as e:
                 logger.error(f"匹配外语术语时出错: {str(e)}, 术语: {foreign_term}")
                 logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
                 continue
 
-        logger.info(f"使用缓存的反向术语库，从外语文本中提取了 {len(used_terms)} 个术语")
+        self.hot.log(CATEGORY_TERMS, "使用缓存的反向术语库，从外语文本中提取了 %s 个术语", len(used_terms))
         return used_terms
 
+    @_timed_match
     def replace_terms_with_placeholders(self, text: str, terminology: Dict[str, str]) -> str:
         """
         将中文文本中的术语替换为占位符
@@ -311,12 +333,11 @@ class TermExtractor:
         # 按照术语长度降序排序，确保优先替换最长的术语
         sorted_terms = sorted(terminology.items(), key=lambda x: len(x[0]), reverse=True)
 
-        logger.info(f"开始替换术语为占位符，术语库大小: {len(terminology)}")
-        logger.debug(f"原始文本前100个字符: {text[:100]}")
+        self.hot.log(CATEGORY_TERMS, "开始替换术语为占位符，术语库大小: %s", len(terminology))
+        self.hot.log(CATEGORY_TERMS, "原始文本前100个字符: %s", text[:100], level=logging.DEBUG)
 
         # 记录术语库样本（仅记录前5个术语，避免日志过大）
-        terms_sample = list(terminology.items())[:5]
-        logger.info(f"术语库样本（前5个）: {terms_sample}")
+        self.hot.log(CATEGORY_TERMS, "术语库样本（前5个）: %s", lazy(lambda: list(terminology.items())[:5]))
 
         # 替换文本中的术语为占位符
         result_text = text
@@ -348,11 +369,10 @@ class TermExtractor:
                         # 保存术语映射
                         self.term_map[placeholder] = (cn_term, foreign_term)
                         replaced_count += 1
-                        logger.info(f"替换中文术语: {cn_term} -> {placeholder} (匹配次数: {match_count})")
+                        self.hot.sample(CATEGORY_TERMS, "替换中文术语: %s -> %s (匹配次数: %s)", cn_term, placeholder, match_count)
 
                         # 记录匹配位置
-                        match_positions = [f"({m.start()}-{m.end()})" for m in matches[:3]]  # 仅记录前3个匹配位置
-                        logger.debug(f"术语 '{cn_term}' 匹配位置: {', '.join(match_positions)}")
+                        self.hot.sample(CATEGORY_TERMS, "术语 '%s' 匹配位置: %s", cn_term, lazy(lambda: ', '.join(f"({m.start()}-{m.end()})" for m in matches[:3])), level=logging.DEBUG)
                     else:
                         logger.warning(f"术语替换失败: {cn_term}")
             except Exception as e:
@@ -360,16 +380,16 @@ class TermExtractor:
                 logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
                 continue
 
-        logger.info(f"替换了 {replaced_count} 个中文术语为占位符")
+        self.hot.log(CATEGORY_TERMS, "替换了 %s 个中文术语为占位符", replaced_count)
         if replaced_count > 0:
-            logger.debug(f"替换后文本前100个字符: {result_text[:100]}")
+            self.hot.log(CATEGORY_TERMS, "替换后文本前100个字符: %s", result_text[:100], level=logging.DEBUG)
 
             # 记录术语映射表
-            term_map_sample = list(self.term_map.items())[:5]  # 仅记录前5个映射
-            logger.info(f"术语映射表样本（前5个）: {term_map_sample}")
+            self.hot.log(CATEGORY_TERMS, "术语映射表样本（前5个）: %s", lazy(lambda: list(self.term_map.items())[:5]))
 
         return result_text
 
+    @_timed_match
     def replace_foreign_terms_with_placeholders(self, text: str, terminology: Dict[str, str]) -> str:
         """
         将外语文本中的术语替换为占位符
@@ -396,12 +416,11 @@ class TermExtractor:
         # 按照术语长度降序排序，确保优先替换最长的术语
         sorted_terms = sorted(terminology.items(), key=lambda x: len(x[0]), reverse=True)
 
-        logger.info(f"开始替换外语术语为占位符，术语库大小: {len(terminology)}")
-        logger.debug(f"原始文本前100个字符: {text[:100]}")
+        self.hot.log(CATEGORY_TERMS, "开始替换外语术语为占位符，术语库大小: %s", len(terminology))
+        self.hot.log(CATEGORY_TERMS, "原始文本前100个字符: %s", text[:100], level=logging.DEBUG)
 
         # 记录术语库样本（仅记录前5个术语，避免日志过大）
-        terms_sample = list(terminology.items())[:5]
-        logger.info(f"术语库样本（前5个）: {terms_sample}")
+        self.hot.log(CATEGORY_TERMS, "术语库样本（前5个）: %s", lazy(lambda: list(terminology.items())[:5]))
 
         # 替换文本中的术语为占位符
         result_text = text
@@ -434,11 +453,10 @@ class TermExtractor:
                         # 保存术语映射
                         self.term_map[placeholder] = (foreign_term, cn_term)
                         replaced_count += 1
-                        logger.info(f"替换外语术语: {foreign_term} -> {placeholder} (匹配次数: {match_count})")
+                        self.hot.sample(CATEGORY_TERMS, "替换外语术语: %s -> %s (匹配次数: %s)", foreign_term, placeholder, match_count)
 
                         # 记录匹配位置
-                        match_positions = [f"({m.start()}-{m.end()})" for m in matches[:3]]  # 仅记录前3个匹配位置
-                        logger.debug(f"术语 '{foreign_term}' 匹配位置: {', '.join(match_positions)}")
+                        self.hot.sample(CATEGORY_TERMS, "术语 '%s' 匹配位置: %s", foreign_term, lazy(lambda: ', '.join(f"({m.start()}-{m.end()})" for m in matches[:3])), level=logging.DEBUG)
                     else:
                         logger.warning(f"术语替换失败: {foreign_term}")
             except Exception as e:
@@ -446,16 +464,16 @@ class TermExtractor:
                 logger.error(f"错误详情: {str(e.__class__.__name__)}: {str(e)}")
                 continue
 
-        logger.info(f"替换了 {replaced_count} 个外语术语为占位符")
+        self.hot.log(CATEGORY_TERMS, "替换了 %s 个外语术语为占位符", replaced_count)
         if replaced_count > 0:
-            logger.debug(f"替换后文本前100个字符: {result_text[:100]}")
+            self.hot.log(CATEGORY_TERMS, "替换后文本前100个字符: %s", result_text[:100], level=logging.DEBUG)
 
             # 记录术语映射表
-            term_map_sample = list(self.term_map.items())[:5]  # 仅记录前5个映射
-            logger.info(f"术语映射表样本（前5个）: {term_map_sample}")
+            self.hot.log(CATEGORY_TERMS, "术语映射表样本（前5个）: %s", lazy(lambda: list(self.term_map.items())[:5]))
 
         return result_text
 
+    @_timed_match
     def restore_placeholders_with_foreign_terms(self, text: str) -> str:
         """
         将文本中的占位符替换为目标外语术语
@@ -471,12 +489,11 @@ class TermExtractor:
             return text
 
         result_text = text
-        logger.info(f"开始恢复占位符为外语术语，占位符数量: {len(self.term_map)}")
-        logger.debug(f"原始文本: {text[:100]}...")
+        self.hot.log(CATEGORY_TERMS, "开始恢复占位符为外语术语，占位符数量: %s", len(self.term_map))
+        self.hot.log(CATEGORY_TERMS, "原始文本: %s...", text[:100], level=logging.DEBUG)
 
         # 记录术语映射表样本（仅记录前5个，避免日志过大）
-        term_map_sample = list(self.term_map.items())[:5]
-        logger.info(f"术语映射表样本（前5个）: {term_map_sample}")
+        self.hot.log(CATEGORY_TERMS, "术语映射表样本（前5个）: %s", lazy(lambda: list(self.term_map.items())[:5]))
 
         replaced_count = 0
         # 首先尝试直接替换完全匹配的占位符
@@ -501,7 +518,7 @@ class TermExtractor:
                     replaced_count += 1
                     # 获取匹配次数（如果有记录）
                     match_count = self.match_count.get(term_tuple[0], "未知")
-                    logger.info(f"恢复占位符为外语术语: {placeholder} -> {foreign_term} (原术语匹配次数: {match_count})")
+                    self.hot.sample(CATEGORY_TERMS, "恢复占位符为外语术语: %s -> %s (原术语匹配次数: %s)", placeholder, foreign_term, match_count)
                 else:
                     logger.warning(f"占位符替换失败: {placeholder}")
             else:
@@ -521,13 +538,12 @@ class TermExtractor:
                 index_to_term[index] = term_tuple[1]  # 外语术语
 
         # 记录索引到术语的映射样本
-        index_map_sample = list(index_to_term.items())[:5]
-        logger.info(f"索引到术语的映射样本（前5个）: {index_map_sample}")
+        self.hot.log(CATEGORY_TERMS, "索引到术语的映射样本（前5个）: %s", lazy(lambda: list(index_to_term.items())[:5]))
 
         # 查找所有匹配的占位符
         matches = re.findall(term_pattern, result_text)
         if matches:
-            logger.info(f"发现 {len(matches)} 个需要额外处理的占位符，尝试使用正则表达式匹配")
+            self.hot.log(CATEGORY_TERMS, "发现 %s 个需要额外处理的占位符，尝试使用正则表达式匹配", len(matches))
 
             # 替换所有匹配的占位符
             for index in matches:
@@ -536,7 +552,7 @@ class TermExtractor:
                     before_replace = result_text
                     result_text = re.sub(replace_pattern, index_to_term[index], result_text)
                     if before_replace != result_text:
-                        logger.info(f"使用正则表达式恢复占位符: {replace_pattern} -> {index_to_term[index]}")
+                        self.hot.sample(CATEGORY_TERMS, "使用正则表达式恢复占位符: %s -> %s", replace_pattern, index_to_term[index])
 
         # 检查是否还有未替换的占位符（包括被翻译成英文的占位符）
         remaining_placeholders = re.findall(r'\[术语\d+\]', result_text)
@@ -560,7 +576,7 @@ class TermExtractor:
                     result_text = result_text.replace(placeholder_text, index_to_term[index])
                     if before_replace != result_text:
                         final_replaced_count += 1
-                        logger.info(f"使用最终替换恢复中文占位符: {placeholder_text} -> {index_to_term[index]}")
+                        self.hot.sample(CATEGORY_TERMS, "使用最终替换恢复中文占位符: %s -> %s", placeholder_text, index_to_term[index])
                     else:
                         logger.error(f"最终替换也失败: {placeholder_text}")
                 else:
@@ -576,7 +592,7 @@ class TermExtractor:
                     result_text = result_text.replace(placeholder_text, index_to_term[index])
                     if before_replace != result_text:
                         final_replaced_count += 1
-                        logger.info(f"使用最终替换恢复英文占位符: {placeholder_text} -> {index_to_term[index]}")
+                        self.hot.sample(CATEGORY_TERMS, "使用最终替换恢复英文占位符: %s -> %s", placeholder_text, index_to_term[index])
                     else:
                         logger.error(f"最终替换也失败: {placeholder_text}")
                 else:
@@ -590,10 +606,10 @@ class TermExtractor:
                 logger.error(f"中文: {final_remaining_cn}")
                 logger.error(f"英文: {final_remaining_en}")
             else:
-                logger.info(f"最终替换成功恢复了额外的 {final_replaced_count} 个占位符")
+                self.hot.log(CATEGORY_TERMS, "最终替换成功恢复了额外的 %s 个占位符", final_replaced_count)
 
-        logger.info(f"恢复了 {replaced_count} 个占位符为目标外语术语")
-        logger.info(f"处理后文本前100个字符: {result_text[:100]}...")
+        self.hot.log(CATEGORY_TERMS, "恢复了 %s 个占位符为目标外语术语", replaced_count)
+        self.hot.log(CATEGORY_TERMS, "处理后文本前100个字符: %s...", result_text[:100])
 
         # 最终验证：确保没有遗留的占位符
         final_check = re.findall(r'\[术语\d+\]', result_text)
@@ -602,6 +618,7 @@ class TermExtractor:
 
         return result_text
 
+    @_timed_match
     def restore_placeholders_with_chinese_terms(self, text: str) -> str:
         """
         将文本中的占位符替换为中文术语
@@ -617,8 +634,8 @@ class TermExtractor:
             return text
 
         result_text = text
-        logger.debug(f"开始恢复占位符为中文术语，占位符数量: {len(self.term_map)}")
-        logger.debug(f"原始文本: {text[:100]}...")
+        self.hot.log(CATEGORY_TERMS, "开始恢复占位符为中文术语，占位符数量: %s", len(self.term_map), level=logging.DEBUG)
+        self.hot.log(CATEGORY_TERMS, "原始文本: %s...", text[:100], level=logging.DEBUG)
 
         # 记录替换的数量
         replaced_count = 0
@@ -647,7 +664,7 @@ class TermExtractor:
                     replaced_count += 1
                     # 获取匹配次数（如果有记录）
                     match_count = self.match_count.get(term_tuple[0], "未知")
-                    logger.debug(f"恢复占位符为中文术语: {placeholder} -> {cn_term} (原术语匹配次数: {match_count})")
+                    self.hot.sample(CATEGORY_TERMS, "恢复占位符为中文术语: %s -> %s (原术语匹配次数: %s)", placeholder, cn_term, match_count, level=logging.DEBUG)
                 else:
                     logger.warning(f"占位符替换失败: {placeholder}")
             else:
@@ -669,7 +686,7 @@ class TermExtractor:
         # 查找所有匹配的占位符
         matches = re.findall(term_pattern, result_text)
         if matches:
-            logger.info(f"发现 {len(matches)} 个需要额外处理的占位符，尝试使用正则表达式匹配")
+            self.hot.log(CATEGORY_TERMS, "发现 %s 个需要额外处理的占位符，尝试使用正则表达式匹配", len(matches))
 
             # 替换所有匹配的占位符
             for index in matches:
@@ -678,7 +695,7 @@ class TermExtractor:
                     before_replace = result_text
                     result_text = re.sub(replace_pattern, index_to_term[index], result_text)
                     if before_replace != result_text:
-                        logger.debug(f"使用正则表达式恢复占位符: {replace_pattern} -> {index_to_term[index]}")
+                        self.hot.sample(CATEGORY_TERMS, "使用正则表达式恢复占位符: %s -> %s", replace_pattern, index_to_term[index], level=logging.DEBUG)
 
         # 检查是否还有未替换的占位符
         remaining_placeholders = re.findall(r'\[术语\d+\]', result_text)
@@ -696,7 +713,7 @@ class TermExtractor:
                     result_text = result_text.replace(placeholder_text, index_to_term[index])
                     if before_replace != result_text:
                         final_replaced_count += 1
-                        logger.debug(f"使用最终替换恢复占位符: {placeholder_text} -> {index_to_term[index]}")
+                        self.hot.sample(CATEGORY_TERMS, "使用最终替换恢复占位符: %s -> %s", placeholder_text, index_to_term[index], level=logging.DEBUG)
                     else:
                         logger.error(f"最终替换也失败: {placeholder_text}")
                 else:
@@ -707,10 +724,10 @@ class TermExtractor:
             if final_remaining:
                 logger.error(f"最终仍有 {len(final_remaining)} 个占位符未被替换: {final_remaining}")
             else:
-                logger.info(f"最终替换成功恢复了额外的 {final_replaced_count} 个占位符")
+                self.hot.log(CATEGORY_TERMS, "最终替换成功恢复了额外的 %s 个占位符", final_replaced_count)
 
-        logger.info(f"恢复了 {replaced_count} 个占位符为中文术语")
-        logger.debug(f"处理后文本: {result_text[:100]}...")
+        self.hot.log(CATEGORY_TERMS, "恢复了 %s 个占位符为中文术语", replaced_count)
+        self.hot.log(CATEGORY_TERMS, "处理后文本: %s...", result_text[:100], level=logging.DEBUG)
 
         # 最终验证：确保没有遗留的占位符
         final_check = re.findall(r'\[术语\d+\]', result_text)
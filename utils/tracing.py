@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务阶段追踪
+为单个翻译任务记录处理器各阶段和每次翻译引擎调用的时间段（span），
+可导出为 Chrome trace-event JSON，在 chrome://tracing 或 Perfetto 中查看任务慢在哪里。
+当前任务的追踪器保存在 contextvars 中，未启用追踪时记录函数直接返回
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from utils.job_context import get_current_job_id
+
+logger = logging.getLogger(__name__)
+
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar("current_tracer", default=None)
+_current_segment: contextvars.ContextVar = contextvars.ContextVar("current_segment", default=None)
+
+
+class JobTracer:
+    """单个任务的时间段记录"""
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._events: List[Dict] = []
+        self._threads: Dict[int, str] = {}
+        self._segment_seq = 0
+        self._lock = threading.Lock()
+
+    def next_segment_id(self) -> int:
+        """任务内片段序号，用于关联同一片段的引擎调用"""
+        with self._lock:
+            self._segment_seq += 1
+            return self._segment_seq
+
+    def record(self, name: str, category: str, started: float, duration: float, args: Optional[Dict] = None) -> None:
+        """
+        记录一个已结束的时间段
+
+        Args:
+            name: 名称
+            category: 类别（stage/engine）
+            started: 开始时间（time.perf_counter()）
+            duration: 持续时间（秒）
+            args: 附加信息
+        """
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self._origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": self.pid,
+            "tid": thread.ident,
+            "args": dict(args or {}, job_id=self.job_id)
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def to_chrome_trace(self) -> Dict:
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": f"翻译任务 {self.job_id or ''}".strip()}}
+        ] + [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def save(self, path: str) -> str:
+        """保存 Chrome trace-event JSON 文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+
+def get_current_tracer() -> Optional[JobTracer]:
+    return _current_tracer.get()
+
+
+@contextmanager
+def trace_job(job_id: Optional[str] = None):
+    """在 with 块内为当前任务启用追踪，产出 JobTracer"""
+    tracer = JobTracer(job_id or get_current_job_id())
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def record_span(name: str, category: str, started: float, duration: float, **args) -> None:
+    """向当前任务的追踪器记录一个已结束的时间段，未启用追踪时不做任何事"""
+    tracer = _current_tracer.get()
+    if tracer is not None:
+        tracer.record(name, category, started, duration, args)
+
+
+@contextmanager
+def segment_span(**args):
+    """记录一个片段的翻译（含缓存查询和引擎调用），片段内的引擎调用带相同的片段序号"""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    segment_id = tracer.next_segment_id()
+    token = _current_segment.set(segment_id)
+    started = time.perf_counter()
+    try:
+        yield segment_id
+    finally:
+        _current_segment.reset(token)
+        tracer.record("segment", "segment", started, time.perf_counter() - started, dict(args, segment_id=segment_id))
+
+
+def current_segment_id() -> Optional[int]:
+    return _current_segment.get()
+
+
+def trace_path_for(output_path: str) -> str:
+    """追踪文件路径：与译文同目录，文件名为 <译文名>_trace.json"""
+    return os.path.splitext(output_path)[0] + "_trace.json"
@@ -14,6 +14,7 @@ import sys
 import time
 import traceback
 from .terminal_capture import get_terminal_capture, add_output_callback, remove_output_callback
+from .log_writer import BackgroundLogWriter, DEFAULT_MAX_BYTES, DEFAULT_BACKUP_COUNT, DEFAULT_FLUSH_INTERVAL
 
 
 class QueueHandler(logging.Handler):
@@ -63,23 +64,34 @@ class QueueHandler(logging.Handler):
 
 
 class EnhancedFileHandler(logging.Handler):
-    """增强的文件日志处理器，支持实时监控和异常捕获"""
-    def __init__(self):
+    """增强的文件日志处理器，支持实时监控和异常捕获
+
+    emit() 只负责格式化并把文本放入后台写入器的有界队列，
+    realtime.log 和 application.log 由后台线程批量写入并按大小轮转压缩
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
         super().__init__()
-        self.buffer = []
-        self.buffer_size = 50  # 减小缓冲区大小，更频繁地写入
-        self.buffer_lock = threading.Lock()
         self.exception_count = 0
         self.last_exception_time = 0
         self.log_file = 'application.log'
         self.realtime_log_file = 'realtime.log'
 
-        # 创建实时日志文件
-        try:
-            with open(self.realtime_log_file, 'w', encoding='utf-8') as f:
-                f.write(f"=== 实时日志开始 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
-        except Exception:
-            pass
+        # 创建实时日志文件（启动时清空，首行为会话标记）
+        self.realtime_writer = BackgroundLogWriter(
+            self.realtime_log_file,
+            max_bytes=max_bytes,
+            backup_count=backup_count,
+            flush_interval=flush_interval,
+            header=f"=== 实时日志开始 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n",
+            truncate=True
+        )
+        self.application_writer = BackgroundLogWriter(
+            self.log_file,
+            max_bytes=max_bytes,
+            backup_count=backup_count,
+            flush_interval=flush_interval
+        )
 
     def emit(self, record):
         try:
@@ -104,56 +116,48 @@ class EnhancedFileHandler(logging.Handler):
             if record.exc_info:
                 log_entry['exception'] = traceback.format_exception(*record.exc_info)
 
-            with self.buffer_lock:
-                self.buffer.append(log_entry)
-
-                # 立即写入实时日志
-                self._write_realtime_log(log_entry)
-
-                # 如果是错误或缓冲区满了，立即刷新
-                if record.levelno >= logging.ERROR or len(self.buffer) >= self.buffer_size:
-                    self.flush_buffer()
+            # 错误记录在队列满时短暂等待，其余记录满了直接丢弃
+            block = record.levelno >= logging.ERROR
+            self.realtime_writer.write(self._format_realtime_line(log_entry), block=block)
+            self.application_writer.write(json.dumps(log_entry, ensure_ascii=False) + '\n', block=block)
 
         except Exception:
             self.handleError(record)
 
-    def _write_realtime_log(self, log_entry):
-        """写入实时日志文件"""
-        try:
-            with open(self.realtime_log_file, 'a', encoding='utf-8') as f:
-                timestamp = log_entry['timestamp']
-                level = log_entry['level']
-                message = log_entry['message']
-                module = log_entry.get('module', '')
-                func = log_entry.get('funcName', '')
-                line = log_entry.get('lineno', '')
-
-                # 格式化输出
-                log_line = f"[{timestamp}] {level:8} {module}:{func}:{line} - {message}\n"
-                f.write(log_line)
-                f.flush()  # 立即刷新到磁盘
-
-                # 如果有异常信息，也写入
-                if 'exception' in log_entry:
-                    f.write("异常堆栈:\n")
-                    for line in log_entry['exception']:
-                        f.write(f"  {line}")
-                    f.write("\n")
-                    f.flush()
-        except Exception:
-            pass  # 忽略实时日志写入错误
-
-    def flush_buffer(self):
-        with self.buffer_lock:
-            if self.buffer:
-                try:
-                    with open(self.log_file, 'a', encoding='utf-8') as f:
-                        for entry in self.buffer:
-                            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
-                    self.buffer.clear()
-                except Exception as e:
-                    self.buffer.clear()
-                    print(f"日志写入失败: {e}")
+    @staticmethod
+    def _format_realtime_line(log_entry):
+        """格式化实时日志行（web/realtime_logger.py 按此格式解析）"""
+        timestamp = log_entry['timestamp']
+        level = log_entry['level']
+        message = log_entry['message']
+        module = log_entry.get('module', '')
+        func = log_entry.get('funcName', '')
+        line = log_entry.get('lineno', '')
+
+        log_line = f"[{timestamp}] {level:8} {module}:{func}:{line} - {message}\n"
+
+        # 如果有异常信息，也写入
+        if 'exception' in log_entry:
+            log_line += "异常堆栈:\n" + "".join(f"  {exc_line}" for exc_line in log_entry['exception']) + "\n"
+        return log_line
+
+    def flush(self):
+        """等待已提交的日志写入文件"""
+        self.realtime_writer.flush()
+        self.application_writer.flush()
+
+    def close(self):
+        """写完剩余日志并停止后台写入线程"""
+        self.realtime_writer.close()
+        self.application_writer.close()
+        super().close()
+
+    def get_writer_stats(self):
+        """获取后台写入统计（写入条数、丢弃条数、轮转次数等）"""
+        return {
+            'realtime': self.realtime_writer.stats(),
+            'application': self.application_writer.stats()
+        }
 
     def get_exception_stats(self):
         """获取异常统计信息"""
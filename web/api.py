@@ -1,24 +1,31 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, JSONResponse, Response
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 import os
 import uuid
+import zipfile
 import logging
-import shutil
 import threading
 from typing import List, Optional, Dict
 from pydantic import BaseModel
 import json
 import asyncio
+from collections import deque
 from datetime import datetime
 
 from services.translator import TranslationService
-from services.document_factory import DocumentProcessorFactory
 from utils.terminology import load_terminology, save_terminology, TERMINOLOGY_PATH
 from web.realtime_logger import realtime_monitor, start_realtime_monitoring, stop_realtime_monitoring
+from web.worker_pool import get_worker_pool, shutdown_worker_pool
+from web.job_store import JobDispatcher, get_job_store
+from web.upload_store import save_upload_stream, get_glossary_version, compute_cache_key, get_result_cache
+from web.batch_jobs import SUPPORTED_EXTENSIONS, MAX_BATCH_DOCUMENTS, extract_zip_documents, create_batch, get_batch, run_batch, iter_batch_zip
+from web.ws_manager import manager
+from utils.job_context import bind_job, unbind_job, get_job_log_router
+from utils import metrics
 from utils.terminal_capture import get_terminal_capture, add_output_callback, remove_output_callback
 
 # 简化日志配置，避免与web_server.py冲突
@@ -145,58 +152,28 @@ class TranslationTask(BaseModel):
     status: str
     progress: float = 0.0
     output_file: Optional[str] = None
-
-# 存储任务状态
-translation_tasks = {}
-
-# WebSocket连接管理器
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-
-    async def send_message(self, client_id: str, message: str):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections.values():
-            await connection.send_text(message)
-
-# 创建连接管理器实例
-manager = ConnectionManager()
-
-# 自定义日志处理器，将日志发送到WebSocket
-class WebSocketLogHandler(logging.Handler):
-    def __init__(self, task_id: str):
-        super().__init__()
-        self.task_id = task_id
-        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-
-    def emit(self, record):
-        log_entry = self.format(record)
-
-        # 检查是否在异步环境中
-        try:
-            asyncio.get_running_loop()
-            # 如果能获取到事件循环，说明在异步环境中
-            asyncio.create_task(self.send_log(log_entry))
-        except RuntimeError:
-            # 如果不在异步环境中，只记录日志，不尝试发送
-            pass
-
-    async def send_log(self, log_entry):
-        await manager.send_message(self.task_id, json.dumps({
-            "type": "log",
-            "data": log_entry
-        }))
+    incremental_summary: Optional[Dict] = None
+    artifacts: Optional[Dict] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+# 存储任务状态（持久化任务存储，调度器在应用启动时创建）
+job_store = get_job_store()
+job_dispatcher = None
+
+def job_to_task(job: Dict) -> TranslationTask:
+    """把任务存储中的记录转换为接口返回的任务状态"""
+    fields = {field: job.get(field) for field in TranslationTask.__fields__ if field in job}
+    # 诊断文件只返回文件名和下载地址，不暴露服务器路径
+    if job.get('artifacts'):
+        fields['artifacts'] = {
+            name: {"file": os.path.basename(path), "url": f"/api/tasks/{job['task_id']}/artifacts/{name}"}
+            for name, path in job['artifacts'].items()
+        }
+    return TranslationTask(**fields)
 
 # 全局WebSocket日志处理器，将日志发送到所有连接的客户端
 class GlobalWebSocketLogHandler(logging.Handler):
@@ -208,9 +185,9 @@ class GlobalWebSocketLogHandler(logging.Handler):
             datefmt='%Y-%m-%d %H:%M:%S'
         ))
         self.setLevel(logging.INFO)  # 只处理INFO级别及以上的日志
-        self.pending_logs = []  # 存储待发送的日志
+        self.max_pending_logs = 1000  # 最大待发送日志数量，超出时丢弃最旧的
+        self.pending_logs = deque(maxlen=self.max_pending_logs)  # 存储待发送的日志
         self._lock = threading.Lock()  # 使用线程锁而不是asyncio锁
-        self.max_pending_logs = 1000  # 最大待发送日志数量，防止内存溢出
 
         # 记录初始化信息，同时输出到终端和Web界面
         init_msg = "全局WebSocket日志处理器已初始化，终端控制台和Web界面日志将实时同步"
@@ -231,12 +208,8 @@ class GlobalWebSocketLogHandler(logging.Handler):
         try:
             log_entry = self.format(record)
 
-            # 简化日志处理，避免异步问题
-            # 只将日志存储到待发送队列中
+            # 只存入待发送队列，在客户端连接时统一发送
             with self._lock:
-                # 限制待发送日志数量，防止内存溢出
-                if len(self.pending_logs) >= self.max_pending_logs:
-                    self.pending_logs.pop(0)  # 移除最旧的日志
                 self.pending_logs.append(log_entry)
         except Exception as e:
             # 确保日志处理器不会因为异常而中断程序
@@ -246,7 +219,7 @@ class GlobalWebSocketLogHandler(logging.Handler):
         """设置终端捕获"""
         try:
             def terminal_output_callback(log_entry):
-                """处理终端输出的回调函数"""
+                """处理终端输出的回调函数（在终端捕获线程中调用）"""
                 try:
                     # 格式化消息
                     timestamp = log_entry.get('timestamp', '')
@@ -256,19 +229,8 @@ class GlobalWebSocketLogHandler(logging.Handler):
                     # 创建格式化的日志消息
                     formatted_message = f"{timestamp} - {level} - terminal - {message}"
 
-                    # 添加到待发送队列
-                    with self._lock:
-                        if len(self.pending_logs) >= self.max_pending_logs:
-                            self.pending_logs.pop(0)
-                        self.pending_logs.append(formatted_message)
-
-                    # 如果有活跃连接，立即广播
-                    if manager.active_connections:
-                        try:
-                            asyncio.create_task(self.broadcast_log(formatted_message))
-                        except RuntimeError:
-                            # 不在异步环境中，忽略
-                            pass
+                    # 有活跃连接时进入各客户端的发送队列，否则存入待发送队列
+                    self.broadcast_log(formatted_message)
 
                 except Exception:
                     pass
@@ -286,20 +248,12 @@ class GlobalWebSocketLogHandler(logging.Handler):
         except Exception as e:
             print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ERROR - 启动终端捕获失败: {e}")
 
-    async def broadcast_log(self, log_entry):
-        # 向所有连接的客户端广播日志
+    def broadcast_log(self, log_entry):
+        """向所有连接的客户端广播日志（线程安全，入队即返回）"""
         try:
-            if manager.active_connections:
-                await manager.broadcast(json.dumps({
-                    "type": "system_log",
-                    "data": log_entry
-                }))
-            else:
+            if not manager.publish_log(log_entry):
                 # 如果没有活跃连接，将日志存储起来
                 with self._lock:
-                    # 限制待发送日志数量
-                    if len(self.pending_logs) >= self.max_pending_logs:
-                        self.pending_logs.pop(0)
                     self.pending_logs.append(log_entry)
         except Exception as e:
             # 使用sys.stderr确保错误信息能输出到终端
@@ -307,14 +261,12 @@ class GlobalWebSocketLogHandler(logging.Handler):
             sys.stderr.write(f"广播日志失败: {str(e)}\n")
             sys.stderr.flush()
 
-    async def flush_pending_logs(self):
+    def flush_pending_logs(self):
         """发送所有待发送的日志"""
-        if not self.pending_logs:
-            return
-
-        # 使用线程锁
         with self._lock:
-            pending = self.pending_logs.copy()
+            if not self.pending_logs:
+                return
+            pending = list(self.pending_logs)
             self.pending_logs.clear()
 
         # 记录发送日志数量，同时输出到终端
@@ -324,12 +276,7 @@ class GlobalWebSocketLogHandler(logging.Handler):
         sys.stdout.flush()
 
         for log_entry in pending:
-            await self.broadcast_log(log_entry)
-
-        # 记录完成信息
-        complete_msg = f"已发送 {len(pending)} 条待处理日志到Web界面"
-        sys.stdout.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - web.api - {complete_msg}\n")
-        sys.stdout.flush()
+            self.broadcast_log(log_entry)
 
 # 创建全局WebSocket日志处理器
 global_ws_handler = GlobalWebSocketLogHandler()
@@ -363,21 +310,17 @@ async def get_translators():
     # 获取当前翻译器类型
     current_type = translator.get_current_translator_type()
 
-    # 基础可用性检查（不包括内网翻译器）
+    # 可用性来自后台健康监测，不在请求中临时探测；尚无监测数据的引擎返回None（按需检测）
+    health = translator.get_engine_health()
     available = {
-        "zhipuai": translator._check_zhipuai_available(),
-        "ollama": translator.check_ollama_service(),
-        "siliconflow": translator.check_siliconflow_service(),
-        "intranet": None  # 内网翻译器状态将在用户选择时检测
+        engine: translator.health.is_available(engine) if engine in translator.translators else False
+        for engine in ("zhipuai", "ollama", "siliconflow", "intranet")
     }
 
-    # 如果当前使用的是内网翻译器，则检查其状态
-    if current_type == "intranet":
-        available["intranet"] = translator.check_intranet_service()
-
     translators = {
         "current": current_type,
-        "available": available
+        "available": available,
+        "health": health
     }
     return translators
 
@@ -436,13 +379,21 @@ async def check_intranet_status():
         }
 
 @app.get("/api/models")
-async def get_models():
-    """获取当前翻译器可用的模型列表"""
+async def get_models(refresh: bool = False):
+    """
+    获取当前翻译器可用的模型列表
+
+    默认返回缓存的列表（过期时在后台刷新，不等待）；refresh=true 时重新加载并等待结果
+    """
     if not translator:
         raise HTTPException(status_code=503, detail="翻译服务尚未初始化")
 
     try:
-        models = translator.get_available_models()
+        if refresh:
+            loop = asyncio.get_running_loop()
+            models = await loop.run_in_executor(None, translator.refresh_models)
+        else:
+            models = translator.get_available_models()
         return {"models": models, "current": translator.get_current_model()}
     except Exception as e:
         logger.error(f"获取模型列表失败: {str(e)}")
@@ -464,8 +415,9 @@ async def set_model(model: str = Form(...)):
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """WebSocket连接端点"""
+    channel = None
     try:
-        await manager.connect(websocket, client_id)
+        channel = await manager.connect(websocket, client_id)
 
         # 记录连接建立信息，同时输出到终端和Web界面
         connect_msg = f"WebSocket客户端 {client_id} 连接已建立"
@@ -478,7 +430,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         }))
 
         # 发送所有待处理的日志
-        await global_ws_handler.flush_pending_logs()
+        global_ws_handler.flush_pending_logs()
 
         # 设置连接超时和心跳检测
         last_ping_time = asyncio.get_event_loop().time()
@@ -514,14 +466,14 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         error_msg = f"WebSocket客户端 {client_id} 连接异常: {str(e)}"
         logger.error(error_msg)
     finally:
-        # 确保清理连接
-        manager.disconnect(client_id)
+        # 确保清理连接（同一客户端ID已重新连接时不影响新连接）
+        if channel is not None:
+            manager.disconnect(client_id, channel)
         final_msg = f"WebSocket客户端 {client_id} 连接已清理"
         logger.info(final_msg)
 
 @app.post("/api/translate")
 async def translate_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     source_lang: str = Form("auto"),
     target_lang: str = Form("zh"),
@@ -530,7 +482,11 @@ async def translate_document(
     export_pdf: bool = Form(False),
     output_format: str = Form("bilingual"),
     client_id: str = Form(None),
-    translation_direction: str = Form(None)
+    translation_direction: str = Form(None),
+    incremental: bool = Form(False),
+    previous_file: Optional[UploadFile] = File(None),
+    trace: Optional[bool] = Form(None),
+    profile: Optional[bool] = Form(None)
 ):
     """上传文件并开始翻译任务"""
     logger.info(f"收到翻译请求: 文件={file.filename}, 源语言={source_lang}, 目标语言={target_lang}")
@@ -544,25 +500,82 @@ async def translate_document(
         task_id = str(uuid.uuid4())
         logger.info(f"生成任务ID: {task_id}")
 
-        # 保存上传的文件
-        file_path = UPLOAD_DIR / file.filename
-        logger.info(f"保存文件到: {file_path}")
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        logger.info(f"文件保存成功，大小: {file_path.stat().st_size} 字节")
+        # 保存上传的文件：分块写入并计算内容哈希，按内容寻址存放，同名文件不会互相覆盖
+        loop = asyncio.get_running_loop()
+        saved_path, file_hash, file_size = await loop.run_in_executor(
+            None, save_upload_stream, file.file, str(UPLOAD_DIR), file.filename)
+        file_path = Path(saved_path)
+        logger.info(f"文件保存成功: {file_path}，大小: {file_size} 字节，哈希: {file_hash[:16]}")
+
+        # 增量翻译：保存用户提供的上一版源文件（可选）
+        previous_path = None
+        if incremental and previous_file is not None and previous_file.filename:
+            saved_previous, _, _ = await loop.run_in_executor(
+                None, save_upload_stream, previous_file.file, str(UPLOAD_DIR), previous_file.filename)
+            previous_path = Path(saved_previous)
+            logger.info(f"上一版源文件已保存: {previous_path}")
+
+        # 结果缓存键：文件内容和所有影响译文的选项
+        cache_options = {
+            "engine": translator.get_current_translator_type(),
+            "model": translator.get_current_model(),
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "translation_direction": translation_direction,
+            "output_format": output_format,
+            "use_terminology": use_terminology,
+            "preprocess_terms": preprocess_terms,
+            "export_pdf": export_pdf,
+            "glossary_version": get_glossary_version(TERMINOLOGY_PATH) if use_terminology else None
+        }
+        cache_key = compute_cache_key(file_hash, **cache_options)
 
         # 创建输出文件路径
         filename, ext = os.path.splitext(file.filename)
         output_filename = f"{filename}_translated{ext}"
         output_path = OUTPUT_DIR / output_filename
 
-        # 创建任务状态
-        translation_tasks[task_id] = TranslationTask(
-            task_id=task_id,
-            filename=file.filename,
-            status="pending",
-            progress=0.0
-        )
+        # 创建任务记录（输入和选项一并持久化，服务重启后可以恢复执行）
+        job_store.create_job(task_id, file.filename, {
+            "input_path": str(file_path),
+            "output_path": str(output_path),
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "use_terminology": use_terminology,
+            "preprocess_terms": preprocess_terms,
+            "export_pdf": export_pdf,
+            "output_format": output_format,
+            "client_id": client_id,
+            "translation_direction": translation_direction,
+            "incremental": incremental,
+            "previous_path": str(previous_path) if previous_path else None,
+            "cache_key": cache_key,
+            "trace": trace,
+            "profile": profile
+        })
+
+        # 命中结果缓存：直接完成任务，不再提交翻译（要求追踪或剖析的任务总是重新翻译）
+        cached_output = None if (trace or profile) else get_result_cache().get(cache_key)
+        metrics.RESULT_CACHE.inc(result="hit" if cached_output else "miss")
+        if cached_output:
+            job_store.complete_job(task_id, cached_output)
+            logger.info(f"命中翻译结果缓存，任务 {task_id} 直接完成: {cached_output}")
+            if client_id:
+                await manager.send_message(
+                    client_id,
+                    json.dumps({
+                        "type": "task_status",
+                        "data": {
+                            "task_id": task_id,
+                            "status": "completed",
+                            "progress": 1.0,
+                            "message": "命中翻译结果缓存，翻译任务已完成",
+                            "output_file": os.path.basename(cached_output),
+                            "cached": True
+                        }
+                    })
+                )
+            return {"task_id": task_id, "message": "命中翻译结果缓存，翻译任务已完成", "cached": True}
 
         # 如果提供了客户端ID，发送任务创建通知
         if client_id:
@@ -597,23 +610,13 @@ async def translate_document(
         logger.info(f"  - 客户端ID: {client_id}")
         logger.info(f"  - 使用术语库: {use_terminology}")
         logger.info(f"  - 术语预处理: {preprocess_terms}")
+        logger.info(f"  - 增量翻译: {incremental}")
 
-        # 在后台执行翻译任务
+        # 唤醒任务调度器领取新任务
         try:
-            background_tasks.add_task(
-                process_translation,
-                task_id,
-                str(file_path),
-                str(output_path),
-                source_lang,
-                target_lang,
-                use_terminology,
-                preprocess_terms,
-                export_pdf,
-                output_format,
-                client_id,
-                translation_direction
-            )
+            if job_dispatcher is None:
+                raise RuntimeError("任务调度器尚未启动")
+            job_dispatcher.notify()
             logger.info(f"后台翻译任务已成功提交: {task_id}")
         except Exception as e:
             logger.error(f"提交后台翻译任务失败: {str(e)}")
@@ -625,6 +628,165 @@ async def translate_document(
         logger.error(f"提交翻译任务失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"提交翻译任务失败: {str(e)}")
 
+@app.post("/api/translate/batch")
+async def translate_batch(
+    files: List[UploadFile] = File(...),
+    source_lang: str = Form("auto"),
+    target_lang: str = Form("zh"),
+    use_terminology: bool = Form(True),
+    preprocess_terms: bool = Form(False),
+    export_pdf: bool = Form(False),
+    output_format: str = Form("bilingual"),
+    client_id: str = Form(None),
+    translation_direction: str = Form(None)
+):
+    """上传ZIP压缩包或多个文件，批量翻译其中的文档"""
+    if not translator:
+        raise HTTPException(status_code=503, detail="翻译服务尚未初始化")
+
+    batch_dir = UPLOAD_DIR / f"batch_{uuid.uuid4().hex}"
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+
+    # 保存上传文件，压缩包解压出其中支持的文档
+    documents = []
+    used_names = set()
+    for upload in files:
+        if not upload.filename:
+            continue
+        saved_path, _, _ = await loop.run_in_executor(
+            None, save_upload_stream, upload.file, str(batch_dir), upload.filename)
+        ext = os.path.splitext(upload.filename)[1].lower()
+        if ext == ".zip":
+            try:
+                extracted = await loop.run_in_executor(
+                    None, extract_zip_documents, saved_path, str(batch_dir), used_names)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"无效的压缩包: {upload.filename}")
+            documents.extend(extracted)
+        elif ext in SUPPORTED_EXTENSIONS:
+            documents.append({"name": os.path.basename(upload.filename), "input_path": saved_path})
+        else:
+            logger.info(f"跳过不支持的文件: {upload.filename}")
+
+    if not documents:
+        raise HTTPException(status_code=400, detail=f"没有可翻译的文档，支持的格式: {', '.join(SUPPORTED_EXTENSIONS)}")
+    if len(documents) > MAX_BATCH_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"单个批次最多 {MAX_BATCH_DOCUMENTS} 个文档，本次 {len(documents)} 个")
+
+    # 所有子任务共用一次加载和选择好的术语库
+    is_cn_to_foreign, source_lang, target_lang = resolve_translation_direction(
+        source_lang, target_lang, translation_direction)
+    target_language = map_language_code(target_lang if is_cn_to_foreign else source_lang)
+    terminology = {}
+    if use_terminology:
+        try:
+            terminology = await loop.run_in_executor(None, load_terminology)
+            terminology.setdefault(target_language, {})
+            logger.info(f"批量翻译术语库 '{target_language}': {len(terminology[target_language])} 个术语")
+        except Exception as e:
+            logger.error(f"加载术语库失败: {str(e)}，将使用空术语库继续翻译")
+            terminology = {}
+
+    base_spec = {
+        "target_language": target_language,
+        "terminology": terminology,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "use_terminology": use_terminology,
+        "preprocess_terms": preprocess_terms,
+        "export_pdf": export_pdf,
+        "output_format": output_format,
+        "is_cn_to_foreign": is_cn_to_foreign
+    }
+
+    batch = create_batch(documents, client_id)
+    logger.info(f"批量翻译任务已创建: {batch.batch_id}，共 {len(documents)} 个文档")
+
+    async def notify_batch_progress(current_batch):
+        if current_batch.client_id:
+            await manager.send_message(
+                current_batch.client_id,
+                json.dumps({"type": "batch_status", "data": current_batch.to_dict()}),
+                coalesce_key=f"batch_status:{current_batch.batch_id}"
+            )
+
+    worker_pool = get_worker_pool(translator.config.get('worker_pool'))
+    batch.runner = asyncio.ensure_future(run_batch(batch, worker_pool, translator, base_spec, notify_batch_progress))
+    if client_id:
+        unsubscribe_logs = get_job_log_router().subscribe(
+            batch.batch_id, lambda line: manager.publish_log(line, "log", client_id))
+        batch.runner.add_done_callback(lambda _: unsubscribe_logs())
+
+    return {"batch_id": batch.batch_id, "total": len(documents), "message": "批量翻译任务已提交"}
+
+@app.get("/api/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """获取批量翻译任务的汇总进度和各文档状态"""
+    batch = get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="批量任务不存在")
+    return batch.to_dict()
+
+@app.get("/api/batch/{batch_id}/download")
+async def download_batch(batch_id: str):
+    """以ZIP流式下载批量翻译结果"""
+    batch = get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="批量任务不存在")
+    if batch.status in ("pending", "processing"):
+        raise HTTPException(status_code=400, detail="批量任务尚未完成")
+
+    return StreamingResponse(
+        iter_batch_zip(batch),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="batch_{batch_id[:8]}_translated.zip"'}
+    )
+
+def map_language_code(lang_code):
+    """将语言代码映射为中文名称"""
+    mapping = {
+        'en': '英语',
+        'ja': '日语',
+        'ko': '韩语',
+        'fr': '法语',
+        'de': '德语',
+        'es': '西班牙语',
+        'ru': '俄语'
+    }
+    return mapping.get(lang_code, lang_code)
+
+def resolve_translation_direction(source_lang: str, target_lang: str, translation_direction: str = None):
+    """
+    确定翻译方向并校正源语言和目标语言
+
+    Returns:
+        tuple: (是否中文→外语, 源语言, 目标语言)
+    """
+    if translation_direction:
+        is_cn_to_foreign = translation_direction == '中文→外语'
+        logger.info(f"使用前端指定的翻译方向: {translation_direction}")
+    else:
+        is_cn_to_foreign = source_lang == 'zh' or (source_lang == 'auto' and target_lang != 'zh')
+        logger.info(f"根据语言设置推断翻译方向: {'中文→外语' if is_cn_to_foreign else '外语→中文'}")
+
+    # 设置源语言和目标语言
+    if is_cn_to_foreign:
+        if source_lang == 'auto':
+            source_lang = 'zh'  # 如果是自动检测，但方向是中文→外语，则设置源语言为中文
+        if target_lang == 'zh':
+            logger.warning("翻译方向为中文→外语，但目标语言设置为中文，将调整目标语言为英语")
+            target_lang = 'en'  # 如果方向是中文→外语，但目标语言是中文，则调整为英语
+    else:
+        if source_lang == 'auto' or source_lang == 'zh':
+            logger.warning("翻译方向为外语→中文，但源语言设置为中文或自动，将调整源语言为英语")
+            source_lang = 'en'  # 如果方向是外语→中文，但源语言是中文或自动，则调整为英语
+        if target_lang != 'zh':
+            logger.warning("翻译方向为外语→中文，但目标语言不是中文，将调整目标语言为中文")
+            target_lang = 'zh'  # 如果方向是外语→中文，但目标语言不是中文，则调整为中文
+
+    return is_cn_to_foreign, source_lang, target_lang
+
 async def process_translation(
     task_id: str,
     input_path: str,
@@ -636,9 +798,15 @@ async def process_translation(
     export_pdf: bool = False,
     output_format: str = "bilingual",
     client_id: str = None,
-    translation_direction: str = None
+    translation_direction: str = None,
+    incremental: bool = False,
+    previous_path: str = None,
+    cache_key: str = None,
+    trace: Optional[bool] = None,
+    profile: Optional[bool] = None,
+    lease_owner: Optional[str] = None
 ):
-    """处理翻译任务"""
+    """处理翻译任务（lease_owner 为调度器的租约持有者，租约被其他调度器接管后不再写入结果）"""
     # 立即记录函数被调用
     print(f"[DEBUG] process_translation 函数被调用，任务ID: {task_id}")
     logger.info(f"[DEBUG] process_translation 函数开始执行，任务ID: {task_id}")
@@ -648,37 +816,17 @@ async def process_translation(
         error_msg = "翻译服务未初始化，无法处理翻译任务"
         logger.error(error_msg)
         print(f"[ERROR] {error_msg}")
+        job_store.fail_job(task_id, error_msg, owner=lease_owner)
         return
 
     logger.info(f"翻译服务状态: 已初始化")
 
-    # 设置WebSocket日志处理器
-    ws_handler = None
+    # 绑定任务上下文：本任务（包括工作线程和处理器）产生的日志只投递给本任务的客户端
+    job_token = bind_job(task_id)
+    unsubscribe_logs = None
     if client_id:
-        ws_handler = WebSocketLogHandler(client_id)
-
-        # 添加到根日志记录器，确保所有模块的日志都能被捕获
-        root_logger = logging.getLogger()
-        root_logger.addHandler(ws_handler)
-
-        # 也添加到当前模块的日志记录器
-        logger.addHandler(ws_handler)
-
-        # 特别为翻译相关的日志记录器添加处理器
-        translator_logger = logging.getLogger('services.translator')
-        translator_logger.addHandler(ws_handler)
-
-        document_processor_logger = logging.getLogger('services.document_processor')
-        document_processor_logger.addHandler(ws_handler)
-
-        pdf_processor_logger = logging.getLogger('services.pdf_processor')
-        pdf_processor_logger.addHandler(ws_handler)
-
-        excel_processor_logger = logging.getLogger('services.excel_processor')
-        excel_processor_logger.addHandler(ws_handler)
-
-        # 设置日志级别为INFO，确保重要信息都能传输
-        ws_handler.setLevel(logging.INFO)
+        unsubscribe_logs = get_job_log_router().subscribe(
+            task_id, lambda line: manager.publish_log(line, "log", client_id))
 
         logger.info(f"=== 开始处理翻译任务 {task_id} ===")
         logger.info(f"客户端ID: {client_id}")
@@ -706,12 +854,9 @@ async def process_translation(
         )
 
     try:
-        # 更新任务状态
-        translation_tasks[task_id].status = "processing"
-
         # 定义进度更新函数
         async def update_progress(progress: float, message: str = ""):
-            translation_tasks[task_id].progress = progress
+            job_store.update_progress(task_id, progress, message)
             if client_id:
                 await manager.send_message(
                     client_id,
@@ -723,26 +868,14 @@ async def process_translation(
                             "progress": progress,
                             "message": message
                         }
-                    })
+                    }),
+                    # 尚未发出的进度消息只保留最新一条
+                    coalesce_key=f"task_status:{task_id}"
                 )
 
         # 初始进度
         await update_progress(0.05, "加载术语库...")
 
-        # 语言代码映射函数
-        def map_language_code(lang_code):
-            """将语言代码映射为中文名称"""
-            mapping = {
-                'en': '英语',
-                'ja': '日语',
-                'ko': '韩语',
-                'fr': '法语',
-                'de': '德语',
-                'es': '西班牙语',
-                'ru': '俄语'
-            }
-            return mapping.get(lang_code, lang_code)
-
         # 初始化target_language变量（确保在所有情况下都有定义）
         target_language = map_language_code(target_lang)
 
@@ -804,42 +937,9 @@ async def process_translation(
             await update_progress(0.0, "翻译服务尚未初始化")
             raise Exception("翻译服务尚未初始化")
 
-        # 创建文档处理器
-        factory = DocumentProcessorFactory()
-        doc_processor = factory.create_processor(input_path, translator)
-
-        # 设置文档处理器选项
-        doc_processor.use_terminology = use_terminology
-        doc_processor.preprocess_terms = preprocess_terms
-        doc_processor.export_pdf = export_pdf
-        doc_processor.output_format = output_format
-
-        # 确定翻译方向
-        is_cn_to_foreign = False
-        if translation_direction:
-            is_cn_to_foreign = translation_direction == '中文→外语'
-            logger.info(f"使用前端指定的翻译方向: {translation_direction}")
-        else:
-            is_cn_to_foreign = source_lang == 'zh' or (source_lang == 'auto' and target_lang != 'zh')
-            logger.info(f"根据语言设置推断翻译方向: {'中文→外语' if is_cn_to_foreign else '外语→中文'}")
-
-        # 设置源语言和目标语言
-        if is_cn_to_foreign:
-            if source_lang == 'auto':
-                source_lang = 'zh'  # 如果是自动检测，但方向是中文→外语，则设置源语言为中文
-            if target_lang == 'zh':
-                logger.warning("翻译方向为中文→外语，但目标语言设置为中文，将调整目标语言为英语")
-                target_lang = 'en'  # 如果方向是中文→外语，但目标语言是中文，则调整为英语
-        else:
-            if source_lang == 'auto' or source_lang == 'zh':
-                logger.warning("翻译方向为外语→中文，但源语言设置为中文或自动，将调整源语言为英语")
-                source_lang = 'en'  # 如果方向是外语→中文，但源语言是中文或自动，则调整为英语
-            if target_lang != 'zh':
-                logger.warning("翻译方向为外语→中文，但目标语言不是中文，将调整目标语言为中文")
-                target_lang = 'zh'  # 如果方向是外语→中文，但目标语言不是中文，则调整为中文
-
-        # 设置翻译方向
-        doc_processor.is_cn_to_foreign = is_cn_to_foreign
+        # 确定翻译方向，并据此校正源语言和目标语言
+        is_cn_to_foreign, source_lang, target_lang = resolve_translation_direction(
+            source_lang, target_lang, translation_direction)
 
         # 记录翻译选项
         logger.info(f"翻译选项设置:")
@@ -851,22 +951,33 @@ async def process_translation(
         logger.info(f"  - 目标语言: {target_lang}")
         logger.info(f"  - 翻译方向: {'中文→外语' if is_cn_to_foreign else '外语→中文'}")
 
-        # 设置进度回调函数
-        doc_processor.set_progress_callback(update_progress)
-
         await update_progress(0.15, "开始翻译文档...")
 
         # 记录术语预处理状态
         logger.info(f"术语预处理状态: {'启用' if preprocess_terms else '禁用'}")
 
-        # 执行翻译
-        output_path = doc_processor.process_document(
-            input_path,
-            target_language,  # 使用映射后的语言名称
-            terminology,
-            source_lang=source_lang,
-            target_lang=target_lang
-        )
+        # 执行翻译：任务交给工作池，每个任务使用独立的文档处理器，事件循环只等待结果和推送进度
+        job_spec = {
+            'input_path': input_path,
+            'target_language': target_language,  # 使用映射后的语言名称
+            'terminology': terminology,
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'use_terminology': use_terminology,
+            'preprocess_terms': preprocess_terms,
+            'export_pdf': export_pdf,
+            'output_format': output_format,
+            'is_cn_to_foreign': is_cn_to_foreign,
+            'incremental': incremental,
+            'previous_path': previous_path,
+            'trace': trace,
+            'profile': profile
+        }
+        worker_pool = get_worker_pool(translator.config.get('worker_pool'))
+        job_result = await worker_pool.run_job(job_spec, translator, update_progress)
+        output_path = job_result['output_path']
+        if job_result.get('stage_durations'):
+            logger.info(f"任务 {task_id} 各阶段耗时(秒): {job_result['stage_durations']}")
 
         # 确保输出路径是绝对路径
         if not os.path.isabs(output_path):
@@ -890,9 +1001,18 @@ async def process_translation(
                     break
 
         # 更新任务状态
-        translation_tasks[task_id].status = "completed"
-        translation_tasks[task_id].progress = 1.0
-        translation_tasks[task_id].output_file = output_path  # 保存完整路径
+        artifacts = dict(job_result.get('profile_files') or {})
+        if job_result.get('trace_file'):
+            artifacts['trace'] = job_result['trace_file']
+        # 保存完整路径；租约已过期并被其他调度器接管时丢弃本次结果，以接管者的结果为准
+        if not job_store.complete_job(task_id, output_path, job_result.get('incremental_summary'), artifacts,
+                                      owner=lease_owner):
+            logger.warning(f"任务 {task_id} 的租约已被接管，丢弃本次翻译结果: {output_path}")
+            return
+
+        # 登记翻译结果缓存，相同文件和选项再次提交时直接返回
+        if cache_key and os.path.exists(output_path):
+            get_result_cache().put(cache_key, output_path, {"task_id": task_id, "source": os.path.basename(input_path)})
 
         # 发送任务完成通知
         if client_id:
@@ -905,33 +1025,17 @@ async def process_translation(
                         "status": "completed",
                         "progress": 1.0,
                         "message": "翻译任务已完成",
-                        "output_file": os.path.basename(output_path)
+                        "output_file": os.path.basename(output_path),
+                        "incremental_summary": job_result.get('incremental_summary')
                     }
                 })
             )
 
-            # 清理WebSocket日志处理器
-            if ws_handler:
-                root_logger = logging.getLogger()
-                root_logger.removeHandler(ws_handler)
-                logger.removeHandler(ws_handler)
-
-                # 清理翻译相关的日志记录器
-                translator_logger = logging.getLogger('services.translator')
-                translator_logger.removeHandler(ws_handler)
-
-                document_processor_logger = logging.getLogger('services.document_processor')
-                document_processor_logger.removeHandler(ws_handler)
-
-                pdf_processor_logger = logging.getLogger('services.pdf_processor')
-                pdf_processor_logger.removeHandler(ws_handler)
-
-                excel_processor_logger = logging.getLogger('services.excel_processor')
-                excel_processor_logger.removeHandler(ws_handler)
-
     except Exception as e:
         logger.error(f"翻译任务失败: {str(e)}")
-        translation_tasks[task_id].status = "failed"
+        if not job_store.fail_job(task_id, str(e), owner=lease_owner):
+            logger.warning(f"任务 {task_id} 的租约已被接管，不记录本次失败")
+            return
 
         # 发送任务失败通知
         if client_id:
@@ -947,49 +1051,50 @@ async def process_translation(
                 })
             )
 
-            # 清理WebSocket日志处理器
-            if ws_handler:
-                root_logger = logging.getLogger()
-                root_logger.removeHandler(ws_handler)
-                logger.removeHandler(ws_handler)
-
-                # 清理翻译相关的日志记录器
-                translator_logger = logging.getLogger('services.translator')
-                translator_logger.removeHandler(ws_handler)
-
-                document_processor_logger = logging.getLogger('services.document_processor')
-                document_processor_logger.removeHandler(ws_handler)
-
-                pdf_processor_logger = logging.getLogger('services.pdf_processor')
-                pdf_processor_logger.removeHandler(ws_handler)
-
-                excel_processor_logger = logging.getLogger('services.excel_processor')
-                excel_processor_logger.removeHandler(ws_handler)
-
     finally:
-        # 移除WebSocket日志处理器
-        if ws_handler:
-            logger.removeHandler(ws_handler)
-            # 也从根日志记录器中移除
-            root_logger = logging.getLogger()
-            root_logger.removeHandler(ws_handler)
-            logger.info(f"已清理任务 {task_id} 的WebSocket日志处理器")
+        # 取消任务日志订阅并解除任务上下文
+        if unsubscribe_logs is not None:
+            unsubscribe_logs()
+        unbind_job(job_token)
+
+async def run_stored_job(job: Dict):
+    """任务调度器的处理函数：按持久化的参数执行翻译任务"""
+    await process_translation(job['task_id'], lease_owner=job['lease_owner'], **job['params'])
 
 @app.get("/api/tasks/{task_id}")
 async def get_task_status(task_id: str):
     """获取任务状态"""
-    if task_id not in translation_tasks:
+    job = job_store.get_job(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    return job_to_task(job)
+
+@app.get("/api/tasks/{task_id}/artifacts/{name}")
+async def download_task_artifact(task_id: str, name: str):
+    """下载任务的诊断文件（追踪、剖析、内存报告）"""
+    job = job_store.get_job(task_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    return translation_tasks[task_id]
+    path = (job.get('artifacts') or {}).get(name)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="诊断文件不存在")
+
+    return FileResponse(
+        path=path,
+        filename=os.path.basename(path),
+        media_type="application/octet-stream"
+    )
 
 @app.get("/api/download/{task_id}")
 async def download_translated_file(task_id: str):
     """下载翻译后的文件"""
-    if task_id not in translation_tasks:
+    job = job_store.get_job(task_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="任务不存在")
 
-    task = translation_tasks[task_id]
+    task = job_to_task(job)
     if task.status != "completed" or not task.output_file:
         raise HTTPException(status_code=400, detail="文件尚未准备好")
 
@@ -1205,9 +1310,32 @@ async def import_terminology_by_language(language: str, file: UploadFile = File(
         raise HTTPException(status_code=500, detail=f"导入术语库失败: {str(e)}")
 
 @app.get("/api/tasks")
-async def get_all_tasks():
-    """获取所有任务"""
-    return list(translation_tasks.values())
+async def get_all_tasks(page: int = 1, page_size: int = 50, status: Optional[str] = None):
+    """分页获取任务（按创建时间倒序，可按状态筛选）"""
+    jobs, total = job_store.list_jobs(page, page_size, status)
+    return {
+        "tasks": [job_to_task(job) for job in jobs],
+        "total": total,
+        "page": page,
+        "page_size": page_size
+    }
+
+@app.get("/api/worker-pool/status")
+async def get_worker_pool_status():
+    """获取翻译任务工作池状态"""
+    if not translator:
+        raise HTTPException(status_code=503, detail="翻译服务尚未初始化")
+    return get_worker_pool(translator.config.get('worker_pool')).stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus格式的翻译流水线指标"""
+    return Response(content=metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/ws/status")
+async def get_websocket_status():
+    """获取WebSocket连接、发送队列深度和丢弃日志数"""
+    return manager.stats()
 
 @app.get("/api/logs/realtime")
 async def get_realtime_logs(count: int = 100):
@@ -1217,24 +1345,31 @@ async def get_realtime_logs(count: int = 100):
         return {
             "success": True,
             "logs": logs,
-            "total": len(logs)
+            "total": len(logs),
+            "cursor": logs[-1]["seq"] if logs else realtime_monitor.last_seq
         }
     except Exception as e:
         logger.error(f"获取实时日志失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取实时日志失败: {str(e)}")
 
 @app.get("/api/logs/since")
-async def get_logs_since(since: str):
-    """获取指定时间后的日志"""
+async def get_logs_since(cursor: Optional[int] = None, since: Optional[str] = None):
+    """获取指定序号（cursor）之后的日志，兼容按时间戳（since）查询"""
     try:
-        if not since:
-            raise HTTPException(status_code=400, detail="缺少since参数")
+        if cursor is not None:
+            logs = realtime_monitor.get_logs_after(cursor)
+        elif since:
+            logs = realtime_monitor.get_logs_since(since)
+        else:
+            raise HTTPException(status_code=400, detail="缺少cursor或since参数")
 
-        logs = realtime_monitor.get_logs_since(since)
         return {
             "success": True,
             "logs": logs,
-            "total": len(logs)
+            "total": len(logs),
+            # 客户端序号超过当前序号（服务已重启）时返回当前序号，客户端从新序号继续
+            "cursor": logs[-1]["seq"] if logs else (min(cursor, realtime_monitor.last_seq) if cursor is not None
+                                                    else realtime_monitor.last_seq)
         }
     except HTTPException:
         raise
@@ -1268,6 +1403,18 @@ async def clear_logs():
         logger.error(f"清空日志失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"清空日志失败: {str(e)}")
 
+def register_runtime_gauges():
+    """登记在输出指标时读取的运行状态：活跃任务、排队任务和WebSocket连接"""
+    def pool_stats():
+        return get_worker_pool(translator.config.get('worker_pool') if translator else None).stats()
+
+    metrics.JOBS_ACTIVE.set_function(lambda: pool_stats()['running'])
+    metrics.JOB_QUEUE_DEPTH.set_function(
+        lambda: job_store.count_by_status().get('pending', 0) + pool_stats()['queued'])
+    metrics.WEBSOCKET_CLIENTS.set_function(lambda: manager.stats()['clients'])
+    metrics.WEBSOCKET_QUEUE_DEPTH.set_function(lambda: manager.stats()['queue_depth'])
+    metrics.WEBSOCKET_DROPPED_LOGS.set_function(lambda: manager.stats()['dropped_logs'])
+
 # 启动实时日志监控
 @app.on_event("startup")
 async def startup_event():
@@ -1276,6 +1423,19 @@ async def startup_event():
     start_realtime_monitoring()
     logger.info("实时日志监控已启动")
 
+    manager.configure(translator.config.get('websocket') if translator else None)
+    register_runtime_gauges()
+    if translator:
+        translator.start_health_monitor()
+
+    # 启动任务调度器，并恢复上次未完成的任务
+    global job_dispatcher
+    # 调度器与工作池的并发数一致（max_workers 为 "auto" 时按翻译引擎的并行槽位数确定）
+    pool_config = (translator.config.get('worker_pool') if translator else None) or {}
+    worker_pool = get_worker_pool(pool_config, translator)
+    job_dispatcher = JobDispatcher(job_store, run_stored_job, concurrency=worker_pool.max_workers)
+    job_dispatcher.start()
+
 @app.post("/api/open-output-directory")
 async def open_output_directory():
     """打开输出目录"""
@@ -1317,4 +1477,9 @@ async def shutdown_event():
     """应用关闭时的事件"""
     logger.info("停止实时日志监控...")
     stop_realtime_monitoring()
-    logger.info("实时日志监控已停止")
\ No newline at end of file
+    logger.info("实时日志监控已停止")
+    if job_dispatcher is not None:
+        await job_dispatcher.stop()
+    shutdown_worker_pool()
+    if translator:
+        translator.stop_health_monitor()
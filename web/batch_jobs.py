@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量翻译任务
+一次提交一个ZIP压缩包（或多个文件），每个文档作为一个子任务交给工作池执行；
+子任务共用同一份术语库和翻译服务的片段缓存，批次进度为各子任务进度的平均值，
+结果以ZIP流式返回，不在内存中组装整个压缩包
+"""
+
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import zipfile
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from utils.job_context import job_scope
+
+logger = logging.getLogger(__name__)
+
+# 批量翻译支持的文档类型（与 DocumentProcessorFactory 一致）
+SUPPORTED_EXTENSIONS = ('.docx', '.pdf', '.xlsx', '.xls')
+
+# 单个批次最多包含的文档数
+MAX_BATCH_DOCUMENTS = 500
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+def _decode_zip_name(info: zipfile.ZipInfo) -> str:
+    """Windows资源管理器创建的压缩包文件名通常是GBK编码，未设置UTF-8标志时尝试按GBK还原"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode('cp437').decode('gbk')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def _unique_name(name: str, used: set) -> str:
+    """同一批次内文件名重复时追加序号（处理器按输入文件名生成输出文件名）"""
+    base, ext = os.path.splitext(name)
+    candidate = name
+    index = 2
+    while candidate.lower() in used:
+        candidate = f"{base} ({index}){ext}"
+        index += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def extract_zip_documents(zip_path: str, dest_dir: str, used_names: set) -> List[Dict]:
+    """
+    解压ZIP中支持的文档
+
+    Args:
+        zip_path: 压缩包路径
+        dest_dir: 解压目录
+        used_names: 本批次已使用的文件名（小写），用于去重
+
+    Returns:
+        List[Dict]: [{'name': 包内相对路径, 'input_path': 解压后的路径}]
+    """
+    documents = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            name = _decode_zip_name(info).replace('\\', '/')
+            parts = [part for part in name.split('/') if part and part not in ('.', '..')]
+            if not parts or parts[0] == '__MACOSX' or parts[-1].startswith(('.', '~$')):
+                continue
+            if os.path.splitext(parts[-1])[1].lower() not in SUPPORTED_EXTENSIONS:
+                logger.info(f"跳过不支持的文件: {name}")
+                continue
+
+            # 只取文件名落盘，包内目录结构保留在 name 中，避免路径穿越
+            target_path = os.path.join(dest_dir, _unique_name(parts[-1], used_names))
+            with archive.open(info) as source, open(target_path, 'wb') as target:
+                shutil.copyfileobj(source, target, STREAM_CHUNK_SIZE)
+            documents.append({'name': '/'.join(parts), 'input_path': target_path})
+    return documents
+
+
+class BatchJob:
+    """批量翻译任务状态"""
+
+    def __init__(self, batch_id: str, documents: List[Dict], client_id: Optional[str] = None):
+        self.batch_id = batch_id
+        self.client_id = client_id
+        self.status = "pending"
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.runner: Optional[asyncio.Future] = None
+        self.documents = [
+            dict(document, status="pending", progress=0.0, output_path=None, error=None)
+            for document in documents
+        ]
+
+    @property
+    def progress(self) -> float:
+        if not self.documents:
+            return 1.0
+        return sum(document['progress'] for document in self.documents) / len(self.documents)
+
+    def to_dict(self) -> Dict:
+        counts = {}
+        for document in self.documents:
+            counts[document['status']] = counts.get(document['status'], 0) + 1
+        return {
+            'batch_id': self.batch_id,
+            'status': self.status,
+            'progress': round(self.progress, 4),
+            'total': len(self.documents),
+            'counts': counts,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'documents': [
+                {
+                    'name': document['name'],
+                    'status': document['status'],
+                    'progress': round(document['progress'], 4),
+                    'output_file': os.path.basename(document['output_path']) if document['output_path'] else None,
+                    'error': document['error']
+                }
+                for document in self.documents
+            ]
+        }
+
+
+# 批次登记表
+_batches: Dict[str, BatchJob] = {}
+
+
+def create_batch(documents: List[Dict], client_id: Optional[str] = None) -> BatchJob:
+    """登记新批次"""
+    batch = BatchJob(str(uuid.uuid4()), documents, client_id)
+    _batches[batch.batch_id] = batch
+    return batch
+
+
+def get_batch(batch_id: str) -> Optional[BatchJob]:
+    return _batches.get(batch_id)
+
+
+async def run_batch(batch: BatchJob, worker_pool, translator, base_spec: Dict,
+                    on_progress: Optional[Callable[[BatchJob], Awaitable[None]]] = None,
+                    min_interval: float = 1.0) -> None:
+    """
+    执行批次：每个文档一个子任务，全部提交给工作池，由工作池控制并发
+
+    Args:
+        batch: 批次
+        worker_pool: 翻译任务工作池
+        translator: 翻译服务（子任务共用其片段缓存）
+        base_spec: 子任务共用的参数（语言、选项、已加载的术语库），不含 input_path
+        on_progress: 批次进度回调（按 min_interval 限频，结束时必定调用）
+        min_interval: 批次进度回调的最小间隔（秒）
+    """
+    batch.status = "processing"
+    last_report = [0.0]
+
+    async def report(force: bool = False):
+        if on_progress is None:
+            return
+        now = time.monotonic()
+        if force or now - last_report[0] >= min_interval:
+            last_report[0] = now
+            try:
+                await on_progress(batch)
+            except Exception as e:
+                logger.error(f"推送批次进度失败: {str(e)}")
+
+    async def run_document(document: Dict):
+        async def update_progress(progress: float, message: str = ""):
+            if progress >= 0:
+                document['progress'] = min(progress, 1.0)
+            await report()
+
+        document['status'] = "processing"
+        try:
+            # 子任务的日志归属于批次，由批次的订阅者接收
+            with job_scope(batch.batch_id):
+                result = await worker_pool.run_job(dict(base_spec, input_path=document['input_path']),
+                                                   translator, update_progress)
+            document['output_path'] = result['output_path']
+            document['status'] = "completed"
+        except Exception as e:
+            logger.error(f"批次 {batch.batch_id} 中的文档翻译失败: {document['name']}, 错误: {str(e)}")
+            document['status'] = "failed"
+            document['error'] = str(e)
+        document['progress'] = 1.0
+        await report()
+
+    await asyncio.gather(*(run_document(document) for document in batch.documents))
+
+    failed = sum(1 for document in batch.documents if document['status'] == "failed")
+    if failed == 0:
+        batch.status = "completed"
+    elif failed == len(batch.documents):
+        batch.status = "failed"
+    else:
+        batch.status = "partial"
+    batch.finished_at = datetime.now().isoformat()
+    logger.info(f"批次 {batch.batch_id} 完成: 共 {len(batch.documents)} 个文档，失败 {failed} 个")
+    await report(force=True)
+
+
+class _ZipStreamBuffer:
+    """zipfile 的写入目标：不可定位，写入的数据暂存到取出为止"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_batch_zip(batch: BatchJob) -> Iterator[bytes]:
+    """
+    逐块生成结果ZIP，内存中只保留当前数据块
+
+    已完成的文档按包内原目录放置译文；失败的文档写入一份错误说明
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        errors = []
+        for document in batch.documents:
+            output_path = document['output_path']
+            if document['status'] != "completed" or not output_path or not os.path.exists(output_path):
+                errors.append(f"{document['name']}: {document['error'] or '未生成译文'}")
+                continue
+
+            directory = os.path.dirname(document['name'])
+            arcname = '/'.join(filter(None, [directory, os.path.basename(output_path)]))
+            with open(output_path, 'rb') as source, archive.open(arcname, 'w', force_zip64=True) as target:
+                for chunk in iter(lambda: source.read(STREAM_CHUNK_SIZE), b""):
+                    target.write(chunk)
+                    data = buffer.take()
+                    if data:
+                        yield data
+            data = buffer.take()
+            if data:
+                yield data
+
+        if errors:
+            archive.writestr("翻译失败清单.txt", "\n".join(errors))
+    yield buffer.take()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化翻译任务队列
+任务的输入、选项、状态、进度、输出路径和耗时记录在SQLite中，服务重启后不会丢失。
+调度器以租约方式领取任务：领取时写入持有者和到期时间，执行期间定期续租，
+进程异常退出后租约过期，任务会被重新领取；正常关闭时主动释放租约，下次启动立即恢复
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 数据库默认存放在程序根目录的 data 目录下
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jobs.db")
+
+# 任务状态
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+DEFAULT_LEASE_SECONDS = 60      # 租约时长
+DEFAULT_MAX_ATTEMPTS = 3        # 同一任务最多领取次数，超过后标记失败
+DEFAULT_POLL_INTERVAL = 5.0     # 调度器空闲时检查过期租约的间隔（秒）
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    task_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    params TEXT NOT NULL,
+    output_file TEXT,
+    incremental_summary TEXT,
+    artifacts TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class JobStore:
+    """基于SQLite的任务存储"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """为旧版本数据库补充新增的列"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)").fetchall()}
+        if 'artifacts' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN artifacts TEXT")
+
+    def _execute(self, sql: str, args: Tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, args)
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['params'] = json.loads(job['params']) if job.get('params') else {}
+        if job.get('incremental_summary'):
+            job['incremental_summary'] = json.loads(job['incremental_summary'])
+        if job.get('artifacts'):
+            job['artifacts'] = json.loads(job['artifacts'])
+        return job
+
+    def create_job(self, task_id: str, filename: str, params: Dict) -> None:
+        """登记新任务（等待中）"""
+        self._execute(
+            "INSERT INTO jobs (task_id, filename, status, params, created_at) VALUES (?, ?, ?, ?, ?)",
+            (task_id, filename, STATUS_PENDING, json.dumps(params, ensure_ascii=False), _now())
+        )
+
+    def get_job(self, task_id: str) -> Optional[Dict]:
+        """按任务ID查询"""
+        row = self._execute("SELECT * FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, page: int = 1, page_size: int = 50, status: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """
+        分页查询任务（按创建时间倒序）
+
+        Returns:
+            Tuple[List[Dict], int]: (当前页任务, 总数)
+        """
+        page = max(1, page)
+        page_size = max(1, min(page_size, 500))
+        where, args = ("WHERE status = ?", (status,)) if status else ("", ())
+        total = self._execute(f"SELECT COUNT(*) FROM jobs {where}", args).fetchone()[0]
+        rows = self._execute(
+            f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            args + (page_size, (page - 1) * page_size)
+        ).fetchall()
+        return [self._row_to_job(row) for row in rows], total
+
+    def claim_next(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                   max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Optional[Dict]:
+        """
+        领取下一个任务：等待中的任务，或租约已过期的处理中任务
+
+        Args:
+            owner: 租约持有者标识
+            lease_seconds: 租约时长（秒）
+            max_attempts: 最多领取次数，超过的任务直接标记失败
+
+        Returns:
+            Optional[Dict]: 领取到的任务，没有可领取的任务时返回None
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                        "ORDER BY created_at LIMIT 1",
+                        (STATUS_PENDING, STATUS_PROCESSING, now)
+                    ).fetchone()
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+                    if row['attempts'] >= max_attempts:
+                        self._conn.execute(
+                            "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, "
+                            "finished_at = ? WHERE task_id = ?",
+                            (STATUS_FAILED, f"任务已重试 {row['attempts']} 次仍未完成", _now(), row['task_id'])
+                        )
+                        continue
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                        "started_at = COALESCE(started_at, ?) WHERE task_id = ?",
+                        (STATUS_PROCESSING, owner, now + lease_seconds, _now(), row['task_id'])
+                    )
+                    job = self._row_to_job(self._conn.execute(
+                        "SELECT * FROM jobs WHERE task_id = ?", (row['task_id'],)).fetchone())
+                    self._conn.execute("COMMIT")
+                    return job
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def renew_lease(self, task_id: str, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """续租，租约已被他人接管时返回False"""
+        cursor = self._execute(
+            "UPDATE jobs SET lease_expires = ? WHERE task_id = ? AND lease_owner = ? AND status = ?",
+            (time.time() + lease_seconds, task_id, owner, STATUS_PROCESSING)
+        )
+        return cursor.rowcount > 0
+
+    def release_lease(self, task_id: str, owner: str) -> None:
+        """释放租约，任务回到等待状态（服务正常关闭时使用）"""
+        self._execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, attempts = MAX(attempts - 1, 0) "
+            "WHERE task_id = ? AND lease_owner = ? AND status = ?",
+            (STATUS_PENDING, task_id, owner, STATUS_PROCESSING)
+        )
+
+    def update_progress(self, task_id: str, progress: float, message: str = "") -> None:
+        """更新任务进度"""
+        self._execute("UPDATE jobs SET progress = ?, message = ? WHERE task_id = ?", (progress, message, task_id))
+
+    @staticmethod
+    def _owner_clause(owner: Optional[str]) -> Tuple[str, Tuple]:
+        """租约持有者条件：指定 owner 时只更新该持有者仍在处理的任务"""
+        if owner is None:
+            return "", ()
+        return " AND lease_owner = ? AND status = ?", (owner, STATUS_PROCESSING)
+
+    def complete_job(self, task_id: str, output_file: str, incremental_summary: Optional[Dict] = None,
+                     artifacts: Optional[Dict[str, str]] = None, owner: Optional[str] = None) -> bool:
+        """
+        标记任务完成
+
+        Args:
+            task_id: 任务ID
+            output_file: 译文路径
+            incremental_summary: 增量翻译统计
+            artifacts: 任务附带的诊断文件 {类型: 路径}（追踪、剖析文件等）
+            owner: 租约持有者，指定时只有仍持有租约才能完成任务
+
+        Returns:
+            bool: 是否已更新；租约已过期并被其他调度器接管时返回False，调用方应丢弃本次结果
+        """
+        clause, clause_args = self._owner_clause(owner)
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, progress = 1.0, output_file = ?, incremental_summary = ?, artifacts = ?, "
+            "lease_owner = NULL, lease_expires = NULL, finished_at = ? WHERE task_id = ?" + clause,
+            (STATUS_COMPLETED, output_file,
+             json.dumps(incremental_summary, ensure_ascii=False) if incremental_summary else None,
+             json.dumps(artifacts, ensure_ascii=False) if artifacts else None,
+             _now(), task_id) + clause_args
+        )
+        return cursor.rowcount > 0
+
+    def fail_job(self, task_id: str, error: str, owner: Optional[str] = None) -> bool:
+        """标记任务失败；指定 owner 时只有仍持有租约才能更新，返回是否已更新"""
+        clause, clause_args = self._owner_clause(owner)
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, finished_at = ? "
+            "WHERE task_id = ?" + clause,
+            (STATUS_FAILED, error, _now(), task_id) + clause_args
+        )
+        return cursor.rowcount > 0
+
+    def recover_unfinished(self) -> int:
+        """启动时恢复租约已过期的处理中任务，返回恢复数量"""
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL "
+            "WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?)",
+            (STATUS_PENDING, STATUS_PROCESSING, time.time())
+        )
+        return cursor.rowcount
+
+    def count_by_status(self) -> Dict[str, int]:
+        """各状态任务数"""
+        rows = self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {row[0]: row[1] for row in rows}
+
+
+class JobDispatcher:
+    """
+    任务调度器
+
+    在事件循环中运行固定数量的领取协程，每个协程循环领取任务、交给处理函数执行并续租。
+    新任务提交后调用 notify() 立即唤醒；空闲时定期检查，接管其他进程遗留的过期任务
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[Dict], Awaitable[None]], concurrency: int = 2,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Args:
+            store: 任务存储
+            handler: 任务处理协程函数 handler(job)，负责把任务标记为完成或失败
+                （以 job['lease_owner'] 作为持有者，租约已被接管时放弃结果）
+            concurrency: 同时执行的任务数
+            lease_seconds: 租约时长（秒）
+            poll_interval: 空闲检查间隔（秒）
+        """
+        self.store = store
+        self.handler = handler
+        self.concurrency = max(1, int(concurrency))
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def start(self) -> None:
+        """在当前事件循环中启动调度（需在事件循环内调用）"""
+        if self._workers:
+            return
+        recovered = self.store.recover_unfinished()
+        if recovered:
+            logger.info(f"恢复未完成的翻译任务 {recovered} 个")
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._worker_loop()) for _ in range(self.concurrency)]
+        self._wakeup.set()
+        logger.info(f"任务调度器已启动: 并发数={self.concurrency}, 持有者={self.owner}")
+
+    def notify(self) -> None:
+        """有新任务提交时唤醒调度器"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """停止调度，释放正在执行任务的租约，使其在下次启动时恢复"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for task_id in list(self._running):
+            self.store.release_lease(task_id, self.owner)
+            logger.info(f"任务 {task_id} 尚未完成，已释放租约，将在下次启动时恢复")
+        self._running.clear()
+
+    async def _worker_loop(self) -> None:
+        while True:
+            job = await asyncio.get_running_loop().run_in_executor(
+                None, self.store.claim_next, self.owner, self.lease_seconds)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # 领到任务后唤醒其他协程，继续领取排队中的任务
+            self._wakeup.set()
+            await self._run_job(job)
+
+    async def _run_job(self, job: Dict) -> None:
+        task_id = job['task_id']
+        logger.info(f"领取翻译任务: {task_id} ({job['filename']})，第 {job['attempts']} 次执行")
+        renewer = asyncio.ensure_future(self._renew_loop(task_id))
+        self._running[task_id] = renewer
+        try:
+            await self.handler(job)
+        except asyncio.CancelledError:
+            # 服务关闭：任务保留在 _running 中，由 stop() 释放租约
+            renewer.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"执行翻译任务失败: {task_id}, 错误: {str(e)}")
+            self.store.fail_job(task_id, str(e), owner=self.owner)
+        else:
+            # 处理函数没有给出最终状态时按失败处理，避免任务一直占用租约
+            self.store.fail_job(task_id, "任务未正常结束", owner=self.owner)
+        renewer.cancel()
+        self._running.pop(task_id, None)
+
+    async def _renew_loop(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self.store.renew_lease(task_id, self.owner, self.lease_seconds):
+                logger.warning(f"任务 {task_id} 的租约已失效")
+                return
+
+
+# 全局任务存储实例
+_job_store = None
+
+
+def get_job_store() -> JobStore:
+    """获取全局任务存储实例"""
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
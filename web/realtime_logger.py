@@ -2,197 +2,175 @@
 # -*- coding: utf-8 -*-
 """
 Web端实时日志监控模块
+日志记录由挂在根日志记录器上的处理器直接写入内存环形缓冲区，
+每条记录带有单调递增的序号，客户端按序号游标增量拉取，不再轮询 realtime.log
 """
 
-import os
-import json
-import time
 import threading
+import traceback
+from collections import deque
 from datetime import datetime
+from itertools import islice
 import logging
+from typing import Dict, List
+
+# 环形缓冲区容量
+DEFAULT_BUFFER_SIZE = 1000
+
+
+class RealtimeLogHandler(logging.Handler):
+    """把日志记录送入实时日志监控器的处理器"""
+
+    def __init__(self, monitor: "RealtimeLogMonitor", level: int = logging.INFO):
+        super().__init__(level)
+        self.monitor = monitor
+
+    def emit(self, record):
+        try:
+            self.monitor.add_record(record)
+        except Exception:
+            self.handleError(record)
+
 
 class RealtimeLogMonitor:
-    """实时日志监控器"""
+    """实时日志监控器（内存环形缓冲区）"""
 
-    def __init__(self):
-        self.realtime_log_file = 'realtime.log'
-        self.last_position = 0
-        self.log_buffer = []
-        self.max_buffer_size = 1000
+    def __init__(self, max_buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.max_buffer_size = max_buffer_size
+        self.log_buffer = deque(maxlen=max_buffer_size)
         self.lock = threading.Lock()
         self.monitoring = False
-        self.monitor_thread = None
+        self.handler = RealtimeLogHandler(self)
+
+        # 最近一条记录的序号，0表示还没有记录
+        self.last_seq = 0
+
+        # 增量维护的异常统计（只统计缓冲区内的记录）
+        self.error_count = 0
+        self.warning_count = 0
+        self.last_error_time = None
 
     def start_monitoring(self):
-        """开始监控日志文件"""
+        """开始接收日志记录"""
         if not self.monitoring:
             self.monitoring = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
+            root_logger = logging.getLogger()
+            if self.handler not in root_logger.handlers:
+                root_logger.addHandler(self.handler)
             logging.info("实时日志监控已启动")
 
     def stop_monitoring(self):
-        """停止监控日志文件"""
-        self.monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=1)
-        logging.info("实时日志监控已停止")
-
-    def _monitor_loop(self):
-        """监控循环"""
-        while self.monitoring:
-            try:
-                self._read_new_logs()
-                time.sleep(0.5)  # 每0.5秒检查一次
-            except Exception as e:
-                logging.error(f"日志监控出错: {e}")
-                time.sleep(1)
-
-    def _read_new_logs(self):
-        """读取新的日志内容"""
-        try:
-            if not os.path.exists(self.realtime_log_file):
-                return
-
-            with open(self.realtime_log_file, 'r', encoding='utf-8') as f:
-                # 移动到上次读取的位置
-                f.seek(self.last_position)
-                new_content = f.read()
-
-                if new_content:
-                    # 更新位置
-                    self.last_position = f.tell()
-
-                    # 处理新内容
-                    lines = new_content.strip().split('\n')
-                    for line in lines:
-                        if line.strip():
-                            self._add_log_entry(line)
-
-        except Exception as e:
-            logging.error(f"读取实时日志失败: {e}")
-
-    def _add_log_entry(self, line):
-        """添加日志条目"""
-        try:
-            # 解析日志行
-            log_entry = self._parse_log_line(line)
+        """停止接收日志记录"""
+        if self.monitoring:
+            logging.info("实时日志监控已停止")
+            self.monitoring = False
+            logging.getLogger().removeHandler(self.handler)
+
+    def add_record(self, record: logging.LogRecord) -> None:
+        """把日志记录转换为日志条目并加入缓冲区"""
+        message = record.getMessage()
+        if record.exc_info:
+            message += "\n异常堆栈:\n" + "".join(traceback.format_exception(*record.exc_info))
+
+        timestamp = datetime.fromtimestamp(record.created).isoformat()
+        location = f"{record.module}:{record.funcName}:{record.lineno}"
+        self._add_log_entry({
+            'timestamp': timestamp,
+            'level': record.levelname,
+            'location': location,
+            'message': message,
+            'raw': f"[{timestamp}] {record.levelname:8} {location} - {message}"
+        })
+
+    def _add_log_entry(self, log_entry: Dict) -> None:
+        """添加日志条目，分配序号并更新异常统计"""
+        with self.lock:
+            self.last_seq += 1
+            log_entry['seq'] = self.last_seq
+
+            # 缓冲区已满时最旧的条目会被挤出，先把它从统计中扣除
+            if len(self.log_buffer) == self.max_buffer_size:
+                self._count_entry(self.log_buffer[0], -1)
+            self.log_buffer.append(log_entry)
+            self._count_entry(log_entry, 1)
+
+    def _count_entry(self, log_entry: Dict, delta: int) -> None:
+        level = log_entry['level']
+        if level == 'ERROR':
+            self.error_count += delta
+            if delta > 0:
+                self.last_error_time = log_entry['timestamp']
+        elif level == 'WARNING':
+            self.warning_count += delta
+
+    def _tail(self, count: int) -> List[Dict]:
+        """从缓冲区尾部取出最近count条（按时间顺序），只遍历这count条"""
+        if count <= 0:
+            return []
+        tail = list(islice(reversed(self.log_buffer), count))
+        tail.reverse()
+        return tail
 
-            with self.lock:
-                self.log_buffer.append(log_entry)
+    def get_recent_logs(self, count=100):
+        """获取最近的日志"""
+        with self.lock:
+            return self._tail(count) if count > 0 else list(self.log_buffer)
 
-                # 保持缓冲区大小
-                if len(self.log_buffer) > self.max_buffer_size:
-                    self.log_buffer.pop(0)
+    def get_logs_after(self, cursor: int) -> List[Dict]:
+        """
+        获取序号大于cursor的日志
 
-        except Exception as e:
-            logging.error(f"添加日志条目失败: {e}")
-
-    def _parse_log_line(self, line):
-        """解析日志行"""
-        try:
-            # 尝试解析标准格式: [timestamp] LEVEL module:func:line - message
-            if line.startswith('[') and ']' in line:
-                parts = line.split(']', 1)
-                if len(parts) == 2:
-                    timestamp_str = parts[0][1:]  # 移除开头的 [
-                    rest = parts[1].strip()
-
-                    # 解析级别和消息
-                    if ' ' in rest:
-                        level_and_location = rest.split(' - ', 1)
-                        if len(level_and_location) == 2:
-                            level_part = level_and_location[0].strip()
-                            message = level_and_location[1]
-
-                            # 解析级别和位置
-                            level_parts = level_part.split(' ')
-                            if len(level_parts) >= 2:
-                                level = level_parts[0]
-                                location = ' '.join(level_parts[1:])
-                            else:
-                                level = level_part
-                                location = ''
-
-                            return {
-                                'timestamp': timestamp_str,
-                                'level': level,
-                                'location': location,
-                                'message': message,
-                                'raw': line
-                            }
-
-            # 如果解析失败，返回原始行
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'level': 'INFO',
-                'location': '',
-                'message': line,
-                'raw': line
-            }
+        序号连续递增，新日志条数可以直接由序号差算出，复杂度与返回条数成正比
 
-        except Exception:
-            # 解析失败时返回基本信息
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'level': 'INFO',
-                'location': '',
-                'message': line,
-                'raw': line
-            }
+        Args:
+            cursor: 客户端已收到的最后一条日志序号
 
-    def get_recent_logs(self, count=100):
-        """获取最近的日志"""
+        Returns:
+            List[Dict]: 新日志；cursor之后的日志已被挤出缓冲区时，返回缓冲区内的全部日志；
+            cursor大于当前序号（服务重启后序号重新开始）时视为重置，同样返回缓冲区内的全部日志
+        """
         with self.lock:
-            return self.log_buffer[-count:] if count > 0 else self.log_buffer[:]
+            if cursor > self.last_seq:
+                return list(self.log_buffer)
+            return self._tail(min(self.last_seq - cursor, len(self.log_buffer)))
 
     def get_logs_since(self, since_timestamp):
-        """获取指定时间戳之后的日志"""
+        """获取指定时间戳之后的日志（兼容旧客户端，从尾部向前扫描到该时间为止）"""
         try:
             since_time = datetime.fromisoformat(since_timestamp)
-            with self.lock:
-                filtered_logs = []
-                for log in self.log_buffer:
-                    try:
-                        log_time = datetime.fromisoformat(log['timestamp'])
-                        if log_time > since_time:
-                            filtered_logs.append(log)
-                    except Exception:
-                        # 如果时间戳解析失败，包含这条日志
-                        filtered_logs.append(log)
-                return filtered_logs
         except Exception as e:
             logging.error(f"获取指定时间后的日志失败: {e}")
             return self.get_recent_logs(50)
 
+        with self.lock:
+            count = 0
+            for log in reversed(self.log_buffer):
+                if datetime.fromisoformat(log['timestamp']) <= since_time:
+                    break
+                count += 1
+            return self._tail(count)
+
     def get_exception_stats(self):
         """获取异常统计"""
         with self.lock:
-            error_count = sum(1 for log in self.log_buffer if log['level'] == 'ERROR')
-            warning_count = sum(1 for log in self.log_buffer if log['level'] == 'WARNING')
-
-            # 查找最近的错误
-            recent_errors = [log for log in self.log_buffer if log['level'] == 'ERROR']
-            last_error_time = None
-            if recent_errors:
-                try:
-                    last_error_time = recent_errors[-1]['timestamp']
-                except Exception:
-                    pass
-
             return {
-                'error_count': error_count,
-                'warning_count': warning_count,
-                'last_error_time': last_error_time,
-                'total_logs': len(self.log_buffer)
+                'error_count': self.error_count,
+                'warning_count': self.warning_count,
+                'last_error_time': self.last_error_time,
+                'total_logs': len(self.log_buffer),
+                'last_seq': self.last_seq
             }
 
     def clear_logs(self):
-        """清空日志缓冲区"""
+        """清空日志缓冲区（序号继续递增，客户端游标保持有效）"""
         with self.lock:
             self.log_buffer.clear()
+            self.error_count = 0
+            self.warning_count = 0
+            self.last_error_time = None
         logging.info("日志缓冲区已清空")
 
+
 # 全局实例
 realtime_monitor = RealtimeLogMonitor()
 
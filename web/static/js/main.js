@@ -170,6 +170,15 @@ async function checkTranslatorStatus() {
                 status = '可用';
                 iconClass = 'bi bi-circle-fill text-success';
                 availableCount++;
+                // 健康监测的加权平均耗时
+                const health = data.health && data.health[type];
+                if (health && health.latency_ms !== null && health.latency_ms !== undefined) {
+                    status += ` (${Math.round(health.latency_ms)}ms)`;
+                }
+                if (health && health.state === 'degraded') {
+                    status += ' 不稳定';
+                    iconClass = 'bi bi-circle-fill text-warning';
+                }
             } else {
                 status = '不可用';
                 iconClass = 'bi bi-circle-fill text-danger';
@@ -296,7 +305,7 @@ let reconnectDelay = 5000; // 增加初始重连延迟到5秒
 let maxLogEntries = 1000; // 最大日志条目数
 let logLevels = ['debug', 'info', 'warning', 'error']; // 日志级别
 let currentLogLevel = 'info'; // 当前日志级别
-let lastLogTimestamp = null; // 最后一条日志的时间戳
+let lastLogCursor = null; // 最后一条日志的序号游标
 let logPollingInterval = null; // 日志轮询定时器
 let exceptionCount = 0; // 异常计数
 let lastExceptionTime = null; // 最后一次异常时间
@@ -367,7 +376,8 @@ function initWebSocket() {
             heartbeatInterval = null;
         }
 
-        if (event.wasClean) {
+        // 1013：服务器因发送超时主动断开，按意外断开处理并重新连接（未送达的状态消息会在重连后补发）
+        if (event.wasClean && event.code !== 1013) {
             console.log(`WebSocket连接已关闭，代码=${event.code} 原因=${event.reason}`);
             addSystemLog(`WebSocket连接已关闭: ${event.reason}`, 'warning');
             isReconnecting = false;
@@ -435,9 +445,21 @@ function startHeartbeat() {
 
 // 处理WebSocket消息
 function handleWebSocketMessage(message) {
-    console.log('收到WebSocket消息:', message);
+    if (message.type !== 'batch') {
+        console.log('收到WebSocket消息:', message);
+    }
 
     switch (message.type) {
+        case 'batch':
+            // 服务端合并发送的多条消息
+            message.data.forEach(item => handleWebSocketMessage(item));
+            break;
+
+        case 'log_dropped':
+            // 客户端接收过慢，服务端丢弃了部分日志
+            addSystemLog(`日志推送过快，已丢弃 ${message.data.count} 条日志`, 'warning');
+            break;
+
         case 'task_created':
             // 任务创建通知
             currentTaskId = message.data.task_id;
@@ -966,18 +988,24 @@ async function submitTranslation(event) {
             currentTaskId = data.task_id;
             console.log(`翻译任务已提交，任务ID: ${currentTaskId}`);
 
-            // 更新按钮状态为处理中
-            updateTranslationButtonStatus('processing');
+            if (data.cached) {
+                // 命中翻译结果缓存，任务已直接完成
+                updateTranslationButtonStatus('completed');
+                addSystemLog(`命中翻译结果缓存，任务已完成: ${currentTaskId}`, 'success');
+            } else {
+                // 更新按钮状态为处理中
+                updateTranslationButtonStatus('processing');
 
-            // 设置备用定时器，如果30秒后仍未收到完成或失败消息，则恢复按钮状态
-            setTimeout(() => {
-                const button = document.getElementById('start-translation-btn');
-                if (button && button.disabled) {
-                    console.log('备用定时器触发：30秒未收到任务完成消息，恢复按钮状态');
-                    addSystemLog('翻译任务超时，恢复按钮状态。如果翻译仍在进行，请查看任务列表。', 'warning');
-                    updateTranslationButtonStatus('idle');
-                }
-            }, 30000); // 30秒超时
+                // 设置备用定时器，如果30秒后仍未收到完成或失败消息，则恢复按钮状态
+                setTimeout(() => {
+                    const button = document.getElementById('start-translation-btn');
+                    if (button && button.disabled) {
+                        console.log('备用定时器触发：30秒未收到任务完成消息，恢复按钮状态');
+                        addSystemLog('翻译任务超时，恢复按钮状态。如果翻译仍在进行，请查看任务列表。', 'warning');
+                        updateTranslationButtonStatus('idle');
+                    }
+                }, 30000); // 30秒超时
+            }
 
             // 重置表单
             document.getElementById('translation-form').reset();
@@ -1020,8 +1048,9 @@ async function loadTasks() {
     `;
 
     try {
-        const response = await fetch('/api/tasks');
-        const tasks = await response.json();
+        const response = await fetch('/api/tasks?page=1&page_size=50');
+        const data = await response.json();
+        const tasks = data.tasks || [];
 
         if (tasks.length === 0) {
             tableBody.innerHTML = `
@@ -2552,9 +2581,9 @@ async function fetchRealtimeLogs() {
     try {
         let url = '/api/logs/realtime?count=50';
 
-        // 如果有最后一条日志的时间戳，只获取之后的日志
-        if (lastLogTimestamp) {
-            url = `/api/logs/since?since=${encodeURIComponent(lastLogTimestamp)}`;
+        // 如果有最后一条日志的序号，只获取之后的日志
+        if (lastLogCursor !== null) {
+            url = `/api/logs/since?cursor=${lastLogCursor}`;
         }
 
         const response = await fetch(url);
@@ -2567,10 +2596,12 @@ async function fetchRealtimeLogs() {
             // 处理新日志
             data.logs.forEach(log => {
                 processRealtimeLog(log);
-                // 更新最后一条日志的时间戳
-                lastLogTimestamp = log.timestamp;
             });
         }
+        // 更新序号游标
+        if (data.success && data.cursor !== undefined) {
+            lastLogCursor = data.cursor;
+        }
     } catch (error) {
         console.error('获取实时日志失败:', error);
         // 不在系统日志中显示这个错误，避免日志循环
@@ -2692,7 +2723,7 @@ async function clearRealtimeLogs() {
             if (data.success) {
                 addSystemLog('实时日志缓冲区已清空', 'info');
                 // 重置本地状态
-                lastLogTimestamp = null;
+                lastLogCursor = null;
                 exceptionCount = 0;
                 lastExceptionTime = null;
             }
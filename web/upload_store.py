@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传文件存储和翻译结果缓存
+上传文件分块写入磁盘并同时计算内容哈希，按内容寻址存放，同名不同内容的文件互不覆盖；
+翻译结果按（文件哈希、引擎、模型、语言、输出格式、术语库版本等）缓存，
+同一份受控文档被重复提交时直接返回缓存的译文
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# 结果缓存默认存放位置
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DB = os.path.join(_ROOT_DIR, "data", "result_cache.db")
+DEFAULT_CACHE_DIR = os.path.join(_ROOT_DIR, "data", "result_cache")
+
+
+def save_upload_stream(source, upload_dir: str, filename: str) -> Tuple[str, str, int]:
+    """
+    把上传文件流分块写入上传目录，边写边计算SHA-256
+
+    文件按内容哈希存放在 upload_dir/<哈希前16位>/<原文件名>，保留原文件名是因为
+    文档处理器按输入文件名生成输出文件名
+
+    Args:
+        source: 可读取的二进制文件对象（如 UploadFile.file）
+        upload_dir: 上传根目录
+        filename: 原始文件名
+
+    Returns:
+        Tuple[str, str, int]: (存放路径, 内容哈希, 文件大小)
+    """
+    filename = os.path.basename(filename)
+    os.makedirs(upload_dir, exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+
+        content_hash = sha256.hexdigest()
+        target_dir = os.path.join(upload_dir, content_hash[:16])
+        target_path = os.path.join(target_dir, filename)
+        if os.path.exists(target_path):
+            # 相同内容、相同文件名已经存在，丢弃本次写入
+            os.remove(tmp_path)
+        else:
+            os.makedirs(target_dir, exist_ok=True)
+            os.replace(tmp_path, target_path)
+        return target_path, content_hash, size
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_glossary_lock = threading.Lock()
+_glossary_version: Dict[str, Tuple] = {}
+
+
+def get_glossary_version(terminology_path: str) -> str:
+    """术语库版本（文件内容哈希），按修改时间和大小缓存，术语库未变化时不重复计算"""
+    try:
+        stat = os.stat(terminology_path)
+    except OSError:
+        return "none"
+    signature = (stat.st_mtime, stat.st_size)
+    with _glossary_lock:
+        cached = _glossary_version.get(terminology_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+    sha1 = hashlib.sha1()
+    with open(terminology_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha1.update(chunk)
+    version = sha1.hexdigest()[:16]
+    with _glossary_lock:
+        _glossary_version[terminology_path] = (signature, version)
+    return version
+
+
+def compute_cache_key(file_hash: str, **options) -> str:
+    """根据文件哈希和影响译文的全部选项计算结果缓存键"""
+    payload = json.dumps({"file_hash": file_hash, **options}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """翻译结果缓存：缓存键 -> 缓存目录中的译文副本"""
+
+    def __init__(self, db_path: str = None, cache_dir: str = None):
+        self.db_path = db_path or DEFAULT_CACHE_DB
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "cache_key TEXT PRIMARY KEY, output_file TEXT NOT NULL, options TEXT, "
+            "created_at TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """查询缓存的译文路径，文件已被删除时清除该条缓存"""
+        with self._lock:
+            row = self._conn.execute("SELECT output_file FROM results WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(row[0]):
+                self._conn.execute("DELETE FROM results WHERE cache_key = ?", (cache_key,))
+                return None
+            self._conn.execute("UPDATE results SET hits = hits + 1 WHERE cache_key = ?", (cache_key,))
+            return row[0]
+
+    def put(self, cache_key: str, output_file: str, options: Optional[Dict] = None) -> Optional[str]:
+        """
+        把译文复制到缓存目录并登记
+
+        Returns:
+            Optional[str]: 缓存副本路径，复制失败时返回None
+        """
+        try:
+            target_dir = os.path.join(self.cache_dir, cache_key[:16])
+            os.makedirs(target_dir, exist_ok=True)
+            target_path = os.path.join(target_dir, os.path.basename(output_file))
+            shutil.copy2(output_file, target_path)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (cache_key, output_file, options, created_at) VALUES (?, ?, ?, ?)",
+                    (cache_key, target_path, json.dumps(options or {}, ensure_ascii=False), datetime.now().isoformat())
+                )
+            return target_path
+        except Exception as e:
+            logger.error(f"写入翻译结果缓存失败: {str(e)}")
+            return None
+
+
+# 全局结果缓存实例
+_result_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    """获取全局结果缓存实例"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译任务工作池
+文档翻译是同步的CPU/网络密集操作，放在独立的线程池或进程池中执行，
+Web事件循环只负责等待结果和推送进度，保证多个用户同时翻译时接口依然可用。
+每个任务都创建自己的文档处理器，不共享处理器上的语言、术语库等状态
+"""
+
+import os
+import time
+import asyncio
+import contextlib
+import functools
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from utils.progress_channel import create_progress_channel
+from utils.job_context import get_current_job_id, get_job_log_router, job_scope, wrap_with_context
+from utils import metrics, profiling, tracing
+from services import prompt_builder
+
+logger = logging.getLogger(__name__)
+
+# 工作模式
+WORKER_MODE_THREAD = "thread"     # 线程池：共享主进程的翻译服务，启动快
+WORKER_MODE_PROCESS = "process"   # 进程池：每个工作进程自建翻译服务，绕开GIL，彼此完全隔离
+
+DEFAULT_MAX_WORKERS = 2
+
+# 进程模式下进度队列的轮询间隔（秒）
+PROGRESS_POLL_INTERVAL = 0.2
+
+
+def build_processor(spec: Dict, translator):
+    """
+    为单个任务创建并配置文档处理器
+
+    Args:
+        spec: 任务参数（输入文件、语言、翻译选项等）
+        translator: 翻译服务实例
+
+    Returns:
+        文档处理器实例
+    """
+    from services.document_factory import DocumentProcessorFactory
+
+    processor = DocumentProcessorFactory.create_processor(spec['input_path'], translator)
+    processor.use_terminology = spec.get('use_terminology', True)
+    processor.preprocess_terms = spec.get('preprocess_terms', False)
+    processor.export_pdf = spec.get('export_pdf', False)
+    processor.output_format = spec.get('output_format', 'bilingual')
+    processor.is_cn_to_foreign = spec.get('is_cn_to_foreign', True)
+    processor.output_dir = spec.get('output_dir')
+
+    if hasattr(processor, 'incremental'):
+        processor.incremental = spec.get('incremental', False)
+        processor.previous_source_path = spec.get('previous_path')
+    elif spec.get('incremental'):
+        logger.warning("当前文档类型不支持增量翻译，将完整翻译")
+
+    return processor
+
+
+def run_document_job(spec: Dict, translator=None, progress: Optional[Callable] = None) -> Dict:
+    """
+    执行一个文档翻译任务（在工作线程或工作进程中运行）
+
+    Args:
+        spec: 任务参数
+        translator: 翻译服务实例，为None时使用当前工作进程自己的实例
+        progress: 进度回调或进度通道
+
+    Returns:
+        Dict: {'output_path': 输出文件路径, 'incremental_summary': 增量翻译统计,
+               'stage_durations': 各阶段耗时, 'trace_file': 追踪文件路径（未启用追踪时为None）,
+               'profile_files': 剖析文件路径（未启用剖析时为空）, 'prompt_report': 提示词token统计}
+    """
+    if translator is None:
+        translator = _get_process_translator(spec)
+
+    processor = build_processor(spec, translator)
+    if progress is not None:
+        processor.set_progress_callback(progress)
+
+    # 是否导出追踪文件：任务参数优先，否则按配置（config.json 中的 tracing 节）
+    trace_enabled = spec.get('trace')
+    if trace_enabled is None:
+        trace_enabled = (getattr(translator, 'config', None) or {}).get('tracing', {}).get('chrome_trace', False)
+
+    # 是否剖析：任务参数优先，否则按环境变量 TRANSLATION_PROFILE
+    profile_enabled = profiling.profile_requested(spec.get('profile'))
+
+    job_id = spec.get('job_id') or get_current_job_id()
+    engine_session = translator.job_session() if hasattr(translator, 'job_session') else contextlib.nullcontext()
+    with engine_session, prompt_builder.account_prompts() as prompt_accounting, \
+            (tracing.trace_job(job_id) if trace_enabled else contextlib.nullcontext()) as tracer, \
+            (profiling.profile_job(job_id) if profile_enabled else contextlib.nullcontext()) as profiler:
+        output_path = processor.process_document(
+            spec['input_path'],
+            spec['target_language'],
+            spec.get('terminology') or {},
+            source_lang=spec['source_lang'],
+            target_lang=spec['target_lang']
+        )
+
+    prompt_report = prompt_accounting.report()
+    if prompt_report['requests']:
+        logger.info(f"任务提示词token统计: {prompt_builder.format_prompt_report(prompt_report)}")
+
+    trace_file = None
+    if tracer is not None:
+        try:
+            trace_file = tracer.save(tracing.trace_path_for(output_path))
+            logger.info(f"任务追踪文件已保存: {trace_file}")
+        except Exception as e:
+            logger.error(f"保存任务追踪文件失败: {str(e)}")
+
+    profile_files = {}
+    if profiler is not None:
+        try:
+            profile_files = profiler.save(output_path)
+            logger.info(f"任务剖析文件已保存: {', '.join(profile_files.values())}，内存峰值 "
+                        f"{profiler.peak_bytes / 1024 / 1024:.1f} MiB")
+        except Exception as e:
+            logger.error(f"保存任务剖析文件失败: {str(e)}")
+
+    return {
+        'output_path': output_path,
+        'incremental_summary': getattr(processor, 'incremental_summary', None),
+        'stage_durations': getattr(processor, 'stage_durations', None) or {},
+        'trace_file': trace_file,
+        'profile_files': profile_files,
+        'prompt_report': prompt_report
+    }
+
+
+# 进程模式下每个工作进程各自持有的翻译服务实例
+_process_translator = None
+
+
+def _get_process_translator(spec: Dict):
+    """获取当前工作进程的翻译服务，并切换到任务指定的引擎和模型"""
+    global _process_translator
+    from services.translator import TranslationService
+
+    translator_type = spec.get('translator_type')
+    model = spec.get('model')
+    if _process_translator is None:
+        logger.info(f"工作进程初始化翻译服务: {translator_type}, 模型: {model}")
+        _process_translator = TranslationService(preferred_engine=translator_type, preferred_model=model)
+    elif translator_type and _process_translator.get_current_translator_type() != translator_type:
+        _process_translator.set_translator_type(translator_type, skip_check=True)
+
+    if model and _process_translator.get_current_model() != model:
+        _process_translator.set_model(model)
+    return _process_translator
+
+
+def _run_in_process(spec: Dict, progress_queue) -> Dict:
+    """进程池入口：进度和任务日志写入跨进程队列，由主进程转发"""
+    if progress_queue is None:
+        return run_document_job(spec)
+
+    def callback(progress: float, message: str = ""):
+        progress_queue.put(("progress", progress, message))
+
+    job_id = spec.get('job_id')
+    if not job_id:
+        return run_document_job(spec, progress=callback)
+
+    # 工作进程中的任务日志经队列回到主进程，再由主进程的任务日志路由投递
+    # （spawn方式启动的工作进程根日志级别为WARNING，需放开到INFO）
+    root_logger = logging.getLogger()
+    if root_logger.level > logging.INFO:
+        root_logger.setLevel(logging.INFO)
+    unsubscribe = get_job_log_router().subscribe(job_id, lambda line: progress_queue.put(("log", line, None)))
+    try:
+        with job_scope(job_id):
+            return run_document_job(spec, progress=callback)
+    finally:
+        unsubscribe()
+
+
+class JobWorkerPool:
+    """翻译任务工作池"""
+
+    def __init__(self, mode: str = WORKER_MODE_THREAD, max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        初始化工作池
+
+        Args:
+            mode: 工作模式，thread 或 process
+            max_workers: 同时执行的任务数
+        """
+        if mode not in (WORKER_MODE_THREAD, WORKER_MODE_PROCESS):
+            logger.warning(f"未知的工作池模式: {mode}，使用线程模式")
+            mode = WORKER_MODE_THREAD
+        self.mode = mode
+        self.max_workers = max(1, int(max_workers))
+
+        if self.mode == WORKER_MODE_PROCESS:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="translation-job")
+        self._manager = None
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+
+        logger.info(f"翻译任务工作池已创建: 模式={self.mode}, 并发数={self.max_workers}")
+
+    async def run_job(self, spec: Dict, translator=None, progress_callback: Optional[Callable] = None) -> Dict:
+        """
+        提交任务并等待完成
+
+        Args:
+            spec: 任务参数
+            translator: 主进程的翻译服务（线程模式使用；进程模式只读取其引擎和模型）
+            progress_callback: 进度回调 callback(progress, message)，可以是协程函数
+
+        Returns:
+            Dict: run_document_job 的返回值
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        started = time.perf_counter()
+        status = "failed"
+
+        try:
+            if self.mode == WORKER_MODE_PROCESS:
+                result = await self._run_process_job(loop, spec, translator, progress_callback)
+            else:
+                # 进度通道在事件循环线程中创建，工作线程发布的进度会回到事件循环上推送
+                channel = create_progress_channel(progress_callback)
+                try:
+                    # 工作线程在提交时的上下文中执行，任务ID随之传递给处理器的日志
+                    result = await loop.run_in_executor(
+                        self.executor,
+                        wrap_with_context(functools.partial(run_document_job, spec, translator, channel))
+                    )
+                finally:
+                    if channel is not None:
+                        channel.close()
+            with self._lock:
+                self.completed += 1
+            status = "completed"
+            return result
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            metrics.JOB_SECONDS.observe(time.perf_counter() - started, status=status)
+            metrics.JOBS_TOTAL.inc(status=status)
+
+    async def _run_process_job(self, loop, spec: Dict, translator, progress_callback: Optional[Callable]) -> Dict:
+        spec = dict(spec)
+        if translator is not None:
+            spec.setdefault('translator_type', translator.get_current_translator_type())
+            spec.setdefault('model', translator.get_current_model())
+        spec.setdefault('job_id', get_current_job_id())
+
+        progress_queue = self._get_manager().Queue() if progress_callback else None
+        future = loop.run_in_executor(self.executor, _run_in_process, spec, progress_queue)
+        if progress_queue is None:
+            result = await future
+        else:
+            pump = asyncio.ensure_future(self._pump_progress(progress_queue, progress_callback, future, spec.get('job_id')))
+            try:
+                result = await future
+            finally:
+                await pump
+
+        # 阶段耗时指标记录在工作进程中，主进程按返回结果补记
+        doc_type = os.path.splitext(spec['input_path'])[1].lower().lstrip('.')
+        metrics.record_stage_durations(doc_type, result.get('stage_durations') or {})
+        return result
+
+    @staticmethod
+    async def _pump_progress(progress_queue, progress_callback: Callable, future, job_id: Optional[str] = None) -> None:
+        """把工作进程发来的进度和任务日志分别转发给回调和任务日志路由，任务结束且队列取空后退出"""
+        is_async = asyncio.iscoroutinefunction(progress_callback)
+        while True:
+            done = future.done()
+            while True:
+                try:
+                    kind, progress, message = progress_queue.get_nowait()
+                except queue.Empty:
+                    break
+                except Exception as e:
+                    logger.error(f"读取任务进度失败: {str(e)}")
+                    return
+                if kind == "log":
+                    if job_id:
+                        get_job_log_router().dispatch(job_id, progress)
+                    continue
+                try:
+                    if is_async:
+                        await progress_callback(progress, message)
+                    else:
+                        progress_callback(progress, message)
+                except Exception as e:
+                    logger.error(f"更新进度失败: {str(e)}")
+            if done:
+                return
+            await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+
+    def _get_manager(self):
+        """进程模式下用于传递进度的共享队列管理器（按需启动）"""
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager
+
+    def stats(self) -> Dict:
+        """返回工作池状态"""
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'max_workers': self.max_workers,
+                'running': min(self.in_flight, self.max_workers),
+                'queued': max(0, self.in_flight - self.max_workers),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """关闭工作池"""
+        self.executor.shutdown(wait=wait)
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        logger.info("翻译任务工作池已关闭")
+
+
+# 全局工作池实例
+_worker_pool = None
+
+
+def resolve_max_workers(config: Optional[Dict] = None, translator=None) -> int:
+    """
+    确定同时执行的任务数：max_workers 为 "auto" 时使用当前引擎的并行槽位数
+    （如 Ollama 服务端的 OLLAMA_NUM_PARALLEL），使引擎的并行能力得到充分利用；槽位数未知时使用默认值
+    """
+    max_workers = (config or {}).get('max_workers', DEFAULT_MAX_WORKERS)
+    if max_workers == 'auto':
+        capacity = translator.engine_capacity() if hasattr(translator, 'engine_capacity') else None
+        max_workers = capacity or DEFAULT_MAX_WORKERS
+        logger.info(f"按翻译引擎并行能力设置任务并发数: {max_workers}")
+    return max(1, int(max_workers))
+
+
+def get_worker_pool(config: Optional[Dict] = None, translator=None) -> JobWorkerPool:
+    """
+    获取全局工作池，首次调用时按配置（config.json 中的 worker_pool 节）创建
+
+    示例:
+        {"mode": "thread", "max_workers": 2}
+        {"mode": "thread", "max_workers": "auto"}
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        config = config or {}
+        _worker_pool = JobWorkerPool(
+            mode=config.get('mode', WORKER_MODE_THREAD),
+            max_workers=resolve_max_workers(config, translator)
+        )
+    return _worker_pool
+
+
+def shutdown_worker_pool() -> None:
+    """关闭全局工作池"""
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.shutdown()
+        _worker_pool = None
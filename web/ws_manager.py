@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebSocket连接管理
+每个客户端一个有界发送队列：日志行超出上限时丢弃最旧的，任务状态等控制消息不丢弃，
+同一任务未发出的进度消息只保留最新一条；每个客户端由独立的发送协程按固定间隔把
+队列中的消息合并为一帧发送，发送带超时，慢客户端不会拖慢其他客户端和日志记录。
+发送超时时帧可能只写出了一部分，此时断开该客户端；未送达的控制消息保留下来，
+同一客户端重新连接后补发
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 0.2
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_SEND_TIMEOUT = 5.0
+UNDELIVERED_TTL = 300.0  # 断开的客户端未送达的控制消息保留时间（秒）
+
+
+class ClientChannel:
+    """单个客户端的发送队列和统计"""
+
+    def __init__(self, client_id: str, websocket: WebSocket, max_queue: int):
+        self.client_id = client_id
+        self.websocket = websocket
+        self._lock = threading.Lock()
+        self._control: deque = deque()
+        self._logs: deque = deque(maxlen=max_queue)
+        self._coalesce: Dict[str, List] = {}
+        self._dropped_unreported = 0
+        self.dropped_logs = 0
+        self.frames_sent = 0
+        self.messages_sent = 0
+        self.timeouts = 0
+        self.connected_at = time.time()
+        self.sender: Optional[asyncio.Task] = None
+
+    def put_control(self, message: str, coalesce_key: Optional[str] = None) -> None:
+        """加入控制消息；指定 coalesce_key 时替换队列中尚未发出的同键消息"""
+        with self._lock:
+            if coalesce_key is not None:
+                pending = self._coalesce.get(coalesce_key)
+                if pending is not None:
+                    pending[0] = message
+                    return
+                entry = [message]
+                self._coalesce[coalesce_key] = entry
+            else:
+                entry = [message]
+            self._control.append(entry)
+
+    def put_log(self, message: str) -> None:
+        """加入日志消息，队列已满时丢弃最旧的一条"""
+        with self._lock:
+            if len(self._logs) == self._logs.maxlen:
+                self.dropped_logs += 1
+                self._dropped_unreported += 1
+            self._logs.append(message)
+
+    def drain(self) -> Tuple[List[str], List[str]]:
+        """取出全部待发送消息，返回（控制消息，日志消息）"""
+        with self._lock:
+            control = [entry[0] for entry in self._control]
+            self._control.clear()
+            self._coalesce.clear()
+            logs = []
+            if self._dropped_unreported:
+                logs.append(json.dumps({"type": "log_dropped", "data": {"count": self._dropped_unreported}}))
+                self._dropped_unreported = 0
+            logs.extend(self._logs)
+            self._logs.clear()
+            return control, logs
+
+    def requeue_control(self, messages: List[str]) -> None:
+        """把未送达的控制消息放回队列最前面（保持原有顺序）"""
+        with self._lock:
+            self._control.extendleft([message] for message in reversed(messages))
+
+    def drop_logs(self, count: int) -> None:
+        """记录未送达而丢弃的日志行"""
+        with self._lock:
+            self.dropped_logs += count
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._control) + len(self._logs)
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "dropped_logs": self.dropped_logs,
+            "frames_sent": self.frames_sent,
+            "messages_sent": self.messages_sent,
+            "timeouts": self.timeouts,
+            "connected_seconds": round(time.time() - self.connected_at, 1)
+        }
+
+
+class ConnectionManager:
+    """WebSocket连接管理器，消息入队可在任意线程调用"""
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL, max_queue: int = DEFAULT_MAX_QUEUE,
+                 send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self._channels: Dict[str, ClientChannel] = {}
+        # 因发送超时断开的客户端未送达的控制消息：客户端ID -> (断开时间, 消息)
+        self._undelivered: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.total_dropped_logs = 0
+        self.total_disconnects_slow = 0
+
+    def configure(self, config: Optional[Dict]) -> None:
+        """按配置（config.json 中的 websocket 节）调整参数，只影响之后建立的连接的队列上限"""
+        config = config or {}
+        # 合并间隔限制在100-250ms之间：太短失去合并效果，太长进度显示迟滞
+        self.flush_interval = min(max(float(config.get('flush_interval', self.flush_interval)), 0.1), 0.25)
+        self.max_queue = max(int(config.get('max_queue', self.max_queue)), 10)
+        self.send_timeout = float(config.get('send_timeout', self.send_timeout))
+
+    @property
+    def active_connections(self) -> Dict[str, WebSocket]:
+        with self._lock:
+            return {client_id: channel.websocket for client_id, channel in self._channels.items()}
+
+    async def connect(self, websocket: WebSocket, client_id: str) -> ClientChannel:
+        await websocket.accept()
+        channel = ClientChannel(client_id, websocket, self.max_queue)
+        with self._lock:
+            previous = self._channels.get(client_id)
+            self._channels[client_id] = channel
+            undelivered = self._undelivered.pop(client_id, None)
+        if undelivered is not None:
+            channel.requeue_control(undelivered[1])
+        if previous is not None and previous.sender is not None:
+            previous.sender.cancel()
+        channel.sender = asyncio.create_task(self._sender_loop(channel))
+        return channel
+
+    def disconnect(self, client_id: str, channel: Optional[ClientChannel] = None):
+        with self._lock:
+            current = self._channels.get(client_id)
+            if current is None or (channel is not None and current is not channel):
+                return
+            del self._channels[client_id]
+            self.total_dropped_logs += current.dropped_logs
+        if current.sender is not None and current.sender is not asyncio.current_task():
+            current.sender.cancel()
+
+    def _get_channel(self, client_id: str) -> Optional[ClientChannel]:
+        with self._lock:
+            return self._channels.get(client_id)
+
+    def _all_channels(self) -> List[ClientChannel]:
+        with self._lock:
+            return list(self._channels.values())
+
+    def has_connections(self) -> bool:
+        with self._lock:
+            return bool(self._channels)
+
+    async def send_message(self, client_id: str, message: str, coalesce_key: Optional[str] = None):
+        """向指定客户端发送控制消息（入队后立即返回）"""
+        self.queue_message(client_id, message, coalesce_key)
+
+    def queue_message(self, client_id: str, message: str, coalesce_key: Optional[str] = None) -> bool:
+        channel = self._get_channel(client_id)
+        if channel is None:
+            return False
+        channel.put_control(message, coalesce_key)
+        return True
+
+    async def broadcast(self, message: str):
+        """向所有客户端发送控制消息"""
+        for channel in self._all_channels():
+            channel.put_control(message)
+
+    def publish_log(self, log_entry: str, message_type: str = "system_log", client_id: Optional[str] = None) -> bool:
+        """
+        发布日志行（线程安全，不创建任何协程）
+
+        Args:
+            log_entry: 格式化后的日志行
+            message_type: 消息类型（system_log 或 log）
+            client_id: 指定客户端，为空时发给所有客户端
+
+        Returns:
+            bool: 是否至少进入了一个客户端的队列
+        """
+        message = json.dumps({"type": message_type, "data": log_entry})
+        if client_id is not None:
+            channel = self._get_channel(client_id)
+            channels = [channel] if channel is not None else []
+        else:
+            channels = self._all_channels()
+        for channel in channels:
+            channel.put_log(message)
+        return bool(channels)
+
+    async def _sender_loop(self, channel: ClientChannel):
+        """按固定间隔合并发送队列中的消息"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                control, logs = channel.drain()
+                messages = control + logs
+                if not messages:
+                    continue
+                frame = messages[0] if len(messages) == 1 else '{"type": "batch", "data": [' + ", ".join(messages) + ']}'
+                try:
+                    await asyncio.wait_for(channel.websocket.send_text(frame), timeout=self.send_timeout)
+                except asyncio.TimeoutError:
+                    # 被取消的发送可能已写出半帧，不能再在该连接上继续发送：只丢弃日志行，
+                    # 控制消息放回队列，断开后留待客户端重新连接时补发
+                    channel.timeouts += 1
+                    channel.drop_logs(len(logs))
+                    channel.requeue_control(control)
+                    self.total_disconnects_slow += 1
+                    logger.warning(f"WebSocket客户端 {channel.client_id} 发送超时，丢弃 {len(logs)} 条日志并断开连接，"
+                                   f"{len(control)} 条控制消息待重新连接后补发")
+                    await self._close(channel)
+                    return
+                channel.frames_sent += 1
+                channel.messages_sent += len(messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 连接已断开，接收循环会负责清理
+            logger.debug(f"WebSocket客户端 {channel.client_id} 发送失败: {str(e)}")
+            self.disconnect(channel.client_id, channel)
+
+    async def _close(self, channel: ClientChannel):
+        self._keep_undelivered(channel)
+        self.disconnect(channel.client_id, channel)
+        try:
+            await asyncio.wait_for(channel.websocket.close(code=1013), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    def _keep_undelivered(self, channel: ClientChannel) -> None:
+        """保留断开的客户端尚未送达的控制消息，并清理超过保留时间的记录"""
+        control, logs = channel.drain()
+        channel.drop_logs(len(logs))
+        now = time.time()
+        with self._lock:
+            for client_id in [client_id for client_id, (closed_at, _) in self._undelivered.items()
+                              if now - closed_at > UNDELIVERED_TTL]:
+                del self._undelivered[client_id]
+            if control:
+                self._undelivered[channel.client_id] = (now, control)
+
+    def stats(self) -> Dict:
+        """连接和队列统计"""
+        channels = self._all_channels()
+        clients = {channel.client_id: channel.stats() for channel in channels}
+        return {
+            "clients": len(channels),
+            "flush_interval": self.flush_interval,
+            "max_queue": self.max_queue,
+            "queue_depth": sum(client["queue_depth"] for client in clients.values()),
+            "dropped_logs": self.total_dropped_logs + sum(client["dropped_logs"] for client in clients.values()),
+            "slow_disconnects": self.total_disconnects_slow,
+            "per_client": clients
+        }
+
+
+# 全局连接管理器实例
+manager = ConnectionManager()
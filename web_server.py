@@ -58,6 +58,59 @@ def open_browser(host, port):
     except Exception as e:
         logger.error(f"打开浏览器失败: {str(e)}")
 
+def check_translator_status(translator):
+    """检查各翻译服务状态并记录日志（在后台线程中执行，不阻塞服务器启动）"""
+    try:
+        # 检测是否为内网环境
+        is_intranet = translator._detect_intranet_environment()
+        if is_intranet:
+            logger.info("检测到内网环境，跳过外部API连接检查")
+
+        # 检查智谱AI服务
+        try:
+            zhipuai_available = translator._check_zhipuai_available(skip_network_check=is_intranet)
+            logger.info(f"智谱AI服务状态: {'可用' if zhipuai_available else '不可用'}")
+        except Exception as e:
+            logger.error(f"检查智谱AI服务状态失败: {str(e)}")
+            logger.warning("智谱AI服务检查失败，将其标记为不可用")
+            zhipuai_available = False
+
+            # 如果智谱AI不可用，确保切换到Ollama模式
+            if hasattr(translator, 'use_fallback'):
+                translator.use_fallback = True
+                logger.info("已自动切换到Ollama模式")
+
+        # 检查Ollama服务
+        try:
+            ollama_available = translator._check_ollama_available()
+            logger.info(f"Ollama服务状态: {'可用' if ollama_available else '不可用'}")
+        except Exception as e:
+            logger.error(f"检查Ollama服务状态失败: {str(e)}")
+            ollama_available = False
+
+        # 检查硅基流动服务
+        try:
+            siliconflow_available = translator.check_siliconflow_service()
+            logger.info(f"硅基流动服务状态: {'可用' if siliconflow_available else '不可用'}")
+        except Exception as e:
+            logger.error(f"检查硅基流动服务状态失败: {str(e)}")
+            siliconflow_available = False
+
+        # 内网服务不进行前置检查，仅在用户选择时检测
+        logger.info("内网翻译器已配置，将在用户选择时进行连接检测")
+
+        # 记录当前使用的模型
+        try:
+            current_model = translator.get_current_model()
+            logger.info(f"当前使用的模型: {current_model}")
+        except Exception as e:
+            logger.error(f"获取当前模型失败: {str(e)}")
+
+        logger.info("-" * 50)
+    except Exception as e:
+        logger.error(f"检查翻译服务状态失败: {str(e)}")
+        logger.error("将继续启动服务器，但部分翻译功能可能不可用")
+
 def main():
     """Web服务器入口函数"""
     global translator
@@ -97,58 +150,10 @@ def main():
         logger.error("将继续启动服务器，但翻译功能可能不可用")
         translator = None
 
-    # 检查翻译服务状态
+    # 检查翻译服务状态（网络检测可能耗时数秒，放到后台线程中，服务器立即开始监听）
     if translator:
-        try:
-            # 检测是否为内网环境
-            is_intranet = translator._detect_intranet_environment()
-            if is_intranet:
-                logger.info("检测到内网环境，跳过外部API连接检查")
-
-            # 检查智谱AI服务
-            try:
-                zhipuai_available = translator._check_zhipuai_available(skip_network_check=is_intranet)
-                logger.info(f"智谱AI服务状态: {'可用' if zhipuai_available else '不可用'}")
-            except Exception as e:
-                logger.error(f"检查智谱AI服务状态失败: {str(e)}")
-                logger.warning("智谱AI服务检查失败，将其标记为不可用")
-                zhipuai_available = False
-
-                # 如果智谱AI不可用，确保切换到Ollama模式
-                if hasattr(translator, 'use_fallback'):
-                    translator.use_fallback = True
-                    logger.info("已自动切换到Ollama模式")
-
-            # 检查Ollama服务
-            try:
-                ollama_available = translator._check_ollama_available()
-                logger.info(f"Ollama服务状态: {'可用' if ollama_available else '不可用'}")
-            except Exception as e:
-                logger.error(f"检查Ollama服务状态失败: {str(e)}")
-                ollama_available = False
-
-            # 检查硅基流动服务
-            try:
-                siliconflow_available = translator.check_siliconflow_service()
-                logger.info(f"硅基流动服务状态: {'可用' if siliconflow_available else '不可用'}")
-            except Exception as e:
-                logger.error(f"检查硅基流动服务状态失败: {str(e)}")
-                siliconflow_available = False
-
-            # 内网服务不进行前置检查，仅在用户选择时检测
-            logger.info("内网翻译器已配置，将在用户选择时进行连接检测")
-
-            # 记录当前使用的模型
-            try:
-                current_model = translator.get_current_model()
-                logger.info(f"当前使用的模型: {current_model}")
-            except Exception as e:
-                logger.error(f"获取当前模型失败: {str(e)}")
-
-            logger.info("-" * 50)
-        except Exception as e:
-            logger.error(f"检查翻译服务状态失败: {str(e)}")
-            logger.error("将继续启动服务器，但部分翻译功能可能不可用")
+        threading.Thread(target=check_translator_status, args=(translator,),
+                         name="translator-status-check", daemon=True).start()
 
     # 预加载术语库
     try: